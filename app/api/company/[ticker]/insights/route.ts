@@ -5,11 +5,12 @@ import {
   companyProfiles,
   companyScores,
   dailySnapshots,
+  latestSnapshots,
   scoreHistory,
   sectorCompanies,
   sectors,
 } from '@/drizzle/schema'
-import { asc, eq, sql } from 'drizzle-orm'
+import { asc, eq } from 'drizzle-orm'
 import { toUsd } from '@/lib/currency'
 import { resolveRange } from '@/lib/api-helpers'
 import { keyMetricForSector } from '@/lib/valuation-guide'
@@ -173,7 +174,7 @@ export async function GET(
       scoreMomentum = { deltaTotal, deltaPct, trend }
     }
 
-    // 2) 주 섹터 peer 집계 — 단일 조인 쿼리(상관 서브쿼리 MAX(date), N+1 금지)
+    // 2) 주 섹터 peer 집계 — 단일 조인 쿼리(latestSnapshots PK 조인, N+1 금지)
     let peers: InsightPeer[] = []
     let sectorContext: CompanyInsightsResponse['sectorContext'] = null
     let valuation: InsightValuation | null = null
@@ -186,22 +187,17 @@ export async function GET(
           rank: sectorCompanies.rank,
           name: companies.name,
           nameKo: companies.nameKo,
-          marketCap: dailySnapshots.marketCap,
-          peRatio: dailySnapshots.peRatio,
-          pegRatio: dailySnapshots.pegRatio,
-          priceToBook: dailySnapshots.priceToBook,
-          evToEbitda: dailySnapshots.evToEbitda,
+          marketCap: latestSnapshots.marketCap,
+          peRatio: latestSnapshots.peRatio,
+          pegRatio: latestSnapshots.pegRatio,
+          priceToBook: latestSnapshots.priceToBook,
+          evToEbitda: latestSnapshots.evToEbitda,
           smoothedScore: companyScores.smoothedScore,
           returnOnEquity: companyScores.returnOnEquity,
         })
         .from(sectorCompanies)
         .leftJoin(companies, eq(sectorCompanies.ticker, companies.ticker))
-        .leftJoin(
-          dailySnapshots,
-          sql`${sectorCompanies.ticker} = ${dailySnapshots.ticker} AND ${dailySnapshots.date} = (
-            SELECT MAX(date) FROM daily_snapshots WHERE ticker = ${sectorCompanies.ticker}
-          )`
-        )
+        .leftJoin(latestSnapshots, eq(sectorCompanies.ticker, latestSnapshots.ticker))
         .leftJoin(
           companyScores,
           eq(sectorCompanies.ticker, companyScores.ticker)
@@ -6,6 +6,7 @@ import {
   companyScores,
   companyProfiles,
   dailySnapshots,
+  latestSnapshots,
   scoreHistory,
 } from '@/drizzle/schema'
 import { matchesRegion } from '@/lib/region'
@@ -233,7 +234,7 @@ export async function getRankings({
 
     // 후보집합(industry∩region)만 좁힌다. industryTickers 는 호출부가 넘긴 필터 결과(null=전 종목),
     // region 은 메모리 마스크(matchesRegion).
-    // companyScores + 최신 dailySnapshots + companies 조인 (상관 서브쿼리로 N+1 금지)
+    // companyScores + latestSnapshots(티커당 최신 1행) + companies 조인 — PK 조인, N+1·MAX 서브쿼리 없음
     const baseRows = await db
       .select({
         ticker: companyScores.ticker,
@@ -256,12 +257,12 @@ export async function getRankings({
         beta: companyScores.beta,
         debtToEquity: companyScores.debtToEquity,
         dataQuality: companyScores.dataQuality,
-        price: dailySnapshots.price,
-        marketCap: dailySnapshots.marketCap,
-        week52High: dailySnapshots.week52High,
-        week52Low: dailySnapshots.week52Low,
-        peRatio: dailySnapshots.peRatio,
-        pegRatio: dailySnapshots.pegRatio,
+        price: latestSnapshots.price,
+        marketCap: latestSnapshots.marketCap,
+        week52High: latestSnapshots.week52High,
+        week52Low: latestSnapshots.week52Low,
+        peRatio: latestSnapshots.peRatio,
+        pegRatio: latestSnapshots.pegRatio,
         // 금융주 DCF 제외용. company_profiles 는 약 1/3 종목만 보유(sector 다수 NULL) →
         // sector 기반 제외는 일부만 작동(알려진 한계). 음수 FCF 가드가 주 방어선.
         sector: companyProfiles.sector,
@@ -271,12 +272,7 @@ export async function getRankings({
       .from(companyScores)
       .leftJoin(companies, eq(companyScores.ticker, companies.ticker))
       .leftJoin(companyProfiles, eq(companyScores.ticker, companyProfiles.ticker))
-      .leftJoin(
-        dailySnapshots,
-        sql`${companyScores.ticker} = ${dailySnapshots.ticker} AND ${dailySnapshots.date} = (
-          SELECT MAX(date) FROM daily_snapshots WHERE ticker = ${companyScores.ticker}
-        )`
-      )
+      .leftJoin(latestSnapshots, eq(companyScores.ticker, latestSnapshots.ticker))
       .where(
         industryTickers && industryTickers.length > 0
           ? inArray(companyScores.ticker, industryTickers)
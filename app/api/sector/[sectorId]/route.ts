@@ -6,9 +6,9 @@ import {
   sectorCompanies,
   companies,
   companyScores,
-  dailySnapshots,
+  latestSnapshots,
 } from '@/drizzle/schema'
-import { eq, sql } from 'drizzle-orm'
+import { eq } from 'drizzle-orm'
 import type { ApiResponse, SectorDetailResponse } from '@/types'
 import { toScoreSummary } from '@/lib/format'
 import { toUsd } from '@/lib/currency'
@@ -56,10 +56,10 @@ export async function GET(
         companyName: companies.name,
         companyNameKo: companies.nameKo,
         logoUrl: companies.logoUrl,
-        snapshotDate: dailySnapshots.date,
-        marketCap: dailySnapshots.marketCap,
-        price: dailySnapshots.price,
-        priceChange: dailySnapshots.priceChange,
+        snapshotDate: latestSnapshots.date,
+        marketCap: latestSnapshots.marketCap,
+        price: latestSnapshots.price,
+        priceChange: latestSnapshots.priceChange,
         smoothedScore: companyScores.smoothedScore,
         scaleScore: companyScores.scaleScore,
         growthScore: companyScores.growthScore,
@@ -69,12 +69,7 @@ export async function GET(
       })
       .from(sectorCompanies)
       .leftJoin(companies, eq(sectorCompanies.ticker, companies.ticker))
-      .leftJoin(
-        dailySnapshots,
-        sql`${sectorCompanies.ticker} = ${dailySnapshots.ticker} AND ${dailySnapshots.date} = (
-          SELECT MAX(date) FROM daily_snapshots WHERE ticker = ${sectorCompanies.ticker}
-        )`
-      )
+      .leftJoin(latestSnapshots, eq(sectorCompanies.ticker, latestSnapshots.ticker))
       .leftJoin(companyScores, eq(sectorCompanies.ticker, companyScores.ticker))
       .where(eq(sectorCompanies.sectorId, sectorId))
       .orderBy(sectorCompanies.rank)
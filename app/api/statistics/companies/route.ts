@@ -4,9 +4,9 @@ import {
   sectorCompanies,
   companies,
   sectors,
-  dailySnapshots,
+  latestSnapshots,
 } from '@/drizzle/schema'
-import { eq, sql } from 'drizzle-orm'
+import { eq } from 'drizzle-orm'
 import type { ApiResponse, CompanyStatisticsResponse, CompanyStatItem } from '@/types'
 import { resolveIndustryFilter } from '@/lib/api-helpers'
 import { matchesRegion } from '@/lib/region'
@@ -99,19 +99,14 @@ export async function GET(
     }
 
     // Get latest snapshots for all companies
-    const latestSnapshots = await db
+    const latestRows = await db
       .select({
-        ticker: dailySnapshots.ticker,
-        marketCap: dailySnapshots.marketCap,
-        price: dailySnapshots.price,
-        priceChange: dailySnapshots.priceChange,
+        ticker: latestSnapshots.ticker,
+        marketCap: latestSnapshots.marketCap,
+        price: latestSnapshots.price,
+        priceChange: latestSnapshots.priceChange,
       })
-      .from(dailySnapshots)
-      .where(
-        sql`${dailySnapshots.date} = (
-          SELECT MAX(date) FROM daily_snapshots WHERE ticker = ${dailySnapshots.ticker}
-        )`
-      )
+      .from(latestSnapshots)
 
     const snapshotMap = new Map<string, {
       marketCap: number | null
@@ -119,7 +114,7 @@ export async function GET(
       priceChange: number | null
     }>()
 
-    for (const snapshot of latestSnapshots) {
+    for (const snapshot of latestRows) {
       if (snapshot.ticker) {
         snapshotMap.set(snapshot.ticker, {
           marketCap: snapshot.marketCap != null ? toUsd(snapshot.marketCap, snapshot.ticker) : null,
@@ -98,7 +98,9 @@ function IndexRow({ item }: { item: MarketIndexItem }) {
       <ChangeCell value={item.changePercent} />
       <ChangeCell value={item.change1w} />
       <ChangeCell value={item.change1m} />
+      <ChangeCell value={item.changeYtd} />
       <ChangeCell value={item.change1y} />
+      <ChangeCell value={item.drawdown} />
       <td className="px-3 py-2.5">
         <div className="flex flex-col items-end gap-0.5">
           <PositionBar pos={item.week52Position} />
@@ -170,9 +172,10 @@ export function IndicesPage({ initialItems }: { initialItems?: MarketIndexItem[]
 
         {data && items.length > 0 && (
           <div className="overflow-x-auto rounded-md border border-border-subtle">
-            <table className="w-full min-w-[760px] border-collapse text-sm">
+            <table className="w-full min-w-[900px] border-collapse text-sm">
               <caption className="sr-only">
-                세계 주요 국가 대표 주가지수 — 현재 지수, 1일·1주·1달·1년 등락률, 52주 위치.
+                세계 주요 국가 대표 주가지수 — 현재 지수, 1일·1주·1달·연초 대비·1년 등락률, 고점 대비
+                낙폭, 52주 위치.
                 출처 Yahoo Finance.
               </caption>
               <thead>
@@ -183,7 +186,9 @@ export function IndicesPage({ initialItems }: { initialItems?: MarketIndexItem[]
                   <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">1일</th>
                   <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">1주</th>
                   <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">1달</th>
+                  <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">YTD</th>
                   <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">1년</th>
+                  <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">고점 대비</th>
                   <th scope="col" className="whitespace-nowrap px-3 py-2.5 text-right">52주 위치</th>
                 </tr>
               </thead>
@@ -53,14 +53,18 @@ export const sectorCompanies = sqliteTable(
   (table) => [
     unique().on(table.sectorId, table.ticker),
     index('idx_sector_companies_sector').on(table.sectorId),
+    index('idx_sector_companies_ticker').on(table.ticker),
   ]
 )
 
+// (ticker, date) 클러스터 WITHOUT ROWID — scripts/database.py 마이그레이션 9.
+// drizzle 은 WITHOUT ROWID 를 선언하지 못한다(테이블 생성은 파이썬 마이그레이션 소관).
 export const dailySnapshots = sqliteTable(
   'daily_snapshots',
   {
-    id: integer('id').primaryKey({ autoIncrement: true }),
-    ticker: text('ticker').references(() => companies.ticker),
+    ticker: text('ticker')
+      .notNull()
+      .references(() => companies.ticker),
     date: text('date').notNull(),
     marketCap: integer('market_cap'),
     price: real('price'),
@@ -79,11 +83,36 @@ export const dailySnapshots = sqliteTable(
     updatedAt: text('updated_at'),
   },
   (table) => [
-    unique().on(table.ticker, table.date),
-    index('idx_snapshots_ticker_date').on(table.ticker, table.date),
+    primaryKey({ columns: [table.ticker, table.date] }),
+    // 날짜 단면 조회(WHERE date = ?, MAX(date)) — scripts/database.py 마이그레이션 6
+    index('idx_snapshots_date').on(table.date),
   ]
 )
 
+// 티커당 최신 스냅샷 1행 — daily_snapshots 트리거가 유지하는 읽기 모델
+// (scripts/database.py 마이그레이션 8). MAX(date) 상관 서브쿼리 대신 PK 조인용.
+export const latestSnapshots = sqliteTable('latest_snapshots', {
+  ticker: text('ticker')
+    .primaryKey()
+    .references(() => companies.ticker),
+  date: text('date').notNull(),
+  marketCap: integer('market_cap'),
+  price: real('price'),
+  priceChange: real('price_change'),
+  week52High: real('week_52_high'),
+  week52Low: real('week_52_low'),
+  dayHigh: real('day_high'),
+  dayLow: real('day_low'),
+  volume: integer('volume'),
+  avgVolume: integer('avg_volume'),
+  peRatio: real('pe_ratio'),
+  pegRatio: real('peg_ratio'),
+  forwardPe: real('forward_pe'),
+  priceToBook: real('price_to_book'),
+  evToEbitda: real('ev_to_ebitda'),
+  updatedAt: text('updated_at'),
+})
+
 export const companyProfiles = sqliteTable('company_profiles', {
   ticker: text('ticker')
     .primaryKey()
@@ -255,10 +284,10 @@ export const ipoCalendar = sqliteTable(
 
 export type IpoCalendarRow = typeof ipoCalendar.$inferSelect
 
+// daily_snapshots 와 같은 (ticker, date) 클러스터 WITHOUT ROWID (마이그레이션 9).
 export const scoreHistory = sqliteTable(
   'score_history',
   {
-    id: integer('id').primaryKey({ autoIncrement: true }),
     ticker: text('ticker')
       .notNull()
       .references(() => companies.ticker),
@@ -271,8 +300,8 @@ export const scoreHistory = sqliteTable(
     sentimentScore: real('sentiment_score'),
   },
   (table) => [
-    unique().on(table.ticker, table.date),
-    index('idx_score_history_ticker').on(table.ticker),
+    primaryKey({ columns: [table.ticker, table.date] }),
+    index('idx_score_history_date').on(table.date),
   ]
 )
 
@@ -287,6 +316,7 @@ export type SectorCompany = typeof sectorCompanies.$inferSelect
 export type NewSectorCompany = typeof sectorCompanies.$inferInsert
 export type DailySnapshot = typeof dailySnapshots.$inferSelect
 export type NewDailySnapshot = typeof dailySnapshots.$inferInsert
+export type LatestSnapshot = typeof latestSnapshots.$inferSelect
 export type CompanyProfile = typeof companyProfiles.$inferSelect
 export type NewCompanyProfile = typeof companyProfiles.$inferInsert
 export type Industry = typeof industries.$inferSelect
@@ -309,6 +339,15 @@ export const marketIndices = sqliteTable('market_indices', {
   change1w: real('change_1w'),
   change1m: real('change_1m'),
   change1y: real('change_1y'),
+  // 파생 통계(마이그레이션 10) — update_indices.compute_stats 가 저장 이력으로 계산.
+  change3m: real('change_3m'),
+  changeYtd: real('change_ytd'),
+  change3y: real('change_3y'),
+  change5y: real('change_5y'),
+  /** 저장 이력(최대 5년) 고점 대비 %(≤ 0). */
+  drawdown: real('drawdown'),
+  /** 1년 실현 변동성(일간 로그수익률 표준편차 연율화, %). */
+  volatility1y: real('volatility_1y'),
   week52High: real('week_52_high'),
   week52Low: real('week_52_low'),
   asOfDate: text('as_of_date'),
@@ -16,6 +16,15 @@ export interface MarketIndexItem {
   change1m: number | null
   /** 1년 등락률(%). */
   change1y: number | null
+  /** 3달·연초 대비·3년·5년 등락률(%). */
+  change3m: number | null
+  changeYtd: number | null
+  change3y: number | null
+  change5y: number | null
+  /** 저장 이력(최대 5년) 고점 대비 낙폭(%, ≤ 0). */
+  drawdown: number | null
+  /** 1년 실현 변동성(연율화 %). */
+  volatility1y: number | null
   week52High: number | null
   week52Low: number | null
   /** 52주 밴드 내 위치 0~1 (고점 근처/저점권 판단용). */
@@ -51,6 +60,12 @@ export async function getMarketIndices(): Promise<MarketIndexItem[]> {
       change1w: r.change1w,
       change1m: r.change1m,
       change1y: r.change1y,
+      change3m: r.change3m,
+      changeYtd: r.changeYtd,
+      change3y: r.change3y,
+      change5y: r.change5y,
+      drawdown: r.drawdown,
+      volatility1y: r.volatility1y,
       week52High: r.week52High,
       week52Low: r.week52Low,
       week52Position,
@@ -3,6 +3,7 @@
 
 Usage:
     python add_ticker.py TICKER SECTOR_ID [--name-ko "한글명"] [--no-backfill]
+    python add_ticker.py --from-file mapping.csv [--workers 8] [--no-backfill]
     python add_ticker.py --list-sectors
     python add_ticker.py --remove TICKER SECTOR_ID
 
@@ -11,23 +12,30 @@ Examples:
     python add_ticker.py 005930.KS dram --name-ko "삼성전자"
     python add_ticker.py --list-sectors
     python add_ticker.py --remove IONQ quantum
+
+Batch mode (--from-file):
+    CSV rows are `ticker,sector_id,name_ko,revenue_weight` (header optional,
+    name_ko/revenue_weight may be empty). Validation and history downloads run
+    concurrently, every mapping is written in one transaction, then scores,
+    rankings and new-ticker score history are computed exactly once.
 """
 
 import argparse
+import csv
 import sqlite3
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
 # Ensure sibling modules (scoring.py) are importable regardless of CWD
 sys.path.insert(0, str(Path(__file__).parent))
 
-import pandas as pd
-import yfinance as yf
-
+from archive import attach_archive, snapshot_dates, snapshots_source
+from backfill_new_ticker_score_history import generate_new_ticker_history
+from database import DB_PATH, connect, publish
 from scoring import calculate_hegemony_scores, update_sector_rankings
-
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+from shares_history import fill_market_cap, implied_shares, record_shares
 
 # region 분류 — lib/region.ts의 getRegionFromTicker와 동일 로직
 KR_TICKER_SUFFIXES = (".KS", ".KQ")
@@ -87,6 +95,8 @@ def list_sectors(conn: sqlite3.Connection):
 
 def validate_ticker(ticker: str) -> dict | None:
     """Validate ticker exists in yfinance and return info."""
+    import yfinance as yf  # 지연 import — --list-sectors / --remove 는 SQLite 만 쓴다
+
     try:
         info = yf.Ticker(ticker).info
         if not info or "marketCap" not in info:
@@ -96,22 +106,18 @@ def validate_ticker(ticker: str) -> dict | None:
         return None
 
 
-def add_ticker(
-    conn: sqlite3.Connection,
-    ticker: str,
-    sector_id: str,
-    name_ko: str | None = None,
-    no_backfill: bool = False,
-):
-    """Add a ticker to a sector with full data pipeline."""
+def check_target(conn: sqlite3.Connection, ticker: str, sector_id: str) -> tuple | None:
+    """Pre-flight DB checks (market gate, sector exists, not mapped yet).
 
+    Returns the (id, name) sector row, or None after printing the reason.
+    """
     # 0. Market gate — reject non US/KR markets (data contamination guard, 07_market_scope)
     if not is_us_or_kr_market(ticker):
         print(
             f"Error: '{ticker}' is not a US/KR market ticker. "
             f"Allowed: US (no suffix), KR (.KS/.KQ). Rejected to prevent data contamination."
         )
-        return False
+        return None
 
     # 1. Validate sector exists
     sector = conn.execute(
@@ -119,7 +125,7 @@ def add_ticker(
     ).fetchone()
     if not sector:
         print(f"Error: Sector '{sector_id}' not found. Use --list-sectors to see options.")
-        return False
+        return None
 
     # 2. Check if already mapped
     existing = conn.execute(
@@ -128,15 +134,25 @@ def add_ticker(
     ).fetchone()
     if existing:
         print(f"Error: {ticker} is already in sector '{sector_id}'")
-        return False
+        return None
 
-    # 3. Validate ticker
-    print(f"Validating {ticker}...", end=" ")
-    info = validate_ticker(ticker)
-    if not info:
-        print("FAILED - Invalid ticker or no data available")
-        return False
-    print(f"OK ({info.get('shortName', 'Unknown')})")
+    return sector
+
+
+def save_company(
+    conn: sqlite3.Connection,
+    ticker: str,
+    sector: tuple,
+    info: dict,
+    name_ko: str | None = None,
+    revenue_weight: float = 1.0,
+) -> int:
+    """Write company, sector mapping, metrics, profile and today's snapshot.
+
+    Does not commit — the caller owns the transaction (batch mode writes every
+    row of the file in one). Returns the provisional rank in the sector.
+    """
+    sector_id = sector[0]
 
     # 4. UPSERT company
     company_name = info.get("shortName") or info.get("longName") or ticker
@@ -162,8 +178,8 @@ def add_ticker(
     new_rank = max_rank + 1
 
     conn.execute(
-        "INSERT INTO sector_companies (sector_id, ticker, rank) VALUES (?, ?, ?)",
-        (sector_id, ticker, new_rank),
+        "INSERT INTO sector_companies (sector_id, ticker, rank, revenue_weight) VALUES (?, ?, ?, ?)",
+        (sector_id, ticker, new_rank, revenue_weight),
     )
     print(f"  Sector mapping: {sector[1]} (rank #{new_rank})")
 
@@ -236,14 +252,17 @@ def add_ticker(
     )
     print("  Company profile saved")
 
+    # 7-1. 상장주식수 — 백필 시총 재구성용(shares_history). 검증 때 받은 .info 재사용.
+    today = datetime.now().date().isoformat()
+    record_shares(conn, ticker, today, implied_shares(info))
+
     # 8. Insert today's snapshot — ONLY if today's daily cohort already exists.
     # ponytail: inserting a today-row before the daily update has run makes
     # `today` the global MAX(date) with just this one ticker, so every other
     # ticker reads N/A / -100% on the frontend (current price keys off the
     # global latest date). Backfill (step 9) covers history; the next daily
     # update adds today's row for all tickers together.
-    today = datetime.now().date().isoformat()
-    cohort_max = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    cohort_max = conn.execute("SELECT MAX(date) FROM latest_snapshots").fetchone()[0]
     if cohort_max == today:
         conn.execute(
             """
@@ -281,6 +300,52 @@ def add_ticker(
             f"yet (latest={cohort_max}); backfill + next daily update cover it"
         )
 
+    return new_rank
+
+
+def print_result(conn: sqlite3.Connection, ticker: str, sector: tuple):
+    """Print the final score and rank of a freshly added mapping."""
+    score = conn.execute(
+        "SELECT smoothed_score, data_quality FROM company_scores WHERE ticker = ?",
+        (ticker,),
+    ).fetchone()
+    rank = conn.execute(
+        "SELECT rank FROM sector_companies WHERE sector_id = ? AND ticker = ?",
+        (sector[0], ticker),
+    ).fetchone()
+
+    print(f"\n  Done! {ticker} added to '{sector[1]}'")
+    # 최신 코호트일에 스냅샷이 없으면(그 시장 휴장) 점수 행이 아직 없다 — 다음 일일 수집이 채운다.
+    if score and score[0] is not None:
+        print(f"  Hegemony Score: {score[0]:.2f}/100 (DQ: {score[1] or 0:.2f})")
+    else:
+        print("  Hegemony Score: not scored yet (no snapshot on the latest cohort date)")
+    print(f"  Rank: #{rank[0]}" if rank and rank[0] is not None else "  Rank: unranked yet")
+
+
+def add_ticker(
+    conn: sqlite3.Connection,
+    ticker: str,
+    sector_id: str,
+    name_ko: str | None = None,
+    no_backfill: bool = False,
+):
+    """Add a ticker to a sector with full data pipeline."""
+    # 0-2. Market gate, sector, existing mapping
+    sector = check_target(conn, ticker, sector_id)
+    if not sector:
+        return False
+
+    # 3. Validate ticker
+    print(f"Validating {ticker}...", end=" ")
+    info = validate_ticker(ticker)
+    if not info:
+        print("FAILED - Invalid ticker or no data available")
+        return False
+    print(f"OK ({info.get('shortName', 'Unknown')})")
+
+    # 4-8. Company, mapping, metrics, profile, today's snapshot
+    save_company(conn, ticker, sector, info, name_ko)
     conn.commit()
 
     # 9. Backfill historical data
@@ -295,7 +360,7 @@ def add_ticker(
 
     # 10. Calculate scores and update rankings
     latest_date = conn.execute(
-        "SELECT MAX(date) FROM daily_snapshots"
+        "SELECT MAX(date) FROM latest_snapshots"
     ).fetchone()[0]
 
     calculate_hegemony_scores(conn, latest_date)
@@ -304,55 +369,68 @@ def add_ticker(
     update_sector_rankings(conn)
     conn.commit()
 
-    # Print final result
-    score = conn.execute(
-        "SELECT smoothed_score, data_quality FROM company_scores WHERE ticker = ?",
-        (ticker,),
-    ).fetchone()
-    rank = conn.execute(
-        "SELECT rank FROM sector_companies WHERE sector_id = ? AND ticker = ?",
-        (sector_id, ticker),
-    ).fetchone()
-
-    print(f"\n  Done! {ticker} added to '{sector[1]}'")
-    print(f"  Hegemony Score: {score[0]:.2f}/100 (DQ: {score[1]:.2f})")
-    print(f"  Rank: #{rank[0]}")
-
+    print_result(conn, ticker, sector)
     return True
 
 
-def backfill_ticker(conn: sqlite3.Connection, ticker: str) -> int:
-    """Backfill historical snapshots for a ticker using existing date range."""
-    existing_dates = conn.execute(
-        "SELECT DISTINCT date FROM daily_snapshots ORDER BY date"
-    ).fetchall()
+def backfill_window(conn: sqlite3.Connection) -> tuple[set[str], str, str] | None:
+    """(valid_dates, start_date, end_date_exclusive) of the existing snapshot range (hot + archive)."""
+    existing_dates = snapshot_dates(conn)
     if not existing_dates:
-        return 0
+        return None
 
-    valid_dates = {row[0] for row in existing_dates}
-    start_date = existing_dates[0][0]
-    end_date = existing_dates[-1][0]
+    valid_dates = set(existing_dates)
+    start_date = existing_dates[0]
+    end_date = existing_dates[-1]
 
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
     end_date_exclusive = (end_dt + timedelta(days=1)).strftime("%Y-%m-%d")
+    return valid_dates, start_date, end_date_exclusive
 
-    try:
-        hist = yf.download(
-            ticker, start=start_date, end=end_date_exclusive,
-            progress=False, auto_adjust=True,
-        )
-        if hist.empty:
-            return 0
 
-        if isinstance(hist.columns, pd.MultiIndex):
-            hist.columns = hist.columns.get_level_values(0)
+def drop_stale_price_cache(conn: sqlite3.Connection, tickers: list[str]) -> None:
+    """분할(snapshot_anomalies 'split') 이전에 받은 가격 캐시를 버린다 — backfill_data 와 같다.
 
-        shares = None
-        try:
-            shares = yf.Ticker(ticker).info.get("sharesOutstanding")
-        except Exception:
-            pass
+    캐시는 구간마다 받은 날 기준으로 보정돼 있어, 분할을 사이에 두고 받은 구간이 섞이면
+    adjusted=True 이력이 분할일에서 튄다. 다운로드(워커 스레드) 전에 메인 스레드에서 부른다.
+    """
+    from price_cache import invalidate_since  # 지연 import(numpy/pandas/yfinance)
+    from scan_anomalies import split_events
+
+    stale = invalidate_since(tickers, split_events(conn))
+    if stale:
+        print(f"  Price cache invalidated after split: {stale}")
+
+
+def download_backfill(ticker: str, start_date: str, end_date_exclusive: str):
+    """Network half of the backfill (safe to run in a worker thread)."""
+    from price_cache import load_history  # 지연 import(numpy/pandas/yfinance)
 
+    try:
+        return load_history(ticker, start_date, end_date_exclusive, adjusted=True)
+    except Exception as e:
+        print(f"  Backfill download error ({ticker}): {e}")
+        return None
+
+
+def write_backfill(
+    conn: sqlite3.Connection,
+    ticker: str,
+    hist,
+    valid_dates: set[str],
+    start_date: str,
+    end_date_exclusive: str,
+) -> int:
+    """DB half of the backfill: insert missing rows on existing business dates.
+
+    티커마다 SAVEPOINT — 중간에 실패하면 이 티커의 행만 되돌린다(배치 트랜잭션의
+    다른 매핑·백필은 그대로, 반쯤 들어간 이력은 남기지 않는다).
+    """
+    if hist is None or hist.empty:
+        return 0
+    snapshots = snapshots_source(conn)
+    conn.execute("SAVEPOINT backfill")
+    try:
         rows_inserted = 0
         prev_close = None
 
@@ -362,9 +440,9 @@ def backfill_ticker(conn: sqlite3.Connection, ticker: str) -> int:
                 prev_close = float(hist.loc[date_idx, "Close"])
                 continue
 
-            # Skip if already exists
+            # Skip if already exists (hot 또는 archive)
             existing = conn.execute(
-                "SELECT id FROM daily_snapshots WHERE ticker = ? AND date = ?",
+                f"SELECT 1 FROM {snapshots} WHERE ticker = ? AND date = ?",
                 (ticker, date_str),
             ).fetchone()
             if existing:
@@ -380,8 +458,6 @@ def backfill_ticker(conn: sqlite3.Connection, ticker: str) -> int:
             if prev_close is not None and prev_close != 0:
                 price_change = ((close - prev_close) / prev_close) * 100
 
-            market_cap = int(shares * close) if shares else None
-
             date_pos = hist.index.get_loc(date_idx)
             window_start = max(0, date_pos - 19)
             avg_vol_series = hist.iloc[window_start : date_pos + 1]["Volume"]
@@ -395,19 +471,174 @@ def backfill_ticker(conn: sqlite3.Connection, ticker: str) -> int:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
             """,
                 (
-                    ticker, date_str, market_cap, close, price_change,
+                    ticker, date_str, None, close, price_change,
                     None, None, high, low, volume, avg_volume, None, None,
                 ),
             )
             rows_inserted += 1
             prev_close = close
 
+        # 시총은 shares_history as-of 주식수 × 종가로 일괄 계산(.info 추가 호출 없음)
+        fill_market_cap(conn, ticker, start_date, end_date_exclusive)
+        conn.execute("RELEASE backfill")
         return rows_inserted
     except Exception as e:
-        print(f"  Backfill error: {e}")
+        conn.execute("ROLLBACK TO backfill")
+        conn.execute("RELEASE backfill")
+        print(f"  Backfill error ({ticker}, rolled back): {e}")
         return 0
 
 
+def backfill_ticker(conn: sqlite3.Connection, ticker: str) -> int:
+    """Backfill historical snapshots for a ticker using existing date range."""
+    window = backfill_window(conn)
+    if not window:
+        return 0
+    valid_dates, start_date, end_date_exclusive = window
+    drop_stale_price_cache(conn, [ticker])
+    hist = download_backfill(ticker, start_date, end_date_exclusive)
+    return write_backfill(conn, ticker, hist, valid_dates, start_date, end_date_exclusive)
+
+
+def read_mapping_file(path: str) -> list[dict]:
+    """Parse `ticker,sector_id,name_ko,revenue_weight` rows (header optional).
+
+    형식이 틀린 행은 배치를 멈추지 않고 row["error"] 로 남겨 결과표에 FAILED 로 나온다.
+    """
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for lineno, cells in enumerate(csv.reader(f), 1):
+            cells = [c.strip() for c in cells]
+            if not cells or not cells[0] or cells[0].startswith("#"):
+                continue
+            if lineno == 1 and cells[0].lower() == "ticker":
+                continue
+            cells += [""] * (4 - len(cells))
+            row = {
+                "line": lineno,
+                "ticker": cells[0].upper(),
+                "sector_id": cells[1],
+                "name_ko": cells[2] or None,
+                "revenue_weight": 1.0,
+            }
+            if cells[3]:
+                try:
+                    row["revenue_weight"] = float(cells[3])
+                except ValueError:
+                    row["error"] = f"invalid revenue_weight {cells[3]!r}"
+            rows.append(row)
+    return rows
+
+
+def add_tickers_from_file(
+    conn: sqlite3.Connection,
+    path: str,
+    workers: int = 8,
+    no_backfill: bool = False,
+) -> bool:
+    """Batch add: concurrent validate/backfill, one write transaction, one scoring pass."""
+    rows = read_mapping_file(path)
+    if not rows:
+        print(f"Error: no rows in {path}")
+        return False
+    print(f"Batch: {len(rows)} rows from {path}")
+
+    # 1. Pre-flight DB checks (cheap, sequential). Duplicate rows in the file fail too.
+    seen: set[tuple[str, str]] = set()
+    for row in rows:
+        if row.get("error"):  # 파싱 실패
+            continue
+        key = (row["ticker"], row["sector_id"])
+        if key in seen:
+            row["error"] = "duplicate row in file"
+            continue
+        seen.add(key)
+        print(f"[line {row['line']}] ", end="")
+        row["sector"] = check_target(conn, row["ticker"], row["sector_id"])
+        if row["sector"]:
+            print(f"{row['ticker']} → {row['sector_id']}: queued")
+        else:
+            row["error"] = "pre-flight check failed (see above)"
+
+    pending = [r for r in rows if not r.get("error")]
+    window = None if no_backfill else backfill_window(conn)
+
+    # 2. Network: validate (.info) + history download per distinct ticker, concurrently.
+    def fetch(ticker: str):
+        info = validate_ticker(ticker)
+        hist = download_backfill(ticker, window[1], window[2]) if (info and window) else None
+        return info, hist
+
+    tickers = sorted({r["ticker"] for r in pending})
+    if window:
+        drop_stale_price_cache(conn, tickers)
+    print(f"Fetching {len(tickers)} tickers with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = dict(zip(tickers, pool.map(fetch, tickers)))
+
+    # 3. One transaction for every mapping + backfill.
+    backfilled: dict[str, int] = {}
+    try:
+        for row in pending:
+            ticker = row["ticker"]
+            info, hist = fetched[ticker]
+            if not info:
+                row["error"] = "invalid ticker or no data available"
+                continue
+            print(f"\n{ticker} → {row['sector_id']}")
+            save_company(
+                conn, ticker, row["sector"], info,
+                name_ko=row["name_ko"], revenue_weight=row["revenue_weight"],
+            )
+            if window and ticker not in backfilled:
+                backfilled[ticker] = write_backfill(
+                    conn, ticker, hist, window[0], window[1], window[2]
+                )
+            row["backfilled"] = backfilled.get(ticker, 0)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"\nError: batch write failed, nothing was added (rolled back): {e}")
+        return False
+
+    added = [r for r in rows if not r.get("error")]
+
+    # 4. Score, rank and new-ticker score history — exactly once for the whole batch.
+    if added:
+        latest_date = conn.execute("SELECT MAX(date) FROM latest_snapshots").fetchone()[0]
+        calculate_hegemony_scores(conn, latest_date)
+        try:
+            generate_new_ticker_history(conn)
+        except RuntimeError as e:
+            print(f"  New-ticker score history skipped: {e}")
+        update_sector_rankings(conn)
+        conn.commit()
+
+    # 5. Per-row report
+    print("\n" + "=" * 72)
+    print(f"{'LINE':<6}{'TICKER':<14}{'SECTOR':<24}{'RESULT':<8}DETAIL")
+    print("-" * 72)
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['line']:<6}{row['ticker']:<14}{row['sector_id']:<24}{'FAILED':<8}{row['error']}")
+            continue
+        score = conn.execute(
+            "SELECT smoothed_score FROM company_scores WHERE ticker = ?", (row["ticker"],)
+        ).fetchone()
+        rank = conn.execute(
+            "SELECT rank FROM sector_companies WHERE sector_id = ? AND ticker = ?",
+            (row["sector_id"], row["ticker"]),
+        ).fetchone()
+        rank_text = f"rank #{rank[0]}" if rank and rank[0] is not None else "unranked"
+        score_text = f"score {score[0]:.2f}" if score and score[0] is not None else "not scored yet"
+        detail = f"{rank_text}, {score_text}, {row['backfilled']} rows backfilled"
+        print(f"{row['line']:<6}{row['ticker']:<14}{row['sector_id']:<24}{'OK':<8}{detail}")
+    print("-" * 72)
+    print(f"Added {len(added)}/{len(rows)} mappings")
+
+    return len(added) == len(rows)
+
+
 def remove_ticker(conn: sqlite3.Connection, ticker: str, sector_id: str):
     """Remove a ticker from a sector."""
     existing = conn.execute(
@@ -453,6 +684,13 @@ def main():
     parser.add_argument("--no-backfill", action="store_true", help="Skip historical data backfill")
     parser.add_argument("--list-sectors", action="store_true", help="List all available sectors")
     parser.add_argument("--remove", action="store_true", help="Remove ticker from sector")
+    parser.add_argument(
+        "--from-file",
+        help="Batch add from CSV rows: ticker,sector_id,name_ko,revenue_weight",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Concurrent downloads in --from-file mode"
+    )
 
     args = parser.parse_args()
 
@@ -460,13 +698,21 @@ def main():
         print(f"Error: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
+    attach_archive(conn)  # 백필 날짜축에 아카이브로 옮긴 과거 일자도 포함
 
     if args.list_sectors:
         list_sectors(conn)
         conn.close()
         return
 
+    if args.from_file:
+        success = add_tickers_from_file(
+            conn, args.from_file, workers=args.workers, no_backfill=args.no_backfill
+        )
+        publish(conn)
+        sys.exit(0 if success else 1)
+
     if not args.ticker or not args.sector_id:
         parser.print_help()
         conn.close()
@@ -483,7 +729,7 @@ def main():
             no_backfill=args.no_backfill,
         )
 
-    conn.close()
+    publish(conn)
     sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""daily_snapshots hot/cold 분리 — 오래된 행을 data/hegemony_archive.db 로 옮긴다.
+
+왜 필요한가:
+  daily_snapshots 는 거래일마다 ~600행씩 끝없이 늘고, 백필 확장(--start)은 몇 년치를 한 번에
+  붙인다. 그런데 웹(요청마다 여는 hegemony.db)과 scoring 이 읽는 건 최신일과 길어야 1년여
+  (map·statistics 의 최대 365 거래일)이다. 배포·조회되는 hot DB 를 작게 유지하고, 깊은
+  과거는 별도 파일에 둔다.
+
+구조:
+  hegemony.db           hot — 최신일 기준 ARCHIVE_HORIZON_DAYS 일 이내. 웹·일일 수집 대상.
+  hegemony_archive.db   cold — 그보다 오래된 daily_snapshots. (ticker, date) PK WITHOUT ROWID
+                        (id 없음 — 웹이 읽지 않으므로 drizzle 스키마와 무관).
+  daily_snapshots_all   연결마다 만드는 TEMP VIEW = hot UNION ALL cold. 깊은 이력이 필요한
+                        백필·검증 스크립트만 이 이름으로 읽는다(attach_archive 후).
+
+  archive_log(메인 DB) 에 이동 기록을 남긴다. 기록이 있는데 아카이브 파일이 없으면(fetch
+  실패 등) 새 빈 아카이브를 만들지 않고 멈춘다 — 빈 파일로 db-snapshot 의 아카이브를
+  덮어쓰면 과거 행이 사라진다.
+
+사용:
+  ARCHIVE_HORIZON_DAYS=730 python scripts/update_data.py   # 일일 수집 끝에 이동(opt-in)
+  python scripts/archive.py --horizon 730                   # 수동 이동
+  python scripts/archive.py                                 # hot/cold 현황만 출력
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH, connect, publish
+
+ARCHIVE_PATH = DB_PATH.parent / "hegemony_archive.db"
+SNAPSHOTS_ALL = "daily_snapshots_all"
+# 웹이 읽는 최대 구간(365 거래일 ≈ 530일) + 여유. 이보다 짧은 horizon 은 화면을 깎는다.
+MIN_HORIZON_DAYS = 550
+
+
+def archive_horizon() -> int | None:
+    """ARCHIVE_HORIZON_DAYS 환경변수(일). 없거나 0 이면 None = 아카이브 비활성."""
+    raw = os.environ.get("ARCHIVE_HORIZON_DAYS", "").strip()
+    return (int(raw) or None) if raw else None
+
+
+def _is_attached(conn: sqlite3.Connection) -> bool:
+    return any(row[1] == "archive" for row in conn.execute("PRAGMA database_list"))
+
+
+def _hot_columns(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+    """main.daily_snapshots 의 (컬럼, 타입) — id 제외."""
+    return [
+        (r[1], r[2])
+        for r in conn.execute("PRAGMA main.table_info(daily_snapshots)")
+        if r[1] != "id"
+    ]
+
+
+def _ensure_archive_table(conn: sqlite3.Connection) -> None:
+    """archive.daily_snapshots 보장 + hot 에 새로 생긴 컬럼 동기화(add_columns 의 attach 판)."""
+    columns = _hot_columns(conn)
+    decls = ",\n            ".join(
+        f"{name} {ctype}{' NOT NULL' if name in ('ticker', 'date') else ''}" for name, ctype in columns
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS archive.daily_snapshots (
+            {decls},
+            PRIMARY KEY (ticker, date)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_snapshots_date ON daily_snapshots(date)")
+    existing = {r[1] for r in conn.execute("PRAGMA archive.table_info(daily_snapshots)")}
+    for name, ctype in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE archive.daily_snapshots ADD COLUMN {name} {ctype}")
+
+
+def _create_view(conn: sqlite3.Connection, with_archive: bool) -> None:
+    cols = ", ".join(name for name, _ in _hot_columns(conn))
+    union = f" UNION ALL SELECT {cols} FROM archive.daily_snapshots" if with_archive else ""
+    conn.execute(f"DROP VIEW IF EXISTS temp.{SNAPSHOTS_ALL}")
+    conn.execute(
+        f"CREATE TEMP VIEW {SNAPSHOTS_ALL} AS SELECT {cols} FROM main.daily_snapshots{union}"
+    )
+
+
+def attach_archive(conn: sqlite3.Connection, path: Path | str = ARCHIVE_PATH, create: bool = False) -> bool:
+    """아카이브를 'archive' 로 붙이고 daily_snapshots_all 뷰를 만든다. 붙였으면 True.
+
+    파일이 없고 create=False 면 붙이지 않고 뷰만 hot 전용으로 만든다 — 읽는 쪽은 아카이브
+    유무와 상관없이 daily_snapshots_all 을 쓰면 된다. 트랜잭션 밖(커밋 직후)에서 호출할 것
+    (ATTACH 는 열린 트랜잭션 안에서 실패한다).
+    """
+    if not _is_attached(conn):
+        if not (create or Path(path).exists()):
+            _create_view(conn, with_archive=False)
+            return False
+        logged = conn.execute("SELECT COUNT(*) FROM archive_log").fetchone()[0]
+        if logged and not Path(path).exists() and str(path) != ":memory:":
+            raise RuntimeError(
+                f"archive_log has {logged} moves but {path} is missing — fetch the archive first"
+            )
+        conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+        _ensure_archive_table(conn)
+    _create_view(conn, with_archive=True)
+    return True
+
+
+def snapshots_source(conn: sqlite3.Connection) -> str:
+    """깊은 이력 읽기용 테이블명: attach_archive 를 거친 연결이면 뷰, 아니면 hot 테이블."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = ?", (SNAPSHOTS_ALL,)
+    ).fetchone()
+    return SNAPSHOTS_ALL if row else "daily_snapshots"
+
+
+def snapshot_dates(conn: sqlite3.Connection) -> list[str]:
+    """hot + cold 의 distinct 거래일(오름차순).
+
+    뷰로 DISTINCT date 를 읽으면 UNION ALL 코루틴이 전 컬럼을 훑는다 → 파일별로 날짜
+    인덱스(커버링)만 읽어 합친다.
+    """
+    dates = {r[0] for r in conn.execute("SELECT DISTINCT date FROM main.daily_snapshots")}
+    if _is_attached(conn) and snapshots_source(conn) == SNAPSHOTS_ALL:
+        dates.update(r[0] for r in conn.execute("SELECT DISTINCT date FROM archive.daily_snapshots"))
+    return sorted(dates)
+
+
+def archive_old(conn: sqlite3.Connection, horizon_days: int) -> int:
+    """최신일 - horizon_days 보다 오래된 hot 행을 아카이브로 옮기고 커밋. 옮긴 행 수 반환.
+
+    INSERT OR REPLACE + DELETE 가 한 트랜잭션이라(ATTACH 된 두 파일 모두 DELETE 저널이면
+    super-journal 로 원자적) 중간에 죽어도 양쪽에 같은 행이 남거나 사라지지 않는다.
+    """
+    if horizon_days < MIN_HORIZON_DAYS:
+        raise ValueError(f"horizon {horizon_days}d < {MIN_HORIZON_DAYS}d (web reads up to ~365 trading days)")
+    if not _is_attached(conn):
+        raise RuntimeError("archive is not attached — call attach_archive(conn, create=True) first")
+
+    cutoff = conn.execute(
+        "SELECT date(MAX(date), ?) FROM main.daily_snapshots", (f"-{horizon_days} days",)
+    ).fetchone()[0]
+    if cutoff is None:
+        return 0
+
+    _ensure_archive_table(conn)
+    cols = ", ".join(name for name, _ in _hot_columns(conn))
+    moved = conn.execute(
+        f"""
+        INSERT OR REPLACE INTO archive.daily_snapshots ({cols})
+        SELECT {cols} FROM main.daily_snapshots WHERE date < ?
+        """,
+        (cutoff,),
+    ).rowcount
+    conn.execute("DELETE FROM main.daily_snapshots WHERE date < ?", (cutoff,))
+    if moved:
+        conn.execute(
+            "INSERT INTO archive_log (cutoff, moved, archived_at) VALUES (?, ?, datetime('now'))",
+            (cutoff, moved),
+        )
+    conn.commit()
+    print(f"Archive: moved {moved:,} daily_snapshots rows older than {cutoff} → {ARCHIVE_PATH.name}")
+    return moved
+
+
+def print_status(conn: sqlite3.Connection) -> None:
+    hot = conn.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM main.daily_snapshots").fetchone()
+    print(f"hot  daily_snapshots: {hot[0]:,} rows ({hot[1]} ~ {hot[2]})")
+    if _is_attached(conn):
+        cold = conn.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM archive.daily_snapshots").fetchone()
+        print(f"cold daily_snapshots: {cold[0]:,} rows ({cold[1]} ~ {cold[2]})")
+    else:
+        print("cold daily_snapshots: (no archive)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="daily_snapshots hot/cold archive")
+    parser.add_argument(
+        "--horizon", type=int, default=archive_horizon(),
+        help=f"이 일수보다 오래된 행을 아카이브로 이동 (기본: ARCHIVE_HORIZON_DAYS, 최소 {MIN_HORIZON_DAYS})",
+    )
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"Error: Database not found at {DB_PATH}")
+        sys.exit(1)
+
+    conn = connect()
+    try:
+        attach_archive(conn, create=bool(args.horizon))
+        if args.horizon:
+            archive_old(conn, args.horizon)
+    except (RuntimeError, ValueError) as e:
+        conn.close()
+        print(f"Error: {e}")
+        sys.exit(1)
+    print_status(conn)
+    publish(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,30 +6,79 @@
   --start  보유 기간보다 과거 구간을 모든 티커에 대해 채운다(이력 확장).
            예: python scripts/backfill_data.py --start 2025-07-01
            종료일은 기존 최소 date 하루 전(겹침 없음). 재실행 멱등.
+  --start --end  [start, end) 에 행이 하나도 없는 티커만 채운다(구멍 메우기).
+
+실행 구조:
+  다운로드는 워커 풀(--workers)에서 동시에, DB 쓰기는 메인 스레드 하나(단일 writer)가 한다.
+  티커 하나를 쓸 때마다 backfill_progress 장부에 결과를 같은 트랜잭션으로 남기고 커밋한다.
+  중단(Ctrl-C·잡 타임아웃) 후 --resume 으로 다시 돌리면 같은 (mode, window) 에서 이미
+  끝난 티커는 건너뛴다. 진행 중 처리량(tickers/min, rows/s)을 주기적으로 출력한다.
 """
 
 import argparse
 import sqlite3
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import pandas as pd
-import yfinance as yf
+# Ensure sibling modules (price_cache.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
 
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+from archive import attach_archive, snapshot_dates, snapshots_source
+from database import DB_PATH, connect, publish
+from price_cache import invalidate_since, load_history
+from scan_anomalies import split_events
+from shares_history import fill_market_cap
 
 SKIP_TICKERS = {
     "CATL",
 }
 
+# 장부 상태: done=행 적재, empty=오류 없는 응답에 데이터 없음/연속성 skip(재시도 무의미),
+# failed=다운로드 실패(네트워크·HTTP·차단, 재시도 대상), error=적재 실패(재시도 대상)
+DONE_STATUSES = ("done", "empty")
 
-def get_existing_dates(conn: sqlite3.Connection) -> list[str]:
-    """Get business dates from existing daily_snapshots (tech data)."""
-    cursor = conn.execute(
-        "SELECT DISTINCT date FROM daily_snapshots ORDER BY date"
+
+def finished_tickers(conn: sqlite3.Connection, mode: str, window: str) -> set[str]:
+    """--resume: 같은 (mode, window) 에서 이미 끝난(done/empty) 티커."""
+    rows = conn.execute(
+        f"""
+        SELECT ticker FROM backfill_progress
+        WHERE mode = ? AND window = ? AND status IN ({",".join("?" * len(DONE_STATUSES))})
+        """,
+        (mode, window, *DONE_STATUSES),
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def record_progress(
+    conn: sqlite3.Connection,
+    ticker: str,
+    mode: str,
+    window: str,
+    status: str,
+    rows: int = 0,
+    error: str | None = None,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO backfill_progress (ticker, mode, window, status, rows, error, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(ticker, mode, window) DO UPDATE SET
+            status = excluded.status,
+            rows = excluded.rows,
+            error = excluded.error,
+            updated_at = excluded.updated_at
+        """,
+        (ticker, mode, window, status, rows, error),
     )
-    return [row[0] for row in cursor.fetchall()]
+
+
+def get_existing_dates(conn: sqlite3.Connection) -> list[str]:
+    """Get business dates from existing daily_snapshots (tech data), hot + archive."""
+    return snapshot_dates(conn)
 
 
 def get_tickers_to_backfill(
@@ -42,14 +91,23 @@ def get_tickers_to_backfill(
     gap_window=(start, end) → 그 구간에 행이 하나도 없는 티커만(구멍 메우기).
     all_tickers=True        → 전부(이력 확장 모드).
     기본                    → 스냅샷이 전혀 없는 티커만.
+
+    NOT EXISTS 상관 서브쿼리라 티커마다 (ticker, date) 인덱스 탐색 1회로 끝난다
+    (NOT IN (SELECT DISTINCT ticker ...) 는 daily_snapshots 전체를 훑었다).
+    아카이브가 붙어 있으면 cold 쪽 행도 "있음"으로 본다.
     """
+    snapshots = snapshots_source(conn)
     if gap_window:
-        cond = "AND sc.ticker NOT IN (SELECT DISTINCT ticker FROM daily_snapshots WHERE date >= ? AND date < ?)"
+        cond = (
+            f"AND NOT EXISTS (SELECT 1 FROM {snapshots} ds"
+            " WHERE ds.ticker = sc.ticker AND ds.date >= ? AND ds.date < ?)"
+        )
         params: tuple = gap_window
     elif all_tickers:
         cond, params = "", ()
     else:
-        cond, params = "AND sc.ticker NOT IN (SELECT DISTINCT ticker FROM daily_snapshots)", ()
+        cond = f"AND NOT EXISTS (SELECT 1 FROM {snapshots} ds WHERE ds.ticker = sc.ticker)"
+        params = ()
     cursor = conn.execute(
         """
         SELECT DISTINCT sc.ticker
@@ -63,122 +121,191 @@ def get_tickers_to_backfill(
     return [row[0] for row in cursor.fetchall()]
 
 
-def fetch_shares_outstanding(ticker: str) -> int | None:
-    """Fetch shares outstanding from yfinance info."""
-    try:
-        info = yf.Ticker(ticker).info
-        return info.get("sharesOutstanding")
-    except Exception:
-        return None
+def download(ticker: str, start_date: str, end_date: str):
+    """워커 스레드 몫: 일봉 다운로드만(DB 접근 없음). 실패는 예외로 올린다.
 
+    무보정(adjusted=False): update_data.py 가 저장하는 currentPrice(무보정 현물)와
+    기준을 맞춤. 단 Yahoo 는 액면분할·분사·증자를 과거에 소급 보정하므로
+    그런 종목은 경계에서 값이 튄다 → write_ticker 의 연속성 가드로 통째 skip.
+    이미 받은 구간은 price_cache 가 디스크에서 돌려준다(재실행 시 네트워크 0).
+    """
+    return load_history(ticker, start_date, end_date, strict=True)
 
-def backfill_ticker(
+
+def write_ticker(
     conn: sqlite3.Connection,
     ticker: str,
+    hist,
     valid_dates: set[str] | None,
     start_date: str,
     end_date: str,
 ) -> int:
-    """Backfill daily_snapshots for a single ticker. Returns number of rows inserted.
+    """Writer 몫: 받은 일봉을 daily_snapshots 에 적재. Returns number of rows inserted.
 
     valid_dates=None → yfinance 가 준 거래일 전부 사용(이력 확장 모드).
     """
-    try:
-        # auto_adjust=False: update_data.py 가 저장하는 currentPrice(무보정 현물)와
-        # 기준을 맞춤. 단 Yahoo 는 액면분할·분사·증자를 과거에 소급 보정하므로
-        # 그런 종목은 경계에서 값이 튄다 → 아래 연속성 가드로 통째 skip.
-        hist = yf.download(
-            ticker,
-            start=start_date,
-            end=end_date,
-            progress=False,
-            auto_adjust=False,
-        )
+    if hist is None or hist.empty:
+        print(f"  {ticker}: no historical data", end=" ")
+        return 0
 
-        if hist.empty:
-            print(f"  {ticker}: no historical data")
+    # 연속성 가드(이력 확장 모드): 백필 마지막 종가 vs 기존 최초 스냅샷가.
+    # 20% 넘게 벌어지면 기업행위 소급 보정 계열 → 가짜 급등락을 심지 않도록 skip.
+    # end_date 는 yfinance exclusive 종료일 = 기존 보유 구간의 첫날.
+    # 재실행해도 자기 자신이 아니라 항상 기존 구간 첫 행과 비교된다.
+    boundary = conn.execute(
+        f"SELECT price FROM {snapshots_source(conn)} WHERE ticker=? AND price>0 AND date>=? ORDER BY date LIMIT 1",
+        (ticker, end_date),
+    ).fetchone()
+    if boundary:
+        last_close = float(hist["Close"].iloc[-1])
+        gap = abs(boundary[0] - last_close) / last_close
+        if gap > 0.2:
+            print(f"  {ticker}: SKIP — 경계 불연속 {last_close:,.0f} → {boundary[0]:,.0f} ({gap:.0%})", end=" ")
             return 0
 
-        # Flatten multi-level columns if present (yfinance sometimes returns MultiIndex)
-        if isinstance(hist.columns, pd.MultiIndex):
-            hist.columns = hist.columns.get_level_values(0)
-
-        # 연속성 가드(이력 확장 모드): 백필 마지막 종가 vs 기존 최초 스냅샷가.
-        # 20% 넘게 벌어지면 기업행위 소급 보정 계열 → 가짜 급등락을 심지 않도록 skip.
-        # end_date 는 yfinance exclusive 종료일 = 기존 보유 구간의 첫날.
-        # 재실행해도 자기 자신이 아니라 항상 기존 구간 첫 행과 비교된다.
-        boundary = conn.execute(
-            "SELECT price FROM daily_snapshots WHERE ticker=? AND price>0 AND date>=? ORDER BY date LIMIT 1",
-            (ticker, end_date),
-        ).fetchone()
-        if boundary:
-            last_close = float(hist["Close"].iloc[-1])
-            gap = abs(boundary[0] - last_close) / last_close
-            if gap > 0.2:
-                print(f"  {ticker}: SKIP — 경계 불연속 {last_close:,.0f} → {boundary[0]:,.0f} ({gap:.0%})")
-                return 0
-
-        shares = fetch_shares_outstanding(ticker)
-
-        rows_inserted = 0
-        prev_close = None
-
-        for date_idx in hist.index:
-            date_str = date_idx.strftime("%Y-%m-%d")
-
-            if valid_dates is not None and date_str not in valid_dates:
-                continue
-
-            close = float(hist.loc[date_idx, "Close"])
-            high = float(hist.loc[date_idx, "High"])
-            low = float(hist.loc[date_idx, "Low"])
-            volume = int(hist.loc[date_idx, "Volume"])
-
-            price_change = None
-            if prev_close is not None and prev_close != 0:
-                price_change = ((close - prev_close) / prev_close) * 100
-
-            market_cap = None
-            if shares is not None:
-                market_cap = int(shares * close)
-
-            # avg_volume: 20-day moving average (use available data)
-            date_pos = hist.index.get_loc(date_idx)
-            window_start = max(0, date_pos - 19)
-            avg_vol_series = hist.iloc[window_start : date_pos + 1]["Volume"]
-            avg_volume = int(avg_vol_series.mean()) if len(avg_vol_series) > 0 else None
-
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO daily_snapshots
-                (ticker, date, market_cap, price, price_change, week_52_high,
-                 week_52_low, day_high, day_low, volume, avg_volume, pe_ratio, peg_ratio, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                """,
-                (
-                    ticker,
-                    date_str,
-                    market_cap,
-                    close,
-                    price_change,
-                    None,  # week_52_high (insufficient data)
-                    None,  # week_52_low
-                    high,
-                    low,
-                    volume,
-                    avg_volume,
-                    None,  # pe_ratio (not available for historical)
-                    None,  # peg_ratio
-                ),
-            )
-            rows_inserted += 1
-            prev_close = close
-
-        return rows_inserted
-
-    except Exception as e:
-        print(f"  {ticker}: ERROR - {e}")
-        return 0
+    rows_inserted = 0
+    prev_close = None
+
+    for date_idx in hist.index:
+        date_str = date_idx.strftime("%Y-%m-%d")
+
+        if valid_dates is not None and date_str not in valid_dates:
+            continue
+
+        close = float(hist.loc[date_idx, "Close"])
+        high = float(hist.loc[date_idx, "High"])
+        low = float(hist.loc[date_idx, "Low"])
+        volume = int(hist.loc[date_idx, "Volume"])
+
+        price_change = None
+        if prev_close is not None and prev_close != 0:
+            price_change = ((close - prev_close) / prev_close) * 100
+
+        # avg_volume: 20-day moving average (use available data)
+        date_pos = hist.index.get_loc(date_idx)
+        window_start = max(0, date_pos - 19)
+        avg_vol_series = hist.iloc[window_start : date_pos + 1]["Volume"]
+        avg_volume = int(avg_vol_series.mean()) if len(avg_vol_series) > 0 else None
+
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO daily_snapshots
+            (ticker, date, market_cap, price, price_change, week_52_high,
+             week_52_low, day_high, day_low, volume, avg_volume, pe_ratio, peg_ratio, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            """,
+            (
+                ticker,
+                date_str,
+                None,  # market_cap — 아래 fill_market_cap 이 as-of 주식수로 일괄 계산
+                close,
+                price_change,
+                None,  # week_52_high (insufficient data)
+                None,  # week_52_low
+                high,
+                low,
+                volume,
+                avg_volume,
+                None,  # pe_ratio (not available for historical)
+                None,  # peg_ratio
+            ),
+        )
+        rows_inserted += 1
+        prev_close = close
+
+    # 시총: shares_history as-of 주식수 × 종가를 SQL 한 번으로(.info 추가 호출 없음)
+    fill_market_cap(conn, ticker, start_date, end_date)
+
+    return rows_inserted
+
+
+def print_throughput(done: int, total: int, rows: int, started: float) -> None:
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(
+        f"  -- {done}/{total} tickers · {done / elapsed * 60:,.1f} tickers/min"
+        f" · {rows / elapsed:,.1f} rows/s · {elapsed:,.0f}s elapsed"
+    )
+
+
+def run_backfill(
+    conn: sqlite3.Connection,
+    tickers: list[str],
+    mode: str,
+    valid_dates: set[str] | None,
+    start_date: str,
+    end_date_exclusive: str,
+    workers: int,
+) -> tuple[list[str], list[str]]:
+    """다운로드 워커 풀 + 단일 writer. (success, failed) 반환.
+
+    동시에 떠 있는 다운로드는 workers*2 개로 묶어 메모리를 제한한다. 티커마다 적재와
+    장부 기록을 한 트랜잭션으로 커밋하므로, 어디서 끊겨도 장부와 데이터가 어긋나지 않는다.
+    """
+    window = f"{start_date}~{end_date_exclusive}"
+    success: list[str] = []
+    failed: list[str] = []
+    total_rows = 0
+    started = time.monotonic()
+    queue = iter(tickers)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    in_flight: dict = {}
+
+    def submit_next() -> None:
+        ticker = next(queue, None)
+        if ticker is not None:
+            in_flight[pool.submit(download, ticker, start_date, end_date_exclusive)] = ticker
+
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                ticker = in_flight.pop(future)
+                submit_next()
+                n = len(success) + len(failed) + 1
+                print(f"[{n}/{len(tickers)}] {ticker}...", end=" ")
+                try:
+                    hist = future.result()
+                except Exception as e:
+                    # 일시 장애 — "empty" 로 적으면 --resume 이 영영 건너뛴다.
+                    record_progress(conn, ticker, mode, window, "failed", error=str(e)[:200])
+                    conn.commit()
+                    failed.append(ticker)
+                    print(f"DOWNLOAD FAILED - {e}")
+                    continue
+                try:
+                    rows = write_ticker(conn, ticker, hist, valid_dates, start_date, end_date_exclusive)
+                except Exception as e:
+                    conn.rollback()
+                    record_progress(conn, ticker, mode, window, "error", error=str(e)[:200])
+                    conn.commit()
+                    failed.append(ticker)
+                    print(f"ERROR - {e}")
+                    continue
+
+                record_progress(conn, ticker, mode, window, "done" if rows > 0 else "empty", rows)
+                conn.commit()
+                total_rows += rows
+                if rows > 0:
+                    success.append(ticker)
+                    print(f"OK ({rows} rows)")
+                else:
+                    failed.append(ticker)
+                    print("FAILED")
+
+                if n % 10 == 0:
+                    print_throughput(n, len(tickers), total_rows, started)
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("\nInterrupted — committed tickers are kept; re-run with --resume to continue.")
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    print_throughput(len(success) + len(failed), len(tickers), total_rows, started)
+    return success, failed
 
 
 def main():
@@ -191,6 +318,14 @@ def main():
         "--end",
         help="--start 와 함께 주면 구멍 메우기 모드: [start, end) 구간에 행이 없는 티커만 채운다",
     )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="동시 다운로드 수(DB 쓰기는 항상 1개)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="backfill_progress 장부에서 같은 (mode, window) 로 이미 끝난 티커는 건너뜀",
+    )
     args = parser.parse_args()
     if args.end and not args.start:
         parser.error("--end 는 --start 와 함께 써야 합니다")
@@ -199,7 +334,10 @@ def main():
         print(f"Error: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect("bulk")
+    # 아카이브로 옮긴 과거 구간도 "이미 있음"으로 본다(있으면 붙이고, 없으면 hot 만).
+    # 새로 적재한 오래된 행은 hot 에 들어가고 다음 archive_old 가 cold 로 옮긴다.
+    attach_archive(conn)
 
     existing_dates = get_existing_dates(conn)
     if not existing_dates:
@@ -215,6 +353,7 @@ def main():
             datetime.strptime(args.end, "%Y-%m-%d") - timedelta(days=1)
         ).strftime("%Y-%m-%d")
         valid_dates = None
+        mode = "gap"
         tickers = get_tickers_to_backfill(conn, gap_window=(args.start, args.end))
     elif args.start:
         # 이력 확장: 기존 최소 date 전날까지(겹침 없음), 거래일 gate 없음, 전 티커
@@ -228,6 +367,7 @@ def main():
             datetime.strptime(existing_dates[0], "%Y-%m-%d") - timedelta(days=1)
         ).strftime("%Y-%m-%d")
         valid_dates = None
+        mode = "extend"
         tickers = get_tickers_to_backfill(conn, all_tickers=True)
     else:
         start_date = existing_dates[0]
@@ -236,35 +376,37 @@ def main():
         end_dt = datetime.strptime(end_date, "%Y-%m-%d")
         end_date_exclusive = (end_dt + timedelta(days=1)).strftime("%Y-%m-%d")
         valid_dates = set(existing_dates)
+        mode = "new"
         tickers = get_tickers_to_backfill(conn)
 
+    # 분할 등 기업행위(scan_anomalies 의 split)가 캐시 작성 이후에 났으면 그 캐시의 과거
+    # 가격은 소급 보정 전 값이다 → 버리고 새로 받는다.
+    stale = invalidate_since(tickers, split_events(conn))
+    if stale:
+        print(f"Price cache invalidated after split: {stale}")
+
+    if args.resume:
+        finished = finished_tickers(conn, mode, f"{start_date}~{end_date_exclusive}")
+        tickers = [t for t in tickers if t not in finished]
+        print(f"Resume: {len(finished)} tickers already finished for this window")
+
     print(f"Backfill started at {datetime.now().isoformat()}")
     print(f"Database: {DB_PATH}")
     gate = f"{len(valid_dates)} business days" if valid_dates is not None else "all trading days"
     print(f"Date range: {start_date} ~ {end_date} ({gate})")
+    print(f"Mode: {mode} · workers: {args.workers}")
     print(f"Tickers to backfill: {len(tickers)}")
     if SKIP_TICKERS:
         print(f"Skipped: {SKIP_TICKERS}")
     print("=" * 60)
 
-    success = []
-    failed = []
-
-    for i, ticker in enumerate(tickers, 1):
-        print(f"[{i}/{len(tickers)}] {ticker}...", end=" ")
-        rows = backfill_ticker(conn, ticker, valid_dates, start_date, end_date_exclusive)
-        if rows > 0:
-            success.append(ticker)
-            print(f"OK ({rows} rows)")
-        else:
-            failed.append(ticker)
-            print("FAILED")
-
-        # Commit every 10 tickers
-        if i % 10 == 0:
-            conn.commit()
-
-    conn.commit()
+    try:
+        success, failed = run_backfill(
+            conn, tickers, mode, valid_dates, start_date, end_date_exclusive, args.workers
+        )
+    except KeyboardInterrupt:
+        conn.close()
+        sys.exit(130)
 
     print("=" * 60)
     print(f"Success: {len(success)} tickers")
@@ -273,10 +415,10 @@ def main():
 
     if len(failed) > len(tickers) * 0.5:
         print("WARNING: More than 50% of tickers failed!")
-        conn.close()
+        publish(conn)
         sys.exit(1)
 
-    conn.close()
+    publish(conn)
     print("\nBackfill completed successfully!")
 
 
@@ -22,6 +22,7 @@
 
 실행 전 백업: cp data/hegemony.db data/hegemony.db.bak.$(date +%s)
 실행: .venv/bin/python scripts/backfill_new_ticker_score_history.py
+      일일 파이프라인(scripts/pipeline.py)의 new-ticker-history 단계로도 매번 돈다(대상 없으면 no-op).
 """
 
 import sqlite3
@@ -35,99 +36,114 @@ from backfill_score_history import (  # noqa: E402
     get_history_dates,
     recompute_scale_for_date,
 )
+from archive import attach_archive  # noqa: E402
+from database import connect, publish  # noqa: E402
 
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
 
 # 이 행수 미만이면 "신규 편입"으로 보고 대상에 포함(모멘텀 lookback 15 보다 넉넉히 위).
 THRESHOLD = 20
 
 
-def main() -> int:
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        targets = [
-            r[0]
-            for r in conn.execute(
+def generate_new_ticker_history(conn: sqlite3.Connection) -> dict | None:
+    """신규 종목 score_history 생성 + 마지막 날 값으로 company_scores 동기화.
+
+    커밋·랭킹 갱신은 호출자 몫이다(add_ticker --from-file 는 배치 끝에 랭킹을 한 번만 돈다).
+    대상이 없으면 None, 날짜축이 비면 RuntimeError.
+    """
+    targets = [
+        r[0]
+        for r in conn.execute(
+            """
+            SELECT c.ticker FROM companies c
+            WHERE (SELECT COUNT(*) FROM score_history sh WHERE sh.ticker = c.ticker) < ?
+            """,
+            (THRESHOLD,),
+        ).fetchall()
+    ]
+    if not targets:
+        return None
+
+    # 현재 펀더멘털(성장/수익성/심리)을 상수로 사용
+    fund: dict[str, tuple[float, float, float]] = {}
+    for t in targets:
+        row = conn.execute(
+            "SELECT growth_score, profitability_score, sentiment_score FROM company_scores WHERE ticker = ?",
+            (t,),
+        ).fetchone()
+        g, p, s = (row or (0.0, 0.0, 0.0))
+        fund[t] = (g or 0.0, p or 0.0, s or 0.0)
+
+    dates = get_history_dates(conn)
+    if not dates:
+        raise RuntimeError("score_history 날짜축이 비어 생성 불가")
+    print(f"대상 신규 종목 {len(targets)}개 · 날짜축 {len(dates)}일 ({dates[0]} ~ {dates[-1]})")
+
+    prev_smoothed: dict[str, float] = {}
+    inserted = 0
+    for d in dates:
+        scale_by_ticker = recompute_scale_for_date(conn, d)
+        for t in targets:
+            scale = scale_by_ticker.get(t)
+            if scale is None:
+                # 그 날짜에 스냅샷/섹터 컨텍스트 없음 → 건너뜀(시계열 공백 허용)
+                continue
+            g, p, s = fund[t]
+            raw = scale + g + p + s
+            prev = prev_smoothed.get(t)
+            smoothed = raw if prev is None else EMA_ALPHA * raw + (1 - EMA_ALPHA) * prev
+            prev_smoothed[t] = smoothed
+            conn.execute(
                 """
-                SELECT c.ticker FROM companies c
-                WHERE (SELECT COUNT(*) FROM score_history sh WHERE sh.ticker = c.ticker) < ?
+                INSERT OR REPLACE INTO score_history
+                (ticker, date, raw_total_score, smoothed_score, scale_score,
+                 growth_score, profitability_score, sentiment_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (THRESHOLD,),
-            ).fetchall()
-        ]
-        if not targets:
-            print("대상 신규 종목 없음 — 이미 모두 충분한 score_history 보유. no-op")
-            return 0
+                (t, d, raw, smoothed, scale, g, p, s),
+            )
+            inserted += 1
+
+    # 마지막 날 값으로 company_scores 동기화(대상 종목만)
+    last = dates[-1]
+    synced = 0
+    for t in targets:
+        row = conn.execute(
+            "SELECT scale_score, raw_total_score, smoothed_score FROM score_history WHERE ticker = ? AND date = ?",
+            (t, last),
+        ).fetchone()
+        if row:
+            conn.execute(
+                """
+                UPDATE company_scores SET
+                    scale_score = ?, raw_total_score = ?, smoothed_score = ?,
+                    score_updated_at = datetime('now')
+                WHERE ticker = ?
+                """,
+                (row[0], row[1], row[2], t),
+            )
+            synced += 1
 
-        # 현재 펀더멘털(성장/수익성/심리)을 상수로 사용
-        fund: dict[str, tuple[float, float, float]] = {}
-        for t in targets:
-            row = conn.execute(
-                "SELECT growth_score, profitability_score, sentiment_score FROM company_scores WHERE ticker = ?",
-                (t,),
-            ).fetchone()
-            g, p, s = (row or (0.0, 0.0, 0.0))
-            fund[t] = (g or 0.0, p or 0.0, s or 0.0)
-
-        dates = get_history_dates(conn)
-        if not dates:
-            print("score_history 날짜축이 비어 생성 불가")
+    return {"targets": targets, "inserted": inserted, "synced": synced}
+
+
+def main() -> int:
+    conn = connect("bulk")
+    attach_archive(conn)  # 과거 일자 scale 재계산이 cold 스냅샷도 읽도록
+    try:
+        try:
+            stats = generate_new_ticker_history(conn)
+        except RuntimeError as e:
+            print(e)
             return 2
-        print(f"대상 신규 종목 {len(targets)}개 · 날짜축 {len(dates)}일 ({dates[0]} ~ {dates[-1]})")
-
-        prev_smoothed: dict[str, float] = {}
-        inserted = 0
-        for d in dates:
-            scale_by_ticker = recompute_scale_for_date(conn, d)
-            for t in targets:
-                scale = scale_by_ticker.get(t)
-                if scale is None:
-                    # 그 날짜에 스냅샷/섹터 컨텍스트 없음 → 건너뜀(시계열 공백 허용)
-                    continue
-                g, p, s = fund[t]
-                raw = scale + g + p + s
-                prev = prev_smoothed.get(t)
-                smoothed = raw if prev is None else EMA_ALPHA * raw + (1 - EMA_ALPHA) * prev
-                prev_smoothed[t] = smoothed
-                conn.execute(
-                    """
-                    INSERT OR REPLACE INTO score_history
-                    (ticker, date, raw_total_score, smoothed_score, scale_score,
-                     growth_score, profitability_score, sentiment_score)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (t, d, raw, smoothed, scale, g, p, s),
-                )
-                inserted += 1
-
-        # 마지막 날 값으로 company_scores 동기화(대상 종목만)
-        last = dates[-1]
-        synced = 0
-        for t in targets:
-            row = conn.execute(
-                "SELECT scale_score, raw_total_score, smoothed_score FROM score_history WHERE ticker = ? AND date = ?",
-                (t, last),
-            ).fetchone()
-            if row:
-                conn.execute(
-                    """
-                    UPDATE company_scores SET
-                        scale_score = ?, raw_total_score = ?, smoothed_score = ?,
-                        score_updated_at = datetime('now')
-                    WHERE ticker = ?
-                    """,
-                    (row[0], row[1], row[2], t),
-                )
-                synced += 1
+        if stats is None:
+            print("대상 신규 종목 없음 — 이미 모두 충분한 score_history 보유. no-op")
+            return 0
+        targets = stats["targets"]
 
         conn.commit()
         update_sector_rankings(conn)
         conn.commit()
 
-        # prod(Vercel readonly FS) 대비 delete 저널 모드 보장
-        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
-        conn.execute("PRAGMA journal_mode=DELETE")
-
         # 사후 통계: 대상 종목 행수 분포
         min_rows = conn.execute(
             f"""
@@ -139,8 +155,11 @@ def main() -> int:
             (targets[0],),
         ).fetchone()[0]
         print("=" * 50)
-        print(f"생성 완료: INSERT {inserted}행 · company_scores 동기화 {synced}개")
+        print(f"생성 완료: INSERT {stats['inserted']}행 · company_scores 동기화 {stats['synced']}개")
         print(f"예시 대상({targets[0]}) score_history 행수: {min_rows}")
+
+        # prod(Vercel readonly FS) 대비 delete 저널 모드 보장
+        publish(conn)
         return 0
     finally:
         conn.close()
@@ -29,6 +29,8 @@
        주말 carry-forward 행이 남으면 EMA 체인에 잡음 1틱이 섞임)
     3) .venv/bin/python scripts/backfill_score_history.py # 본 스크립트
     4) pnpm db:verify:accuracy                            # 사후 검증(주말 0·EMA 정합)
+    2~3 은 파이프라인이 순서를 지켜 돌린다(주말 행이 남아 있으면 3 을 시작하지 않는다):
+       python scripts/pipeline.py --only clean-weekend-rows,score-history,rank,publish
 
 폴백(forward-only):
     입력이 신뢰 불가할 만큼 부족하다고 판단되면 backfill 을 중단·롤백하고 종료코드 2 로
@@ -51,8 +53,9 @@ from scoring import (  # noqa: E402
     fetch_sector_companies,
     update_sector_rankings,
 )
+from archive import attach_archive, snapshots_source  # noqa: E402
+from database import DB_PATH, connect, publish  # noqa: E402
 
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
 
 # backfill 신뢰 가능 최소 기준 — 스냅샷 매칭률이 이 값 미만이면 forward-only 폴백.
 MIN_SNAPSHOT_COVERAGE = 0.5
@@ -71,11 +74,13 @@ def assess_coverage(conn: sqlite3.Connection) -> float:
     total = conn.execute("SELECT COUNT(*) FROM score_history").fetchone()[0]
     if total == 0:
         return 0.0
+    # EXISTS 상관 서브쿼리라 아카이브 뷰(UNION ALL)에도 (ticker, date) 가 각 파일로 내려간다
+    # (JOIN 이면 뷰 전체를 materialize 한다).
     matched = conn.execute(
         """
         SELECT COUNT(*) FROM score_history sh
-        JOIN daily_snapshots ds ON ds.ticker = sh.ticker AND ds.date = sh.date
-        """
+        WHERE EXISTS (SELECT 1 FROM {} ds WHERE ds.ticker = sh.ticker AND ds.date = sh.date)
+        """.format(snapshots_source(conn))
     ).fetchone()[0]
     return matched / total
 
@@ -84,12 +89,14 @@ def recompute_scale_for_date(conn: sqlite3.Connection, snapshot_date: str) -> di
     """해당 날짜 스냅샷으로 전 섹터 점수를 계산, ticker→winning sector 의 scale 을 반환.
 
     원본 엔진과 동일하게 raw_total 최대 섹터를 채택한다(scale 만 추출해 사용).
+    아카이브가 붙은 연결이면 hot DB 에서 빠진 과거 일자도 cold 쪽에서 읽는다.
     """
+    snapshots = snapshots_source(conn)
     sectors = conn.execute("SELECT id FROM sectors").fetchall()
     best: dict = {}  # ticker -> {"scale": float, "raw_total": float}
 
     for (sector_id,) in sectors:
-        companies = fetch_sector_companies(conn, sector_id, snapshot_date)
+        companies = fetch_sector_companies(conn, sector_id, snapshot_date, snapshots)
         if not companies:
             continue
         sector_scores = compute_sector_company_scores(companies)
@@ -197,7 +204,8 @@ def main() -> None:
         print(f"Error: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect("bulk")
+    attach_archive(conn)
     conn.execute("PRAGMA foreign_keys = ON")
 
     print("=" * 60)
@@ -230,7 +238,7 @@ def main() -> None:
         print(f"Error: rank 재계산 실패(롤백): {e}")
         sys.exit(1)
 
-    conn.close()
+    publish(conn)
 
     print("\n" + "=" * 60)
     print("backfill 완료")
@@ -13,20 +13,19 @@ from pathlib import Path
 
 import yfinance as yf
 
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH, connect, publish
 
 
 def latest_snapshot_per_ticker(conn: sqlite3.Connection) -> list[tuple[str, str]]:
-    """(ticker, max_date) for every ticker that has at least one snapshot."""
-    cursor = conn.execute(
-        """
-        SELECT ticker, MAX(date) AS d
-        FROM daily_snapshots
-        WHERE ticker IS NOT NULL
-        GROUP BY ticker
-        ORDER BY ticker
-        """
-    )
+    """(ticker, max_date) for every ticker that has at least one snapshot.
+
+    latest_snapshots(티커당 1행, database 마이그레이션 8)를 PK 순으로 읽는다. 아래 UPDATE
+    daily_snapshots 는 트리거가 latest_snapshots 에도 반영한다.
+    """
+    cursor = conn.execute("SELECT ticker, date FROM latest_snapshots ORDER BY ticker")
     return [(row[0], row[1]) for row in cursor.fetchall()]
 
 
@@ -35,7 +34,7 @@ def main():
         print(f"Error: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect("bulk")
     rows = latest_snapshot_per_ticker(conn)
     print(f"Backfilling valuation metrics for {len(rows)} tickers...")
 
@@ -68,17 +67,8 @@ def main():
             print(f"  [{i}/{len(rows)}] ... (filled={filled})")
         time.sleep(0.15)  # yfinance rate-limit 완화
 
-    conn.commit()
-
     # 커밋되는 DB 는 DELETE journal 모드 유지 (Vercel readonly FS 500 방지)
-    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
-    conn.execute("PRAGMA journal_mode = DELETE")
-    conn.close()
-
-    for suffix in (".db-wal", ".db-shm"):
-        p = DB_PATH.with_suffix(suffix)
-        if p.exists():
-            p.unlink()
+    publish(conn)
 
     print(f"\nDone. Updated {updated} rows, {filled} with at least one metric.")
 
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""행 단위 changeset — 실행마다 DB 전체 대신 바뀐 행만 db-snapshot 에 올린다.
+
+왜 필요한가:
+  수집은 하루 4회인데 바뀌는 건 스냅샷 ~600행과 점수·프로필 정도다. 그런데 매번 수십 MB
+  hegemony.db 전체를 force-push 하고, 빌드·수집은 매번 그 전체를 내려받았다.
+
+구조(db-snapshot 의 data/):
+  hegemony.db(.zst/.sha256)   base — publish_db 아티팩트. 주기적으로만 새로 올린다.
+  changeset-000001.db.gz      base 이후 실행마다 1개. gzip 한 SQLite 파일:
+                                ins_<table>  새로 생기거나 바뀐 행(전 컬럼)
+                                del_<table>  사라진 행의 PK
+                                steps        적용 SQL(순서대로) — 적용 도구는 이것만 실행한다
+                                meta         seq, 만든 시각, 적용 후 테이블별 행 수(검증용)
+  manifest.json               base sha256 + changeset 목록(seq, 파일, sha256, 바이트, 행 수)
+
+  적용 SQL 을 changeset 안에 넣어 두므로 파이썬(이 파일의 apply)과 Node(fetch-db.mjs)가
+  같은 문장을 실행한다 — 규칙이 두 곳에 따로 있지 않다.
+
+base 를 새로 올리는 경우(export 가 판단):
+  이전 manifest·이전 DB 가 없음 / 스키마가 바뀜(마이그레이션) / changeset 이 MAX_CHAIN 개
+  / changeset 누적 바이트가 base 의 MAX_CHAIN_RATIO 초과 / --base.
+
+사용:
+  python scripts/changeset.py export              # data/hegemony.prev.db ↔ data/hegemony.db
+  python scripts/changeset.py apply --dir DIR     # DIR 의 base + changeset 들로 data/hegemony.db 재구성
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH
+from publish_db import ARTIFACT_DIR
+
+MANIFEST_NAME = "manifest.json"
+# fetch-db.mjs 가 로컬 DB 를 만들 때 쓴 manifest 를 여기에 남긴다(다음 export 의 이전 상태).
+LOCAL_MANIFEST = DB_PATH.parent / "hegemony.manifest.json"
+# 워크플로우가 수집 전에 떠 두는 사본 = 클라이언트가 지금 재구성하는 상태.
+PREV_PATH = DB_PATH.parent / "hegemony.prev.db"
+
+MAX_CHAIN = 28  # 하루 4회 × 1주
+MAX_CHAIN_RATIO = 0.3  # changeset 누적이 base 의 30% 를 넘으면 base 를 새로
+# 트리거가 유지하는 읽기 모델 — 원천 테이블 적용(트리거 발동) 뒤에 덮어써야 정확히 맞는다.
+DERIVED_TABLES = ("latest_snapshots",)
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def changeset_name(seq: int) -> str:
+    return f"changeset-{seq:06d}.db.gz"
+
+
+def _schema(conn: sqlite3.Connection, schema: str) -> set[tuple]:
+    return set(conn.execute(
+        f"SELECT type, name, sql FROM {schema}.sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    ).fetchall())
+
+
+def _tables(conn: sqlite3.Connection, schema: str) -> list[tuple[str, list[str], list[str]]]:
+    """(테이블, 컬럼, PK 컬럼) — 파생 테이블은 끝으로. PK 가 없으면 빈 리스트(통째 교체)."""
+    names = [r[0] for r in conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    names.sort(key=lambda n: n in DERIVED_TABLES)
+    tables = []
+    for name in names:
+        info = conn.execute(f"PRAGMA {schema}.table_info({_q(name)})").fetchall()
+        columns = [r[1] for r in info]
+        pk = [r[1] for r in sorted((r for r in info if r[5]), key=lambda r: r[5])]
+        tables.append((name, columns, pk))
+    return tables
+
+
+def diff(prev: Path, new: Path, out: Path, seq: int) -> dict[str, list[int]]:
+    """prev → new 의 changeset 을 out(비압축 SQLite)에 쓴다. {테이블: [ins, del]} (바뀐 것만)."""
+    if out.exists():
+        out.unlink()
+    conn = sqlite3.connect(out)
+    try:
+        conn.execute("ATTACH DATABASE ? AS new", (str(new),))
+        conn.execute("ATTACH DATABASE ? AS prev", (str(prev),))
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE steps (step INTEGER PRIMARY KEY, sql TEXT NOT NULL)")
+
+        deletes: list[str] = []
+        inserts: list[str] = []
+        changed: dict[str, list[int]] = {}
+        counts: dict[str, int] = {}
+        for table, columns, pk in _tables(conn, "new"):
+            t, cols = _q(table), ", ".join(_q(c) for c in columns)
+            ins, dels = _q(f"ins_{table}"), _q(f"del_{table}")
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM new.{t}").fetchone()[0]
+            if pk:
+                keys = ", ".join(_q(c) for c in pk)
+                conn.execute(f"CREATE TABLE {ins} AS SELECT {cols} FROM new.{t} WHERE 0")
+                n_ins = conn.execute(
+                    f"INSERT INTO {ins} SELECT {cols} FROM new.{t} EXCEPT SELECT {cols} FROM prev.{t}"
+                ).rowcount
+                conn.execute(f"CREATE TABLE {dels} AS SELECT {keys} FROM prev.{t} WHERE 0")
+                n_del = conn.execute(
+                    f"INSERT INTO {dels} SELECT {keys} FROM prev.{t} EXCEPT SELECT {keys} FROM new.{t}"
+                ).rowcount
+                if n_del:
+                    deletes.append(
+                        f"DELETE FROM main.{t} WHERE ({keys}) IN (SELECT {keys} FROM cs.{dels})"
+                    )
+                if n_ins:
+                    inserts.append(f"INSERT OR REPLACE INTO main.{t} ({cols}) SELECT {cols} FROM cs.{ins}")
+            else:
+                # 키가 없으면 행 동일성을 못 정한다 → 다르면 통째 교체
+                prev_count = conn.execute(f"SELECT COUNT(*) FROM prev.{t}").fetchone()[0]
+                differs = prev_count != counts[table] or any(
+                    conn.execute(
+                        f"SELECT 1 FROM (SELECT {cols} FROM {a}.{t} EXCEPT SELECT {cols} FROM {b}.{t}) LIMIT 1"
+                    ).fetchone()
+                    for a, b in (("new", "prev"), ("prev", "new"))
+                )
+                n_ins = n_del = 0
+                if differs:
+                    conn.execute(f"CREATE TABLE {ins} AS SELECT {cols} FROM new.{t}")
+                    n_ins, n_del = counts[table], prev_count
+                    deletes.append(f"DELETE FROM main.{t}")
+                    inserts.append(f"INSERT INTO main.{t} ({cols}) SELECT {cols} FROM cs.{ins}")
+            if n_ins or n_del:
+                changed[table] = [n_ins, n_del]
+            if not n_ins:
+                conn.execute(f"DROP TABLE IF EXISTS {ins}")
+            if not n_del or not pk:
+                conn.execute(f"DROP TABLE IF EXISTS {dels}")
+
+        conn.executemany(
+            "INSERT INTO steps (step, sql) VALUES (?, ?)", enumerate(deletes + inserts, start=1)
+        )
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("seq", str(seq)),
+                ("created_at", datetime.now(timezone.utc).isoformat(timespec="seconds")),
+                ("counts", json.dumps(counts, sort_keys=True)),
+            ],
+        )
+        conn.commit()
+        conn.execute("DETACH DATABASE new")
+        conn.execute("DETACH DATABASE prev")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return changed
+
+
+def apply(conn: sqlite3.Connection, changeset: Path) -> int:
+    """비압축 changeset 하나를 한 트랜잭션으로 적용하고 행 수를 검증. 실행한 문장 수."""
+    conn.commit()
+    conn.execute("ATTACH DATABASE ? AS cs", (str(changeset),))
+    try:
+        steps = [r[0] for r in conn.execute("SELECT sql FROM cs.steps ORDER BY step")]
+        expected = json.loads(conn.execute("SELECT value FROM cs.meta WHERE key = 'counts'").fetchone()[0])
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql in steps:
+                conn.execute(sql)
+            for table, count in expected.items():
+                actual = conn.execute(f"SELECT COUNT(*) FROM main.{_q(table)}").fetchone()[0]
+                if actual != count:
+                    raise RuntimeError(f"{changeset.name}: {table} has {actual} rows after apply, expected {count}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("DETACH DATABASE cs")
+    return len(steps)
+
+
+def _gunzip(src: Path, dst: Path) -> Path:
+    with gzip.open(src, "rb") as fin, dst.open("wb") as fout:
+        shutil.copyfileobj(fin, fout)
+    return dst
+
+
+def rebuild(src_dir: Path, out: Path = DB_PATH) -> dict:
+    """src_dir 의 manifest.json + base + changeset 들로 out 을 재구성. 쓴 manifest 를 돌려준다."""
+    manifest = json.loads((src_dir / MANIFEST_NAME).read_text())
+    base = src_dir / "hegemony.db"
+    if _sha256(base) != manifest["base"]["sha256"]:
+        raise RuntimeError("base sha256 does not match manifest")
+    tmp = out.with_name(out.name + ".rebuild")
+    shutil.copyfile(base, tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        with tempfile.TemporaryDirectory() as work:
+            for entry in manifest["changesets"]:
+                packed = src_dir / entry["file"]
+                if _sha256(packed) != entry["sha256"]:
+                    raise RuntimeError(f"{entry['file']}: sha256 does not match manifest")
+                apply(conn, _gunzip(packed, Path(work) / "cs.db"))
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+    tmp.replace(out)
+    return manifest
+
+
+def _new_base(artifact_dir: Path, reason: str) -> dict:
+    target = artifact_dir / "hegemony.db"
+    zst = artifact_dir / "hegemony.db.zst"
+    print(f"Changeset: publishing a new base ({reason})")
+    return {
+        "version": 1,
+        "base": {
+            "sha256": (artifact_dir / "hegemony.db.sha256").read_text().split()[0],
+            "bytes": (zst if zst.exists() else target).stat().st_size,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "changesets": [],
+    }
+
+
+def _base_reason(prev: Path, new: Path, previous: dict | None) -> str | None:
+    """base 를 새로 올려야 하는 이유(없으면 None = changeset 으로 충분)."""
+    if previous is None or not prev.exists():
+        return "no previous manifest/DB"
+    chain = previous["changesets"]
+    if len(chain) >= MAX_CHAIN:
+        return f"chain reached {MAX_CHAIN}"
+    if sum(c["bytes"] for c in chain) > previous["base"]["bytes"] * MAX_CHAIN_RATIO:
+        return f"changesets exceed {MAX_CHAIN_RATIO:.0%} of base"
+    conn = sqlite3.connect(new)
+    try:
+        conn.execute("ATTACH DATABASE ? AS prev", (str(prev),))
+        if _schema(conn, "main") != _schema(conn, "prev"):
+            return "schema changed"
+    finally:
+        conn.close()
+    return None
+
+
+def export(
+    prev: Path = PREV_PATH,
+    new: Path = DB_PATH,
+    artifact_dir: Path = ARTIFACT_DIR,
+    previous_manifest: Path = LOCAL_MANIFEST,
+    force_base: bool = False,
+) -> str:
+    """artifact_dir 에 manifest.json 과 (delta 면) 이번 changeset 을 쓴다. 'base' 또는 'delta'."""
+    for stale in artifact_dir.glob("changeset-*.db.gz"):
+        stale.unlink()
+    previous = json.loads(previous_manifest.read_text()) if previous_manifest.exists() else None
+    reason = "--base" if force_base else _base_reason(prev, new, previous)
+
+    if reason:
+        manifest, mode = _new_base(artifact_dir, reason), "base"
+    else:
+        seq = (previous["changesets"][-1]["seq"] if previous["changesets"] else 0) + 1
+        packed = artifact_dir / changeset_name(seq)
+        with tempfile.TemporaryDirectory() as work:
+            raw = Path(work) / "cs.db"
+            changed = diff(prev, new, raw, seq)
+            with raw.open("rb") as fin, gzip.GzipFile(packed, "wb", compresslevel=9, mtime=0) as fout:
+                shutil.copyfileobj(fin, fout)
+        manifest, mode = previous, "delta"
+        manifest["changesets"].append({
+            "seq": seq,
+            "file": packed.name,
+            "sha256": _sha256(packed),
+            "bytes": packed.stat().st_size,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "rows": changed,
+        })
+        total = sum(sum(counts) for counts in changed.values())
+        print(
+            f"Changeset {seq}: {total:,} rows in {len(changed)} tables → {packed.name}"
+            f" ({packed.stat().st_size / 1e3:.0f}KB vs base {manifest['base']['bytes'] / 1e6:.1f}MB)"
+        )
+
+    (artifact_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+    return mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="row-level changesets for db-snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="이전 DB 대비 changeset(또는 새 base) + manifest 를 data/publish/ 에")
+    p_export.add_argument("--prev", type=Path, default=PREV_PATH)
+    p_export.add_argument("--base", action="store_true", help="changeset 대신 새 base 를 강제")
+    p_apply = sub.add_parser("apply", help="디렉터리의 base + changeset 으로 DB 재구성")
+    p_apply.add_argument("--dir", type=Path, required=True, help="manifest.json·hegemony.db·changeset-*.db.gz 가 있는 곳")
+    p_apply.add_argument("--out", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if not DB_PATH.exists():
+            print(f"Error: Database not found at {DB_PATH}")
+            sys.exit(1)
+        export(prev=args.prev, force_base=args.base)
+    else:
+        manifest = rebuild(args.dir, args.out)
+        print(f"Rebuilt {args.out} from base + {len(manifest['changesets'])} changesets")
+
+
+if __name__ == "__main__":
+    main()
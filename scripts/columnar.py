@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""시계열 테이블의 컬럼형 사본 — 월 단위 Arrow IPC 파티션(분석·월간 리포트용).
+
+왜 필요한가:
+  월간 리포트·분포 검증 같은 일괄 분석은 "전 종목 × 수개월 × 컬럼 두세 개"를 읽는다.
+  SQLite 행 저장에선 필요 없는 컬럼까지 페이지째 읽고 파이썬 튜플로 풀어야 한다.
+  Arrow IPC(Feather v2, 비압축) 파일은 컬럼별 연속 버퍼라 memory_map 으로 열면 복사 없이
+  고른 컬럼만 페이지 인(in)된다.
+
+배치:
+  data/columnar/<table>/<YYYY-MM>.arrow   월 파티션, (키, date) 순 정렬
+  data/columnar/manifest.json             파티션별 행 수·지문(fingerprint)
+
+증분:
+  매 실행마다 월별 COUNT(*) + 숫자 컬럼 TOTAL() 지문을 GROUP BY 한 번으로 구해 manifest 와
+  비교하고, 달라진(또는 새) 달만 다시 쓴다 — 평일 수집이면 보통 이번 달 파일 하나.
+  원본에서 사라진 달(아카이브 이동이 아니라 실제 삭제)은 파일도 지운다. 컬럼 구성이 바뀌면
+  그 테이블은 전부 다시 쓴다. daily_snapshots 는 아카이브(hegemony_archive.db)가 있으면
+  daily_snapshots_all 뷰로 읽어 cold 구간도 포함한다.
+
+선택 의존성 pyarrow (`pip install pyarrow`). 없으면 건너뛴다. 수집 단계(update_data,
+update_indices)는 COLUMNAR_EXPORT=1 일 때만 자기 단계가 쓴 테이블을 내보낸다(opt-in).
+
+  python scripts/columnar.py                 # 전체 테이블 증분 내보내기
+  python scripts/columnar.py --full          # manifest 무시하고 전부 다시 쓰기
+  python scripts/columnar.py --tables score_history --out /tmp/columnar
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from archive import attach_archive, snapshots_source
+from database import DB_PATH
+
+COLUMNAR_DIR = DB_PATH.parent / "columnar"
+MANIFEST_NAME = "manifest.json"
+
+# {테이블: 정렬 키(파티션 안에서 티커/심볼별 구간이 연속이 되게)}
+TABLES = {
+    "daily_snapshots": ("ticker", "date"),
+    "score_history": ("ticker", "date"),
+    "market_index_history": ("symbol", "date"),
+}
+
+
+def columnar_enabled() -> bool:
+    """COLUMNAR_EXPORT 환경변수. 수집 단계의 자동 내보내기 스위치."""
+    return os.environ.get("COLUMNAR_EXPORT", "").strip().lower() in ("1", "true", "yes")
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list[tuple[str, str]]:
+    """[(컬럼, 선언 타입)] — main 테이블 기준. 마이그레이션 9 전 DB 의 surrogate id 는 뺀다
+    (daily_snapshots_all 뷰에도 없고 분석에서 읽을 일이 없다)."""
+    return [
+        (r[1], (r[2] or "").upper())
+        for r in conn.execute(f"PRAGMA main.table_info({table})")
+        if r[1] != "id"
+    ]
+
+
+def _arrow_type(pa, name: str, decl: str):
+    if name == "date":
+        return pa.date32()
+    if "INT" in decl:
+        return pa.int64()
+    if any(k in decl for k in ("REAL", "FLOA", "DOUB", "NUM")):
+        return pa.float64()
+    return pa.string()
+
+
+def _numeric(columns: list[tuple[str, str]]) -> list[str]:
+    return [c for c, decl in columns if any(k in decl for k in ("INT", "REAL", "FLOA", "DOUB", "NUM"))]
+
+
+def fingerprints(conn: sqlite3.Connection, source: str, columns: list[tuple[str, str]]) -> dict[str, list]:
+    """{YYYY-MM: [행 수, 숫자 컬럼별 TOTAL...]}. 값 하나만 바뀌어도 합이 달라진다."""
+    totals = "".join(f", TOTAL({c})" for c in _numeric(columns))
+    rows = conn.execute(
+        f"SELECT substr(date, 1, 7) AS month, COUNT(*){totals} FROM {source} GROUP BY month"
+    ).fetchall()
+    return {r[0]: list(r[1:]) for r in rows}
+
+
+def _month_bounds(month: str) -> tuple[str, str]:
+    year, mon = int(month[:4]), int(month[5:7])
+    nxt = f"{year + 1:04d}-01" if mon == 12 else f"{year:04d}-{mon + 1:02d}"
+    return f"{month}-01", f"{nxt}-01"
+
+
+def _write_partition(pa, conn, source, table, columns, month, path: Path) -> int:
+    """한 달치를 (키, date) 순으로 읽어 Arrow IPC 파일로. 행 수를 돌려준다."""
+    lo, hi = _month_bounds(month)
+    names = [c for c, _ in columns]
+    rows = conn.execute(
+        f"SELECT {', '.join(names)} FROM {source} WHERE date >= ? AND date < ? "
+        f"ORDER BY {', '.join(TABLES[table])}",
+        (lo, hi),
+    ).fetchall()
+    data = list(zip(*rows)) if rows else [()] * len(names)
+    arrays = []
+    for (name, decl), values in zip(columns, data):
+        typ = _arrow_type(pa, name, decl)
+        if typ == pa.date32():
+            arrays.append(pa.array(values, pa.string()).cast(typ))
+        else:
+            arrays.append(pa.array(values, typ))
+    batch = pa.table(arrays, names=names)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    os.replace(tmp, path)
+    return len(rows)
+
+
+def _load_manifest(out: Path) -> dict:
+    path = out / MANIFEST_NAME
+    if path.exists():
+        return json.loads(path.read_text())
+    return {"version": 1, "tables": {}}
+
+
+def export(
+    db_path: Path = DB_PATH,
+    out: Path = COLUMNAR_DIR,
+    tables: tuple[str, ...] = tuple(TABLES),
+    full: bool = False,
+) -> dict[str, int] | None:
+    """테이블별 증분 내보내기. {테이블: 다시 쓴 파티션 수}, pyarrow 가 없으면 None."""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401 — pa.ipc 서브모듈 로드
+    except ImportError:
+        print("  pyarrow not installed — skipping columnar export")
+        return None
+
+    manifest = _load_manifest(out)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    written: dict[str, int] = {}
+    try:
+        for table in tables:
+            if table == "daily_snapshots":
+                attach_archive(conn)
+                source = snapshots_source(conn)
+            else:
+                source = table
+            columns = _columns(conn, table)
+            current = fingerprints(conn, source, columns)
+
+            entry = manifest["tables"].get(table, {})
+            names = [c for c, _ in columns]
+            previous = {} if full or entry.get("columns") != names else entry.get("partitions", {})
+            table_dir = out / table
+            table_dir.mkdir(parents=True, exist_ok=True)
+
+            partitions = {}
+            written[table] = 0
+            for month, fp in sorted(current.items()):
+                path = table_dir / f"{month}.arrow"
+                old = previous.get(month)
+                if old and old["fingerprint"] == fp and path.exists():
+                    partitions[month] = old
+                    continue
+                rows = _write_partition(pa, conn, source, table, columns, month, path)
+                partitions[month] = {"rows": rows, "fingerprint": fp}
+                written[table] += 1
+            for stale in table_dir.glob("*.arrow"):
+                if stale.stem not in current:
+                    stale.unlink()
+
+            manifest["tables"][table] = {"columns": names, "partitions": partitions}
+            # 파티션을 다 쓴 뒤에 manifest 를 갱신 — 도중에 죽으면 다음 실행이 다시 쓴다.
+            tmp = out / (MANIFEST_NAME + ".tmp")
+            tmp.write_text(json.dumps(manifest, indent=1))
+            os.replace(tmp, out / MANIFEST_NAME)
+            print(f"  columnar {table}: {written[table]}/{len(current)} partitions written")
+    finally:
+        conn.close()
+    return written
+
+
+def export_stage(db_path: Path, tables: tuple[str, ...]) -> None:
+    """수집 단계 훅: COLUMNAR_EXPORT=1 이면 그 단계가 쓴 테이블만 내보낸다. publish 뒤에 부를 것."""
+    if columnar_enabled():
+        export(db_path, COLUMNAR_DIR, tables)
+
+
+def scan(
+    table: str,
+    columns: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    root: Path = COLUMNAR_DIR,
+):
+    """[start, end] 구간(YYYY-MM-DD, 양끝 포함)의 파티션을 memory_map 으로 열어 pyarrow.Table 로.
+
+    구간에 걸친 달의 파일만 연다. 고른 컬럼 외 버퍼는 매핑만 되고 읽히지 않는다.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc  # noqa: F401
+
+    filtering = bool(start or end)
+    wanted = None
+    if columns:
+        wanted = list(columns) + (["date"] if filtering and "date" not in columns else [])
+    parts = []
+    for path in sorted((root / table).glob("*.arrow")):
+        month = path.stem
+        if (start and month < start[:7]) or (end and month > end[:7]):
+            continue
+        part = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        if wanted:
+            part = part.select(wanted)
+        parts.append(part)
+    if not parts:
+        return None
+    result = pa.concat_tables(parts)
+    if filtering:
+        mask = None
+        if start:
+            mask = pc.greater_equal(result["date"], pa.scalar(start).cast(pa.date32()))
+        if end:
+            upper = pc.less_equal(result["date"], pa.scalar(end).cast(pa.date32()))
+            mask = upper if mask is None else pc.and_(mask, upper)
+        result = result.filter(mask)
+        if columns and "date" not in columns:
+            result = result.drop_columns(["date"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="export time-series tables as monthly Arrow IPC partitions")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="원본 DB(읽기만 함)")
+    parser.add_argument("--out", type=Path, default=COLUMNAR_DIR, help="출력 디렉터리")
+    parser.add_argument("--tables", nargs="+", choices=sorted(TABLES), default=list(TABLES))
+    parser.add_argument("--full", action="store_true", help="manifest 를 무시하고 전부 다시 쓴다")
+    args = parser.parse_args()
+    if not args.db.exists():
+        print(f"Error: Database not found at {args.db}")
+        sys.exit(1)
+    if export(args.db, args.out, tuple(args.tables), full=args.full) is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""종목 × 거래일 × 필드 큐브 — numpy memmap 으로 전 이력을 복사 없이 여는 분석용 사본.
+
+왜 필요한가:
+  backfill·검증류 스크립트는 이력을 날짜마다, 종목마다 SQL 로 다시 모은다(수천 번 조회).
+  큐브는 필드마다 float64 2차원 배열 파일 하나라 np.memmap 으로 열면 즉시(ms) 전 이력이
+  ndarray 로 보이고, 실제로 건드린 페이지만 디스크에서 읽힌다.
+
+배치 (data/cube/):
+  <field>.f64    float64 little-endian, shape (날짜 수, 티커 용량) — 날짜 우선(row = 거래일)
+  tickers.txt    줄 번호 = 티커 id (추가만 — 한번 받은 id 는 바뀌지 않는다)
+  dates.txt      줄 번호 = day 번호 (오름차순)
+  meta.json      shape·용량·필드·환율·날짜별 지문
+
+  결측은 NaN. market_cap_usd 는 currency.to_usd 로 환산한 값(환율은 meta 에 기록).
+
+증분 (매일 수집 뒤):
+  날짜별 지문(행 수 + 필드 TOTAL)을 두 테이블에서 GROUP BY 한 번씩 구해 meta 와 비교한다.
+    - 새 거래일(마지막 날 이후)  → 파일 끝에 행 추가 (날짜 우선 배치라 append 만으로 된다)
+    - 지문이 바뀐 기존 거래일     → 그 행만 제자리 덮어쓰기
+    - 중간 날짜 삽입·날짜 삭제, 티커 용량 초과, 필드·환율 변경 → 전체 재구축
+  전체 재구축은 cube.next/ 에 만든 뒤 디렉터리를 바꿔 끼운다. meta.json 은 항상 마지막에
+  쓰므로 도중에 죽으면 다음 실행이 지문 불일치로 다시 쓴다.
+
+사용:
+  python scripts/cube.py            # 증분 갱신(없으면 생성)
+  python scripts/cube.py --full     # 전체 재구축
+  python scripts/cube.py --info     # 현재 큐브 요약
+
+  from cube import load
+  c = load()
+  c.field("smoothed_score")[:, c.ticker_ids["AAPL"]]     # 한 종목의 전 이력
+  c.field("market_cap_usd")[c.day_numbers["2026-06-26"]]  # 한 날짜 단면
+
+수집 단계(update_data)는 CUBE_EXPORT=1 일 때만 publish 뒤에 갱신한다(opt-in).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from archive import attach_archive, snapshots_source
+from currency import CURRENCY_RATES, get_currency_rate
+from database import DB_PATH
+
+CUBE_DIR = DB_PATH.parent / "cube"
+DTYPE = np.dtype("<f8")
+CAPACITY_STEP = 256  # 티커 용량 여유 — 신규 편입 몇 개로는 재구축하지 않게
+
+# (큐브 필드, SQL 컬럼). market_cap_usd 는 native market_cap 을 읽은 뒤 환산한다.
+SNAPSHOT_FIELDS = (
+    ("price", "price"),
+    ("market_cap_usd", "market_cap"),
+    ("volume", "volume"),
+    ("avg_volume", "avg_volume"),
+)
+SCORE_FIELDS = (
+    ("scale_score", "scale_score"),
+    ("growth_score", "growth_score"),
+    ("profitability_score", "profitability_score"),
+    ("sentiment_score", "sentiment_score"),
+    ("raw_total_score", "raw_total_score"),
+    ("smoothed_score", "smoothed_score"),
+)
+FIELDS = tuple(name for name, _ in SNAPSHOT_FIELDS + SCORE_FIELDS)
+
+
+class Cube(NamedTuple):
+    """load() 결과. fields 의 배열은 (len(dates), len(tickers)) 읽기 전용 memmap 뷰."""
+
+    tickers: list[str]
+    dates: list[str]
+    ticker_ids: dict[str, int]
+    day_numbers: dict[str, int]
+    fields: dict[str, np.ndarray]
+
+    def field(self, name: str) -> np.ndarray:
+        return self.fields[name]
+
+    def series(self, ticker: str, name: str) -> np.ndarray:
+        """한 종목의 날짜순 값(NaN = 그날 행 없음)."""
+        return self.fields[name][:, self.ticker_ids[ticker]]
+
+
+def cube_enabled() -> bool:
+    """CUBE_EXPORT 환경변수. 수집 단계의 자동 갱신 스위치."""
+    return os.environ.get("CUBE_EXPORT", "").strip().lower() in ("1", "true", "yes")
+
+
+def _capacity(n: int) -> int:
+    return (n + n // 4) // CAPACITY_STEP * CAPACITY_STEP + CAPACITY_STEP
+
+
+def _fingerprints(conn: sqlite3.Connection, source: str) -> dict[str, list]:
+    """{date: [스냅샷 행 수, TOTAL..., 점수 행 수, TOTAL...]} — 두 테이블 각각 GROUP BY 한 번."""
+    out: dict[str, list] = {}
+    width = 1 + len(SNAPSHOT_FIELDS)
+    for table, fields, offset in ((source, SNAPSHOT_FIELDS, 0), ("score_history", SCORE_FIELDS, width)):
+        totals = "".join(f", TOTAL({col})" for _, col in fields)
+        for row in conn.execute(f"SELECT date, COUNT(*){totals} FROM {table} GROUP BY date"):
+            fp = out.setdefault(row[0], [0] * (width + 1 + len(SCORE_FIELDS)))
+            fp[offset:offset + len(row) - 1] = row[1:]
+    return out
+
+
+def _tickers(conn: sqlite3.Connection, source: str, known: list[str]) -> list[str]:
+    """기존 id 순서를 유지하고 새 티커만 정렬해 뒤에 붙인다."""
+    seen = set(known)
+    found = {r[0] for r in conn.execute(f"SELECT DISTINCT ticker FROM {source}")}
+    found.update(r[0] for r in conn.execute("SELECT DISTINCT ticker FROM score_history"))
+    return known + sorted(found - seen)
+
+
+def _rows(conn, source: str, dates: list[str], ticker_ids: dict[str, int], capacity: int) -> dict[str, np.ndarray]:
+    """dates 의 필드별 (len(dates), capacity) 블록 — 행 i 가 dates[i]."""
+    day = {d: i for i, d in enumerate(dates)}
+    block = {name: np.full((len(dates), capacity), np.nan, dtype=DTYPE) for name in FIELDS}
+    rate = {t: get_currency_rate(t) for t in ticker_ids}
+
+    for table, fields in ((source, SNAPSHOT_FIELDS), ("score_history", SCORE_FIELDS)):
+        cols = ", ".join(col for _, col in fields)
+        for start in range(0, len(dates), 500):  # SQLite 변수 개수 제한
+            chunk = dates[start:start + 500]
+            rows = conn.execute(
+                f"SELECT ticker, date, {cols} FROM {table} WHERE date IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            if not rows:
+                continue
+            r = np.fromiter((day[row[1]] for row in rows), dtype=np.int64, count=len(rows))
+            c = np.fromiter((ticker_ids[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+            for k, (name, _) in enumerate(fields):
+                values = np.array([row[2 + k] for row in rows], dtype=DTYPE)  # None → nan
+                if name == "market_cap_usd":
+                    values /= np.array([rate[row[0]] for row in rows], dtype=DTYPE)
+                block[name][r, c] = values
+    return block
+
+
+def _write_meta(root: Path, meta: dict) -> None:
+    (root / "tickers.txt").write_text("".join(t + "\n" for t in meta.pop("tickers")))
+    (root / "dates.txt").write_text("".join(d + "\n" for d in meta.pop("dates")))
+    tmp = root / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, root / "meta.json")
+
+
+def _read_meta(root: Path) -> dict | None:
+    path = root / "meta.json"
+    if not path.exists():
+        return None
+    meta = json.loads(path.read_text())
+    meta["tickers"] = (root / "tickers.txt").read_text().splitlines()
+    meta["dates"] = (root / "dates.txt").read_text().splitlines()
+    return meta
+
+
+def _rebuild(conn, source: str, root: Path, tickers: list[str], fps: dict[str, list]) -> None:
+    dates = sorted(fps)
+    capacity = _capacity(len(tickers))
+    ids = {t: i for i, t in enumerate(tickers)}
+    block = _rows(conn, source, dates, ids, capacity)
+
+    tmp = root.with_name(root.name + ".next")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for name in FIELDS:
+        block[name].tofile(tmp / f"{name}.f64")
+    _write_meta(tmp, {
+        "version": 1, "fields": list(FIELDS), "rates": CURRENCY_RATES, "capacity": capacity,
+        "tickers": tickers, "dates": dates, "fingerprints": fps,
+    })
+    old = root.with_name(root.name + ".old")
+    if root.exists():
+        os.replace(root, old)
+    os.replace(tmp, root)
+    if old.exists():
+        shutil.rmtree(old)
+
+
+def update(db_path: Path = DB_PATH, root: Path = CUBE_DIR, full: bool = False) -> str:
+    """큐브를 DB 에 맞춘다. "rebuilt" / "updated" / "unchanged" 중 하나를 돌려준다."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        attach_archive(conn)
+        source = snapshots_source(conn)
+        fps = _fingerprints(conn, source)
+        meta = None if full else _read_meta(root)
+
+        reason = None
+        if meta is None:
+            reason = "no cube" if not full else "--full"
+        elif meta["fields"] != list(FIELDS) or meta["rates"] != CURRENCY_RATES:
+            reason = "fields or FX rates changed"
+        else:
+            tickers = _tickers(conn, source, meta["tickers"])
+            stored = meta["dates"]
+            new_dates = sorted(set(fps) - set(stored))
+            if len(tickers) > meta["capacity"]:
+                reason = f"{len(tickers)} tickers > capacity {meta['capacity']}"
+            elif set(stored) - set(fps):
+                reason = "dates removed"
+            elif new_dates and stored and new_dates[0] <= stored[-1]:
+                reason = f"date {new_dates[0]} inserted before {stored[-1]}"
+        if reason:
+            tickers = _tickers(conn, source, [] if meta is None else meta["tickers"])
+            _rebuild(conn, source, root, tickers, fps)
+            print(f"  cube rebuilt ({reason}): {len(fps)} dates × {len(tickers)} tickers")
+            return "rebuilt"
+
+        capacity = meta["capacity"]
+        ids = {t: i for i, t in enumerate(tickers)}
+        changed = [d for d in stored if meta["fingerprints"].get(d) != fps[d]]
+        if not changed and not new_dates and len(tickers) == len(meta["tickers"]):
+            print(f"  cube unchanged: {len(stored)} dates × {len(tickers)} tickers")
+            return "unchanged"
+
+        dates = stored + new_dates
+        day = {d: i for i, d in enumerate(dates)}
+        touched = changed + new_dates
+        block = _rows(conn, source, touched, ids, capacity) if touched else None
+        for name in FIELDS:
+            path = root / f"{name}.f64"
+            with path.open("r+b") as f:
+                f.truncate(len(dates) * capacity * DTYPE.itemsize)
+            if block is None:
+                continue
+            arr = np.memmap(path, dtype=DTYPE, mode="r+", shape=(len(dates), capacity))
+            arr[[day[d] for d in touched]] = block[name]
+            arr.flush()
+            del arr
+        _write_meta(root, {
+            "version": 1, "fields": list(FIELDS), "rates": CURRENCY_RATES, "capacity": capacity,
+            "tickers": tickers, "dates": dates, "fingerprints": fps,
+        })
+        print(f"  cube updated: {len(new_dates)} new dates, {len(changed)} rewritten, "
+              f"{len(tickers) - len(meta['tickers'])} new tickers")
+        return "updated"
+    finally:
+        conn.close()
+
+
+def update_stage(db_path: Path = DB_PATH) -> None:
+    """수집 단계 훅: CUBE_EXPORT=1 이면 publish 뒤 증분 갱신."""
+    if cube_enabled():
+        update(db_path)
+
+
+def load(root: Path = CUBE_DIR) -> Cube:
+    """읽기 전용 memmap 으로 연다(복사 없음). 큐브가 없으면 FileNotFoundError."""
+    meta = _read_meta(root)
+    if meta is None:
+        raise FileNotFoundError(f"{root / 'meta.json'} not found — run scripts/cube.py first")
+    tickers, dates, capacity = meta["tickers"], meta["dates"], meta["capacity"]
+    fields = {}
+    for name in meta["fields"]:
+        if dates:
+            arr = np.memmap(root / f"{name}.f64", dtype=DTYPE, mode="r", shape=(len(dates), capacity))
+        else:
+            arr = np.empty((0, capacity), dtype=DTYPE)
+        fields[name] = arr[:, :len(tickers)]
+    return Cube(
+        tickers=tickers,
+        dates=dates,
+        ticker_ids={t: i for i, t in enumerate(tickers)},
+        day_numbers={d: i for i, d in enumerate(dates)},
+        fields=fields,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory-mapped ticker × date × field cube")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="원본 DB(읽기만 함)")
+    parser.add_argument("--out", type=Path, default=CUBE_DIR, help="큐브 디렉터리")
+    parser.add_argument("--full", action="store_true", help="증분 대신 전체 재구축")
+    parser.add_argument("--info", action="store_true", help="갱신하지 않고 현재 큐브 요약만")
+    args = parser.parse_args()
+    if args.info:
+        c = load(args.out)
+        span = f"{c.dates[0]} ~ {c.dates[-1]}" if c.dates else "-"
+        print(f"{len(c.dates)} dates ({span}) × {len(c.tickers)} tickers × {len(c.fields)} fields")
+        return
+    if not args.db.exists():
+        print(f"Error: Database not found at {args.db}")
+        sys.exit(1)
+    update(args.db, args.out, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""파이프라인 공용 SQLite 연결 — 프로파일별 PRAGMA, 스키마 버전 마이그레이션, 배포용 마감.
+
+왜 필요한가:
+  스크립트마다 sqlite3.connect(DB_PATH) 를 기본 설정으로 열었고, WAL→DELETE 변환과
+  -wal/-shm 정리가 update_data / backfill_valuation_metrics / backfill_new_ticker_score_history
+  에 복붙돼 있었다. 테이블 보장(ensure_*)도 실행마다 DDL 을 전부 다시 돌렸다.
+
+사용:
+  conn = connect("bulk")     # 대량 적재(일일 수집·백필)
+  ...
+  publish(conn)              # 커밋 → 체크포인트 → DELETE 저널 → -wal/-shm 삭제 → close
+
+프로파일(PROFILES):
+  default   일반 쓰기(add_ticker, 지수 갱신 등). 캐시 64MB, mmap 256MB, temp 메모리.
+  bulk      대량 적재. 캐시 256MB, mmap 1GB, synchronous=OFF.
+            CI 러너에서 db-snapshot 을 받아 쓰고 publish 로 마감하는 구조라, 도중에 OS 가
+            죽으면 결과물을 버리고 다시 돌리면 된다 → fsync 를 생략해 적재 속도를 산다.
+  readonly  조회 전용(suggest_candidates). mode=ro 로 열고 마이그레이션을 돌리지 않는다.
+
+스키마 버전:
+  schema_version(version, name, applied_at) 에 적용한 MIGRATIONS 번호를 남기고, 연결 시
+  아직 적용 안 된 것만 순서대로 실행한다 → 평소 실행에선 DDL 0회.
+  base 테이블(companies, daily_snapshots 등)은 seed.ts / drizzle 소관이라 여기 없다.
+  모든 DDL 은 IF NOT EXISTS / 컬럼 존재 확인이라, 버전 테이블 도입 전 DB 에 처음 적용해도
+  기존 테이블을 건드리지 않는다. 새 테이블·컬럼은 MIGRATIONS 끝에 번호를 붙여 추가한다.
+"""
+
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+# Ensure sibling modules (shares_history.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+
+PROFILES: dict[str, dict[str, int | str]] = {
+    "default": {
+        "cache_size": -64_000,  # KiB 단위(음수) = 64MB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "synchronous": "FULL",
+    },
+    "bulk": {
+        "cache_size": -256_000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "synchronous": "OFF",
+    },
+    "readonly": {
+        "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def _score_tables(conn: sqlite3.Connection) -> None:
+    """company_scores 와 일일 수집이 채우는 부속 테이블(구 update_data.ensure_score_tables)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS company_scores (
+            ticker TEXT PRIMARY KEY REFERENCES companies(ticker),
+            revenue_growth REAL,
+            earnings_growth REAL,
+            operating_margin REAL,
+            return_on_equity REAL,
+            recommendation_key TEXT,
+            analyst_count INTEGER,
+            target_mean_price REAL,
+            free_cashflow INTEGER,
+            beta REAL,
+            debt_to_equity REAL,
+            scale_score REAL DEFAULT 0,
+            growth_score REAL DEFAULT 0,
+            profitability_score REAL DEFAULT 0,
+            sentiment_score REAL DEFAULT 0,
+            raw_total_score REAL DEFAULT 0,
+            smoothed_score REAL DEFAULT 0,
+            data_quality REAL DEFAULT 0,
+            metrics_updated_at TEXT,
+            score_updated_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS score_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL REFERENCES companies(ticker),
+            date TEXT NOT NULL,
+            raw_total_score REAL,
+            smoothed_score REAL,
+            scale_score REAL,
+            growth_score REAL,
+            profitability_score REAL,
+            sentiment_score REAL,
+            UNIQUE(ticker, date)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_score_history_ticker ON score_history(ticker);
+        CREATE INDEX IF NOT EXISTS idx_score_history_date ON score_history(date);
+
+        CREATE TABLE IF NOT EXISTS analyst_recommendation_trend (
+            ticker TEXT NOT NULL REFERENCES companies(ticker),
+            period TEXT NOT NULL,
+            strong_buy INTEGER,
+            buy INTEGER,
+            hold INTEGER,
+            sell INTEGER,
+            strong_sell INTEGER,
+            updated_at TEXT,
+            PRIMARY KEY (ticker, period)
+        );
+
+        CREATE TABLE IF NOT EXISTS earnings_calendar (
+            ticker TEXT NOT NULL REFERENCES companies(ticker),
+            earnings_date TEXT NOT NULL,
+            earnings_time TEXT,
+            is_estimate INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT,
+            PRIMARY KEY (ticker, earnings_date)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_earnings_calendar_date
+            ON earnings_calendar(earnings_date);
+
+        -- 공모주(IPO) 일정. 상장 전이라 티커가 없어 종목명이 키다(companies FK 없음).
+        -- 값은 표시용 원문 문자열(공모가 '23,000' 등) — 원화 라벨이라 toUsd 대상이 아니다.
+        CREATE TABLE IF NOT EXISTS ipo_calendar (
+            name TEXT NOT NULL,
+            event_type TEXT NOT NULL,      -- 'subscription' | 'listing'
+            event_date TEXT NOT NULL,      -- 청약 시작일 / 상장일 (YYYY-MM-DD)
+            end_date TEXT,                 -- 청약 종료일 (listing 은 NULL)
+            offer_price TEXT,              -- 확정공모가
+            price_band TEXT,               -- 희망공모가 밴드
+            competition TEXT,              -- 청약경쟁률
+            underwriter TEXT,              -- 주간사
+            detail_url TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (name, event_type)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_ipo_calendar_date
+            ON ipo_calendar(event_date);
+    """)
+
+
+def _market_index_tables(conn: sqlite3.Connection) -> None:
+    """국가 지수 스냅샷·시계열(구 update_indices.ensure_tables)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS market_indices (
+            symbol TEXT PRIMARY KEY,
+            country TEXT NOT NULL,
+            name TEXT NOT NULL,
+            price REAL,
+            change_percent REAL,
+            week_52_high REAL,
+            week_52_low REAL,
+            as_of_date TEXT,
+            sort_order INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS market_index_history (
+            symbol TEXT NOT NULL,
+            date TEXT NOT NULL,
+            close REAL NOT NULL,
+            PRIMARY KEY (symbol, date)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_index_history_symbol ON market_index_history(symbol);
+    """)
+    # 기간별 등락 컬럼 — change_percent 는 1일 등락.
+    add_columns(conn, "market_indices", {"change_1w": "REAL", "change_1m": "REAL", "change_1y": "REAL"})
+
+
+def _shares_history(conn: sqlite3.Connection) -> None:
+    """상장주식수 타임라인(shares_history.py). 처음 만들 때 기존 스냅샷에서 시드."""
+    from shares_history import seed_from_snapshots
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shares_history (
+            ticker TEXT NOT NULL REFERENCES companies(ticker),
+            date TEXT NOT NULL,            -- 이 주식수가 처음 관측된 날 (YYYY-MM-DD)
+            shares INTEGER NOT NULL,
+            source TEXT,                   -- 'info' | 'snapshot'
+            PRIMARY KEY (ticker, date)
+        )
+        """
+    )
+    seeded = seed_from_snapshots(conn)
+    print(f"  shares_history seeded {seeded} tickers from daily_snapshots")
+
+
+def _snapshot_anomalies(conn: sqlite3.Connection) -> None:
+    """이상치 스캔 결과(scan_anomalies.py)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snapshot_anomalies (
+            ticker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            kind TEXT NOT NULL,            -- 'split' | 'price_jump' | 'mcap_break' | 'change_mismatch'
+            value REAL,                    -- 판정에 쓴 비율(또는 %p 차이)
+            detail TEXT,
+            detected_at TEXT,
+            PRIMARY KEY (ticker, date, kind)
+        )
+        """
+    )
+
+
+def _backfill_progress(conn: sqlite3.Connection) -> None:
+    """백필 장부(backfill_data.py --resume)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            ticker TEXT NOT NULL,
+            mode TEXT NOT NULL,            -- 'new' | 'extend' | 'gap'
+            window TEXT NOT NULL,          -- 'start~end_exclusive'
+            status TEXT NOT NULL,          -- 'done' | 'empty' | 'failed' | 'error'
+            rows INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (ticker, mode, window)
+        )
+        """
+    )
+
+
+def _query_indexes(conn: sqlite3.Connection) -> None:
+    """핫 쿼리 지원 인덱스(scripts/tests/test_query_plans.py 가 회귀를 잡는다).
+
+    - daily_snapshots(date): fetch_sector_companies 의 WHERE date = ?, MAX(date),
+      DISTINCT date — (ticker, date) 인덱스는 선두 컬럼이 ticker 라 못 쓴다.
+    - sector_companies(sector_id / ticker): seed.ts 로 만든 DB 엔 ticker 쪽이 없다.
+    - score_history(ticker): UNIQUE(ticker, date) 가 덮지만 drizzle 스키마와 맞춰 둔다.
+    - backfill_progress(mode, window): --resume 조회. PK 선두가 ticker 라 못 쓴다.
+    """
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_snapshots_date ON daily_snapshots(date);
+        CREATE INDEX IF NOT EXISTS idx_sector_companies_sector ON sector_companies(sector_id);
+        CREATE INDEX IF NOT EXISTS idx_sector_companies_ticker ON sector_companies(ticker);
+        CREATE INDEX IF NOT EXISTS idx_score_history_ticker ON score_history(ticker);
+        CREATE INDEX IF NOT EXISTS idx_backfill_progress_window ON backfill_progress(mode, window);
+        ANALYZE;
+    """)
+
+
+def _archive_log(conn: sqlite3.Connection) -> None:
+    """hot→cold 이동 기록(archive.py). 아카이브 파일 유실 감지용."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive_log (
+            cutoff TEXT NOT NULL,          -- 이 날짜 미만을 옮김
+            moved INTEGER NOT NULL,
+            archived_at TEXT
+        )
+        """
+    )
+
+
+# latest_snapshots 가 daily_snapshots 에서 복사하는 컬럼(id 제외, ticker 는 PK).
+LATEST_SNAPSHOT_COLUMNS = (
+    "ticker", "date", "market_cap", "price", "price_change", "week_52_high", "week_52_low",
+    "day_high", "day_low", "volume", "avg_volume", "pe_ratio", "peg_ratio", "forward_pe",
+    "price_to_book", "ev_to_ebitda", "updated_at",
+)
+
+
+def _latest_snapshots(conn: sqlite3.Connection) -> None:
+    """티커당 최신 스냅샷 1행 읽기 모델 + daily_snapshots 트리거.
+
+    MAX(date)/GROUP BY ticker 상관 서브쿼리 대신 PK 조회로 최신 행을 읽게 한다. 유지는
+    트리거라 쓰는 쪽(일일 UPSERT, 백필, add_ticker, archive 이동, TS 마이그레이션)이 따로
+    할 일이 없고, 항상 같은 트랜잭션 안에서 맞춰진다.
+      INSERT/UPDATE: 새 행의 date 가 현재 최신 이상일 때만 덮는다(과거 백필은 no-op).
+      DELETE: 지운 행이 최신이었으면 남은 행 중 최신으로 다시 채운다.
+    daily_snapshots 를 재생성하는 마이그레이션은 트리거가 함께 사라지므로 이 함수를 다시 부른다.
+    """
+    cols = ", ".join(LATEST_SNAPSHOT_COLUMNS)
+    new_vals = ", ".join(f"NEW.{c}" for c in LATEST_SNAPSHOT_COLUMNS)
+    updates = ",\n                ".join(
+        f"{c} = excluded.{c}" for c in LATEST_SNAPSHOT_COLUMNS if c != "ticker"
+    )
+    upsert = f"""
+            INSERT INTO latest_snapshots ({cols}) VALUES ({new_vals})
+            ON CONFLICT(ticker) DO UPDATE SET
+                {updates}
+            WHERE excluded.date >= latest_snapshots.date;"""
+    # executescript 는 먼저 COMMIT 한다 — 재생성 마이그레이션(9) 중간에 불리므로 한 문장씩.
+    statements = (
+        """
+        CREATE TABLE IF NOT EXISTS latest_snapshots (
+            ticker TEXT PRIMARY KEY REFERENCES companies(ticker),
+            date TEXT NOT NULL,
+            market_cap INTEGER, price REAL, price_change REAL,
+            week_52_high REAL, week_52_low REAL, day_high REAL, day_low REAL,
+            volume INTEGER, avg_volume INTEGER, pe_ratio REAL, peg_ratio REAL,
+            forward_pe REAL, price_to_book REAL, ev_to_ebitda REAL, updated_at TEXT
+        )""",
+        "DROP TRIGGER IF EXISTS trg_latest_snapshots_insert",
+        "DROP TRIGGER IF EXISTS trg_latest_snapshots_update",
+        "DROP TRIGGER IF EXISTS trg_latest_snapshots_delete",
+        f"""
+        CREATE TRIGGER trg_latest_snapshots_insert AFTER INSERT ON daily_snapshots
+        WHEN NEW.ticker IS NOT NULL
+        BEGIN{upsert}
+        END""",
+        f"""
+        CREATE TRIGGER trg_latest_snapshots_update AFTER UPDATE ON daily_snapshots
+        WHEN NEW.ticker IS NOT NULL
+        BEGIN{upsert}
+        END""",
+        f"""
+        CREATE TRIGGER trg_latest_snapshots_delete AFTER DELETE ON daily_snapshots
+        WHEN OLD.date = (SELECT date FROM latest_snapshots WHERE ticker = OLD.ticker)
+        BEGIN
+            DELETE FROM latest_snapshots WHERE ticker = OLD.ticker;
+            INSERT INTO latest_snapshots ({cols})
+            SELECT {cols} FROM daily_snapshots
+            WHERE ticker = OLD.ticker ORDER BY date DESC LIMIT 1;
+        END""",
+        "DELETE FROM latest_snapshots",
+        f"""
+        INSERT INTO latest_snapshots ({cols})
+        SELECT {cols} FROM daily_snapshots ds
+        WHERE ds.ticker IS NOT NULL
+          AND ds.date = (SELECT MAX(date) FROM daily_snapshots WHERE ticker = ds.ticker)""",
+    )
+    for sql in statements:
+        conn.execute(sql)
+
+
+def _column_defs(conn: sqlite3.Connection, table: str) -> dict[str, str]:
+    """sqlite_master 원문에서 {컬럼명: 컬럼 선언 원문} (선언 순서). 테이블 제약(UNIQUE(...) 등)은 뺀다.
+
+    ALTER TABLE ADD COLUMN 으로 붙은 컬럼도 원문에 이어 붙어 있으므로 함께 나온다.
+    """
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    sql = re.sub(r"--[^\n]*", "", sql)
+    body = sql[sql.index("(") + 1 : sql.rindex(")")]
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    defs: dict[str, str] = {}
+    for part in parts:
+        decl = " ".join(part.split())
+        name = re.match(r"[\"`\[]?(\w*)", decl).group(1)
+        if not name or name.upper() in ("CONSTRAINT", "PRIMARY", "UNIQUE", "CHECK", "FOREIGN"):
+            continue
+        defs[name] = decl
+    return defs
+
+
+def _rebuild_without_rowid(conn: sqlite3.Connection, table: str, indexes: dict[str, str]) -> None:
+    """table 을 (ticker, date) 클러스터 WITHOUT ROWID 로 재생성. id 컬럼과 기존 인덱스는 버린다.
+
+    indexes = {이름: 컬럼} 으로 남길 보조 인덱스를 다시 만든다. 컬럼 선언(타입, NOT NULL,
+    DEFAULT, REFERENCES)은 sqlite_master 원문에서 그대로 옮긴다 — PRAGMA table_info 로
+    재구성하면 REFERENCES 가 빠진다. PK 가 되는 ticker/date 에는 NOT NULL 을 보탠다(schema.ts).
+    """
+    defs = _column_defs(conn, table)
+    defs.pop("id", None)
+    cols = list(defs)
+    decls = []
+    for name, decl in defs.items():
+        if name in ("ticker", "date") and "NOT NULL" not in decl.upper():
+            decl = re.sub(r"^(\S+\s+\S+)", r"\1 NOT NULL", decl)
+        decls.append(decl)
+    col_list = ", ".join(cols)
+    conn.execute(f"DROP TABLE IF EXISTS {table}_compact")
+    conn.execute(
+        f"CREATE TABLE {table}_compact ({', '.join(decls)}, PRIMARY KEY (ticker, date)) WITHOUT ROWID"
+    )
+    conn.execute(
+        f"""
+        INSERT INTO {table}_compact ({col_list})
+        SELECT {col_list} FROM {table} WHERE ticker IS NOT NULL AND date IS NOT NULL
+        ORDER BY ticker, date
+        """
+    )
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_compact RENAME TO {table}")
+    for name, column in indexes.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})")
+
+
+def _compact_time_series(conn: sqlite3.Connection) -> None:
+    """daily_snapshots·score_history 를 (ticker, date) PK WITHOUT ROWID 로.
+
+    이전 배치: 행 본문(rowid 순 = 수집 순, 날짜 우선) + UNIQUE(ticker, date) 자동 인덱스 +
+    idx_snapshots_ticker_date → (ticker, date) 가 세 번 저장되고, 티커 구간 조회는 인덱스를
+    타고 날짜마다 다른 본문 페이지를 읽었다. 클러스터 배치에선 본문이 곧 (ticker, date) B-tree
+    라 키는 한 번, 티커 구간은 연속 페이지. 남기는 보조 인덱스는 날짜 단면용 (date) 하나.
+
+    surrogate id 는 어디서도 읽지 않아 버린다. ticker/date 는 TEXT 그대로 둔다 — drizzle 타입,
+    TS 쿼리, 파이썬 UPSERT(ON CONFLICT(ticker, date)) 가 전부 문자열 키를 쓴다.
+    정수 일자·티커 사전 + 호환 뷰까지 가지 않은 이유도 같다 — 뷰에는 UPSERT 가 안 된다.
+
+    scripts/measure_storage.py 로 전후를 잰다(합성 600종목×250일, 날짜 우선 적재):
+    시계열 테이블+인덱스 24.3MB → 15.6MB, 티커 구간 조회 263 → 9 페이지. 대신 날짜 단면
+    (WHERE date = ?) 은 21 → 650 페이지(행이 티커별로 흩어짐, 2ms 수준) — 최신일 단면은
+    latest_snapshots 가 받으므로 남는 건 scoring 1회/백필뿐이다.
+    """
+    # DROP TABLE 이 참조 검사에 걸리지 않게 끈다. 트랜잭션 밖에서만 먹히므로 되돌리는 건
+    # 커밋 뒤 migrate() 몫이다. 대신 커밋 전에 옮긴 행의 참조를 직접 확인한다.
+    conn.execute("PRAGMA foreign_keys = OFF")
+    # 첫 DDL 부터 한 트랜잭션 — 중간에 실패하면 migrate() 의 롤백이 재생성 전체를 되돌린다.
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    _rebuild_without_rowid(conn, "daily_snapshots", {"idx_snapshots_date": "date"})
+    _rebuild_without_rowid(conn, "score_history", {"idx_score_history_date": "date"})
+    for table in ("daily_snapshots", "score_history"):
+        broken = conn.execute(f"PRAGMA foreign_key_check({table})").fetchall()
+        if broken:
+            raise sqlite3.IntegrityError(f"{table}: {len(broken)} rows reference missing companies")
+    # DROP TABLE 로 사라진 latest_snapshots 트리거를 다시 건다(내용도 재시드).
+    _latest_snapshots(conn)
+    conn.execute("ANALYZE")
+
+
+def _index_stats(conn: sqlite3.Connection) -> None:
+    """market_indices 파생 통계 컬럼 — update_indices.compute_stats 가 저장 이력으로 채운다.
+
+    change_* 는 %, drawdown 은 저장 이력(최대 5년) 고점 대비 %(≤ 0), volatility_1y 는
+    최근 252 거래일 일간 로그수익률 표준편차의 연율화 %.
+    """
+    add_columns(conn, "market_indices", {
+        "change_3m": "REAL",
+        "change_ytd": "REAL",
+        "change_3y": "REAL",
+        "change_5y": "REAL",
+        "drawdown": "REAL",
+        "volatility_1y": "REAL",
+    })
+
+
+def _crawl_state(conn: sqlite3.Connection) -> None:
+    """외부 페이지 크롤 상태(ipo_calendar.py) — 조건부 요청 검증자와 본문 해시.
+
+    url 마다 마지막으로 받은 ETag/Last-Modified 와 디코딩한 본문의 sha256. 다음 실행이
+    304 를 받거나 해시가 같으면 파싱·UPSERT 를 건너뛴다.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            checked_at TEXT,               -- 마지막 요청 시각
+            changed_at TEXT                -- 해시가 마지막으로 바뀐 시각
+        )
+        """
+    )
+
+
+def _ipo_details(conn: sqlite3.Connection) -> None:
+    """공모주 상세 페이지 보강(ipo_details.py) — 38 의 `no=` id 가 키.
+
+    ipo_calendar 와 같은 원문 라벨 문자열이다('1,500,000주', '35.20%'). content_hash 가 같으면
+    다시 파싱하지 않고 fetched_at 만 갱신한다.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ipo_details (
+            detail_no INTEGER PRIMARY KEY,     -- 38 상세 URL 의 no=
+            name TEXT,
+            offering_shares TEXT,              -- 공모주식수
+            offering_amount TEXT,              -- 공모금액
+            forecast_dates TEXT,               -- 수요예측일
+            institutional_competition TEXT,    -- 기관(수요예측) 경쟁률
+            lockup_ratio TEXT,                 -- 의무보유확약 비율
+            content_hash TEXT,
+            fetched_at TEXT,                   -- 마지막 요청 시각
+            changed_at TEXT                    -- 내용이 마지막으로 바뀐 시각
+        )
+        """
+    )
+
+
+def _crawl_parse_version(conn: sqlite3.Connection) -> None:
+    """crawl_state.parse_version — 상태를 남긴 파서 버전(ipo_calendar.PARSE_VERSION).
+
+    버전이 다르면 조건부 헤더를 빼고 받는다. 해시만으로는 부족했다 — ETag 를 지키는 서버는
+    304 를 돌려주고, 그러면 해시 비교까지 가지 않아 고친 파서가 돌지 않는다.
+    """
+    add_columns(conn, "crawl_state", {"parse_version": "INTEGER"})
+
+
+# (version, name, apply). 번호는 추가만 — 이미 배포된 항목을 고치거나 재번호하지 않는다.
+MIGRATIONS = [
+    (1, "score_tables", _score_tables),
+    (2, "market_index_tables", _market_index_tables),
+    (3, "shares_history", _shares_history),
+    (4, "snapshot_anomalies", _snapshot_anomalies),
+    (5, "backfill_progress", _backfill_progress),
+    (6, "query_indexes", _query_indexes),
+    (7, "archive_log", _archive_log),
+    (8, "latest_snapshots", _latest_snapshots),
+    (9, "compact_time_series", _compact_time_series),
+    (10, "index_stats", _index_stats),
+    (11, "crawl_state", _crawl_state),
+    (12, "ipo_details", _ipo_details),
+    (13, "crawl_parse_version", _crawl_parse_version),
+]
+
+
+def add_columns(conn: sqlite3.Connection, table: str, columns: dict[str, str]) -> None:
+    """없는 컬럼만 ALTER TABLE ADD COLUMN (SQLite 엔 IF NOT EXISTS 가 없다)."""
+    existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT
+        )
+        """
+    )
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """미적용 마이그레이션을 순서대로 적용. 적용 개수를 반환.
+
+    마이그레이션이 바꾼 PRAGMA foreign_keys 는 커밋(또는 롤백) 뒤 원래 값으로 되돌린다.
+    """
+    current = schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    for version, name, apply in pending:
+        print(f"Schema migration {version}: {name}")
+        try:
+            apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, datetime('now'))",
+                (version, name),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error: schema migration {version} ({name}) failed: {e}")
+            sys.exit(1)
+        finally:
+            conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+    return len(pending)
+
+
+def _leave_wal(conn: sqlite3.Connection) -> None:
+    """WAL 이면 DELETE 로. git/Vercel 은 본 파일만 보므로 -wal 에 남은 쓰기는 유실된다."""
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.lower() != "wal":
+        return
+    print("Converting journal mode from WAL to DELETE for git compatibility...")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        print(f"Journal mode: {conn.execute('PRAGMA journal_mode').fetchone()[0]}")
+    except sqlite3.OperationalError as e:
+        print(f"Warning: Could not change journal mode (other readers?): {e}")
+        print("Continuing with WAL mode - publish() checkpoints before the file is committed")
+
+
+def connect(profile: str = "default", path: Path = DB_PATH) -> sqlite3.Connection:
+    """프로파일 PRAGMA 를 적용한 연결. 쓰기 프로파일은 마이그레이션까지 끝낸 상태로 돌려준다."""
+    settings = PROFILES[profile]
+    if profile == "readonly":
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(path)
+    for pragma, value in settings.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    if profile != "readonly":
+        _leave_wal(conn)
+        migrate(conn)
+    return conn
+
+
+def publish(conn: sqlite3.Connection, path: Path = DB_PATH) -> None:
+    """커밋 후 배포 가능한 상태로 닫는다: DELETE 저널 모드, -wal/-shm 없음.
+
+    Vercel 은 읽기 전용 파일시스템이라 WAL 파일이 필요한 DB 를 열면 500 이 난다.
+    """
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+    for suffix in ("-wal", "-shm"):
+        p = Path(f"{path}{suffix}")
+        if p.exists():
+            p.unlink()
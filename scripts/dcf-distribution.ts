@@ -12,8 +12,7 @@ const rows = db
             ds.price AS price, ds.market_cap AS mc
      FROM company_scores cs
      LEFT JOIN company_profiles cp ON cp.ticker = cs.ticker
-     LEFT JOIN daily_snapshots ds ON ds.ticker = cs.ticker
-       AND ds.date = (SELECT MAX(date) FROM daily_snapshots WHERE ticker = cs.ticker)`
+     LEFT JOIN latest_snapshots ds ON ds.ticker = cs.ticker`
   )
   .all() as Array<{
   ticker: string
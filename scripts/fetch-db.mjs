@@ -12,13 +12,43 @@
  *  3) 이미 있는 로컬 유효 DB — 개발 오프라인 폴백.
  *
  * 종료 코드: 0=유효 DB 확보 / 1=실패(빌드·수집 중단 → 빈·손상 DB 배포/푸시 방지)
- * 유효성: SQLite 매직 헤더("SQLite format 3\0") + 최소 크기.
+ * 유효성: SQLite 매직 헤더("SQLite format 3\0") + 최소 크기 + (있으면) sha256 대조.
+ *
+ * db-snapshot 에는 scripts/publish_db.py 아티팩트가 올라간다: hegemony.db, hegemony.db.zst,
+ * hegemony.db.sha256. Node 에 zlib.zstdDecompressSync(22.15+)가 있으면 .zst 를 받아 풀고,
+ * 없거나 .zst 가 없으면 원본을 받는다. .sha256 이 없는 옛 스냅샷은 대조를 건너뛴다.
+ *
+ * changeset(scripts/changeset.py): db-snapshot 에 manifest.json 이 있으면 hegemony.db 는 base 이고
+ * 그 뒤 실행분이 changeset-NNNNNN.db.gz 로 쌓여 있다. base 를 받은 뒤 manifest 순서대로
+ * 받아(sha256 대조) changeset 안의 steps SQL 을 그대로 실행한다 — better-sqlite3(빌드) 또는
+ * node:sqlite(의존성 설치 없는 수집 워크플로우). 적용한 manifest 는 data/hegemony.manifest.json
+ * 에 남긴다(다음 수집의 changeset export 가 이어 붙일 기준).
+ *
+ * --archive: data/hegemony_archive.db(scripts/archive.py 의 cold 스냅샷)도 받는다. 수집
+ * 워크플로우 전용 — 웹은 hot DB 만 읽는다. 아직 아카이브가 없으면 경고만 하고 넘어간다
+ * (archive_log 가 있는데 파일이 없으면 archive.py 가 새 빈 아카이브 생성을 거부한다).
  */
 import { execSync } from 'node:child_process'
-import { existsSync, statSync, openSync, readSync, closeSync, mkdirSync, writeFileSync } from 'node:fs'
+import { createHash } from 'node:crypto'
+import {
+  existsSync,
+  statSync,
+  openSync,
+  readSync,
+  closeSync,
+  mkdirSync,
+  readFileSync,
+  writeFileSync,
+  rmSync,
+} from 'node:fs'
 import path from 'node:path'
+import zlib from 'node:zlib'
 
 const DB = path.join(process.cwd(), 'data', 'hegemony.db')
+const ARCHIVE = path.join(process.cwd(), 'data', 'hegemony_archive.db')
+const LOCAL_MANIFEST = path.join(process.cwd(), 'data', 'hegemony.manifest.json')
+const CHANGESET_TMP = path.join(process.cwd(), 'data', '.changeset.db')
+const WANT_ARCHIVE = process.argv.includes('--archive')
 const BRANCH = process.env.DB_SNAPSHOT_BRANCH || 'db-snapshot'
 // 정상 DB 는 10MB+. 손상·빈 DB 가 소스오브트루스를 덮어쓰지 않도록 하한을 둔다.
 const MIN_BYTES = 3_000_000
@@ -31,6 +61,11 @@ const REPO =
     ? `${process.env.VERCEL_GIT_REPO_OWNER}/${process.env.VERCEL_GIT_REPO_SLUG}`
     : 'byunginhb/sector-king')
 
+// 성공 로그용 — tryHttps 가 zstd 경로를 탔는지
+let via = 'HTTPS'
+// 성공 로그용 — 적용한 changeset 수
+let applied = 0
+
 function isValidSqlite(file) {
   try {
     if (!existsSync(file) || statSync(file).size < MIN_BYTES) return false
@@ -47,25 +82,140 @@ function isValidSqlite(file) {
   }
 }
 
+function sha256(file) {
+  return createHash('sha256').update(readFileSync(file)).digest('hex')
+}
+
+// better-sqlite3(빌드: node_modules 있음) → node:sqlite(Node 22.13+) 순. 둘 다 exec/prepare 를 같게 쓴다.
+async function openSqlite(file) {
+  try {
+    const { default: Database } = await import('better-sqlite3')
+    return new Database(file)
+  } catch {
+    // 수집 워크플로우는 npm 의존성을 설치하지 않는다
+  }
+  try {
+    const { DatabaseSync } = await import('node:sqlite')
+    return new DatabaseSync(file)
+  } catch {
+    return null
+  }
+}
+
+// base(DB) 위에 manifest 의 changeset 들을 순서대로 적용. read(file) → Buffer(gzip).
+async function applyChangesets(manifest, read) {
+  const entries = manifest?.changesets ?? []
+  applied = 0
+  if (!entries.length) return true
+  const db = await openSqlite(DB)
+  if (!db) {
+    console.error('[fetch-db] no SQLite binding (better-sqlite3 / node:sqlite) — cannot apply changesets')
+    return false
+  }
+  try {
+    for (const entry of entries) {
+      const packed = await read(entry.file)
+      const actual = createHash('sha256').update(packed).digest('hex')
+      if (actual !== entry.sha256) {
+        console.error(`[fetch-db] ${entry.file}: sha256 mismatch`)
+        return false
+      }
+      writeFileSync(CHANGESET_TMP, zlib.gunzipSync(packed))
+      db.exec(`ATTACH DATABASE '${CHANGESET_TMP.replaceAll("'", "''")}' AS cs`)
+      try {
+        const steps = db.prepare('SELECT sql FROM cs.steps ORDER BY step').all()
+        const counts = JSON.parse(db.prepare("SELECT value FROM cs.meta WHERE key = 'counts'").get().value)
+        db.exec('BEGIN IMMEDIATE')
+        try {
+          for (const { sql } of steps) db.exec(sql)
+          for (const [table, expected] of Object.entries(counts)) {
+            const { n } = db.prepare(`SELECT COUNT(*) AS n FROM main."${table}"`).get()
+            if (Number(n) !== expected) throw new Error(`${entry.file}: ${table} has ${n} rows, expected ${expected}`)
+          }
+          db.exec('COMMIT')
+        } catch (e) {
+          db.exec('ROLLBACK')
+          throw e
+        }
+      } finally {
+        db.exec('DETACH DATABASE cs')
+      }
+    }
+  } catch (e) {
+    console.error(`[fetch-db] changeset apply failed: ${String(e.message).split('\n')[0]}`)
+    return false
+  } finally {
+    db.close()
+    rmSync(CHANGESET_TMP, { force: true })
+  }
+  applied = entries.length
+  return true
+}
+
+function keepManifest(manifest) {
+  if (manifest) writeFileSync(LOCAL_MANIFEST, JSON.stringify(manifest, null, 2) + '\n')
+  else rmSync(LOCAL_MANIFEST, { force: true })
+}
+
+// "<hex>  hegemony.db" (sha256sum 형식) → hex. 없으면 null.
+function parseChecksum(text) {
+  const hex = text && text.trim().split(/\s+/)[0]
+  return hex && /^[0-9a-f]{64}$/.test(hex) ? hex : null
+}
+
+function checksumMatches(expected) {
+  if (!expected) return true
+  const actual = sha256(DB)
+  if (actual !== expected) {
+    console.error(`[fetch-db] sha256 mismatch: expected ${expected.slice(0, 12)}, got ${actual.slice(0, 12)}`)
+    return false
+  }
+  return true
+}
+
 function ensureDir() {
   mkdirSync(path.dirname(DB), { recursive: true })
 }
 
 // 1) HTTPS 다운로드 (Vercel 빌드 포함 어디서나 동작 — git 인증 불필요)
 async function tryHttps() {
-  const url = `https://raw.githubusercontent.com/${REPO}/${BRANCH}/data/hegemony.db`
+  const root = `https://raw.githubusercontent.com/${REPO}/${BRANCH}/data`
+  const base = `${root}/hegemony.db`
   const token = process.env.GH_TOKEN || process.env.GITHUB_TOKEN
+  const get = (url) => fetch(url, { headers: token ? { Authorization: `token ${token}` } : {} })
   try {
-    const res = await fetch(url, {
-      headers: token ? { Authorization: `token ${token}` } : {},
-    })
-    if (!res.ok) {
-      console.error(`[fetch-db] HTTPS ${res.status} for ${REPO}@${BRANCH}`)
-      return false
+    const manifestRes = await get(`${root}/manifest.json`)
+    const manifest = manifestRes.ok ? await manifestRes.json() : null
+    const sumRes = await get(`${base}.sha256`)
+    const expected = manifest?.base?.sha256 ?? (sumRes.ok ? parseChecksum(await sumRes.text()) : null)
+
+    let body = null
+    if (typeof zlib.zstdDecompressSync === 'function') {
+      const res = await get(`${base}.zst`)
+      if (res.ok) {
+        body = zlib.zstdDecompressSync(Buffer.from(await res.arrayBuffer()))
+        via = 'HTTPS zstd'
+      }
+    }
+    if (!body) {
+      const res = await get(base)
+      if (!res.ok) {
+        console.error(`[fetch-db] HTTPS ${res.status} for ${REPO}@${BRANCH}`)
+        return false
+      }
+      body = Buffer.from(await res.arrayBuffer())
     }
     ensureDir()
-    writeFileSync(DB, Buffer.from(await res.arrayBuffer()))
-    return isValidSqlite(DB)
+    writeFileSync(DB, body)
+    if (!isValidSqlite(DB) || !checksumMatches(expected)) return false
+    const readChangeset = async (file) => {
+      const res = await get(`${root}/${file}`)
+      if (!res.ok) throw new Error(`HTTPS ${res.status} for ${file}`)
+      return Buffer.from(await res.arrayBuffer())
+    }
+    if (!(await applyChangesets(manifest, readChangeset))) return false
+    keepManifest(manifest)
+    return true
   } catch (e) {
     console.error(`[fetch-db] HTTPS failed: ${String(e.message).split('\n')[0]}`)
     return false
@@ -73,30 +223,63 @@ async function tryHttps() {
 }
 
 // 2) git fetch (git 인증이 있는 로컬/CI 폴백)
-function tryGit() {
+async function tryGit() {
   try {
     ensureDir()
     execSync(`git fetch --depth=1 origin ${BRANCH}`, { stdio: ['ignore', 'ignore', 'pipe'] })
     execSync('git checkout FETCH_HEAD -- data/hegemony.db', { stdio: ['ignore', 'ignore', 'pipe'] })
-    return isValidSqlite(DB)
+    const show = (file) => execSync(`git show FETCH_HEAD:data/${file}`, { stdio: ['ignore', 'pipe', 'ignore'] })
+    let manifest = null
+    try {
+      manifest = JSON.parse(show('manifest.json').toString())
+    } catch {
+      // changeset 도입 전 스냅샷 — base 단독
+    }
+    let expected = manifest?.base?.sha256 ?? null
+    if (!expected) {
+      try {
+        expected = parseChecksum(show('hegemony.db.sha256').toString())
+      } catch {
+        // 아티팩트 도입 전 스냅샷 — 체크섬 없음
+      }
+    }
+    if (!isValidSqlite(DB) || !checksumMatches(expected)) return false
+    if (!(await applyChangesets(manifest, async (file) => show(file)))) return false
+    keepManifest(manifest)
+    return true
   } catch (e) {
     console.error(`[fetch-db] git fetch failed: ${String(e.message).split('\n')[0]}`)
     return false
   }
 }
 
-let ok = await tryHttps()
-if (ok) {
-  console.log(`[fetch-db] OK — ${(statSync(DB).size / 1e6).toFixed(1)}MB via HTTPS (${REPO}@${BRANCH})`)
-  process.exit(0)
+// cold 아카이브(선택). 실패해도 hot DB 확보 결과는 유지한다.
+async function tryArchive() {
+  const url = `https://raw.githubusercontent.com/${REPO}/${BRANCH}/data/hegemony_archive.db`
+  const token = process.env.GH_TOKEN || process.env.GITHUB_TOKEN
+  try {
+    const res = await fetch(url, { headers: token ? { Authorization: `token ${token}` } : {} })
+    if (res.ok) {
+      writeFileSync(ARCHIVE, Buffer.from(await res.arrayBuffer()))
+    } else {
+      execSync('git checkout FETCH_HEAD -- data/hegemony_archive.db', { stdio: ['ignore', 'ignore', 'pipe'] })
+    }
+    console.log(`[fetch-db] archive OK — ${(statSync(ARCHIVE).size / 1e6).toFixed(1)}MB`)
+  } catch {
+    console.warn(`[fetch-db] no archive on ${BRANCH} (hot/cold 분리 전이면 정상)`)
+  }
 }
 
-ok = tryGit()
-if (ok) {
-  console.log(`[fetch-db] OK — ${(statSync(DB).size / 1e6).toFixed(1)}MB via git (${BRANCH})`)
+async function done(how) {
+  const note = applied ? ` + ${applied} changesets` : ''
+  console.log(`[fetch-db] OK — ${(statSync(DB).size / 1e6).toFixed(1)}MB via ${how}${note}`)
+  if (WANT_ARCHIVE) await tryArchive()
   process.exit(0)
 }
 
+if (await tryHttps()) await done(`${via} (${REPO}@${BRANCH})`)
+if (await tryGit()) await done(`git (${BRANCH})`)
+
 // 3) 로컬 폴백(개발 오프라인)
 if (isValidSqlite(DB)) {
   console.warn('[fetch-db] remote unavailable — using existing local DB')
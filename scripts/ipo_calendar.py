@@ -12,15 +12,25 @@
   38 은 청약일·공모가밴드·확정공모가·경쟁률·주간사가 한 표에 정규화돼 있다.
 
 주의: 페이지 인코딩이 euc-kr 이다(UTF-8 로 읽으면 종목명이 전부 깨진다).
+
+증분 크롤(crawl_state 테이블, 마이그레이션 11):
+  하루 4회 실행되는데 두 페이지는 대개 그대로다. 페이지마다 지난번 ETag/Last-Modified 로
+  조건부 요청을 보내 304 면 끝, 200 이어도 디코딩한 본문 sha256 이 지난번과 같으면 파싱·
+  UPSERT 를 건너뛴다. 상태는 UPSERT 와 같은 트랜잭션에서 갱신한다(write_ipo_calendar).
+  파서를 고치면 PARSE_VERSION 을 올린다. 상태에 남은 버전(crawl_state.parse_version)과 다르면
+  조건부 헤더 없이 받고, 해시에도 섞여 있어 다음 실행이 전부 다시 파싱한다.
 """
 
+import hashlib
 import re
 import sqlite3
 import ssl
 import time
+import urllib.error
 import urllib.request
 from datetime import datetime, timedelta, timezone
 from html.parser import HTMLParser
+from typing import NamedTuple
 
 KST = timezone(timedelta(hours=9))
 
@@ -28,6 +38,8 @@ BASE = "https://www.38.co.kr/html/fund/index.htm"
 SUBSCRIPTION_URL = f"{BASE}?o=k"   # 공모주 청약일정
 LISTING_URL = f"{BASE}?o=nw"       # 신규상장(상장일)
 DETAIL_BASE = "https://www.38.co.kr/html/fund/"
+USER_AGENT = "Mozilla/5.0 (compatible; SectorKing/1.0)"
+PARSE_VERSION = 1  # parse_subscription/parse_listing 변경 시 +1 → 저장된 해시 무효화
 
 # 종목명 앞에 붙는 공백/불릿 제거용.
 _WS = re.compile(r"\s+")
@@ -180,14 +192,38 @@ def _ssl_context() -> ssl.SSLContext:
     return ctx
 
 
-def _fetch(url: str, attempts: int = 3) -> str:
-    """38 서버는 간헐적으로 20초를 넘긴다(실측 3회 중 1회 timeout) — 짧게 재시도."""
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; SectorKing/1.0)"})
+class Page(NamedTuple):
+    """조건부 요청 결과. text 가 None 이면 304(지난번과 같음)."""
+
+    text: str | None
+    etag: str | None
+    last_modified: str | None
+
+
+def _fetch_page(url: str, state: dict | None = None, attempts: int = 3) -> Page:
+    """state(지난 ETag/Last-Modified)가 있으면 조건부 GET.
+
+    38 서버는 간헐적으로 20초를 넘긴다(실측 3회 중 1회 timeout) — 짧게 재시도.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if state and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state and state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    req = urllib.request.Request(url, headers=headers)
     for i in range(attempts):
         try:
             with urllib.request.urlopen(req, timeout=20, context=_ssl_context()) as res:
                 # euc-kr 고정. 깨진 바이트 하나로 전체 수집이 죽지 않게 replace.
-                return res.read().decode("euc-kr", errors="replace")
+                text = res.read().decode("euc-kr", errors="replace")
+                return Page(text, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+        except urllib.error.HTTPError as e:
+            if e.code == 304:  # urllib 은 304 를 예외로 올린다
+                prev = state or {}
+                return Page(None, prev.get("etag"), prev.get("last_modified"))
+            if i == attempts - 1:
+                raise
+            time.sleep(2)
         except Exception:
             if i == attempts - 1:
                 raise
@@ -195,22 +231,70 @@ def _fetch(url: str, attempts: int = 3) -> str:
     raise RuntimeError("unreachable")
 
 
-def fetch_ipo_events() -> list[dict]:
-    """두 페이지를 긁어 이벤트 목록으로. 한 쪽이 실패해도 다른 쪽은 살린다."""
+def _fetch(url: str, attempts: int = 3) -> str:
+    """무조건 GET — 본문 문자열."""
+    return _fetch_page(url, None, attempts).text
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(f"{PARSE_VERSION}\n{text}".encode()).hexdigest()
+
+
+def load_crawl_state(conn: sqlite3.Connection) -> dict[str, dict]:
+    """{url: {etag, last_modified, content_hash, parse_version}} — 워커 스레드에 넘길 수 있게 dict 로."""
+    return {
+        url: {"etag": etag, "last_modified": modified, "content_hash": digest, "parse_version": version}
+        for url, etag, modified, digest, version in conn.execute(
+            "SELECT url, etag, last_modified, content_hash, parse_version FROM crawl_state"
+        )
+    }
+
+
+def fetch_ipo_events(state: dict[str, dict] | None = None) -> tuple[list[dict], dict[str, dict]]:
+    """두 페이지를 긁어 (바뀐 페이지의 이벤트, 갱신할 crawl_state) 로. DB 는 만지지 않는다.
+
+    한 쪽이 실패해도 다른 쪽은 살린다. 실패한 페이지는 상태도 남기지 않는다(다음에 재시도).
+    """
+    state = state or {}
     events: list[dict] = []
+    updates: dict[str, dict] = {}
     for idx, (url, parse) in enumerate(((SUBSCRIPTION_URL, parse_subscription), (LISTING_URL, parse_listing))):
         if idx:
             time.sleep(1)  # 연속 요청 간격(서버 배려)
+        prev = state.get(url, {})
+        # 다른 파서 버전이 남긴 검증자로 물으면 304 가 와서 고친 파서가 돌지 않는다.
+        conditional = prev.get("parse_version") == PARSE_VERSION
         try:
-            rows = parse(_fetch(url))
-        except Exception as e:  # 네트워크/차단/구조변경
+            page = _fetch_page(url, prev if conditional else None)
+        except Exception as e:  # 네트워크/차단
             print(f"  IPO fetch failed ({url}): {e}")
             continue
+        if page.text is None:
+            updates[url] = {**prev, "changed": False}
+            print(f"  IPO page not modified (304): {url}")
+            continue
+        digest = content_hash(page.text)
+        entry = {
+            "etag": page.etag, "last_modified": page.last_modified,
+            "content_hash": digest, "parse_version": PARSE_VERSION,
+        }
+        if digest == prev.get("content_hash"):
+            updates[url] = {**entry, "changed": False}
+            print(f"  IPO page unchanged (same hash): {url}")
+            continue
+        try:
+            rows = parse(page.text)
+        except Exception as e:  # 구조변경
+            print(f"  IPO parse failed ({url}): {e}")
+            continue
         if not rows:
             # 표 구조가 바뀌면 0건이 된다. 0건을 정상으로 취급하면 조용히 갱신이 멎는다.
+            # 해시도 남기지 않는다 — 파서를 고친 뒤 같은 페이지를 다시 파싱해야 하므로.
             print(f"  Warning: no rows parsed from {url} (page structure changed?)")
+            continue
         events.extend(rows)
-    return events
+        updates[url] = {**entry, "changed": True}
+    return events, updates
 
 
 def upsert_ipo_calendar(conn: sqlite3.Connection, events: list[dict]) -> int:
@@ -219,8 +303,13 @@ def upsert_ipo_calendar(conn: sqlite3.Connection, events: list[dict]) -> int:
     PK 에 날짜를 넣지 않는 이유: 청약/상장일은 정정신고로 자주 밀린다. 날짜가 키면
     옛 날짜 행이 유령으로 남아 실적 캘린더가 겪은 문제를 그대로 반복한다.
     한 종목의 청약·상장은 각각 1회뿐이라 (name, event_type) 이면 충분하다.
+
+    값이 실제로 바뀐 행만 갱신한다(updated_at 포함) — 페이지가 바뀌면 그 페이지의 모든 행이
+    다시 들어오는데, updated_at 이 같이 밀리면 ipo_details.due_details 가 지난 종목까지
+    "요약 바뀜"으로 보고 상세를 다시 받는다. 반환값은 새로 들어오거나 바뀐 행 수.
     """
     now = datetime.now(KST).isoformat(timespec="seconds")
+    before = conn.total_changes
     for e in events:
         conn.execute(
             """
@@ -237,6 +326,13 @@ def upsert_ipo_calendar(conn: sqlite3.Connection, events: list[dict]) -> int:
                 underwriter = COALESCE(excluded.underwriter, ipo_calendar.underwriter),
                 detail_url  = COALESCE(excluded.detail_url, ipo_calendar.detail_url),
                 updated_at  = excluded.updated_at
+            WHERE excluded.event_date IS NOT ipo_calendar.event_date
+               OR excluded.end_date IS NOT ipo_calendar.end_date
+               OR COALESCE(excluded.offer_price, ipo_calendar.offer_price) IS NOT ipo_calendar.offer_price
+               OR COALESCE(excluded.price_band, ipo_calendar.price_band) IS NOT ipo_calendar.price_band
+               OR COALESCE(excluded.competition, ipo_calendar.competition) IS NOT ipo_calendar.competition
+               OR COALESCE(excluded.underwriter, ipo_calendar.underwriter) IS NOT ipo_calendar.underwriter
+               OR COALESCE(excluded.detail_url, ipo_calendar.detail_url) IS NOT ipo_calendar.detail_url
             """,
             (
                 e["name"], e["event_type"], e["event_date"], e["end_date"],
@@ -244,19 +340,43 @@ def upsert_ipo_calendar(conn: sqlite3.Connection, events: list[dict]) -> int:
                 e["underwriter"], e["detail_url"], now,
             ),
         )
-    return len(events)
+    return conn.total_changes - before
+
+
+def save_crawl_state(conn: sqlite3.Connection, updates: dict[str, dict]) -> None:
+    now = datetime.now(KST).isoformat(timespec="seconds")
+    for url, st in updates.items():
+        conn.execute(
+            """
+            INSERT INTO crawl_state (url, etag, last_modified, content_hash, parse_version, checked_at, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag          = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_hash  = excluded.content_hash,
+                parse_version = excluded.parse_version,
+                checked_at    = excluded.checked_at,
+                changed_at    = COALESCE(excluded.changed_at, crawl_state.changed_at)
+            """,
+            (url, st.get("etag"), st.get("last_modified"), st.get("content_hash"), st.get("parse_version"), now,
+             now if st.get("changed") else None),
+        )
+
+
+def write_ipo_calendar(conn: sqlite3.Connection, events: list[dict], updates: dict[str, dict]) -> str:
+    """fetch_ipo_events 결과 반영(이벤트 UPSERT + crawl_state). 요약 문자열. 커밋은 호출부."""
+    unchanged = sum(1 for st in updates.values() if not st.get("changed"))
+    count = upsert_ipo_calendar(conn, events) if events else 0
+    save_crawl_state(conn, updates)
+    return f"{count}/{len(events)} events new or changed, {unchanged}/{len(updates)} pages unchanged"
 
 
 def sync_ipo_calendar(conn: sqlite3.Connection) -> int:
     """수집 → 적재. 실패해도 예외를 밖으로 던지지 않는다(주가 수집이 우선)."""
     try:
-        events = fetch_ipo_events()
-        if not events:
-            print("IPO calendar: 0 events fetched — skipping upsert")
-            return 0
-        count = upsert_ipo_calendar(conn, events)
-        print(f"IPO calendar: {count} events upserted")
-        return count
+        events, updates = fetch_ipo_events(load_crawl_state(conn))
+        print(f"IPO calendar: {write_ipo_calendar(conn, events, updates)}")
+        return len(events)
     except Exception as e:
         print(f"Warning: IPO calendar sync failed: {e}")
         return 0
@@ -274,5 +394,5 @@ if __name__ == "__main__":
     assert _detail_url(None) is None
     print("self-check OK")
 
-    for e in fetch_ipo_events():
+    for e in fetch_ipo_events()[0]:
         print(e)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""공모주 상세 페이지 보강 — 38 상세(`?o=v&no=…`)의 공모규모·수요예측 결과를 ipo_details 로.
+
+ipo_calendar.py 는 요약표만 읽고 detail_url 은 저장만 한다. 공모주식수·공모금액·기관경쟁률·
+의무보유확약은 종목별 상세 페이지에만 있어 종목 수만큼 요청이 든다. 그래서:
+
+  - 대상 선별(due_details): 상세가 아직 없거나, 요약 행이 상세보다 나중에 바뀌었거나,
+    일정이 다가오는(막 지난) 종목 중 DETAIL_TTL 이 지난 것만. 지난 종목은 no= 로 캐시된다.
+  - 정중한 동시 요청(HostLimiter): 호스트당 동시 PER_HOST 개, 요청 시작 간격 INTERVAL 초.
+  - 본문 해시가 같으면 파싱하지 않고 fetched_at 만 갱신(ipo_calendar 의 content_hash 와 같은 규칙).
+  - update_data 에선 사이드 단계로 티커 루프와 겹쳐 돈다 — 일일 실행 시간을 늘리지 않는다.
+
+사용법:
+    python scripts/ipo_details.py          # 대상만
+    python scripts/ipo_details.py --all    # 캐시 무시, ipo_calendar 의 모든 상세
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import connect, publish  # noqa: E402
+from ipo_calendar import KST, _dash_to_none, _fetch_page, _TableRows, content_hash  # noqa: E402
+
+LOOKAHEAD_DAYS = 3      # 일정 종료 후 이만큼은 '다가오는' 종목으로 본다(확정공모가·경쟁률이 늦게 붙는다)
+DETAIL_TTL = timedelta(hours=12)  # 다가오는 종목도 이 간격 안에서는 다시 받지 않는다(하루 4회 실행)
+MAX_PER_RUN = 40        # 첫 실행 백필이 한 번에 몰리지 않게
+WORKERS = 4
+PER_HOST = 2
+INTERVAL = 1.0
+
+# 상세 페이지 라벨 → 컬럼. 라벨 셀 바로 다음 셀이 값이다(한 행에 라벨/값 쌍이 1~2개).
+LABELS = {
+    "공모주식수": "offering_shares",
+    "총공모주식수": "offering_shares",
+    "공모금액": "offering_amount",
+    "수요예측일": "forecast_dates",
+    "기관경쟁률": "institutional_competition",
+    "의무보유확약": "lockup_ratio",
+}
+FIELDS = tuple(dict.fromkeys(LABELS.values()))
+
+
+def detail_no(url: str | None) -> int | None:
+    m = re.search(r"[?&]no=(\d+)", url or "")
+    return int(m.group(1)) if m else None
+
+
+def parse_detail(html: str) -> dict[str, str | None]:
+    """상세 페이지 → {컬럼: 원문 문자열}. 라벨을 하나도 못 찾으면 빈 dict."""
+    parser = _TableRows()
+    parser.feed(html)
+    found: dict[str, str | None] = {}
+    for cells, _ in parser.rows:
+        for label, value in zip(cells, cells[1:]):
+            col = LABELS.get(label.replace(" ", ""))
+            if col and col not in found:
+                found[col] = _dash_to_none(value)
+    return found
+
+
+class HostLimiter:
+    """호스트별 동시 요청 수와 요청 시작 간격 제한. 여러 워커 스레드가 공유한다.
+
+    clock/sleep 은 테스트가 시각을 주입하려고 둔다(예약된 시작 시각을 벽시계 없이 검증).
+    """
+
+    def __init__(
+        self,
+        per_host: int = PER_HOST,
+        interval: float = INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.per_host = per_host
+        self.interval = interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        with sem:
+            with self._lock:
+                now = self._clock()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.interval
+            if start > now:
+                self._sleep(start - now)
+            yield
+
+
+def due_details(conn: sqlite3.Connection, today: date | None = None, everything: bool = False) -> list[dict]:
+    """다시 받아야 할 상세 페이지 [{no, url, name, content_hash}] — 워커에 넘길 수 있게 dict 로.
+
+    우선순위: 상세 없음 → 요약이 바뀜 → 다가오는 일정(가까운 날짜부터). MAX_PER_RUN 개까지.
+    """
+    today = today or datetime.now(KST).date()
+    horizon = (today - timedelta(days=LOOKAHEAD_DAYS)).isoformat()
+    stale_before = (datetime.now(KST) - DETAIL_TTL).isoformat(timespec="seconds")
+    cached = {
+        no: (digest, fetched)
+        for no, digest, fetched in conn.execute("SELECT detail_no, content_hash, fetched_at FROM ipo_details")
+    }
+    # 같은 종목이 청약·상장 두 행으로 있다 → no 별로 가장 늦은 날짜·갱신시각만.
+    events: dict[int, dict] = {}
+    for name, url, day, updated in conn.execute(
+        "SELECT name, detail_url, COALESCE(end_date, event_date), updated_at FROM ipo_calendar "
+        "WHERE detail_url IS NOT NULL"
+    ):
+        no = detail_no(url)
+        if no is None:
+            continue
+        e = events.setdefault(no, {"no": no, "url": url, "name": name, "day": day, "updated": updated or ""})
+        e["day"] = max(e["day"], day)
+        e["updated"] = max(e["updated"], updated or "")
+
+    due = []
+    for no, e in events.items():
+        digest, fetched = cached.get(no, (None, None))
+        if everything or fetched is None:
+            rank = 0
+        elif e["updated"] > fetched:
+            rank = 1
+        elif e["day"] >= horizon and fetched < stale_before:
+            rank = 2
+        else:
+            continue
+        due.append((rank, abs((date.fromisoformat(e["day"]) - today).days), {
+            "no": no, "url": e["url"], "name": e["name"], "content_hash": digest,
+        }))
+    due.sort(key=lambda t: t[:2])
+    limit = len(due) if everything else MAX_PER_RUN
+    return [d for _, _, d in due[:limit]]
+
+
+def _fetch_one(item: dict, limiter: HostLimiter) -> dict | None:
+    try:
+        with limiter.slot(item["url"]):
+            text = _fetch_page(item["url"], attempts=2).text
+    except Exception as e:  # 네트워크/차단 — 다음 실행에서 다시 대상이 된다
+        print(f"  IPO detail fetch failed (no={item['no']}): {e}")
+        return None
+    digest = content_hash(text)
+    if digest == item["content_hash"]:
+        return {"no": item["no"], "unchanged": True}
+    try:
+        fields = parse_detail(text)
+    except Exception as e:  # 구조변경
+        print(f"  IPO detail parse failed (no={item['no']}): {e}")
+        return None
+    if not fields:
+        # 0건을 정상으로 취급하면 조용히 멎는다 — 해시도 남기지 않아 파서 수정 후 재파싱된다.
+        print(f"  Warning: no fields parsed from detail no={item['no']} (page structure changed?)")
+        return None
+    return {"no": item["no"], "name": item["name"], "content_hash": digest, **fields}
+
+
+def fetch_details(due: list[dict], workers: int = WORKERS, limiter: HostLimiter | None = None) -> list[dict]:
+    """상세 페이지를 동시에 받아 파싱한 결과 목록. DB 는 만지지 않는다. 실패한 페이지는 빠진다."""
+    if not due:
+        return []
+    limiter = limiter or HostLimiter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ipo-detail") as pool:
+        results = pool.map(lambda item: _fetch_one(item, limiter), due)
+        return [r for r in results if r is not None]
+
+
+def write_ipo_details(conn: sqlite3.Connection, results: list[dict]) -> str:
+    """fetch_details 결과 UPSERT. 요약 문자열. 커밋은 호출부."""
+    now = datetime.now(KST).isoformat(timespec="seconds")
+    unchanged = [r["no"] for r in results if r.get("unchanged")]
+    conn.executemany("UPDATE ipo_details SET fetched_at = ? WHERE detail_no = ?", [(now, no) for no in unchanged])
+    changed = [r for r in results if not r.get("unchanged")]
+    cols = ", ".join(FIELDS)
+    conn.executemany(
+        f"""
+        INSERT INTO ipo_details (detail_no, name, {cols}, content_hash, fetched_at, changed_at)
+        VALUES (?, ?, {", ".join("?" for _ in FIELDS)}, ?, ?, ?)
+        ON CONFLICT(detail_no) DO UPDATE SET
+            name = excluded.name,
+            {", ".join(f"{c} = COALESCE(excluded.{c}, ipo_details.{c})" for c in FIELDS)},
+            content_hash = excluded.content_hash,
+            fetched_at = excluded.fetched_at,
+            changed_at = excluded.changed_at
+        """,
+        [(r["no"], r["name"], *(r.get(c) for c in FIELDS), r["content_hash"], now, now) for r in changed],
+    )
+    return f"{len(changed)} details updated, {len(unchanged)} unchanged"
+
+
+def sync_ipo_details(conn: sqlite3.Connection, everything: bool = False) -> int:
+    """선별 → 수집 → 적재. 실패해도 예외를 밖으로 던지지 않는다."""
+    try:
+        due = due_details(conn, everything=everything)
+        print(f"IPO details: {len(due)} pages due")
+        results = fetch_details(due)
+        print(f"IPO details: {write_ipo_details(conn, results)}")
+        return len(results)
+    except Exception as e:
+        print(f"Warning: IPO detail sync failed: {e}")
+        return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="IPO detail page enrichment (38.co.kr)")
+    parser.add_argument("--all", action="store_true", help="캐시를 무시하고 ipo_calendar 의 모든 상세를 다시 받는다")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect()
+    sync_ipo_details(conn, everything=args.all)
+    publish(conn)
+
+
+if __name__ == "__main__":
+    main()
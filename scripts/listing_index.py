@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""상장 종목 인덱스 — suggest_candidates --discover 의 후보 모집단(로컬, 배포 안 함).
+
+왜 필요한가:
+  suggest_candidates 는 큐레이터가 후보 티커를 이미 알고 있어야 했다. 섹터의 "빈 자리"를
+  찾으려면 US·KR 전 종목(수천 개)을 봐야 하는데, 그 대부분은 시총·거래량 게이트에서
+  뻔히 떨어진다. 종목마다 .info 를 부르는 대신 마지막으로 알려진 값을 여기 두고
+  게이트를 SQL 로 먼저 건다(인덱스 조회, 수 ms).
+
+저장(data/listing_index.db, hegemony.db 와 별개 — 수집 결과가 아니라 로컬 도구 상태):
+  listings  종목(yfinance 표기) | 거래소 | 지역 | 이름 | 디렉터리 업종 | yfinance 업종 |
+            USD 시총 | 평균거래량 | 값 확인 시각·출처 | 디렉터리 확인 시각 | 상폐 시각
+  meta      디렉터리 마지막 수집 시각 등
+
+증분 갱신:
+  - 종목 목록(refresh_symbols): NASDAQ Trader 심볼 디렉터리(nasdaqlisted/otherlisted) +
+    KRX KIND 상장법인목록. 요청 3회. DIRECTORY_TTL 안이면 건너뛴다. 새 종목은 추가,
+    사라진 종목은 delisted_at 만 찍는다(값은 남겨 재상장·오류 복구에 쓴다).
+  - 시총·거래량·업종(update_stats): 호출부(suggest_candidates --refresh-index)가 hegemony.db,
+    .info 캐시, 네트워크 순으로 채운다. due_stats 가 다시 볼 종목을 고른다 — 값이 없는 종목,
+    그다음 STATS_TTL 이 지난 종목. SMALL_CAP_USD 미만은 SMALL_CAP_TTL 로 드물게 본다.
+
+이 모듈은 네트워크 디렉터리 파싱과 SQLite 만 쓴다(yfinance 불필요).
+
+사용:
+    python scripts/listing_index.py            # 종목 목록 갱신(TTL 안이면 건너뜀) + 요약
+    python scripts/listing_index.py --force    # TTL 무시
+"""
+
+import argparse
+import sqlite3
+import sys
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ipo_calendar import USER_AGENT, _TableRows  # noqa: E402
+
+INDEX_PATH = Path(__file__).parent.parent / "data" / "listing_index.db"
+
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+KIND_LIST_URL = "https://kind.krx.co.kr/corpgeneral/corpList.do?method=download"
+
+DIRECTORY_TTL = timedelta(hours=20)
+STATS_TTL = timedelta(days=7)
+SMALL_CAP_TTL = timedelta(days=30)
+SMALL_CAP_USD = 1e8  # 어떤 게이트 기본값(US $2B, KR $0.7B)보다도 한참 아래
+
+# otherlisted.txt 의 Exchange 코드.
+OTHER_EXCHANGES = {"A": "NYSE American", "N": "NYSE", "P": "NYSE Arca", "Z": "Cboe", "V": "IEX"}
+# KIND 시장구분 → (거래소, yfinance 접미사). 코넥스는 시장 게이트 밖이라 뺀다.
+KIND_MARKETS = {"유가": ("KOSPI", ".KS"), "코스닥": ("KOSDAQ", ".KQ")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    symbol TEXT PRIMARY KEY,          -- yfinance 표기(BRK-B, 005930.KS)
+    exchange TEXT NOT NULL,
+    region TEXT NOT NULL,             -- 'us' | 'kr'
+    name TEXT,
+    listing_industry TEXT,            -- 디렉터리 원문 업종(KIND 업종, 한글). US 는 NULL
+    industry TEXT,                    -- yfinance industry — company_profiles.industry 와 같은 체계
+    market_cap_usd REAL,
+    avg_volume REAL,
+    stats_at TEXT,                    -- 시총·거래량·업종을 마지막으로 확인한 시각
+    stats_source TEXT,                -- 'db' | 'cache' | 'yfinance'
+    seen_at TEXT NOT NULL,            -- 디렉터리에서 마지막으로 본 시각
+    delisted_at TEXT                  -- 디렉터리에서 사라진 시각(다시 보이면 NULL)
+);
+CREATE INDEX IF NOT EXISTS idx_listings_gate
+    ON listings(region, market_cap_usd) WHERE delisted_at IS NULL;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def connect(path: Path = INDEX_PATH) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def parse_nasdaq_listed(text: str) -> list[dict]:
+    """nasdaqlisted.txt(파이프 구분) → 보통주 목록. 테스트 종목·ETF 는 뺀다."""
+    rows = []
+    for line in text.splitlines()[1:]:
+        f = line.split("|")
+        if len(f) < 7 or line.startswith("File Creation Time"):
+            continue
+        symbol, name, test_issue, etf = f[0], f[1], f[3], f[6]
+        if test_issue == "Y" or etf == "Y" or "$" in symbol:
+            continue
+        rows.append({"symbol": symbol.replace(".", "-"), "exchange": "NASDAQ", "region": "us", "name": name})
+    return rows
+
+
+def parse_other_listed(text: str) -> list[dict]:
+    """otherlisted.txt → NYSE 등 보통주 목록. '$' 가 든 심볼은 우선주라 뺀다."""
+    rows = []
+    for line in text.splitlines()[1:]:
+        f = line.split("|")
+        if len(f) < 7 or line.startswith("File Creation Time"):
+            continue
+        symbol, name, exchange, etf, test_issue = f[0], f[1], f[2], f[4], f[6]
+        if test_issue == "Y" or etf == "Y" or "$" in symbol:
+            continue
+        rows.append({
+            "symbol": symbol.replace(".", "-"),
+            "exchange": OTHER_EXCHANGES.get(exchange, exchange),
+            "region": "us",
+            "name": name,
+        })
+    return rows
+
+
+def parse_kind_list(html: str) -> list[dict]:
+    """KIND 상장법인목록(엑셀이라 부르지만 실제론 euc-kr HTML 표) → KOSPI/KOSDAQ 목록.
+
+    열: 회사명 | 시장구분 | 종목코드 | 업종 | 주요제품 | 상장일 | … — 헤더 행으로 위치를 찾는다.
+    """
+    parser = _TableRows()
+    parser.feed(html)
+    cols: dict[str, int] = {}
+    rows = []
+    for cells, _ in parser.rows:
+        if "종목코드" in cells:
+            cols = {name: i for i, name in enumerate(cells)}
+            continue
+        if not cols or len(cells) < len(cols):
+            continue
+        market = KIND_MARKETS.get(cells[cols["시장구분"]])
+        code = cells[cols["종목코드"]].strip()
+        if not market or not code.isdigit():
+            continue
+        exchange, suffix = market
+        rows.append({
+            "symbol": code.zfill(6) + suffix,
+            "exchange": exchange,
+            "region": "kr",
+            "name": cells[cols["회사명"]],
+            "listing_industry": cells[cols["업종"]] if "업종" in cols else None,
+        })
+    return rows
+
+
+def _get(url: str, encoding: str) -> str:
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=30) as res:
+        return res.read().decode(encoding, errors="replace")
+
+
+def fetch_directories() -> dict[str, list[dict]]:
+    """{출처: 종목 목록}. 실패한 출처는 빠진다 — 그 출처의 종목은 상폐 처리하지 않는다."""
+    sources = {
+        "nasdaq": (NASDAQ_LISTED_URL, "utf-8", parse_nasdaq_listed),
+        "other": (OTHER_LISTED_URL, "utf-8", parse_other_listed),
+        "kind": (KIND_LIST_URL, "euc-kr", parse_kind_list),
+    }
+    fetched = {}
+    for name, (url, encoding, parse) in sources.items():
+        try:
+            rows = parse(_get(url, encoding))
+        except Exception as e:
+            print(f"  Listing directory failed ({name}): {e}")
+            continue
+        if not rows:
+            print(f"  Warning: no rows parsed from {name} directory (format changed?)")
+            continue
+        fetched[name] = rows
+    return fetched
+
+
+# 출처 → 그 출처가 책임지는 종목 범위(상폐 판정용).
+SOURCE_SCOPE = {
+    "nasdaq": "region = 'us' AND exchange = 'NASDAQ'",
+    "other": "region = 'us' AND exchange != 'NASDAQ'",
+    "kind": "region = 'kr'",
+}
+
+
+def apply_directories(conn: sqlite3.Connection, fetched: dict[str, list[dict]]) -> dict[str, int]:
+    """디렉터리 결과 반영. {'added', 'delisted'} 개수. 커밋은 호출부."""
+    now = _now()
+    before = conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+    for source, rows in fetched.items():
+        conn.executemany(
+            """
+            INSERT INTO listings (symbol, exchange, region, name, listing_industry, seen_at)
+            VALUES (:symbol, :exchange, :region, :name, :listing_industry, :seen_at)
+            ON CONFLICT(symbol) DO UPDATE SET
+                exchange = excluded.exchange,
+                name = excluded.name,
+                listing_industry = COALESCE(excluded.listing_industry, listings.listing_industry),
+                seen_at = excluded.seen_at,
+                delisted_at = NULL
+            """,
+            [{"listing_industry": None, **r, "seen_at": now} for r in rows],
+        )
+    delisted = 0
+    for source in fetched:
+        delisted += conn.execute(
+            f"UPDATE listings SET delisted_at = ? WHERE {SOURCE_SCOPE[source]} "
+            "AND seen_at < ? AND delisted_at IS NULL",
+            (now, now),
+        ).rowcount
+    added = conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0] - before
+    return {"added": added, "delisted": delisted}
+
+
+def refresh_symbols(conn: sqlite3.Connection, force: bool = False) -> str:
+    """종목 목록 증분 갱신(TTL 안이면 건너뜀). 요약 문자열. 커밋까지 한다."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'directories_at'").fetchone()
+    if row and not force and row[0] > (datetime.now(timezone.utc) - DIRECTORY_TTL).isoformat():
+        return f"directories fresh (fetched {row[0]})"
+    fetched = fetch_directories()
+    counts = apply_directories(conn, fetched)
+    if len(fetched) == len(SOURCE_SCOPE):  # 하나라도 실패했으면 다음 실행에서 다시
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('directories_at', ?)", (_now(),))
+    conn.commit()
+    total = sum(len(rows) for rows in fetched.values())
+    return f"{total} listed from {len(fetched)}/{len(SOURCE_SCOPE)} directories, {counts['added']} new, " \
+           f"{counts['delisted']} delisted"
+
+
+def due_stats(conn: sqlite3.Connection, limit: int, now: datetime | None = None) -> list[str]:
+    """값을 다시 확인할 종목. 값 없음 → TTL 지난 큰 종목(시총 큰 순) → TTL 지난 소형주."""
+    now = now or datetime.now(timezone.utc)
+    fresh = (now - STATS_TTL).isoformat()
+    small_fresh = (now - SMALL_CAP_TTL).isoformat()
+    rows = conn.execute(
+        """
+        SELECT symbol FROM listings
+        WHERE delisted_at IS NULL
+          AND (stats_at IS NULL
+               OR (stats_at < ? AND COALESCE(market_cap_usd, 0) >= ?)
+               OR stats_at < ?)
+        ORDER BY stats_at IS NOT NULL, COALESCE(market_cap_usd, 0) < ?, market_cap_usd DESC
+        LIMIT ?
+        """,
+        (fresh, SMALL_CAP_USD, small_fresh, SMALL_CAP_USD, limit),
+    )
+    return [s for (s,) in rows]
+
+
+def update_stats(conn: sqlite3.Connection, stats: dict[str, dict], source: str) -> int:
+    """{symbol: {market_cap_usd, avg_volume, industry}} 반영. 인덱스에 없는 종목은 무시. 커밋은 호출부."""
+    now = _now()
+    return conn.executemany(
+        """
+        UPDATE listings SET
+            market_cap_usd = ?,
+            avg_volume = ?,
+            industry = COALESCE(?, industry),
+            stats_at = ?,
+            stats_source = ?
+        WHERE symbol = ?
+        """,
+        [
+            (s.get("market_cap_usd"), s.get("avg_volume"), s.get("industry"), now, source, symbol)
+            for symbol, s in stats.items()
+        ],
+    ).rowcount
+
+
+def gate_candidates(
+    conn: sqlite3.Connection,
+    region: str,
+    min_mcap: dict[str, float],
+    min_vol: dict[str, float],
+) -> list[dict]:
+    """마지막으로 알려진 값으로 시총·거래량 게이트를 통과한 종목(시총 DESC).
+
+    지역별로 나눠 부분 인덱스(region, market_cap_usd)를 범위 탐색한다. 거래량을 모르는 종목은
+    suggest_candidates 의 유동성 게이트와 같이 통과시킨다.
+    """
+    regions = ("us", "kr") if region == "all" else (region,)
+    result = []
+    for r in regions:
+        result.extend(
+            dict(zip(("symbol", "exchange", "region", "name", "industry", "market_cap_usd", "avg_volume"), row))
+            for row in conn.execute(
+                """
+                SELECT symbol, exchange, region, name, industry, market_cap_usd, avg_volume
+                FROM listings
+                WHERE region = ? AND market_cap_usd >= ? AND delisted_at IS NULL
+                  AND (avg_volume IS NULL OR avg_volume >= ?)
+                """,
+                (r, min_mcap[r], min_vol[r]),
+            )
+        )
+    return sorted(result, key=lambda c: c["market_cap_usd"], reverse=True)
+
+
+def summary(conn: sqlite3.Connection) -> str:
+    rows = conn.execute(
+        """
+        SELECT region, COUNT(*), COUNT(stats_at), COUNT(industry)
+        FROM listings WHERE delisted_at IS NULL GROUP BY region ORDER BY region
+        """
+    ).fetchall()
+    return ", ".join(f"{r}: {n} listed ({s} with stats, {i} with industry)" for r, n, s, i in rows) or "empty"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="US/KR listing index for candidate discovery")
+    parser.add_argument("--force", action="store_true", help="DIRECTORY_TTL 무시하고 디렉터리 재수집")
+    args = parser.parse_args()
+    conn = connect()
+    print(f"Listing index: {refresh_symbols(conn, force=args.force)}")
+    print(f"Listing index: {summary(conn)}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""거래소 휴장일 — NYSE/NASDAQ(us), KRX(kr). 네트워크 없이 내장 표로 판정한다.
+
+    python scripts/market_calendar.py [YYYY-MM-DD]   # 그날 시장별 개장 여부
+
+휴장일에도 yfinance .info 는 직전 거래일 값을 돌려준다. 그대로 저장하면 주말과 똑같이
+carry-forward 행(가격 무변동)이 생기고, 나중에 정리 마이그레이션이 필요해진다(audit B4-b,
+migrate-clean-weekend-rows.ts). 그래서 수집 계획은 이 모듈로:
+
+    - 두 시장이 모두 쉬면 실행 전체를 건너뛴다(주말 포함). 아티팩트가 없으니 워크플로의
+      push·배포 단계도 건너뛰도록 signal_skipped() 로 $GITHUB_OUTPUT 에 skipped=true 를 남긴다.
+    - 한 시장만 쉬면 그 시장 종목(add_ticker.get_region_from_ticker)만 수집에서 뺀다.
+      점수는 그 종목의 마지막 스냅샷으로 섹터 상대 계산에 넣고 이력은 쓰지 않는다(scoring.AS_OF_DAYS).
+
+표에 없는 해(COVERED_YEARS 밖)는 주말만 휴장으로 보고 경고한다 — 모자란 표 때문에 수집을 빼먹느니
+carry-forward 한 줄이 낫다. 매년 말 다음 해 공휴일을 추가하고, 임시공휴일·선거일은 지정되는 대로 넣는다.
+출처: NYSE Holidays & Trading Hours, KRX 휴장일 안내(연말 휴장일 12/31 포함).
+"""
+
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from add_ticker import get_region_from_ticker  # noqa: E402
+
+MARKETS = ("us", "kr")
+COVERED_YEARS = range(2025, 2028)
+
+# 평일 휴장일만(주말과 겹치는 공휴일은 대체휴일·관측일로 적는다).
+HOLIDAYS: dict[str, dict[str, str]] = {
+    "us": {
+        "2025-01-01": "New Year's Day",
+        "2025-01-09": "National Day of Mourning (President Carter)",
+        "2025-01-20": "Martin Luther King Jr. Day",
+        "2025-02-17": "Washington's Birthday",
+        "2025-04-18": "Good Friday",
+        "2025-05-26": "Memorial Day",
+        "2025-06-19": "Juneteenth",
+        "2025-07-04": "Independence Day",
+        "2025-09-01": "Labor Day",
+        "2025-11-27": "Thanksgiving Day",
+        "2025-12-25": "Christmas Day",
+        "2026-01-01": "New Year's Day",
+        "2026-01-19": "Martin Luther King Jr. Day",
+        "2026-02-16": "Washington's Birthday",
+        "2026-04-03": "Good Friday",
+        "2026-05-25": "Memorial Day",
+        "2026-06-19": "Juneteenth",
+        "2026-07-03": "Independence Day (observed)",
+        "2026-09-07": "Labor Day",
+        "2026-11-26": "Thanksgiving Day",
+        "2026-12-25": "Christmas Day",
+        "2027-01-01": "New Year's Day",
+        "2027-01-18": "Martin Luther King Jr. Day",
+        "2027-02-15": "Washington's Birthday",
+        "2027-03-26": "Good Friday",
+        "2027-05-31": "Memorial Day",
+        "2027-06-18": "Juneteenth (observed)",
+        "2027-07-05": "Independence Day (observed)",
+        "2027-09-06": "Labor Day",
+        "2027-11-25": "Thanksgiving Day",
+        "2027-12-24": "Christmas Day (observed)",
+    },
+    "kr": {
+        "2025-01-01": "신정",
+        "2025-01-27": "임시공휴일",
+        "2025-01-28": "설날 연휴",
+        "2025-01-29": "설날",
+        "2025-01-30": "설날 연휴",
+        "2025-03-03": "삼일절 대체휴일",
+        "2025-05-01": "근로자의 날",
+        "2025-05-05": "어린이날·부처님오신날",
+        "2025-05-06": "대체휴일",
+        "2025-06-03": "제21대 대통령 선거",
+        "2025-06-06": "현충일",
+        "2025-08-15": "광복절",
+        "2025-10-03": "개천절",
+        "2025-10-06": "추석",
+        "2025-10-07": "추석 연휴",
+        "2025-10-08": "추석 대체휴일",
+        "2025-10-09": "한글날",
+        "2025-12-25": "성탄절",
+        "2025-12-31": "연말 휴장일",
+        "2026-01-01": "신정",
+        "2026-02-16": "설날 연휴",
+        "2026-02-17": "설날",
+        "2026-02-18": "설날 연휴",
+        "2026-03-02": "삼일절 대체휴일",
+        "2026-05-01": "근로자의 날",
+        "2026-05-05": "어린이날",
+        "2026-05-25": "부처님오신날 대체휴일",
+        "2026-06-03": "제9회 전국동시지방선거",
+        "2026-08-17": "광복절 대체휴일",
+        "2026-09-24": "추석 연휴",
+        "2026-09-25": "추석",
+        "2026-10-05": "개천절 대체휴일",
+        "2026-10-09": "한글날",
+        "2026-12-25": "성탄절",
+        "2026-12-31": "연말 휴장일",
+        "2027-01-01": "신정",
+        "2027-02-08": "설날 다음날",  # 설날 2/7(일, KST 삭), 연휴 2/6(토)
+        "2027-02-09": "설날 대체휴일",
+        "2027-03-01": "삼일절",
+        "2027-05-05": "어린이날",
+        "2027-05-13": "부처님오신날",
+        "2027-08-16": "광복절 대체휴일",
+        "2027-09-14": "추석 연휴",
+        "2027-09-15": "추석",
+        "2027-09-16": "추석 연휴",
+        "2027-10-04": "개천절 대체휴일",
+        "2027-10-11": "한글날 대체휴일",
+        "2027-12-27": "성탄절 대체휴일",
+        "2027-12-31": "연말 휴장일",
+    },
+}
+
+
+def market_of(ticker: str) -> str:
+    """'kr'(.KS/.KQ) 또는 'us' — 허용 시장이 US/KR 뿐이라 KR 이 아니면 US 거래소다."""
+    return "kr" if get_region_from_ticker(ticker) == "KR" else "us"
+
+
+def closed_reason(market: str, day: str) -> str | None:
+    """휴장이면 사유('weekend' 또는 공휴일명), 개장이면 None."""
+    if date.fromisoformat(day).weekday() >= 5:
+        return "weekend"
+    return HOLIDAYS[market].get(day)
+
+
+def closed_markets(day: str) -> dict[str, str]:
+    """{휴장 시장: 사유}. 표에 없는 해면 경고하고 주말만 본다."""
+    if date.fromisoformat(day).year not in COVERED_YEARS:
+        print(f"Warning: no holiday table for {day[:4]} — only weekends are skipped (market_calendar.HOLIDAYS)")
+    return {market: reason for market in MARKETS if (reason := closed_reason(market, day))}
+
+
+def split_tickers(tickers: list[str], day: str) -> tuple[list[str], dict[str, list[str]]]:
+    """(수집할 종목, {휴장 시장: 뺀 종목}) — 순서는 입력 그대로."""
+    closed = closed_markets(day)
+    open_tickers: list[str] = []
+    skipped: dict[str, list[str]] = {market: [] for market in closed}
+    for ticker in tickers:
+        market = market_of(ticker)
+        if market in closed:
+            skipped[market].append(ticker)
+        else:
+            open_tickers.append(ticker)
+    return open_tickers, skipped
+
+
+def signal_skipped() -> None:
+    """GitHub Actions 스텝 출력 skipped=true — 휴장일 실행 뒤 push·배포 단계가 이걸 보고 건너뛴다."""
+    output = os.environ.get("GITHUB_OUTPUT")
+    if output:
+        with open(output, "a") as f:
+            f.write("skipped=true\n")
+
+
+def describe(day: str) -> str:
+    closed = closed_markets(day)
+    return ", ".join(f"{m.upper()} {closed.get(m, 'open')}" for m in MARKETS)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else datetime.now().date().isoformat()
+    print(f"{target}: {describe(target)}")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""시계열 테이블 저장 배치 비교 — 이전(rowid + UNIQUE) vs 클러스터(WITHOUT ROWID) 용량·페이지 읽기.
+
+database 마이그레이션 9(compact_time_series) 의 효과를 실 DB 로 잰다. 원본은 건드리지 않는다:
+  before  원본을 VACUUM INTO 한 사본(아직 9 미적용 DB 여야 의미가 있다 — db-snapshot 사본 등)
+  after   before 사본에 _compact_time_series 를 적용하고 VACUUM
+
+용량은 dbstat 로 테이블·인덱스별 바이트를, 페이지 읽기는 티커 구간 조회(종목 차트·백필 패턴)와
+날짜 단면 조회(scoring 패턴)를 새 연결(빈 페이지 캐시, mmap 끔)로 실행하며 /proc/self/io 의
+rchar 증가량 ÷ page_size 로 잰다 (SQLite 가 pread 로 요청한 바이트 = 읽은 페이지).
+
+  python scripts/measure_storage.py                 # data/hegemony.db
+  python scripts/measure_storage.py --db path/to/copy.db --tickers 50
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH, _compact_time_series
+
+TABLES = ("daily_snapshots", "score_history")
+
+
+def _rchar() -> int:
+    """이 프로세스가 read 계열 syscall 로 받은 누적 바이트(리눅스 전용)."""
+    for line in Path("/proc/self/io").read_text().splitlines():
+        if line.startswith("rchar:"):
+            return int(line.split()[1])
+    return 0
+
+
+def storage(path: Path) -> dict[str, int]:
+    """{테이블/인덱스 이름: 바이트} — TABLES 에 딸린 것만."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            """
+            SELECT s.name, SUM(s.pgsize)
+            FROM dbstat s JOIN sqlite_master m ON m.name = s.name
+            WHERE m.tbl_name IN ({})
+            GROUP BY s.name ORDER BY s.name
+            """.format(",".join("?" * len(TABLES))),
+            TABLES,
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def page_reads(path: Path, tickers: list[str], dates: list[str]) -> dict[str, float]:
+    """조회 패턴별 평균 읽은 페이지 수와 소요 ms."""
+    patterns = {
+        "ticker range": (
+            "SELECT date, price, market_cap, volume FROM daily_snapshots WHERE ticker = ? ORDER BY date",
+            tickers,
+        ),
+        "date cross-section": (
+            "SELECT ticker, market_cap, volume, avg_volume FROM daily_snapshots WHERE date = ?",
+            dates,
+        ),
+        "score history": (
+            "SELECT date, smoothed_score FROM score_history WHERE ticker = ? ORDER BY date",
+            tickers,
+        ),
+    }
+    out: dict[str, float] = {}
+    for label, (sql, params) in patterns.items():
+        pages = elapsed = 0.0
+        for value in params:
+            conn = sqlite3.connect(path)  # 새 연결 = 빈 페이지 캐시
+            conn.execute("PRAGMA mmap_size = 0")
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # 스키마 로드는 제외
+            before, started = _rchar(), time.perf_counter()
+            conn.execute(sql, (value,)).fetchall()
+            elapsed += time.perf_counter() - started
+            pages += (_rchar() - before) / page_size
+            conn.close()
+        out[f"{label} pages"] = pages / max(len(params), 1)
+        out[f"{label} ms"] = elapsed * 1000 / max(len(params), 1)
+    return out
+
+
+def _sample(path: Path, n: int) -> tuple[list[str], list[str]]:
+    conn = sqlite3.connect(path)
+    try:
+        tickers = [r[0] for r in conn.execute(
+            "SELECT DISTINCT ticker FROM daily_snapshots ORDER BY ticker"
+        )]
+        dates = [r[0] for r in conn.execute(
+            "SELECT DISTINCT date FROM daily_snapshots ORDER BY date"
+        )]
+    finally:
+        conn.close()
+    step_t = max(len(tickers) // n, 1)
+    step_d = max(len(dates) // n, 1)
+    return tickers[::step_t][:n], dates[::step_d][:n]
+
+
+def compare(src: Path, n: int = 30) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        before = Path(tmp) / "before.db"
+        after = Path(tmp) / "after.db"
+
+        conn = sqlite3.connect(src)
+        conn.execute("VACUUM INTO ?", (str(before),))
+        conn.close()
+        conn = sqlite3.connect(before)
+        already = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'daily_snapshots' AND sql LIKE '%WITHOUT ROWID%'"
+        ).fetchone()[0]
+        conn.execute("VACUUM INTO ?", (str(after),))
+        conn.close()
+        if already:
+            print("Note: source is already compact (migration 9 applied) — before/after are identical")
+        else:
+            conn = sqlite3.connect(after)
+            _compact_time_series(conn)
+            conn.commit()
+            conn.execute("VACUUM")
+            conn.close()
+
+        tickers, dates = _sample(before, n)
+        rows = []
+        for label, path in (("before", before), ("after", after)):
+            sizes = storage(path)
+            rows.append((label, path.stat().st_size, sizes, page_reads(path, tickers, dates)))
+
+    print(f"Source: {src} · sample {len(tickers)} tickers / {len(dates)} dates\n")
+    for label, file_size, sizes, _ in rows:
+        print(f"[{label}] file {file_size / 1e6:.2f}MB")
+        for name, size in sizes.items():
+            print(f"    {name:<40} {size / 1e6:8.2f}MB")
+    print()
+    metrics = rows[0][3].keys()
+    print(f"{'query':<28}{'before':>12}{'after':>12}")
+    for m in metrics:
+        print(f"{m:<28}{rows[0][3][m]:>12.1f}{rows[1][3][m]:>12.1f}")
+    ts_before = sum(rows[0][2].values())
+    ts_after = sum(rows[1][2].values())
+    print(f"\ntime-series tables+indexes: {ts_before / 1e6:.2f}MB → {ts_after / 1e6:.2f}MB"
+          f" ({(1 - ts_after / ts_before):.0%} smaller)" if ts_before else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="time-series storage layout comparison")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="측정할 DB(읽기만 함)")
+    parser.add_argument("--tickers", type=int, default=30, help="조회 패턴별 샘플 수")
+    args = parser.parse_args()
+    if not args.db.exists():
+        print(f"Error: Database not found at {args.db}")
+        sys.exit(1)
+    compare(args.db, args.tickers)
+
+
+if __name__ == "__main__":
+    main()
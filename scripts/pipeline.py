@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""일일 파이프라인 러너 — 단계 DAG 를 한 프로세스·한 연결로 돌린다.
+
+    python scripts/pipeline.py [YYYY-MM-DD] [--only a,b] [--skip c] [--list]
+
+단계마다 의존 단계를 선언한다(STAGES). 의존이 풀린 단계는 바로 시작하고, 서로 독립인 네트워크
+수집(ipo · indices · fetch)은 워커 스레드에서 동시에 돈다. DB 는 database.connect("bulk") 연결
+하나(Run.conn)로만, 메인 스레드에서만 읽고 쓴다 — 단계는 두 부분이다:
+
+    prepare(run) → fetch | None   메인 스레드. 필요한 상태를 DB 에서 읽고 워커에 넘길 함수를 돌려준다.
+    fetch()      → result          워커 스레드. DB 를 만지지 않는다(네트워크).
+    apply(run, result) → 요약       메인 스레드. run.conn 으로 쓴다. 성공하면 러너가 커밋한다.
+
+실패 격리: 단계 예외는 그 단계만 롤백한다. required 단계가 실패하면 그 뒤 단계는 blocked,
+required=False 단계(ipo·indices·점수 보조)는 실패해도 뒤 단계가 돈다. update_data 의 --staged 와
+달리 병합~순위가 한 트랜잭션이 아니라 단계마다 커밋한다(--only score,rank 로 재실행할 수 있게) —
+클라이언트가 읽는 건 publish 아티팩트라 중간 상태는 밖에 보이지 않는다.
+
+수동 후속 작업(manual=True)은 기본 실행에 들지 않고 --only 로만 돈다. 실행 순서 규칙은 의존과
+사전 점검으로 코드에 있다 — 예: score-history 는 clean-weekend-rows 뒤에만 돌고, 주말 행이
+남아 있으면 시작하지 않는다.
+
+    python scripts/pipeline.py --only clean-weekend-rows,score-history,rank,publish
+
+--only 에 없는 의존 단계는 이미 끝난 것으로 본다(그 단계의 결과가 DB 에 있다는 전제).
+실행이 끝나면(실패해도) 단계별 시작·끝 시각과 fetch/write 시간을 표로 찍는다.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from archive import archive_horizon, archive_old, attach_archive  # noqa: E402
+from database import DB_PATH, connect, publish  # noqa: E402
+from market_calendar import MARKETS, closed_markets, signal_skipped, split_tickers  # noqa: E402
+
+# 동시에 도는 워커 단계 수 상한(ipo, ipo-details, indices, fetch).
+WORKERS = 4
+
+# migrate-clean-weekend-rows.ts 와 같은 대상·조건(SQLite %w: 0=일, 6=토).
+WEEKEND_PREDICATE = "strftime('%w', date) IN ('0','6')"
+WEEKEND_TABLES = ("daily_snapshots", "score_history")
+
+
+class Run:
+    """한 번의 실행 상태: 대상일, DB 연결(처음 쓸 때 연다), 단계 간 전달값."""
+
+    def __init__(self, target_date: str, db_path: Path = DB_PATH, conn: sqlite3.Connection | None = None):
+        self.target_date = target_date
+        self.db_path = db_path
+        self.state: dict = {}
+        self._conn = conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect("bulk", self.db_path)
+        return self._conn
+
+    def commit(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def publish(self) -> None:
+        """커밋 후 DELETE 저널로 닫는다(database.publish). 이후 conn 을 쓰면 다시 연다."""
+        publish(self.conn, self.db_path)
+        self._conn = None
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Stage(NamedTuple):
+    name: str
+    deps: tuple[str, ...]
+    apply: Callable[[Run, object], str]
+    prepare: Callable[[Run], Callable[[], object] | None] | None = None
+    required: bool = True  # 실패하면 의존 단계를 막는다
+    manual: bool = False  # 기본 실행에서 빠진다(--only 로만)
+
+
+# ── 수집 ──────────────────────────────────────────────────────────────
+
+def prepare_ipo(run: Run) -> Callable[[], object]:
+    from ipo_calendar import fetch_ipo_events, load_crawl_state
+
+    state = load_crawl_state(run.conn)
+    return lambda: fetch_ipo_events(state)
+
+
+def apply_ipo(run: Run, result: tuple[list[dict], dict]) -> str:
+    from ipo_calendar import write_ipo_calendar
+
+    return write_ipo_calendar(run.conn, *result)
+
+
+def prepare_ipo_details(run: Run) -> Callable[[], object]:
+    """일정 크롤 뒤라 이번에 새로 잡힌 종목도 바로 보강 대상이다."""
+    from ipo_details import due_details, fetch_details
+
+    due = due_details(run.conn)
+    return lambda: fetch_details(due)
+
+
+def apply_ipo_details(run: Run, results: list[dict]) -> str:
+    from ipo_details import write_ipo_details
+
+    return write_ipo_details(run.conn, results)
+
+
+def prepare_indices(run: Run) -> Callable[[], object]:
+    from update_indices import fetch_indices, last_dates
+
+    stored = last_dates(run.conn)
+    return lambda: (stored, fetch_indices(stored))
+
+
+def apply_indices(run: Run, result: tuple[dict, dict]) -> str:
+    from update_indices import INDICES, write_indices
+
+    stored, fetched = result
+    return f"{write_indices(run.conn, fetched, stored)}/{len(INDICES)} indices updated"
+
+
+def prepare_fetch(run: Run) -> Callable[[], object]:
+    from update_data import fetch_stock_data, get_tickers_from_db
+
+    tickers, holiday = split_tickers(get_tickers_from_db(run.conn), run.target_date)
+    for market, skipped in holiday.items():
+        print(f"Skipped {len(skipped)} {market.upper()} tickers: market closed")
+    target_date = run.target_date
+
+    def fetch() -> tuple[list[dict], list[str]]:
+        fetched, failed = [], []
+        for ticker in tickers:
+            data = fetch_stock_data(ticker, target_date)
+            if data:
+                fetched.append(data)
+            else:
+                failed.append(ticker)
+            print(f"  {ticker}: {'OK' if data else 'FAILED'}")
+        return fetched, failed
+
+    return fetch
+
+
+def apply_fetch(run: Run, result: tuple[list[dict], list[str]]) -> str:
+    run.state["fetched"] = result
+    fetched, failed = result
+    return f"{len(fetched)} tickers fetched, {len(failed)} failed"
+
+
+def apply_upsert(run: Run, _: None) -> str:
+    """수집분을 스테이징에 모아 테이블마다 집합 병합 1회(update_data --staged 와 같은 경로).
+
+    절반 넘게 실패했으면 아무것도 쓰지 않는다 — 점수·publish 도 이 단계에 막혀 전일 상태가 남는다.
+    """
+    from update_data import create_staging, merge_staged, write_ticker
+
+    if "fetched" not in run.state:
+        raise RuntimeError("nothing fetched in this run — upsert needs the fetch stage")
+    fetched, failed = run.state.pop("fetched")
+    if failed:
+        print(f"Failed: {failed}")
+    if len(failed) > (len(fetched) + len(failed)) * 0.5:
+        raise RuntimeError(f"More than 50% of tickers failed ({len(failed)}/{len(fetched) + len(failed)})")
+    create_staging(run.conn)
+    for data in fetched:
+        write_ticker(run.conn, data, run.target_date, staged=True)
+    merge_staged(run.conn)
+    return f"{len(fetched)} tickers written, {len(failed)} failed"
+
+
+# ── 점수·순위 ─────────────────────────────────────────────────────────
+
+def apply_score(run: Run, _: None) -> str:
+    """이상치 스캔 → 게이트 → 점수. 점수 계산이 실패해도 스캔 결과는 커밋하고 실패로 보고한다."""
+    from scan_anomalies import flagged_share, run_scan
+    from scoring import calculate_hegemony_scores
+    from update_data import ANOMALY_GATE_RATIO
+
+    conn = run.conn
+    anomalies = run_scan(conn)
+    share = flagged_share(anomalies, conn, run.target_date)
+    if share > ANOMALY_GATE_RATIO:
+        run.state["rerank"] = False
+        return (
+            f"skipped — {share:.0%} of {run.target_date} snapshots flagged as anomalous "
+            f"(> {ANOMALY_GATE_RATIO:.0%}), previous scores kept"
+        )
+
+    conn.execute("SAVEPOINT scoring")
+    try:
+        calculate_hegemony_scores(conn, run.target_date)
+        conn.execute("RELEASE scoring")
+    except Exception:
+        conn.execute("ROLLBACK TO scoring")
+        conn.execute("RELEASE scoring")
+        conn.commit()
+        raise
+    run.state["rerank"] = True
+    return "hegemony scores updated"
+
+
+def weekend_rows(conn: sqlite3.Connection) -> dict[str, int]:
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {WEEKEND_PREDICATE}").fetchone()[0]
+        for table in WEEKEND_TABLES
+    }
+
+
+def apply_clean_weekend_rows(run: Run, _: None) -> str:
+    """scripts/migrate-clean-weekend-rows.ts 와 같은 삭제(멱등). 커밋 전 foreign_key_check."""
+    deleted = {
+        table: run.conn.execute(f"DELETE FROM {table} WHERE {WEEKEND_PREDICATE}").rowcount
+        for table in WEEKEND_TABLES
+    }
+    violations = run.conn.execute("PRAGMA foreign_key_check").fetchall()
+    if violations:
+        raise RuntimeError(f"foreign_key_check failed: {violations[:5]}")
+    return ", ".join(f"{table} -{count}" for table, count in deleted.items())
+
+
+def apply_score_history(run: Run, _: None) -> str:
+    """과거 score_history 전 일자 재계산(backfill_score_history). 주말 행이 남아 있으면 거부한다.
+
+    입력이 부족하면 backfill 이 RuntimeError 로 중단된다 — forward-only 폴백(다음 수집부터 정상 산식).
+    """
+    from backfill_score_history import backfill
+
+    remaining = {table: count for table, count in weekend_rows(run.conn).items() if count}
+    if remaining:
+        raise RuntimeError(f"weekend rows left {remaining} — run clean-weekend-rows first")
+    attach_archive(run.conn)
+    stats = backfill(run.conn)
+    run.state["rerank"] = True
+    return f"{stats['rows_updated']} rows over {stats['dates']} dates ({stats['first']} ~ {stats['last']})"
+
+
+def apply_new_ticker_history(run: Run, _: None) -> str:
+    """score_history 가 짧은 신규 편입 종목의 과거 점수 생성(멱등 — 대상이 없으면 no-op)."""
+    from backfill_new_ticker_score_history import generate_new_ticker_history
+
+    attach_archive(run.conn)  # 과거 일자 scale 재계산이 cold 스냅샷도 읽도록
+    stats = generate_new_ticker_history(run.conn)
+    if stats is None:
+        return "no new tickers"
+    run.state["rerank"] = True
+    return f"{len(stats['targets'])} tickers, {stats['inserted']} rows inserted"
+
+
+def apply_rank(run: Run, _: None) -> str:
+    from scoring import update_sector_rankings
+
+    if not run.state.get("rerank", True):
+        return "skipped — scores unchanged"
+    update_sector_rankings(run.conn)
+    return "sector rankings updated"
+
+
+# ── 배포 ──────────────────────────────────────────────────────────────
+
+def apply_publish(run: Run, _: None) -> str:
+    """아카이브(opt-in) → DELETE 저널로 닫기 → 분석용 파티션·큐브(opt-in) → 읽기 최적화 아티팩트."""
+    from columnar import export_stage
+    from cube import update_stage as update_cube
+    from publish_db import build_artifact
+
+    horizon = archive_horizon()
+    if horizon:
+        try:
+            attach_archive(run.conn, create=True)
+            archive_old(run.conn, horizon)
+        except (RuntimeError, ValueError) as e:
+            run.rollback()
+            print(f"Archive skipped: {e}")
+    run.publish()
+    export_stage(run.db_path, ("daily_snapshots", "score_history", "market_index_history"))
+    update_cube(run.db_path)
+    build_artifact()
+    return f"published {run.db_path.name}"
+
+
+def apply_changeset(run: Run, _: None) -> str:
+    """수집 전 사본(hegemony.prev.db) 대비 changeset + manifest. 사본이 없으면(로컬 실행) 건너뛴다."""
+    from changeset import PREV_PATH, export
+
+    if not PREV_PATH.exists():
+        return f"skipped — no {PREV_PATH.name}"
+    return f"{export(new=run.db_path)} manifest written"
+
+
+STAGES = (
+    Stage("ipo", (), apply_ipo, prepare_ipo, required=False),
+    Stage("ipo-details", ("ipo",), apply_ipo_details, prepare_ipo_details, required=False),
+    Stage("indices", (), apply_indices, prepare_indices, required=False),
+    Stage("fetch", (), apply_fetch, prepare_fetch),
+    Stage("upsert", ("fetch",), apply_upsert),
+    Stage("clean-weekend-rows", ("upsert",), apply_clean_weekend_rows, manual=True),
+    Stage("score", ("upsert",), apply_score, required=False),
+    Stage("score-history", ("clean-weekend-rows", "score"), apply_score_history, manual=True),
+    Stage("new-ticker-history", ("score", "score-history"), apply_new_ticker_history, required=False),
+    Stage("rank", ("score", "score-history", "new-ticker-history"), apply_rank, required=False),
+    Stage("publish", ("upsert", "rank", "ipo", "ipo-details", "indices"), apply_publish),
+    Stage("changeset", ("publish",), apply_changeset),
+)
+
+
+def check_dag(stages: tuple[Stage, ...]) -> None:
+    """모르는 의존·중복 이름·순환이면 ValueError."""
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate stage names: {names}")
+    for stage in stages:
+        unknown = set(stage.deps) - set(names)
+        if unknown:
+            raise ValueError(f"{stage.name}: unknown deps {sorted(unknown)}")
+    done: set[str] = set()
+    left = list(stages)
+    while left:
+        ready = [s for s in left if set(s.deps) <= done]
+        if not ready:
+            raise ValueError(f"dependency cycle among {[s.name for s in left]}")
+        done.update(s.name for s in ready)
+        left = [s for s in left if s not in ready]
+
+
+def select(stages: tuple[Stage, ...], only: list[str] | None = None, skip: list[str] | None = None) -> tuple[Stage, ...]:
+    """--only 가 있으면 그 단계만(manual 포함), 없으면 manual 이 아닌 단계 전부. 그다음 --skip 을 뺀다."""
+    names = {s.name for s in stages}
+    unknown = (set(only or ()) | set(skip or ())) - names
+    if unknown:
+        raise ValueError(f"unknown stages: {sorted(unknown)} (known: {', '.join(s.name for s in stages)})")
+    chosen = [s for s in stages if s.name in only] if only else [s for s in stages if not s.manual]
+    return tuple(s for s in chosen if s.name not in set(skip or ()))
+
+
+def _timed(fetch: Callable[[], object]) -> tuple[object, float]:
+    started = time.monotonic()
+    return fetch(), time.monotonic() - started
+
+
+def run_stages(run: Run, stages: tuple[Stage, ...], workers: int = WORKERS) -> list[dict]:
+    """의존이 풀린 단계부터 시작한다. 워커 단계를 먼저 띄우고 메인 단계(apply)는 하나씩 돈다.
+
+    돌려주는 건 선언 순서의 단계별 기록: name, status(ok/failed/blocked), start·end(실행 시작 기준 초),
+    fetch·write(초), summary.
+    """
+    by_name = {s.name: s for s in stages}
+    check_dag(tuple(s._replace(deps=tuple(d for d in s.deps if d in by_name)) for s in stages))
+    status: dict[str, str] = {}
+    records: dict[str, dict] = {}
+    pending = list(stages)
+    running: dict[Future, tuple[Stage, float]] = {}
+    t0 = time.monotonic()
+
+    def record(stage: Stage, state: str, started: float, summary: str, fetch: float = 0.0, write: float = 0.0):
+        status[stage.name] = state
+        records[stage.name] = {
+            "name": stage.name, "status": state, "start": started - t0, "end": time.monotonic() - t0,
+            "fetch": fetch, "write": write, "summary": summary,
+        }
+        print(f"[{stage.name}] {state}: {summary}")
+
+    def complete(stage: Stage, started: float, result: object, fetched_in: float) -> None:
+        began = time.monotonic()
+        try:
+            summary = stage.apply(run, result)
+            run.commit()
+        except Exception as e:
+            run.rollback()
+            record(stage, "failed", started, f"{type(e).__name__}: {e}", fetched_in, time.monotonic() - began)
+            return
+        record(stage, "ok", started, summary or "", fetched_in, time.monotonic() - began)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as pool:
+        while pending or running:
+            # 선택에서 빠진 의존은 끝난 것으로 본다.
+            ready = [s for s in pending if all(d in status for d in s.deps if d in by_name)]
+            ready.sort(key=lambda s: s.prepare is None)  # 워커 단계를 먼저 띄운다
+            for stage in ready:
+                pending.remove(stage)
+                started = time.monotonic()
+                blockers = [
+                    d for d in stage.deps
+                    if d in by_name and by_name[d].required and status[d] != "ok"
+                ]
+                if blockers:
+                    record(stage, "blocked", started, f"after {', '.join(blockers)}")
+                    continue
+                try:
+                    fetch = stage.prepare(run) if stage.prepare else None
+                except Exception as e:
+                    run.rollback()
+                    record(stage, "failed", started, f"{type(e).__name__}: {e}")
+                    continue
+                if fetch is None:
+                    complete(stage, started, None, 0.0)
+                else:
+                    running[pool.submit(_timed, fetch)] = (stage, started)
+            if ready:
+                continue
+            if not running:
+                raise RuntimeError(f"stuck with pending stages {[s.name for s in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started = running.pop(future)
+                try:
+                    result, fetched_in = future.result()
+                except Exception as e:
+                    record(stage, "failed", started, f"fetch {type(e).__name__}: {e}")
+                    continue
+                complete(stage, started, result, fetched_in)
+
+    return [records[s.name] for s in stages]
+
+
+def report(records: list[dict], wall: float) -> str:
+    """단계별 시간표. start/end 가 겹치는 단계는 동시에 돈 것이다."""
+    lines = [
+        f"Stage timing — wall {wall:.1f}s, stages total {sum(r['end'] - r['start'] for r in records):.1f}s",
+        f"  {'stage':<20}{'status':<9}{'start':>8}{'end':>8}{'fetch':>8}{'write':>8}  summary",
+    ]
+    for r in records:
+        lines.append(
+            f"  {r['name']:<20}{r['status']:<9}{r['start']:>7.1f}s{r['end']:>7.1f}s"
+            f"{r['fetch']:>7.1f}s{r['write']:>7.1f}s  {r['summary']}"
+        )
+    return "\n".join(lines)
+
+
+def _names(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Daily pipeline (stage DAG, one process)")
+    parser.add_argument("date", nargs="?", default="", help="target date YYYY-MM-DD (default: today)")
+    parser.add_argument("--only", type=_names, help="이 단계만(쉼표 구분). 빠진 의존은 끝난 것으로 본다")
+    parser.add_argument("--skip", type=_names, help="빼는 단계(쉼표 구분)")
+    parser.add_argument("--list", action="store_true", help="단계와 의존을 보여주고 끝낸다")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="동시 워커 단계 수")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.list:
+        for stage in STAGES:
+            flags = [f for f, on in (("manual", stage.manual), ("optional", not stage.required)) if on]
+            print(f"{stage.name:<20} after {', '.join(stage.deps) or '-':<45} {' '.join(flags)}")
+        return 0
+    try:
+        stages = select(STAGES, args.only, args.skip)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not DB_PATH.exists():
+        print(f"Error: Database not found at {DB_PATH}")
+        return 1
+
+    target_date = args.date or datetime.now().date().isoformat()
+    # 휴장 가드(audit B4-b) — update_data.py 와 같다. 수집이 없는 실행(--only rank 등)은 그대로 돈다.
+    # 한 시장만 쉬는 날은 fetch 단계가 그 시장 종목만 뺀다.
+    closed = closed_markets(target_date)
+    if any(s.name == "fetch" for s in stages) and len(closed) == len(MARKETS):
+        reasons = ", ".join(f"{m.upper()} {r}" for m, r in closed.items())
+        print(f"Target date {target_date}: all markets closed ({reasons}) — skipping update.")
+        signal_skipped()
+        return 0
+
+    print(f"Pipeline {target_date}: {', '.join(s.name for s in stages)}")
+    run = Run(target_date)
+    started = time.monotonic()
+    try:
+        records = run_stages(run, stages, args.workers)
+    finally:
+        run.close()
+    print(report(records, time.monotonic() - started))
+    required = {s.name for s in stages if s.required}
+    broken = [r["name"] for r in records if r["status"] != "ok" and r["name"] in required]
+    if broken:
+        print(f"Error: required stages did not finish: {', '.join(broken)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
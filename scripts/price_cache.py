@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""종목/지수 일봉 이력 로컬 캐시 — 받은 구간은 디스크에서, 빈 구간만 yfinance 로.
+
+왜 필요한가:
+  add_ticker.backfill_ticker, backfill_data.py(세 모드 전부), update_indices.fetch(매번 5년치)
+  가 모두 같은 과거 일봉을 매번 처음부터 다시 받았다. 과거 일봉은 거의 변하지 않으므로
+  심볼별로 한 번 받은 구간을 저장해 두고, 요청 구간 중 "아직 받은 적 없는" 부분만 받는다.
+  백필·지수 갱신을 재실행하면 네트워크 호출이 사실상 0 이 된다.
+
+저장 형식 (data/price_cache/<symbol>.npz, 심볼당 파일 1개):
+  - days      : int64 epoch-day(1970-01-01 기준 일수), 오름차순·중복 없음
+  - 컬럼 배열 : COLUMNS 각각 float64 (결측 NaN). yfinance auto_adjust=False 값 그대로 —
+                OHLC 는 분할만 소급 보정된 값(무보정 현물가가 아니다), Adj Close 는 분할+배당
+                보정, Volume 은 분할 보정 거래량. 보정 기준은 "받은 날" 시점이다.
+  - ranges    : (n, 2) int64 — 이미 받아 본 [start, end) 구간 맵(병합된 상태)
+  - first_fetched : int64 epoch-day — 캐시에 남은 가장 오래된 구간을 받은 날(cached_at)
+  행이 없는 구간은 확실히 비어 있을 때만 ranges 에 들어간다 — 앞뒤로 받은 행이 있는 구간
+  (휴장) 이거나 상장일(firstTradeDate) 이전. 그 밖의 빈 응답은 다음 호출에 다시 묻는다.
+  다운로드 실패(네트워크·HTTP·차단)는 절대 ranges 에 넣지 않는다.
+
+정합성 규칙:
+  - 최근 SETTLE_DAYS 일은 ranges 에 넣지 않는다. 당일 봉은 장중 값이고, 시차 때문에
+    "어제" 미국 봉이 아직 없을 수도 있다 → 이 구간은 호출 때마다 다시 받는다.
+  - 구간마다 받은 날이 다르므로, 그 사이에 분할·분사가 나면 보정 기준이 섞인다. 그런 종목은
+    invalidate_since(심볼, 기업행위 날짜) 로 통째 버린다 — 가격 캐시를 쓰는 백필 경로
+    (backfill_data, add_ticker) 는 다운로드 전에 부른다. 배당은 Adj Close(adjusted=True 의
+    비율)만 조금씩 어긋난다(연 수 %p 이하) — 정확해야 하면 invalidate 후 다시 받는다.
+    지수(update_indices)는 기업행위가 없어 해당 없음.
+  - refetch_since 로 특정 날짜 이후만 강제 재수집할 수 있다(정정 반영용 겹침 구간).
+
+구간 규약은 yfinance 와 동일: start 포함, end 미포함 ('YYYY-MM-DD').
+"""
+
+import os
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "price_cache"
+
+# yfinance auto_adjust=False 의 컬럼명 그대로.
+COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+# 이 일수 이내(오늘 포함)는 확정 봉으로 보지 않는다.
+SETTLE_DAYS = 2
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _to_day(value: str) -> int:
+    return (date.fromisoformat(value) - _EPOCH).days
+
+
+def _cache_path(symbol: str) -> Path:
+    # '^GSPC' 같은 지수 심볼도 파일명으로 쓸 수 있게.
+    safe = symbol.replace("^", "_").replace("/", "_")
+    return CACHE_DIR / f"{safe}.npz"
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(r for r in ranges if r[0] < r[1]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_from(ranges: list[tuple[int, int]], cut: int) -> list[tuple[int, int]]:
+    """ranges 에서 [cut, ∞) 를 잘라낸다(강제 재수집 구간)."""
+    return [(s, min(e, cut)) for s, e in ranges if s < cut]
+
+
+def _missing_spans(
+    ranges: list[tuple[int, int]], start: int, end: int
+) -> list[tuple[int, int]]:
+    """[start, end) 중 ranges 가 덮지 않는 부분 구간들."""
+    spans: list[tuple[int, int]] = []
+    cursor = start
+    for s, e in ranges:
+        if e <= cursor:
+            continue
+        if s >= end:
+            break
+        if s > cursor:
+            spans.append((cursor, min(s, end)))
+        cursor = max(cursor, e)
+        if cursor >= end:
+            break
+    if cursor < end:
+        spans.append((cursor, end))
+    return spans
+
+
+def _read(symbol: str) -> tuple[pd.DataFrame, list[tuple[int, int]], int | None]:
+    """(frame, ranges, first_fetched). 캐시가 없거나 못 읽으면 빈 프레임·[]·None."""
+    path = _cache_path(symbol)
+    if not path.exists():
+        return pd.DataFrame(columns=list(COLUMNS), dtype="float64"), [], None
+    try:
+        with np.load(path) as z:
+            days = z["days"]
+            frame = pd.DataFrame(
+                {col: z[col] for col in COLUMNS},
+                index=pd.Index(days, dtype="int64"),
+            )
+            ranges = [(int(s), int(e)) for s, e in z["ranges"]]
+            # first_fetched 이전 형식은 파일 시각으로 대신한다.
+            first = int(z["first_fetched"]) if "first_fetched" in z.files else _mtime_day(path)
+    except Exception as e:  # 손상된 캐시 파일은 버리고 새로 받는다(캐시는 SoT 가 아님)
+        print(f"  (price cache for {symbol} unreadable, refetching: {e})")
+        return pd.DataFrame(columns=list(COLUMNS), dtype="float64"), [], None
+    return frame, ranges, first
+
+
+def _mtime_day(path: Path) -> int:
+    return (date.fromtimestamp(path.stat().st_mtime) - _EPOCH).days
+
+
+def _write(symbol: str, frame: pd.DataFrame, ranges: list[tuple[int, int]], first_fetched: int) -> None:
+    """임시 파일에 쓰고 rename — 중단돼도 반쯤 쓴 캐시가 남지 않는다."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(symbol)
+    arrays = {col: frame[col].to_numpy(dtype="float64") for col in COLUMNS}
+    arrays["days"] = frame.index.to_numpy(dtype="int64")
+    arrays["ranges"] = np.array(ranges, dtype="int64").reshape(-1, 2)
+    arrays["first_fetched"] = np.array(first_fetched, dtype="int64")
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _download(symbol: str, start: int, end: int) -> tuple[pd.DataFrame, int | None]:
+    """[start, end) 일봉을 받아 (epoch-day 인덱스 프레임, 상장일 epoch-day | None).
+
+    yf.download 는 네트워크·HTTP 오류를 로그만 남기고 빈 프레임을 돌려준다 — "데이터 없음"과
+    구분이 안 돼 실패 구간이 받은 것으로 캐시됐다. 그래서 Ticker.history(raise_errors=True)
+    로 받고, 오류는 예외로 올린다. 단 "그 구간에 가격 없음"(YFPricesMissingError)은 정상적인
+    빈 응답이다.
+    """
+    ticker = yf.Ticker(symbol)
+    try:
+        hist = ticker.history(
+            start=(_EPOCH + timedelta(days=start)).isoformat(),
+            end=(_EPOCH + timedelta(days=end)).isoformat(),
+            auto_adjust=False,
+            actions=False,
+            raise_errors=True,
+        )
+    except YFPricesMissingError:
+        hist = None
+    first_trade = (getattr(ticker, "history_metadata", None) or {}).get("firstTradeDate")
+    first_day = int(first_trade) // 86400 if isinstance(first_trade, (int, float)) else None
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=list(COLUMNS), dtype="float64"), first_day
+
+    # Flatten multi-level columns if present (yfinance sometimes returns MultiIndex)
+    if isinstance(hist.columns, pd.MultiIndex):
+        hist.columns = hist.columns.get_level_values(0)
+
+    idx = hist.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_localize(None)
+    days = idx.normalize().values.astype("datetime64[D]").astype("int64")
+    frame = pd.DataFrame(
+        {col: hist[col].to_numpy(dtype="float64") if col in hist else np.nan for col in COLUMNS},
+        index=pd.Index(days, dtype="int64"),
+    )
+    return frame[~frame.index.duplicated(keep="last")], first_day
+
+
+def _known_empty(days: pd.Index, first_day: int | None, start: int, end: int) -> bool:
+    """빈 응답이 캐시해도 되는 빈 구간인가: 상장 전이거나, 앞뒤로 받은 행이 있는 휴장 구간."""
+    if first_day is not None and end <= first_day:
+        return True
+    return bool(len(days)) and days.min() < start and days.max() >= end
+
+
+def load_history(
+    symbol: str,
+    start: str,
+    end: str,
+    *,
+    adjusted: bool = False,
+    refetch_since: str | None = None,
+    strict: bool = False,
+) -> pd.DataFrame:
+    """[start, end) 일봉을 반환. 캐시에 없는 구간만 네트워크로 채운다.
+
+    반환 프레임은 yf.download 와 같은 모양(DatetimeIndex, 컬럼 COLUMNS)이라 기존
+    호출부가 그대로 쓸 수 있다. adjusted=True 는 auto_adjust=True 와 동일하게
+    OHLC 를 수정종가 비율로 보정하고 'Adj Close' 를 뺀다.
+
+    일부 구간 다운로드가 실패하면 그 구간은 ranges 에 기록하지 않고(다음 호출에 재시도)
+    받은 만큼만 돌려준다. 모든 구간이 실패하고 캐시도 비었으면 빈 프레임이다.
+    strict=True 면 실패를 삼키지 않고 마지막 예외를 올린다("데이터 없음"과 "수집 실패"를
+    구분해야 하는 호출부용 — 받은 구간은 그 전에 캐시에 저장된다). 빈 응답은 실패가 아니다.
+    """
+    start_day, end_day = _to_day(start), _to_day(end)
+    frame, ranges, first_fetched = _read(symbol)
+    if refetch_since:
+        ranges = _subtract_from(ranges, _to_day(refetch_since))
+
+    today = (date.today() - _EPOCH).days
+    settled_until = today - SETTLE_DAYS + 1
+    fetched: list[tuple[int, int, pd.DataFrame, int | None]] = []
+    error: Exception | None = None
+    for span_start, span_end in _missing_spans(ranges, start_day, end_day):
+        try:
+            rows, first_day = _download(symbol, span_start, span_end)
+        except Exception as e:
+            print(f"  (price fetch failed for {symbol}: {e})")
+            error = e
+            continue
+        fetched.append((span_start, span_end, rows, first_day))
+
+    if fetched:
+        frame = pd.concat([frame, *(rows for _, _, rows, _ in fetched)])
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        for span_start, span_end, rows, first_day in fetched:
+            if not rows.empty or _known_empty(frame.index, first_day, span_start, span_end):
+                ranges.append((span_start, min(span_end, settled_until)))
+        _write(symbol, frame, _merge_ranges(ranges), today if first_fetched is None else first_fetched)
+    if strict and error is not None:
+        raise error
+
+    window = frame[(frame.index >= start_day) & (frame.index < end_day)].copy()
+    window.index = pd.to_datetime(window.index.to_numpy().astype("datetime64[D]"))
+    if adjusted:
+        ratio = window["Adj Close"] / window["Close"]
+        for col in ("Open", "High", "Low", "Close"):
+            window[col] = window[col] * ratio
+        window = window.drop(columns=["Adj Close"])
+    return window
+
+
+def invalidate(symbol: str) -> None:
+    """심볼 캐시 삭제 — 분할·분사 등으로 과거 가격이 소급 보정됐을 때."""
+    _cache_path(symbol).unlink(missing_ok=True)
+
+
+def cached_at(symbol: str) -> date | None:
+    """캐시에 남은 가장 오래된 구간을 받은 날(없으면 None). 그 뒤의 기업행위는 일부 구간에 반영 안 됨.
+
+    파일 시각이 아니다 — 최근 구간을 다시 받을 때마다 파일은 새로 쓰이지만 과거 구간은 그대로다.
+    """
+    first = _read(symbol)[2]
+    return None if first is None else _EPOCH + timedelta(days=first)
+
+
+def invalidate_since(symbols: list[str], events: dict[str, str]) -> list[str]:
+    """events={심볼: 기업행위(분할 등) 날짜} 에 대해, 그날 이전부터 있던 캐시를 버린다. 버린 심볼."""
+    stale = [
+        s for s in symbols
+        if s in events and (cached := cached_at(s)) and cached.isoformat() <= events[s]
+    ]
+    for s in stale:
+        invalidate(s)
+    return stale
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""배포용 DB 아티팩트 — 웹(lib/db.ts, 읽기 전용)이 여는 파일을 따로 빌드한다.
+
+왜 필요한가:
+  db-snapshot 에 올라가던 건 파이썬 쓰기 작업이 남긴 파일 그대로였다. 매일 UPSERT·DELETE
+  로 페이지가 흩어지고(빈 페이지·조각난 B-tree), sqlite_stat1 은 마이그레이션 시점 그대로,
+  page_size 는 기본 4KB. 웹은 읽기만 하므로 쓰기 편의가 아니라 읽기 기준으로 만든 사본을
+  배포한다.
+
+아티팩트(ARTIFACT_DIR):
+  hegemony.db         VACUUM INTO 로 새로 쓴 사본 — 조각 없음, 페이지 ARTIFACT_PAGE_SIZE,
+                      ANALYZE 최신, DELETE 저널. 다음 수집의 시작 DB 로도 그대로 쓰인다.
+  hegemony.db.zst     zstd 압축본(zstandard 설치 시). fetch-db.mjs 가 Node 에 zstd 가 있으면
+                      이것을 받는다 — 전송량이 원본의 1/4~1/5.
+  hegemony.db.sha256  원본(비압축) sha256. fetch-db.mjs 가 받은 뒤 대조한다.
+
+사용:
+  python scripts/publish_db.py          # data/hegemony.db → data/publish/
+  update_data.py 는 마지막 단계에서 build_artifact() 를 호출한다.
+"""
+
+import hashlib
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH
+
+ARTIFACT_DIR = DB_PATH.parent / "publish"
+# 16KB: 시계열 범위 조회(ticker, date 인덱스)가 한 페이지에 더 많은 행을 담아 B-tree 가
+# 얕아진다. 4KB 대비 파일은 비슷하고 cold read 횟수는 줄어든다.
+ARTIFACT_PAGE_SIZE = 16384
+ZSTD_LEVEL = 19
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _compress(src: Path, dst: Path) -> bool:
+    """zstd 압축. zstandard 가 없으면 False (비압축 아티팩트만 배포)."""
+    try:
+        import zstandard
+    except ImportError:
+        print("  zstandard not installed — skipping .zst output")
+        return False
+    cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        cctx.copy_stream(fin, fout)
+    return True
+
+
+def build_artifact(src: Path = DB_PATH, out_dir: Path = ARTIFACT_DIR, compress: bool = True) -> Path:
+    """src 를 읽기 최적화 사본으로 out_dir 에 빌드하고 그 경로를 반환.
+
+    src 는 publish() 로 닫힌(DELETE 저널) 상태여야 한다 — VACUUM INTO 는 열린 쓰기
+    트랜잭션이 있으면 실패한다.
+    """
+    started = time.monotonic()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    target = out_dir / src.name
+    tmp = target.with_suffix(".db.tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    conn = sqlite3.connect(src)
+    try:
+        # 대기 중인 page_size 는 VACUUM INTO 결과 파일에 적용된다(원본은 그대로).
+        conn.execute(f"PRAGMA page_size = {ARTIFACT_PAGE_SIZE}")
+        conn.execute("VACUUM INTO ?", (str(tmp),))
+    finally:
+        conn.close()
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA journal_mode=DELETE")
+        ok = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if ok != "ok":
+        tmp.unlink()
+        raise RuntimeError(f"artifact quick_check failed: {ok}")
+
+    tmp.replace(target)
+    checksum = _sha256(target)
+    (out_dir / f"{target.name}.sha256").write_text(f"{checksum}  {target.name}\n")
+
+    zst = out_dir / f"{target.name}.zst"
+    if zst.exists():
+        zst.unlink()
+    if compress and _compress(target, zst):
+        ratio = zst.stat().st_size / target.stat().st_size
+        zst_note = f", zst {zst.stat().st_size / 1e6:.1f}MB ({ratio:.0%})"
+    else:
+        zst_note = ""
+
+    print(
+        f"Publish artifact: {src.stat().st_size / 1e6:.1f}MB → {target.stat().st_size / 1e6:.1f}MB"
+        f"{zst_note}, page_size {ARTIFACT_PAGE_SIZE}, sha256 {checksum[:12]}"
+        f" in {time.monotonic() - started:.1f}s"
+    )
+    return target
+
+
+def main():
+    if not DB_PATH.exists():
+        print(f"Error: Database not found at {DB_PATH}")
+        sys.exit(1)
+    build_artifact()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""daily_snapshots 전수 이상치 스캔 — 기업행위·수집 오류를 매일 잡는다.
+
+배경:
+  분할·분사 같은 소급 보정을 막는 장치는 backfill_data.write_ticker 의 20% 경계 가드뿐이었고,
+  그것도 백필할 때만 돈다. 일일 수집이 받은 Yahoo 값이 틀려도(시총 단위 오류, 분할 당일
+  주가 미보정 등) 아무도 모른 채 점수·순위에 반영됐다.
+
+방식:
+  전 티커 (ticker, date, price, price_change, market_cap) 를 한 번에 읽어 티커별 shift 로
+  전일 대비 비율을 벡터 연산한다(티커 루프 없음). 60만 행 수준에서 1~2초.
+
+종류(kind):
+  split         주가 ±30% 초과인데 시총은 ±10% 이내 → 액면분할·병합 등 주식수 재기준.
+                시총은 정상이라 점수엔 영향 없음. 그 이전 가격 캐시는 소급 보정 전 값이다.
+  price_jump    주가 ±30% 초과, 시총도 같이 움직임(분할 패턴 아님). KRX 가격제한폭이 ±30%
+                이므로 국내 종목은 사실상 데이터 오류, 미국 종목은 실적 급변 가능 — 검토용.
+  mcap_break    시총/주가 로 역산한 주식수가 전일 대비 ±10% 초과 변동(분할 아님).
+                Yahoo marketCap 오류 또는 클래스 합산 기준 변경 → scoring 이 그날 시총을 중립 처리.
+  change_mismatch  저장된 price_change(%) 와 전일 종가로 계산한 등락률이 5%p 넘게 다름.
+
+  전일 비교는 직전 행과 4일(주말+휴일 1일) 이내일 때만 한다 — 긴 공백 뒤의 변화는
+  이상치가 아니라 누락이다. split/price_jump/mcap_break 는 직전 5행 중앙값 대비로도
+  벗어나야 한다 → 하루 튀고 돌아온 경우 튄 날만 잡히고, 복귀한 날은 잡히지 않는다.
+
+결과는 snapshot_anomalies 에 스캔마다 통째로 교체 저장한다(전수 스캔이라 증분 불필요).
+  python scripts/scan_anomalies.py            # 스캔 + 저장 + 요약
+  python scripts/scan_anomalies.py --date 2026-10-16   # 그날 플래그만 출력
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ensure sibling modules (database.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import DB_PATH, connect, publish
+
+JUMP_THRESHOLD = 0.30  # 주가 일간 변동(비율). KRX 가격제한폭 ±30%
+SHARES_THRESHOLD = 0.10  # 역산 주식수 일간 변동(비율)
+CHANGE_TOLERANCE_PP = 5.0  # price_change 불일치 허용폭(%p)
+MAX_GAP_DAYS = 4  # 직전 행과 이 일수 이내일 때만 비교
+BASELINE_ROWS = 5  # 튐 판정 기준선(직전 N행 중앙값)
+
+
+def load_series(conn: sqlite3.Connection) -> pd.DataFrame:
+    """전 티커 시계열을 (ticker, date) 순으로. 본문이 (ticker, date) PK 클러스터라 정렬 비용 없음."""
+    rows = conn.execute(
+        """
+        SELECT ticker, date, price, price_change, market_cap
+        FROM daily_snapshots
+        ORDER BY ticker, date
+        """
+    ).fetchall()
+    df = pd.DataFrame.from_records(
+        rows, columns=["ticker", "date", "price", "price_change", "market_cap"]
+    )
+    for col in ("price", "price_change", "market_cap"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _trailing_median(values: pd.Series, tickers: pd.Series) -> pd.Series:
+    """같은 티커의 직전 BASELINE_ROWS 행 중앙값(자기 자신 제외). lag 행렬 + nanmedian 으로 벡터화."""
+    lags = np.column_stack([
+        values.shift(k).where(tickers.eq(tickers.shift(k))).to_numpy(dtype="float64")
+        for k in range(1, BASELINE_ROWS + 1)
+    ])
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 NaN 인 행(티커 첫 행)
+        median = np.nanmedian(lags, axis=1)
+    return pd.Series(median, index=values.index)
+
+
+def scan(df: pd.DataFrame) -> pd.DataFrame:
+    """이상치 행들(ticker, date, kind, value, detail). 입력은 (ticker, date) 정렬 상태."""
+    empty = pd.DataFrame(columns=["ticker", "date", "kind", "value", "detail"])
+    if df.empty:
+        return empty
+
+    tickers = df["ticker"]
+    same = tickers.eq(tickers.shift())
+    days = pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[D]").astype("int64")
+    gap = days - np.roll(days, 1)
+    comparable = same.to_numpy() & (gap <= MAX_GAP_DAYS)
+
+    # 0·음수 값은 비율이 무의미 → NaN 으로 두면 아래 비교가 전부 False
+    price = df["price"].where(df["price"] > 0)
+    mcap = df["market_cap"].where(df["market_cap"] > 0)
+    shares = mcap / price
+
+    r_price = price / price.shift().where(comparable)
+    r_mcap = mcap / mcap.shift().where(comparable)
+    r_shares = shares / shares.shift().where(comparable)
+
+    # 하루짜리 튐은 다음 날 "복귀"도 전일 대비로는 같은 크기로 보인다. 직전 BASELINE_ROWS 행
+    # 중앙값 대비로도 벗어났을 때만 잡아 튄 날 하나만 표시한다(분할 다음 날도 제외됨).
+    base_price = _trailing_median(price, tickers)
+    base_shares = _trailing_median(shares, tickers)
+
+    moved = ((r_price - 1).abs() > JUMP_THRESHOLD) & (
+        (price / base_price - 1).abs() > JUMP_THRESHOLD
+    )
+    mcap_steady = (r_mcap - 1).abs() <= SHARES_THRESHOLD
+    split = moved & mcap_steady
+    jump = moved & ~mcap_steady
+    mcap_break = (
+        ((r_shares - 1).abs() > SHARES_THRESHOLD)
+        & ((shares / base_shares - 1).abs() > SHARES_THRESHOLD)
+        & ~split
+    )
+
+    computed = (r_price - 1) * 100
+    mismatch_pp = (df["price_change"] - computed).abs()
+    mismatch = mismatch_pp > CHANGE_TOLERANCE_PP
+
+    parts = []
+    for kind, mask, value, detail in (
+        ("split", split, r_price, "price x{:.3f}, mcap steady"),
+        ("price_jump", jump, r_price, "price x{:.3f}"),
+        ("mcap_break", mcap_break, r_shares, "implied shares x{:.3f}"),
+        ("change_mismatch", mismatch, mismatch_pp, "price_change off by {:.1f}pp"),
+    ):
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        if not mask.any():
+            continue
+        hit = df.loc[mask, ["ticker", "date"]].copy()
+        hit["kind"] = kind
+        hit["value"] = value[mask].to_numpy()
+        hit["detail"] = [detail.format(v) for v in hit["value"]]
+        parts.append(hit)
+
+    if not parts:
+        return empty
+    return pd.concat(parts, ignore_index=True)
+
+
+def save_anomalies(conn: sqlite3.Connection, anomalies: pd.DataFrame) -> int:
+    """전수 스캔 결과로 통째 교체. 커밋은 호출부."""
+    conn.execute("DELETE FROM snapshot_anomalies")
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO snapshot_anomalies (ticker, date, kind, value, detail, detected_at)
+        VALUES (?, ?, ?, ?, ?, datetime('now'))
+        """,
+        anomalies[["ticker", "date", "kind", "value", "detail"]].itertuples(index=False, name=None),
+    )
+    return len(anomalies)
+
+
+def run_scan(conn: sqlite3.Connection) -> pd.DataFrame:
+    """로드 → 스캔 → 저장. 요약을 출력하고 결과 프레임을 돌려준다."""
+    started = time.monotonic()
+    df = load_series(conn)
+    anomalies = scan(df)
+    save_anomalies(conn, anomalies)
+    counts = anomalies["kind"].value_counts().to_dict() if not anomalies.empty else {}
+    summary = ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "none"
+    print(
+        f"Anomaly scan: {len(df):,} rows / {df['ticker'].nunique() if not df.empty else 0} tickers"
+        f" in {time.monotonic() - started:.2f}s — {summary}"
+    )
+    return anomalies
+
+
+def flagged_share(anomalies: pd.DataFrame, conn: sqlite3.Connection, date_str: str) -> float:
+    """date_str 스냅샷 중 split 이외 플래그가 붙은 티커 비율(일일 실행 게이트용)."""
+    total = conn.execute(
+        "SELECT COUNT(*) FROM daily_snapshots WHERE date = ?", (date_str,)
+    ).fetchone()[0]
+    if not total or anomalies.empty:
+        return 0.0
+    day = anomalies[(anomalies["date"] == date_str) & (anomalies["kind"] != "split")]
+    return day["ticker"].nunique() / total
+
+
+def split_events(conn: sqlite3.Connection) -> dict[str, str]:
+    """티커별 가장 최근 split 플래그 날짜 (백필의 가격 캐시 무효화용)."""
+    rows = conn.execute(
+        "SELECT ticker, MAX(date) FROM snapshot_anomalies WHERE kind = 'split' GROUP BY ticker"
+    ).fetchall()
+    return dict(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="daily_snapshots anomaly scan")
+    parser.add_argument("--date", help="이 날짜(YYYY-MM-DD)의 플래그를 나열")
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"Error: Database not found at {DB_PATH}")
+        sys.exit(1)
+
+    conn = connect()
+    print(f"Scan started at {datetime.now().isoformat()}")
+    anomalies = run_scan(conn)
+    publish(conn)
+
+    if args.date:
+        day = anomalies[anomalies["date"] == args.date]
+        print(f"\n{args.date}: {len(day)} flags")
+        for row in day.itertuples(index=False):
+            print(f"  {row.ticker:<12} {row.kind:<16} {row.detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from currency import to_usd
+from shares_history import shares_as_of_sql
+
+# snapshot_anomalies(scan_anomalies.py) 중 그날 market_cap 을 믿지 않는 종류.
+# scan_anomalies 가 아니라 여기 두는 이유: 그쪽은 pandas 모듈이라, 상수 하나 때문에 scoring 을
+# 쓰는 백필·add_ticker 가 pandas 를 import 하게 된다.
+NEUTRALIZE_MCAP_KINDS = ("mcap_break",)
 
 RECOMMENDATION_SCORES = {
     "strong_buy": 8,
@@ -44,6 +50,11 @@ FUNDAMENTAL_FIELDS = [
 EMA_ALPHA = 0.3
 SCORE_HISTORY_RETENTION_DAYS = 90
 
+# 한 시장만 휴장한 날(market_calendar) 그 시장 종목은 대상일 스냅샷이 없다. 이 일수 안의 마지막
+# 스냅샷(latest_snapshots)으로 섹터 상대 계산에는 넣되, 점수·이력은 쓰지 않는다 — 전 거래일 점수 유지.
+# 설·추석 연휴(앞뒤 주말 포함 최장 ~9일)를 덮는다.
+AS_OF_DAYS = 10
+
 
 def normalize(
     value: float | None, min_val: float, max_val: float, max_score: float
@@ -231,15 +242,38 @@ def compute_sector_company_scores(companies: list) -> dict:
     return out
 
 
-def fetch_sector_companies(conn: sqlite3.Connection, sector_id: str, snapshot_date: str) -> list:
+def fetch_sector_companies(
+    conn: sqlite3.Connection,
+    sector_id: str,
+    snapshot_date: str,
+    snapshots: str = "daily_snapshots",
+    since: str | None = None,
+) -> list:
     """Fetch a sector's companies joined to the snapshot of `snapshot_date`.
 
     Fundamental metrics come from company_scores (current values). For historical
     backfill the snapshot_date varies per day while fundamentals use latest —
     this matches the original engine which only ever joined the latest fundamentals.
+
+    A snapshot without market_cap (e.g. a backfilled row before shares_history had
+    a value) falls back to price × as-of shares from shares_history.
+
+    A snapshot flagged in snapshot_anomalies as a market-cap break (scan_anomalies)
+    gets market_cap NULL, i.e. the neutral scale score, instead of a bad share.
+
+    `snapshots` lets history backfills read archive.snapshots_source() (hot + cold
+    union view) for dates that have been moved out of the hot DB.
+
+    With `since`, any snapshot dated between `since` and `snapshot_date` matches —
+    meant for latest_snapshots (one row per ticker), so a market that was closed
+    on `snapshot_date` still contributes its last close to the sector totals.
     """
+    date_filter, params = ("date = ?", (snapshot_date,)) if since is None else (
+        "date BETWEEN ? AND ?", (since, snapshot_date)
+    )
+    neutralize = ",".join(f"'{k}'" for k in NEUTRALIZE_MCAP_KINDS)
     return conn.execute(
-        """
+        f"""
         SELECT sc.ticker, ds.market_cap, ds.volume, ds.avg_volume, ds.price,
                cs.revenue_growth, cs.earnings_growth, cs.operating_margin,
                cs.return_on_equity, cs.recommendation_key, cs.analyst_count,
@@ -247,14 +281,24 @@ def fetch_sector_companies(conn: sqlite3.Connection, sector_id: str, snapshot_da
                sc.revenue_weight
         FROM sector_companies sc
         LEFT JOIN (
-            SELECT ticker, market_cap, volume, avg_volume, price
-            FROM daily_snapshots
-            WHERE date = ?
+            SELECT ticker,
+                   CASE WHEN EXISTS (
+                       SELECT 1 FROM snapshot_anomalies sa
+                       WHERE sa.ticker = snap.ticker
+                         AND sa.date = snap.date
+                         AND sa.kind IN ({neutralize})
+                   ) THEN NULL ELSE COALESCE(
+                       market_cap,
+                       CAST(price * {shares_as_of_sql("snap.ticker", "snap.date")} AS INTEGER)
+                   ) END AS market_cap,
+                   volume, avg_volume, price
+            FROM {snapshots} snap
+            WHERE {date_filter}
         ) ds ON sc.ticker = ds.ticker
         LEFT JOIN company_scores cs ON sc.ticker = cs.ticker
         WHERE sc.sector_id = ?
     """,
-        (snapshot_date, sector_id),
+        (*params, sector_id),
     ).fetchall()
 
 
@@ -268,13 +312,22 @@ def calculate_hegemony_scores(conn: sqlite3.Connection, target_date: str):
 
     all_scores = {}
 
-    max_date = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    # 티커당 1행(latest_snapshots)의 MAX — 이력 길이와 무관한 상수 비용
+    max_date = conn.execute("SELECT MAX(date) FROM latest_snapshots").fetchone()[0]
     if not max_date:
         print("No snapshot data available, skipping score calculation")
         return
 
+    since = (datetime.fromisoformat(max_date) - timedelta(days=AS_OF_DAYS)).strftime("%Y-%m-%d")
+    # 대상일 스냅샷이 없는 종목(휴장 시장·수집 실패) — 계산에는 넣고 점수·이력은 그대로 둔다.
+    stale = {
+        ticker for (ticker,) in conn.execute(
+            "SELECT ticker FROM latest_snapshots WHERE date < ?", (max_date,)
+        )
+    }
+
     for (sector_id,) in sectors:
-        companies = fetch_sector_companies(conn, sector_id, max_date)
+        companies = fetch_sector_companies(conn, sector_id, max_date, "latest_snapshots", since)
         if not companies:
             continue
 
@@ -289,6 +342,8 @@ def calculate_hegemony_scores(conn: sqlite3.Connection, target_date: str):
     # Apply EMA smoothing and update DB
     updated = 0
     for ticker, scores in all_scores.items():
+        if ticker in stale:
+            continue
         prev = conn.execute(
             "SELECT smoothed_score, score_updated_at FROM company_scores WHERE ticker = ?", (ticker,)
         ).fetchone()
@@ -350,6 +405,9 @@ def calculate_hegemony_scores(conn: sqlite3.Connection, target_date: str):
     conn.execute("DELETE FROM score_history WHERE date < ?", (cutoff,))
 
     print(f"Calculated scores for {updated} companies")
+    kept = len(stale & all_scores.keys())
+    if kept:
+        print(f"  kept {kept} without a {max_date} snapshot (market closed or fetch failed)")
 
 
 def update_sector_rankings(conn: sqlite3.Connection):
@@ -374,11 +432,9 @@ def update_sector_rankings(conn: sqlite3.Connection):
                    COALESCE(ds.market_cap, 0) * sc.revenue_weight as weighted_mc
             FROM sector_companies sc
             LEFT JOIN company_scores cs ON sc.ticker = cs.ticker
-            LEFT JOIN (
-                SELECT ticker, market_cap
-                FROM daily_snapshots
-                WHERE date = (SELECT MAX(date) FROM daily_snapshots)
-            ) ds ON sc.ticker = ds.ticker
+            LEFT JOIN latest_snapshots ds
+                ON sc.ticker = ds.ticker
+               AND ds.date = (SELECT MAX(date) FROM latest_snapshots)
             WHERE sc.sector_id = ?
             ORDER BY score DESC, weighted_mc DESC
         """,
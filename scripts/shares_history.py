@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""상장주식수 시계열(shares_history) — 과거 시가총액 재구성용.
+
+배경:
+  백필은 `market_cap = 현재 sharesOutstanding × 과거 종가` 로 시총을 만들었고, 그 주식수
+  하나를 얻으려고 티커마다 .info 를 한 번 더 호출했다(backfill_data.fetch_shares_outstanding,
+  add_ticker.backfill_ticker). 일일 수집(update_data.py)은 어차피 같은 .info 를 받으므로
+  거기서 주식수를 기록해 두면 백필은 네트워크 없이 as-of 조회로 끝난다.
+
+저장 규칙:
+  - 값이 바뀐 날만 1행(변경점 타임라인). 매일 600행씩 쌓지 않는다.
+    역산값은 marketCap·price 의 갱신 시차로 매일 조금씩 흔들리므로, as-of 값과
+    SHARES_TOLERANCE(상대 0.5%) 넘게 달라야 바뀐 것으로 본다 — 자사주 매입·증자는 그보다 크다.
+  - 주식수는 marketCap / price 로 역산한 값을 우선한다. 다중 클래스 종목(GOOGL 등)은
+    Yahoo marketCap 이 전 클래스 합산이라 sharesOutstanding(단일 클래스)과 곱이 맞지 않는다.
+    daily_snapshots.market_cap 과 같은 기준이어야 백필 구간과 일일 구간이 이어진다.
+
+as-of 규칙:
+  date 이하의 가장 최근 행. 그보다 이른 날짜(첫 관측 이전 백필)는 가장 이른 행으로 폴백한다
+  — 예전 "현재 주식수 × 과거 종가" 와 같은 근사지만 .info 호출이 없다.
+  주식수 행이 하나도 없을 때 백필된 행은 market_cap 이 NULL 로 남는다. 그 티커의 첫 행을
+  기록하는 순간(record_shares·merge_staged_shares) 남은 NULL 을 채운다.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# Ensure sibling modules (staging.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
+
+from staging import Upsert, merge, stage_name, upsert
+
+# 일일 수집이 주식수를 쓰는 명세 — record_shares(행 단위)와 merge_staged_shares(집합)가 공유.
+SHARES_UPSERT = Upsert(
+    "shares_history",
+    ("ticker", "date", "shares", "source"),
+    "?, ?, ?, 'info'",
+    """ON CONFLICT(ticker, date) DO UPDATE SET
+            shares = excluded.shares,
+            source = excluded.source""",
+)
+
+# 이 상대 차이 이하는 같은 주식수로 본다(역산 지터). record_shares·merge_staged_shares 공통.
+SHARES_TOLERANCE = 0.005
+
+# fill_market_cap 으로 티커 전 구간을 채울 때의 [start, end).
+ALL_DATES = ("0000-01-01", "9999-12-31")
+
+# (ticker, as-of date) 로 주식수를 고르는 상관 서브쿼리. {t}/{d} 에 바깥 컬럼식을 넣는다.
+_AS_OF_SQL = """COALESCE(
+    (SELECT sh.shares FROM shares_history sh
+     WHERE sh.ticker = {t} AND sh.date <= {d} ORDER BY sh.date DESC LIMIT 1),
+    (SELECT sh.shares FROM shares_history sh
+     WHERE sh.ticker = {t} ORDER BY sh.date LIMIT 1)
+)"""
+
+
+def shares_as_of_sql(ticker_expr: str, date_expr: str) -> str:
+    """다른 쿼리에 끼워 넣을 as-of 주식수 SQL 식(예: scoring 의 시총 폴백)."""
+    return _AS_OF_SQL.format(t=ticker_expr, d=date_expr)
+
+
+def seed_from_snapshots(conn: sqlite3.Connection) -> int:
+    """shares_history 가 없는 티커에 최신 스냅샷의 market_cap / price 를 1행 넣는다.
+
+    테이블 생성은 database.MIGRATIONS 가 하고, 생성 직후 한 번 이 함수로 시드한다.
+    """
+    return conn.execute(
+        """
+        INSERT OR IGNORE INTO shares_history (ticker, date, shares, source)
+        SELECT ds.ticker, ds.date, CAST(ROUND(ds.market_cap / ds.price) AS INTEGER), 'snapshot'
+        FROM daily_snapshots ds
+        JOIN (
+            SELECT ticker, MAX(date) AS d
+            FROM daily_snapshots
+            WHERE market_cap > 0 AND price > 0
+            GROUP BY ticker
+        ) latest ON latest.ticker = ds.ticker AND latest.d = ds.date
+        WHERE ds.ticker NOT IN (SELECT ticker FROM shares_history)
+        """
+    ).rowcount
+
+
+def implied_shares(info: dict) -> int | None:
+    """.info 에서 주식수. marketCap / price 역산 우선, 없으면 sharesOutstanding."""
+    market_cap = info.get("marketCap")
+    price = info.get("currentPrice") or info.get("regularMarketPrice")
+    if market_cap and price:
+        return round(market_cap / price)
+    shares = info.get("sharesOutstanding")
+    return int(shares) if shares else None
+
+
+def record_shares(
+    conn: sqlite3.Connection, ticker: str, as_of: str, shares: int | None
+) -> bool:
+    """as_of 기준 값과 SHARES_TOLERANCE 넘게 다를 때만 기록. 기록했으면 True."""
+    if not shares:
+        return False
+    current = shares_as_of(conn, ticker, as_of)
+    if current and abs(shares - current) <= SHARES_TOLERANCE * current:
+        return False
+    upsert(conn, SHARES_UPSERT, (ticker, as_of, shares))
+    if current is None:  # 첫 행 — 주식수 없이 백필된 시총을 채운다
+        fill_market_cap(conn, ticker, ALL_DATES[0], ALL_DATES[1])
+    return True
+
+
+def merge_staged_shares(conn: sqlite3.Connection) -> int:
+    """스테이징된 주식수 중 as-of 값과 SHARES_TOLERANCE 넘게 다른 것만 기록 — record_shares 의 집합 병합판.
+
+    as-of 는 병합 전 상태와 비교한다. 일일 수집은 티커당 1행(대상일)만 스테이징하므로
+    행 단위 경로와 결과가 같다.
+    """
+    first = [
+        t for (t,) in conn.execute(
+            f"""
+            SELECT DISTINCT s.ticker FROM temp.{stage_name(SHARES_UPSERT.table)} s
+            WHERE s.shares IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM shares_history sh WHERE sh.ticker = s.ticker)
+            """
+        )
+    ]
+    current = shares_as_of_sql("s.ticker", "s.date")
+    merged = merge(
+        conn,
+        SHARES_UPSERT,
+        where=f"s.shares IS NOT NULL AND ({current} IS NULL OR ABS(s.shares - {current}) > {SHARES_TOLERANCE} * {current})",
+    )
+    for ticker in first:  # 첫 행 — 주식수 없이 백필된 시총을 채운다(record_shares 와 같다)
+        fill_market_cap(conn, ticker, ALL_DATES[0], ALL_DATES[1])
+    return merged
+
+
+def shares_as_of(conn: sqlite3.Connection, ticker: str, as_of: str) -> int | None:
+    """as_of 시점의 주식수(없으면 None)."""
+    row = conn.execute(f"SELECT {shares_as_of_sql('?', '?')}", (ticker, as_of, ticker)).fetchone()
+    return row[0] if row else None
+
+
+def fill_market_cap(
+    conn: sqlite3.Connection, ticker: str, start_date: str, end_date: str
+) -> int:
+    """[start_date, end_date) 의 market_cap 이 빈 행을 price × as-of 주식수로 한 번에 채운다.
+
+    일일 수집이 저장한 시총(Yahoo marketCap 원값)은 건드리지 않는다(IS NULL 행만).
+    """
+    return conn.execute(
+        f"""
+        UPDATE daily_snapshots
+        SET market_cap = CAST(price * {shares_as_of_sql('daily_snapshots.ticker', 'daily_snapshots.date')} AS INTEGER)
+        WHERE ticker = ? AND date >= ? AND date < ?
+          AND market_cap IS NULL AND price IS NOT NULL
+        """,
+        (ticker, start_date, end_date),
+    ).rowcount
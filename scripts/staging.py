@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""일일 수집 스테이징 — 가져온 행을 TEMP 테이블에 모았다가 짧은 트랜잭션 한 번에 병합.
+
+왜 필요한가:
+  update_data 는 20분 넘는 티커 루프 동안 라이브 테이블에 한 행씩 UPSERT 하고, 점수·순위는
+  그 뒤 별도 커밋으로 썼다. 도중에 DB 를 여는 쪽(로컬 dev 서버, 검증 스크립트)은 오늘 스냅샷
+  절반 + 어제 점수 같은 섞인 상태를 본다. 쓰기 잠금도 루프 내내 잡혀 있었다.
+
+방식(update_data --staged):
+  1. 수집   행을 temp.stage_<table> 에 INSERT 만 한다. TEMP 스키마는 연결 전용 메모리라
+            메인 파일엔 잠금이 걸리지 않는다.
+  2. 병합   BEGIN IMMEDIATE 후 테이블마다 INSERT ... SELECT ... ON CONFLICT 한 번
+            (행 단위 UPSERT 와 같은 ON CONFLICT 절 — Upsert 명세를 공유한다).
+  3. 점수   같은 트랜잭션 안에서 이상치 스캔·점수·순위까지 계산하고 한 번에 커밋.
+  → 읽는 쪽은 어제 상태 아니면 오늘 상태만 본다. 잠금은 병합~점수 몇 초만.
+
+  --swap 을 더하면 작업 사본(hegemony.db.next)에서 전부 끝낸 뒤 rename 으로 바꿔 끼운다.
+  이미 옛 파일을 연 리더는 끝까지 옛 inode 를 읽는다(POSIX rename 은 원자적).
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Upsert(NamedTuple):
+    """테이블 하나의 쓰기 명세. 행 단위 UPSERT 와 스테이징 병합이 같은 걸 쓴다.
+
+    values 는 VALUES 자리에 들어갈 식(? 와 datetime('now') 등),
+    conflict 는 ON CONFLICT ... 절 전체.
+    """
+
+    table: str
+    columns: tuple[str, ...]
+    values: str
+    conflict: str
+
+
+def stage_name(table: str) -> str:
+    return f"stage_{table}"
+
+
+def upsert(conn: sqlite3.Connection, spec: Upsert, row: tuple) -> None:
+    """라이브 테이블에 한 행 UPSERT (비스테이징 경로)."""
+    conn.execute(
+        f"INSERT INTO {spec.table} ({', '.join(spec.columns)}) VALUES ({spec.values}) {spec.conflict}",
+        row,
+    )
+
+
+def create_stage(conn: sqlite3.Connection, table: str) -> str:
+    """main.<table> 과 같은 컬럼(제약 없음)의 빈 TEMP 테이블. 이름을 돌려준다.
+
+    CREATE ... AS SELECT 는 컬럼 affinity 만 복사하고 UNIQUE/PK 는 복사하지 않는다 —
+    같은 키가 두 번 스테이징돼도 병합의 ON CONFLICT 가 순서대로 처리한다.
+    """
+    name = stage_name(table)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {name} AS SELECT * FROM main.{table} WHERE 0")
+    conn.execute(f"DELETE FROM temp.{name}")
+    return name
+
+
+def stage(conn: sqlite3.Connection, spec: Upsert, row: tuple) -> None:
+    """스테이징 테이블에 한 행 INSERT (제약 없음 → 충돌 처리는 병합 때)."""
+    conn.execute(
+        f"INSERT INTO temp.{stage_name(spec.table)} ({', '.join(spec.columns)}) VALUES ({spec.values})",
+        row,
+    )
+
+
+def merge(conn: sqlite3.Connection, spec: Upsert, where: str = "true") -> int:
+    """스테이징 → 라이브 집합 병합 1회. 병합한 행 수(rowcount). 커밋은 호출부.
+
+    INSERT ... SELECT 뒤의 ON CONFLICT 는 WHERE 가 있어야 파싱이 모호하지 않다(SQLite 문서).
+    where 의 스테이징 행 별칭은 s.
+    """
+    cols = ", ".join(spec.columns)
+    return conn.execute(
+        f"""
+        INSERT INTO main.{spec.table} ({cols})
+        SELECT {cols} FROM temp.{stage_name(spec.table)} AS s
+        WHERE {where}
+        {spec.conflict}
+        """
+    ).rowcount
+
+
+def work_copy(path: Path) -> Path:
+    """--swap 용 작업 사본(<name>.next)을 온라인 백업으로 만든다. 경로를 돌려준다."""
+    work = path.with_name(path.name + ".next")
+    if work.exists():
+        work.unlink()  # 지난 실행이 중간에 죽고 남긴 사본
+    src = sqlite3.connect(path)
+    dst = sqlite3.connect(work)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return work
+
+
+def swap_in(work: Path, path: Path) -> None:
+    """publish 로 마감한 작업 사본을 원자적으로 라이브 경로에 바꿔 끼운다."""
+    for suffix in ("-journal", "-wal", "-shm"):
+        if Path(f"{work}{suffix}").exists():
+            raise RuntimeError(f"{work.name}{suffix} exists — publish() the work copy before swapping")
+    os.replace(work, path)
@@ -15,10 +15,28 @@
 
 통화: 시총 정렬·임계 비교는 반드시 currency.to_usd(marketCap, ticker) 후 수행(KR raw 정렬 금지).
 
+대량 후보(KOSPI/KOSDAQ 전체, NASDAQ 전체 목록):
+    .info 는 후보당 1~2초 블로킹 요청이라 순차로는 500개에 수십 분이 걸린다. 그래서
+    - 네트워크 없이 끝나는 후보를 먼저 거른다: 시장 게이트, 이미 DB 에 있는 종목
+      (companies + 최근 KNOWN_MAX_AGE_DAYS 일 latest_snapshots, DQ 는 company_scores),
+      INFO_CACHE 에 INFO_TTL_HOURS 안에 받아 둔 .info 요약.
+    - 나머지만 --workers 개 스레드로 동시에 .info 를 받고, 끝나는 순서대로 stderr 에 흘린다.
+    - --sector 편입 여부는 한 번의 쿼리로 집합을 만들어 둔다(행마다 쿼리하지 않는다).
+    최종 표/JSON(stdout)은 예전처럼 전부 끝난 뒤 USD 시총 순으로 한 번 출력한다.
+
+발굴 모드(--discover, listing_index.py):
+    후보 목록 없이 US·KR 전 종목 인덱스(data/listing_index.db)에서 마지막으로 알려진 시총·
+    거래량으로 게이트를 SQL 로 먼저 걸고, 섹터 편입 종목의 company_profiles.industry 분포와
+    업종이 비슷한 비편입 종목만 골라 위 스크리닝(DB·캐시·.info)에 넘긴다. 유사도 DESC →
+    USD 시총 DESC. 인덱스 값 갱신은 --refresh-index(목록은 TTL, 값은 due 종목 --index-limit 개).
+
 사용법:
     .venv/bin/python scripts/suggest_candidates.py --tickers AAPL,005930.KS,JD --sector ecommerce
     .venv/bin/python scripts/suggest_candidates.py --tickers-file candidates.txt --sector materials --limit 10
     .venv/bin/python scripts/suggest_candidates.py --tickers LMT,RTX,GD --region us --min-mcap-us 2e9 --json
+    .venv/bin/python scripts/suggest_candidates.py --tickers-file kosdaq.txt --region kr --workers 16
+    .venv/bin/python scripts/suggest_candidates.py --refresh-index --index-limit 1000
+    .venv/bin/python scripts/suggest_candidates.py --discover --sector semis --region us
 
 옵션:
     --tickers       쉼표구분 후보 티커(필수 또는 --tickers-file)
@@ -31,25 +49,43 @@
     --min-vol-us    US 최소 평균거래량(기본 500000)
     --min-vol-kr    KR 최소 평균거래량(기본 100000)
     --json          JSON 출력(기본 표)
+    --workers       동시 .info 요청 수(기본 8)
+    --refresh       DB·캐시를 무시하고 모든 후보를 yfinance 로 다시 조회
+    --discover      listing_index 에서 섹터 빈 자리 후보 발굴(--sector 필수)
+    --min-similarity  발굴 업종 유사도 하한(0~1, 기본 0.3)
+    --refresh-index listing_index 종목 목록·값 증분 갱신(단독 또는 --discover 와 함께)
+    --index-limit   갱신 시 네트워크로 값을 다시 볼 최대 종목 수(기본 300)
 """
 
 import argparse
 import json
+import os
+import re
 import sqlite3
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 import yfinance as yf
 
+import listing_index
 from currency import to_usd
-
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+from database import DB_PATH, connect
 
 # 시장 게이트 — lib/region.ts 및 add_ticker.py 와 동일 로직(US=접미사 없음, KR=.KS/.KQ)
 KR_TICKER_SUFFIXES = (".KS", ".KQ")
 
+# 이보다 오래된 latest_snapshots 는 믿지 않고 .info 를 다시 받는다(수집에서 빠진 종목 등).
+KNOWN_MAX_AGE_DAYS = 7
+
+# .info 요약 캐시 — 같은 목록을 임계만 바꿔 다시 돌릴 때 네트워크 0.
+INFO_CACHE = Path(__file__).parent.parent / "data" / "candidate_info.json"
+INFO_TTL_HOURS = 24
+
 
 def is_us_or_kr(ticker: str) -> bool:
     """허용 시장(US=접미사 없음, KR=.KS/.KQ)인지. 그 외 접미사는 거부."""
@@ -62,12 +98,13 @@ def region_of(ticker: str) -> str:
     return "kr" if ticker.endswith(KR_TICKER_SUFFIXES) else "us"
 
 
-def already_in_sector(conn: sqlite3.Connection, sector_id: str, ticker: str) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM sector_companies WHERE sector_id = ? AND ticker = ?",
-        (sector_id, ticker),
-    ).fetchone()
-    return row is not None
+def sector_members(conn: sqlite3.Connection | None, sector_id: str | None) -> set[str] | None:
+    """섹터 편입 티커 집합(쿼리 1회). 섹터·DB 가 없으면 None(표시 안 함)."""
+    if conn is None or not sector_id:
+        return None
+    return {
+        t for (t,) in conn.execute("SELECT ticker FROM sector_companies WHERE sector_id = ?", (sector_id,))
+    }
 
 
 FUNDAMENTAL_FIELDS = (
@@ -80,6 +117,9 @@ FUNDAMENTAL_FIELDS = (
     "beta",
 )
 
+# 캐시에 남기는 .info 키 — 게이트·출력에 쓰는 것만(.info 전체는 티커당 수십 KB).
+INFO_FIELDS = ("marketCap", "averageVolume", "shortName", "longName", "industry", *FUNDAMENTAL_FIELDS)
+
 
 def data_quality(info: dict) -> float:
     """펀더멘털 7필드 비결측 비율(0~1) — scoring 의 data_quality 근사."""
@@ -87,6 +127,53 @@ def data_quality(info: dict) -> float:
     return present / len(FUNDAMENTAL_FIELDS)
 
 
+def known_companies(conn: sqlite3.Connection | None, max_age_days: int = KNOWN_MAX_AGE_DAYS) -> dict[str, dict]:
+    """이미 수집 중인 종목의 .info 대용 {ticker: info-like dict}. 최신 스냅샷이 오래된 종목은 빠진다.
+
+    시총·평균거래량은 latest_snapshots, 이름은 companies, DQ 는 company_scores(같은 7필드 비율).
+    """
+    if conn is None:
+        return {}
+    since = (datetime.now(timezone.utc).date() - timedelta(days=max_age_days)).isoformat()
+    rows = conn.execute(
+        """
+        SELECT c.ticker, c.name, l.market_cap, l.avg_volume, s.data_quality
+        FROM companies c
+        JOIN latest_snapshots l ON l.ticker = c.ticker
+        LEFT JOIN company_scores s ON s.ticker = c.ticker
+        WHERE l.date >= ? AND l.market_cap IS NOT NULL
+        """,
+        (since,),
+    )
+    return {
+        ticker: {"marketCap": mcap, "averageVolume": avg_vol, "shortName": name, "_dataQuality": dq}
+        for ticker, name, mcap, avg_vol, dq in rows
+    }
+
+
+def load_info_cache(path: Path = INFO_CACHE, ttl_hours: float = INFO_TTL_HOURS) -> dict[str, dict]:
+    """{ticker: {"fetched_at", "info"}} 중 TTL 안의 것만. 파일이 없거나 깨졌으면 빈 캐시."""
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=ttl_hours)).isoformat()
+    return {t: e for t, e in entries.items() if e.get("fetched_at", "") >= cutoff}
+
+
+def save_info_cache(cache: dict[str, dict], path: Path = INFO_CACHE) -> None:
+    """임시 파일에 쓰고 rename — 중단돼도 반쯤 쓴 캐시가 남지 않는다."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
 def parse_ticker_list(args: argparse.Namespace) -> list[str]:
     raw: list[str] = []
     if args.tickers:
@@ -105,28 +192,38 @@ def parse_ticker_list(args: argparse.Namespace) -> list[str]:
     return result
 
 
-def evaluate(
-    ticker: str,
-    args: argparse.Namespace,
-    conn: sqlite3.Connection | None,
-) -> dict | None:
-    """단일 후보 평가. 게이트 통과 시 dict 반환, 탈락 시 None(+사유 출력)."""
-    # 1) 시장 게이트
+def market_gate(ticker: str, args: argparse.Namespace) -> bool:
+    """1) 시장 게이트 + --region 필터 — 네트워크 없이 판정."""
     if not is_us_or_kr(ticker):
         print(f"  [reject] {ticker}: 비 US/KR 시장(접미사) — 거부", file=sys.stderr)
-        return None
+        return False
+    return args.region == "all" or region_of(ticker) == args.region
 
-    region = region_of(ticker)
-    if args.region != "all" and region != args.region:
-        return None
 
-    # 2) 데이터 결측 게이트
+def fetch_info(ticker: str) -> dict | None:
+    """.info 에서 INFO_FIELDS 만. 조회 실패는 None(+사유 출력). 워커 스레드에서 돈다."""
     try:
         info = yf.Ticker(ticker).info
     except Exception as e:
         print(f"  [reject] {ticker}: yfinance 조회 실패 ({e})", file=sys.stderr)
         return None
-    if not info or info.get("marketCap") is None:
+    return {k: info.get(k) for k in INFO_FIELDS} if info else {}
+
+
+def evaluate(
+    ticker: str,
+    args: argparse.Namespace,
+    info: dict | None,
+    members: set[str] | None = None,
+    source: str = "yfinance",
+) -> dict | None:
+    """게이트 2~5. info 는 .info 요약(또는 DB 대용). 통과 시 dict, 탈락 시 None(+사유 출력)."""
+    region = region_of(ticker)
+
+    # 2) 데이터 결측 게이트
+    if info is None:
+        return None
+    if info.get("marketCap") is None:
         print(f"  [reject] {ticker}: marketCap 결측", file=sys.stderr)
         return None
 
@@ -152,7 +249,7 @@ def evaluate(
         )
         return None
 
-    dq = data_quality(info)
+    dq = info["_dataQuality"] if info.get("_dataQuality") is not None else data_quality(info)
 
     return {
         "ticker": ticker,
@@ -162,12 +259,184 @@ def evaluate(
         "marketCapNative": raw_mcap,
         "avgVolume": avg_vol,
         "dataQuality": round(dq, 2),
-        "alreadyInSector": (
-            already_in_sector(conn, args.sector, ticker)
-            if (conn is not None and args.sector)
-            else None
-        ),
+        "alreadyInSector": (ticker in members) if members is not None else None,
+        "source": source,
+    }
+
+
+def screen(
+    tickers: list[str],
+    args: argparse.Namespace,
+    conn: sqlite3.Connection | None,
+    cache: dict[str, dict],
+) -> list[dict]:
+    """후보 전체 평가. DB·캐시로 끝나는 후보는 바로, 나머지는 동시 .info 조회 후 완료 순으로.
+
+    cache 에는 새로 받은 .info 요약이 채워진다(저장은 호출부).
+    """
+    members = sector_members(conn, args.sector)
+    known = {} if args.refresh else known_companies(conn)
+    results: list[dict] = []
+    remote: list[str] = []
+    for ticker in tickers:
+        if not market_gate(ticker, args):
+            continue
+        if ticker in known:
+            row = evaluate(ticker, args, known[ticker], members, "db")
+        elif ticker in cache and not args.refresh:
+            row = evaluate(ticker, args, cache[ticker]["info"], members, "cache")
+        else:
+            remote.append(ticker)
+            continue
+        if row is not None:
+            results.append(row)
+    print(
+        f"  {len(tickers)} candidates: {len(results)} passed from DB/cache, {len(remote)} to fetch "
+        f"({args.workers} workers)",
+        file=sys.stderr,
+    )
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(fetch_info, t): t for t in remote}
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            info = future.result()
+            if info is not None:
+                cache[ticker] = {"fetched_at": datetime.now(timezone.utc).isoformat(), "info": info}
+            row = evaluate(ticker, args, info, members)
+            if row is not None:
+                results.append(row)
+                print(
+                    f"  [{done}/{len(remote)}] {ticker}: 통과 ${row['marketCapUsd']:,} {row['name']}",
+                    file=sys.stderr,
+                )
+    return results
+
+
+# ── 발굴 모드(listing_index) ─────────────────────────────────────────────────
+
+_INDUSTRY_STOPWORDS = {"and", "the", "of", "other", "general"}
+
+
+def _industry_tokens(industry: str) -> set[str]:
+    """소문자 단어 집합. 끝 's' 는 떼어 단·복수를 맞춘다(Semiconductors ↔ Semiconductor Equipment)."""
+    words = set(re.findall(r"[a-z0-9]+", industry.lower())) - _INDUSTRY_STOPWORDS
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words}
+
+
+def sector_industry_profile(conn: sqlite3.Connection, sector_id: str) -> dict[str, float]:
+    """섹터 편입 종목의 company_profiles.industry 분포 {업종: 비중}(합 1)."""
+    rows = conn.execute(
+        """
+        SELECT p.industry, COUNT(*) FROM sector_companies sc
+        JOIN company_profiles p ON p.ticker = sc.ticker
+        WHERE sc.sector_id = ? AND p.industry IS NOT NULL
+        GROUP BY p.industry
+        """,
+        (sector_id,),
+    ).fetchall()
+    total = sum(n for _, n in rows)
+    return {industry: n / total for industry, n in rows}
+
+
+def industry_similarity(industry: str | None, profile: dict[str, float]) -> float:
+    """섹터 업종 분포 대비 유사도(0~1).
+
+    업종 쌍마다 토큰 Jaccard × 그 업종 비중을 최대 비중으로 나눈 값의 최댓값 → 섹터 최다 업종과
+    정확히 같으면 1, 소수 업종과 같거나 최다 업종과 일부 토큰만 겹치면 그보다 낮다.
+    """
+    if not industry or not profile:
+        return 0.0
+    tokens = _industry_tokens(industry)
+    top = max(profile.values())
+    best = 0.0
+    for other, share in profile.items():
+        other_tokens = _industry_tokens(other)
+        if not tokens or not other_tokens:
+            continue
+        jaccard = len(tokens & other_tokens) / len(tokens | other_tokens)
+        best = max(best, jaccard * share / top)
+    return best
+
+
+def _index_stats(ticker: str, info: dict) -> dict:
+    mcap = info.get("marketCap")
+    return {
+        "market_cap_usd": to_usd(mcap, ticker) if mcap is not None else None,
+        "avg_volume": info.get("averageVolume"),
+        "industry": info.get("industry"),
+    }
+
+
+def refresh_index(
+    index: sqlite3.Connection,
+    conn: sqlite3.Connection | None,
+    cache: dict[str, dict],
+    args: argparse.Namespace,
+) -> None:
+    """listing_index 증분 갱신: 종목 목록(TTL) → DB·캐시 값 → due 종목만 .info 동시 조회."""
+    print(f"  Listing index: {listing_index.refresh_symbols(index)}", file=sys.stderr)
+
+    known = known_companies(conn)
+    industries = dict(conn.execute("SELECT ticker, industry FROM company_profiles")) if conn else {}
+    for ticker, info in known.items():
+        info["industry"] = industries.get(ticker)
+    local = {
+        "db": {t: _index_stats(t, info) for t, info in known.items()},
+        "cache": {t: _index_stats(t, e["info"]) for t, e in cache.items() if t not in known},
     }
+    for source, stats in local.items():
+        listing_index.update_stats(index, stats, source)
+    index.commit()
+
+    due = listing_index.due_stats(index, args.index_limit)
+    fetched: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(fetch_info, t): t for t in due}
+        for future in as_completed(futures):
+            ticker, info = futures[future], future.result()
+            if info is None:
+                continue  # 조회 실패 — stats_at 을 남기지 않아 다음 갱신에서 다시 본다
+            cache[ticker] = {"fetched_at": datetime.now(timezone.utc).isoformat(), "info": info}
+            fetched[ticker] = _index_stats(ticker, info)
+    listing_index.update_stats(index, fetched, "yfinance")
+    index.commit()
+    print(
+        f"  Listing index: {sum(map(len, local.values()))} from DB/cache, {len(fetched)}/{len(due)} fetched; "
+        f"{listing_index.summary(index)}",
+        file=sys.stderr,
+    )
+
+
+def discover(
+    index: sqlite3.Connection,
+    conn: sqlite3.Connection,
+    args: argparse.Namespace,
+) -> list[dict]:
+    """인덱스 게이트 통과 + 섹터 비편입 + 업종 유사도 ≥ 하한. 유사도 DESC → USD 시총 DESC. 네트워크 없음."""
+    profile = sector_industry_profile(conn, args.sector)
+    if not profile:
+        raise ValueError(f"{args.sector}: 편입 종목의 company_profiles.industry 가 없어 유사도를 잴 수 없습니다")
+    members = sector_members(conn, args.sector) or set()
+    gated = listing_index.gate_candidates(
+        index,
+        args.region,
+        {"us": args.min_mcap_us, "kr": args.min_mcap_kr},
+        {"us": args.min_vol_us, "kr": args.min_vol_kr},
+    )
+    scored = []
+    for c in gated:
+        if c["symbol"] in members:
+            continue
+        similarity = industry_similarity(c["industry"], profile)
+        if similarity >= args.min_similarity:
+            scored.append({**c, "similarity": round(similarity, 2)})
+    scored.sort(key=lambda c: (-c["similarity"], -c["market_cap_usd"]))
+    print(
+        f"  Discover {args.sector}: {len(gated)} pass index gates, {len(scored)} similar non-members",
+        file=sys.stderr,
+    )
+    return scored
 
 
 def main() -> None:
@@ -182,26 +451,61 @@ def main() -> None:
     parser.add_argument("--min-vol-us", type=float, default=500000)
     parser.add_argument("--min-vol-kr", type=float, default=100000)
     parser.add_argument("--json", action="store_true", help="JSON 출력")
+    parser.add_argument("--workers", type=int, default=8, help="동시 .info 요청 수")
+    parser.add_argument("--refresh", action="store_true", help="DB·캐시 무시, 전부 yfinance 로 재조회")
+    parser.add_argument("--discover", action="store_true", help="listing_index 에서 섹터 빈 자리 후보 발굴")
+    parser.add_argument("--min-similarity", type=float, default=0.3, help="발굴 업종 유사도 하한(0~1)")
+    parser.add_argument("--refresh-index", action="store_true", help="listing_index 증분 갱신")
+    parser.add_argument("--index-limit", type=int, default=300, help="갱신 시 .info 로 다시 볼 최대 종목 수")
 
     args = parser.parse_args()
 
     tickers = parse_ticker_list(args)
-    if not tickers:
-        parser.error("--tickers 또는 --tickers-file 로 후보를 지정하세요.")
+    if args.discover and not args.sector:
+        parser.error("--discover 는 --sector 가 필요합니다.")
+    if not tickers and not args.discover and not args.refresh_index:
+        parser.error("--tickers 또는 --tickers-file 로 후보를 지정하세요(또는 --discover).")
 
-    conn = sqlite3.connect(DB_PATH) if DB_PATH.exists() else None
+    conn = connect("readonly") if DB_PATH.exists() else None
+    if args.discover and conn is None:
+        parser.error(f"--discover 는 {DB_PATH} 가 필요합니다.")
 
-    results: list[dict] = []
-    for ticker in tickers:
-        row = evaluate(ticker, args, conn)
-        if row is not None:
-            results.append(row)
-
-    if conn is not None:
-        conn.close()
-
-    # USD 시총 DESC 정렬 (불변 — 새 리스트)
-    ranked = sorted(results, key=lambda r: r["marketCapUsd"], reverse=True)[: args.limit]
+    cache = load_info_cache()
+    similar: dict[str, dict] = {}
+    try:
+        if args.refresh_index or args.discover:
+            index = listing_index.connect()
+            try:
+                if args.refresh_index:
+                    refresh_index(index, conn, cache, args)
+                if args.discover:
+                    # 게이트 재확인(DB·캐시·.info)에서 일부 떨어지므로 limit 보다 넉넉히 넘긴다.
+                    for c in discover(index, conn, args)[: args.limit * 3]:
+                        similar[c["symbol"]] = c
+                    tickers = [t for t in tickers if t not in similar] + list(similar)
+            finally:
+                index.close()
+        results = screen(tickers, args, conn, cache) if tickers else []
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        save_info_cache(cache)
+        if conn is not None:
+            conn.close()
+
+    if similar:
+        for r in results:
+            if r["ticker"] in similar:
+                r["industry"] = similar[r["ticker"]]["industry"]
+                r["similarity"] = similar[r["ticker"]]["similarity"]
+        # 발굴: 유사도 DESC → USD 시총 DESC
+        ranked = sorted(results, key=lambda r: (-r.get("similarity", 0), -r["marketCapUsd"]))[: args.limit]
+    else:
+        # USD 시총 DESC 정렬 (불변 — 새 리스트)
+        ranked = sorted(results, key=lambda r: r["marketCapUsd"], reverse=True)[: args.limit]
+
+    if args.refresh_index and not args.discover and not tickers:
+        return  # 인덱스 갱신만
 
     if args.json:
         print(json.dumps(ranked, ensure_ascii=False, indent=2))
@@ -211,7 +515,8 @@ def main() -> None:
         print("통과한 후보가 없습니다(게이트 사유는 stderr 참조).")
         return
 
-    print(f"\n후보 {len(ranked)}개 (USD 시총 DESC, DB 변경 없음):")
+    order = "업종 유사도 DESC → USD 시총 DESC" if similar else "USD 시총 DESC"
+    print(f"\n후보 {len(ranked)}개 ({order}, DB 변경 없음):")
     print("-" * 88)
     print(f"{'TICKER':<14}{'REGION':<8}{'USD 시총':>18}{'평균거래량':>14}{'DQ':>6}  편입여부")
     print("-" * 88)
@@ -224,6 +529,7 @@ def main() -> None:
             f"${r['marketCapUsd']:>17,}"
             f"{(r['avgVolume'] or 0):>14,}"
             f"{r['dataQuality']:>6}  {in_sector}  {r['name']}"
+            + (f"  [{r['industry']} ~{r['similarity']}]" if "similarity" in r else "")
         )
     print("-" * 88)
     print("→ 큐레이터 검토 후 add_ticker.py 로 수동 편입하세요. (이 스크립트는 DB 미변경)")
@@ -0,0 +1,147 @@
+"""테스트용 합성 DB — drizzle/schema.ts 와 같은 base 테이블 + database.MIGRATIONS.
+
+실제 data/hegemony.db 는 main 에 없으므로(db-snapshot 브랜치) 테스트는 이 픽스처로 돈다.
+"""
+
+import contextlib
+import io
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import migrate  # noqa: E402
+
+# drizzle/schema.ts 의 base 테이블(파이프라인이 만들지 않는 것)만.
+BASE_SCHEMA = """
+CREATE TABLE categories (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, name_en TEXT, "order" INTEGER NOT NULL,
+    region_scope TEXT NOT NULL DEFAULT 'ANY'
+);
+CREATE TABLE sectors (
+    id TEXT PRIMARY KEY, category_id TEXT REFERENCES categories(id), name TEXT NOT NULL,
+    name_en TEXT, "order" INTEGER NOT NULL, description TEXT
+);
+CREATE TABLE companies (
+    ticker TEXT PRIMARY KEY, name TEXT NOT NULL, name_ko TEXT, logo_url TEXT,
+    region TEXT NOT NULL DEFAULT 'INTL'
+);
+CREATE INDEX idx_companies_region ON companies(region);
+CREATE TABLE sector_companies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sector_id TEXT REFERENCES sectors(id),
+    ticker TEXT REFERENCES companies(ticker),
+    rank INTEGER NOT NULL,
+    revenue_weight REAL NOT NULL DEFAULT 1.0,
+    notes TEXT,
+    UNIQUE(sector_id, ticker)
+);
+CREATE INDEX idx_sector_companies_sector ON sector_companies(sector_id);
+CREATE TABLE daily_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT REFERENCES companies(ticker),
+    date TEXT NOT NULL,
+    market_cap INTEGER, price REAL, price_change REAL,
+    week_52_high REAL, week_52_low REAL, day_high REAL, day_low REAL,
+    volume INTEGER, avg_volume INTEGER, pe_ratio REAL, peg_ratio REAL,
+    forward_pe REAL, price_to_book REAL, ev_to_ebitda REAL, updated_at TEXT,
+    UNIQUE(ticker, date)
+);
+CREATE INDEX idx_snapshots_ticker_date ON daily_snapshots(ticker, date);
+CREATE TABLE company_profiles (
+    ticker TEXT PRIMARY KEY REFERENCES companies(ticker),
+    sector TEXT, industry TEXT, country TEXT, employees INTEGER, revenue INTEGER,
+    net_income INTEGER, description TEXT, website TEXT, updated_at TEXT
+);
+"""
+
+SECTORS = ("semis", "cloud", "banks")
+
+
+def trading_days(start: date, count: int) -> list[str]:
+    days: list[str] = []
+    d = start
+    while len(days) < count:
+        if d.weekday() < 5:
+            days.append(d.isoformat())
+        d += timedelta(days=1)
+    return days
+
+
+def make_db(tickers: int = 60, days: int = 120, path: str = ":memory:") -> sqlite3.Connection:
+    """base 스키마 + 합성 스냅샷 → 마이그레이션 → 점수 이력 → ANALYZE 까지 끝낸 연결."""
+    conn = sqlite3.connect(path)
+    conn.executescript(BASE_SCHEMA)
+    conn.execute("INSERT INTO categories (id, name, \"order\") VALUES ('tech', 'Tech', 1)")
+    for i, sector in enumerate(SECTORS):
+        conn.execute(
+            "INSERT INTO sectors (id, category_id, name, \"order\") VALUES (?, 'tech', ?, ?)",
+            (sector, sector, i),
+        )
+
+    dates = trading_days(date(2026, 1, 5), days)
+    snapshots = []
+    for i in range(tickers):
+        ticker = f"{i:06d}.KS" if i % 4 == 0 else f"T{i:03d}"
+        conn.execute(
+            "INSERT INTO companies (ticker, name, region) VALUES (?, ?, ?)",
+            (ticker, ticker, "KR" if ticker.endswith(".KS") else "INTL"),
+        )
+        conn.execute(
+            "INSERT INTO sector_companies (sector_id, ticker, rank) VALUES (?, ?, ?)",
+            (SECTORS[i % len(SECTORS)], ticker, i // len(SECTORS) + 1),
+        )
+        price = 100.0 + i
+        for n, d in enumerate(dates):
+            prev, price = price, price * (1.0 + ((n * 7 + i) % 11 - 5) / 500)
+            snapshots.append((
+                ticker, d, int(price * 1_000_000), price, (price - prev) / prev * 100,
+                price * 1.01, price * 0.99, 1000 + n, 1000,
+            ))
+    conn.executemany(
+        """
+        INSERT INTO daily_snapshots
+        (ticker, date, market_cap, price, price_change, day_high, day_low, volume, avg_volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        snapshots,
+    )
+    conn.commit()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn)
+
+    conn.executemany(
+        "INSERT INTO company_scores (ticker, revenue_growth, recommendation_key) VALUES (?, 0.1, 'buy')",
+        [(r[0],) for r in conn.execute("SELECT ticker FROM companies")],
+    )
+    conn.executemany(
+        """
+        INSERT INTO score_history
+        (ticker, date, raw_total_score, smoothed_score, scale_score, growth_score,
+         profitability_score, sentiment_score)
+        VALUES (?, ?, 50, 50, 20, 15, 10, 5)
+        """,
+        [(r[0], d) for r in conn.execute("SELECT ticker FROM companies") for d in dates[-30:]],
+    )
+    conn.execute("ANALYZE")  # 운영 DB 처럼 통계가 있는 상태에서 플랜을 본다
+    conn.commit()
+    return conn
+
+
+def ticker_data(ticker: str, last: str) -> dict:
+    """update_data.fetch_stock_data 가 돌려주는 형태의 한 티커 결과(네트워크 없이)."""
+    return {
+        "ticker": ticker, "date": last, "market_cap": 1, "price": 1.0, "price_change": 0.0,
+        "week_52_high": None, "week_52_low": None, "day_high": None, "day_low": None,
+        "volume": 1, "avg_volume": 1, "pe_ratio": None, "peg_ratio": None, "forward_pe": None,
+        "price_to_book": None, "ev_to_ebitda": None, "shares": 1, "revenue_growth": None,
+        "earnings_growth": None, "operating_margin": None, "return_on_equity": None,
+        "recommendation_key": None, "analyst_count": None, "target_mean_price": None,
+        "free_cashflow": None, "beta": None, "debt_to_equity": None,
+        "recommendation_trend": [{"period": "0m", "strongBuy": 1, "buy": 1, "hold": 1, "sell": 0, "strongSell": 0}],
+        "earnings_dates": [{"date": last, "time": "06:00", "is_estimate": 0}],
+        "profile": {"sector": "Tech"},
+    }
@@ -0,0 +1,67 @@
+"""배치 추가(add_ticker.py) — 형식이 틀린 행은 그 행만 실패, 백필 실패는 그 티커만 롤백."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import add_ticker  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+try:
+    import pandas as pd
+except ImportError:  # 선택 의존성(pandas) 없음
+    pd = None
+
+
+class MappingFileTest(unittest.TestCase):
+    def test_bad_weight_fails_only_its_row(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "map.csv"
+            path.write_text("ticker,sector_id,name_ko,revenue_weight\nnvda,gpu,,0.8\nAMD,gpu,,abc\nINTC,cpu\n")
+            rows = add_ticker.read_mapping_file(str(path))
+        self.assertEqual([(r["ticker"], r["revenue_weight"]) for r in rows], [("NVDA", 0.8), ("AMD", 1.0), ("INTC", 1.0)])
+        self.assertEqual([r.get("error") for r in rows], [None, "invalid revenue_weight 'abc'", None])
+
+
+class PrintResultTest(unittest.TestCase):
+    def test_unscored_ticker_does_not_crash(self):
+        """최신 코호트일이 그 시장 휴장일이면 점수 행이 없다 — 매핑은 커밋됐으니 보고가 죽으면 안 된다."""
+        conn = make_db(tickers=2, days=5)
+        conn.execute("DELETE FROM company_scores WHERE ticker = 'T001'")
+        sector = conn.execute("SELECT sector_id FROM sector_companies WHERE ticker = 'T001'").fetchone()[0]
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            add_ticker.print_result(conn, "T001", (sector, "Sector"))
+            add_ticker.print_result(conn, "T001", ("nope", "Nope"))
+        self.assertIn("not scored yet", out.getvalue())
+        self.assertIn("Rank: unranked yet", out.getvalue())
+
+
+@unittest.skipIf(pd is None, "pandas not installed")
+class WriteBackfillTest(unittest.TestCase):
+    def test_failure_rolls_back_only_that_ticker(self):
+        conn = make_db(tickers=2, days=5)
+        dates = [d for (d,) in conn.execute("SELECT DISTINCT date FROM daily_snapshots ORDER BY date")]
+        conn.execute("DELETE FROM daily_snapshots WHERE ticker = 'T001' AND date < ?", (dates[-1],))
+        conn.commit()
+        conn.execute("UPDATE companies SET name = 'kept' WHERE ticker = 'T001'")  # 배치의 앞선 쓰기
+
+        hist = pd.DataFrame(
+            {"Close": 1.0, "High": 1.0, "Low": 1.0, "Volume": [100.0, 100.0, float("nan"), 100.0, 100.0]},
+            index=pd.DatetimeIndex(dates),
+        )  # 세 번째 날 거래량 NaN → int() 에서 실패
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            rows = add_ticker.write_backfill(conn, "T001", hist, set(dates), dates[0], "2100-01-01")
+        self.assertEqual(rows, 0)
+        self.assertIn("rolled back", out.getvalue())
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM daily_snapshots WHERE ticker = 'T001'").fetchone()[0], 1)
+        self.assertEqual(conn.execute("SELECT name FROM companies WHERE ticker = 'T001'").fetchone()[0], "kept")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""hot/cold 분리(archive.py) — 이동 후에도 hot + cold 합이 원본과 같아야 한다."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import archive  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+ROWS = "SELECT ticker, date, price, market_cap FROM {} ORDER BY ticker, date"
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hegemony_archive.db"
+        self.conn = make_db(tickers=10, days=120)
+        self.before = self.conn.execute(ROWS.format("daily_snapshots")).fetchall()
+        patcher = mock.patch.object(archive, "MIN_HORIZON_DAYS", 30)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def move(self, horizon=60):
+        with contextlib.redirect_stdout(io.StringIO()):
+            archive.attach_archive(self.conn, self.path, create=True)
+            return archive.archive_old(self.conn, horizon)
+
+    def test_move_keeps_union_identical(self):
+        moved = self.move()
+        self.assertGreater(moved, 0)
+        hot_min = self.conn.execute("SELECT MIN(date) FROM main.daily_snapshots").fetchone()[0]
+        cold_max = self.conn.execute("SELECT MAX(date) FROM archive.daily_snapshots").fetchone()[0]
+        self.assertLess(cold_max, hot_min)
+        self.assertEqual(self.conn.execute(ROWS.format(archive.SNAPSHOTS_ALL)).fetchall(), self.before)
+        self.assertEqual(archive.snapshot_dates(self.conn), sorted({r[1] for r in self.before}))
+
+    def test_rerun_is_noop(self):
+        self.move()
+        self.assertEqual(self.move(), 0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM archive_log").fetchone()[0], 1)
+
+    def test_missing_archive_after_moves_is_refused(self):
+        self.move()
+        self.conn.execute("DETACH DATABASE archive")
+        self.path.unlink()
+        with self.assertRaises(RuntimeError):
+            archive.attach_archive(self.conn, self.path, create=True)
+
+    def test_horizon_floor(self):
+        with self.assertRaises(ValueError):
+            archive.attach_archive(self.conn, self.path, create=True)
+            archive.archive_old(self.conn, 10)
+
+    def test_without_archive_view_is_hot_only(self):
+        self.assertFalse(archive.attach_archive(self.conn, self.path))
+        self.assertEqual(archive.snapshots_source(self.conn), archive.SNAPSHOTS_ALL)
+        self.assertEqual(self.conn.execute(ROWS.format(archive.SNAPSHOTS_ALL)).fetchall(), self.before)
+
+
+if __name__ == "__main__":
+    unittest.main()
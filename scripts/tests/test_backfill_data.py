@@ -0,0 +1,53 @@
+"""백필 장부(backfill_data.py) — 다운로드 실패는 재시도 대상, 오류 없는 빈 응답만 empty."""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+try:
+    import backfill_data
+    import pandas as pd
+except ImportError:  # 선택 의존성(pandas/yfinance) 없음
+    backfill_data = None
+
+
+@unittest.skipIf(backfill_data is None, "backfill_data dependencies missing")
+class ProgressStatusTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db(tickers=3, days=5)
+
+    def fake_download(self, ticker, start, end):
+        if ticker == "T000":
+            raise ConnectionError("connection reset")
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])  # 정상 응답, 행 없음
+
+    def run_backfill(self):
+        with mock.patch.object(backfill_data, "download", self.fake_download), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return backfill_data.run_backfill(
+                self.conn, ["T000", "T001"], "extend", None, "2020-01-01", "2020-02-01", workers=2
+            )
+
+    def test_failed_download_is_retried_on_resume(self):
+        success, failed = self.run_backfill()
+        self.assertEqual((success, sorted(failed)), ([], ["T000", "T001"]))
+        status = dict(self.conn.execute("SELECT ticker, status FROM backfill_progress"))
+        self.assertEqual(status, {"T000": "failed", "T001": "empty"})
+        self.assertIn("connection reset", self.conn.execute(
+            "SELECT error FROM backfill_progress WHERE ticker = 'T000'"
+        ).fetchone()[0])
+        self.assertEqual(
+            backfill_data.finished_tickers(self.conn, "extend", "2020-01-01~2020-02-01"), {"T001"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
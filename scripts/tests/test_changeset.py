@@ -0,0 +1,129 @@
+"""changeset(changeset.py) — base + changeset 적용 결과가 새 DB 와 행 단위로 같아야 한다."""
+
+import contextlib
+import io
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import changeset  # noqa: E402
+from fixtures import make_db  # noqa: E402
+from publish_db import build_artifact  # noqa: E402
+
+
+def dump(path: Path) -> dict[str, list]:
+    conn = sqlite3.connect(path)
+    try:
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        return {t: sorted(conn.execute(f'SELECT * FROM "{t}"').fetchall(), key=repr) for t in tables}
+    finally:
+        conn.close()
+
+
+def mutate(path: Path) -> None:
+    """하루치 수집 흉내: 새 거래일 삽입, 점수·프로필 갱신, 티커 하나 삭제, 키 없는 테이블 변경."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        INSERT INTO daily_snapshots (ticker, date, market_cap, price)
+        SELECT ticker, '2099-01-02', market_cap + 1, price + 1 FROM latest_snapshots
+        """
+    )
+    conn.execute("UPDATE company_scores SET smoothed_score = 77.5 WHERE ticker = 'T001'")
+    conn.execute("INSERT INTO company_profiles (ticker, sector) VALUES ('T002', 'Tech')")
+    conn.execute("DELETE FROM daily_snapshots WHERE ticker = 'T003'")
+    conn.execute("DELETE FROM score_history WHERE ticker = 'T003'")
+    conn.execute("INSERT INTO notes VALUES ('changed')")
+    conn.commit()
+    conn.close()
+
+
+class ChangesetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.prev = self.dir / "prev.db"
+        conn = make_db(tickers=8, days=20, path=str(self.prev))
+        conn.execute("CREATE TABLE notes (text TEXT)")  # PK 없는 테이블 → 통째 교체 경로
+        conn.execute("INSERT INTO notes VALUES ('base')")
+        conn.commit()
+        conn.close()
+        self.new = self.dir / "hegemony.db"
+        shutil.copyfile(self.prev, self.new)
+        mutate(self.new)
+        self.publish = self.dir / "publish"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_export(self, previous: Path, **kw) -> str:
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_artifact(self.new, self.publish, compress=False)
+            return changeset.export(self.prev, self.new, self.publish, previous, **kw)
+
+    def previous_manifest(self) -> Path:
+        """prev 를 base 로 하는 manifest(= fetch-db 가 남긴 로컬 manifest)."""
+        path = self.dir / "hegemony.manifest.json"
+        path.write_text(json.dumps({
+            "version": 1,
+            "base": {"sha256": changeset._sha256(self.prev), "bytes": 10**9, "created_at": "-"},
+            "changesets": [],
+        }))
+        return path
+
+    def test_apply_reproduces_new_rows(self):
+        raw = self.dir / "cs.db"
+        changed = changeset.diff(self.prev, self.new, raw, seq=1)
+        self.assertEqual(changed["daily_snapshots"][1], 20)  # T003 의 20일치 삭제
+        self.assertEqual(changed["notes"], [2, 1])
+        self.assertNotIn("sectors", changed)
+
+        target = self.dir / "applied.db"
+        shutil.copyfile(self.prev, target)
+        conn = sqlite3.connect(target)
+        changeset.apply(conn, raw)
+        conn.close()
+        self.assertEqual(dump(target), dump(self.new))
+
+    def test_export_chains_and_rebuilds(self):
+        self.assertEqual(self.run_export(self.previous_manifest()), "delta")
+        manifest = json.loads((self.publish / changeset.MANIFEST_NAME).read_text())
+        self.assertEqual([c["seq"] for c in manifest["changesets"]], [1])
+        self.assertTrue((self.publish / changeset.changeset_name(1)).exists())
+
+        # db-snapshot 레이아웃 재현: 옛 base + 새 changeset + 새 manifest
+        snapshot = self.dir / "snapshot"
+        snapshot.mkdir()
+        shutil.copyfile(self.prev, snapshot / "hegemony.db")
+        shutil.copy(self.publish / changeset.changeset_name(1), snapshot)
+        shutil.copy(self.publish / changeset.MANIFEST_NAME, snapshot)
+        out = self.dir / "rebuilt.db"
+        changeset.rebuild(snapshot, out)
+        self.assertEqual(dump(out), dump(self.new))
+
+    def test_schema_change_forces_base(self):
+        conn = sqlite3.connect(self.new)
+        conn.execute("ALTER TABLE notes ADD COLUMN extra TEXT")
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.run_export(self.previous_manifest()), "base")
+        manifest = json.loads((self.publish / changeset.MANIFEST_NAME).read_text())
+        self.assertEqual(manifest["changesets"], [])
+        self.assertEqual(manifest["base"]["sha256"], changeset._sha256(self.publish / "hegemony.db"))
+        self.assertEqual(list(self.publish.glob("changeset-*")), [])
+
+    def test_missing_previous_manifest_forces_base(self):
+        self.assertEqual(self.run_export(self.dir / "absent.json"), "base")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""컬럼형 내보내기(columnar.py) — 파티션 내용이 원본과 같고, 바뀐 달만 다시 써야 한다."""
+
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import columnar  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # 선택 의존성
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class ColumnarExportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.db = self.dir / "hegemony.db"
+        conn = make_db(tickers=6, days=70, path=str(self.db))  # 2026-01 ~ 04, 4개 월 파티션
+        conn.executemany(
+            "INSERT INTO market_index_history (symbol, date, close) VALUES ('^GSPC', ?, ?)",
+            [(d, 5000.0 + i) for i, (d,) in enumerate(conn.execute("SELECT DISTINCT date FROM daily_snapshots"))],
+        )
+        conn.commit()
+        conn.close()
+        self.out = self.dir / "columnar"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def months(self, table: str) -> int:
+        conn = sqlite3.connect(self.db)
+        try:
+            return conn.execute(f"SELECT COUNT(DISTINCT substr(date, 1, 7)) FROM {table}").fetchone()[0]
+        finally:
+            conn.close()
+
+    def export(self, **kw) -> dict[str, int]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return columnar.export(self.db, self.out, **kw)
+
+    def test_partitions_match_source(self):
+        written = self.export()
+        self.assertEqual(written, {t: self.months(t) for t in columnar.TABLES})
+        self.assertEqual(written["daily_snapshots"], 4)
+
+        table = columnar.scan("daily_snapshots", ["ticker", "date", "price"], root=self.out)
+        conn = sqlite3.connect(self.db)
+        expected = conn.execute("SELECT ticker, date, price FROM daily_snapshots").fetchall()
+        conn.close()
+        got = [(t, d.isoformat(), p) for t, d, p in zip(*(c.to_pylist() for c in table.columns))]
+        self.assertEqual(sorted(got), sorted(expected))
+        self.assertEqual(table.column_names, ["ticker", "date", "price"])
+
+        conn = sqlite3.connect(self.db)
+        lo, hi = conn.execute("SELECT MIN(date), MAX(date) FROM score_history").fetchone()
+        mid = lo[:8] + "15"  # 첫 달 중순부터 → 파티션 안 날짜 필터까지 탄다
+        n = conn.execute("SELECT COUNT(*) FROM score_history WHERE date BETWEEN ? AND ?", (mid, hi)).fetchone()[0]
+        conn.close()
+        scores = columnar.scan("score_history", ["smoothed_score"], mid, hi, root=self.out)
+        self.assertEqual(scores.num_rows, n)
+        self.assertEqual(scores.column_names, ["smoothed_score"])
+
+    def test_only_changed_months_rewritten(self):
+        self.export()
+        self.assertEqual(self.export(), {t: 0 for t in columnar.TABLES})
+
+        conn = sqlite3.connect(self.db)
+        conn.execute(
+            "UPDATE daily_snapshots SET price = price + 1 WHERE date = (SELECT MIN(date) FROM daily_snapshots)"
+        )
+        conn.execute("DELETE FROM market_index_history WHERE date >= '2026-04-01'")
+        conn.commit()
+        conn.close()
+
+        written = self.export()
+        self.assertEqual(written, {"daily_snapshots": 1, "score_history": 0, "market_index_history": 0})
+        self.assertFalse((self.out / "market_index_history" / "2026-04.arrow").exists())
+        self.assertEqual(self.export(full=True)["score_history"], self.months("score_history"))
+
+
+if __name__ == "__main__":
+    unittest.main()
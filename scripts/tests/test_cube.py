@@ -0,0 +1,96 @@
+"""memmap 큐브(cube.py) — 값이 SQL 과 같고, 새 거래일은 append·바뀐 날만 재기록해야 한다."""
+
+import contextlib
+import io
+import math
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+try:
+    import cube
+except ImportError:  # 선택 의존성(numpy) 없음
+    cube = None
+
+
+@unittest.skipIf(cube is None, "numpy not installed")
+class CubeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.db = self.dir / "hegemony.db"
+        make_db(tickers=8, days=30, path=str(self.db)).close()
+        self.root = self.dir / "cube"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def update(self, **kw) -> str:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return cube.update(self.db, self.root, **kw)
+
+    def sql(self, query: str, *params):
+        conn = sqlite3.connect(self.db)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def assert_matches_db(self):
+        c = cube.load(self.root)
+        for ticker, d, price, mc in self.sql("SELECT ticker, date, price, market_cap FROM daily_snapshots"):
+            t, day = c.ticker_ids[ticker], c.day_numbers[d]
+            self.assertEqual(c.field("price")[day, t], price)
+            self.assertAlmostEqual(c.field("market_cap_usd")[day, t], mc / cube.get_currency_rate(ticker))
+        for ticker, d, smoothed in self.sql("SELECT ticker, date, smoothed_score FROM score_history"):
+            self.assertEqual(c.series(ticker, "smoothed_score")[c.day_numbers[d]], smoothed)
+        filled = sum(1 for v in c.field("price").ravel() if not math.isnan(v))
+        self.assertEqual(filled, self.sql("SELECT COUNT(*) FROM daily_snapshots")[0][0])
+        return c
+
+    def test_build_and_append(self):
+        self.assertEqual(self.update(), "rebuilt")
+        before = self.assert_matches_db()
+        self.assertEqual(self.update(), "unchanged")
+
+        last = before.dates[-1]
+        conn = sqlite3.connect(self.db)
+        conn.execute(
+            "INSERT INTO daily_snapshots (ticker, date, market_cap, price) "
+            "SELECT ticker, '2099-01-02', market_cap, price * 2 FROM daily_snapshots WHERE date = ?",
+            (last,),
+        )
+        conn.execute("UPDATE score_history SET smoothed_score = 1.5 WHERE date = ?", (last,))
+        conn.commit()
+        conn.close()
+        size = (self.root / "price.f64").stat().st_size
+
+        self.assertEqual(self.update(), "updated")
+        c = self.assert_matches_db()
+        self.assertEqual(c.dates[-1], "2099-01-02")
+        self.assertEqual(c.tickers, before.tickers)  # id 안정
+        self.assertEqual((self.root / "price.f64").stat().st_size, size // len(before.dates) * len(c.dates))
+
+    def test_structural_change_rebuilds(self):
+        self.update()
+        first = self.sql("SELECT MIN(date) FROM daily_snapshots")[0][0]
+        conn = sqlite3.connect(self.db)
+        conn.execute("DELETE FROM daily_snapshots WHERE date = ?", (first,))
+        conn.execute("DELETE FROM score_history WHERE date = ?", (first,))
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.update(), "rebuilt")
+        c = self.assert_matches_db()
+        self.assertNotIn(first, c.day_numbers)
+        self.assertFalse(self.root.with_name("cube.next").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
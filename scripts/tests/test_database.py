@@ -0,0 +1,71 @@
+"""마이그레이션 9(compact_time_series) — 컬럼 제약 보존, foreign_keys 복원, 참조 검사."""
+
+import contextlib
+import io
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database  # noqa: E402
+from fixtures import BASE_SCHEMA  # noqa: E402
+
+
+class CompactTimeSeriesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(BASE_SCHEMA)
+        self.conn.execute("ALTER TABLE daily_snapshots ADD COLUMN source TEXT NOT NULL DEFAULT 'yf'")
+        self.conn.execute("INSERT INTO companies (ticker, name) VALUES ('AAA', 'A')")
+        self.conn.execute("INSERT INTO daily_snapshots (ticker, date, price) VALUES ('AAA', '2026-01-05', 1.0)")
+        self.conn.commit()
+
+    def migrate(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            database.migrate(self.conn)
+        return out.getvalue()
+
+    def test_column_definitions_survive_rebuild(self):
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.migrate()
+        sql = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'daily_snapshots'").fetchone()[0]
+        self.assertIn("ticker TEXT NOT NULL REFERENCES companies(ticker)", sql)
+        self.assertIn("source TEXT NOT NULL DEFAULT 'yf'", sql)
+        self.assertIn("WITHOUT ROWID", sql)
+        self.assertNotIn(" id ", sql)
+        self.assertEqual(self.conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)  # 복원
+        with self.assertRaises(sqlite3.IntegrityError):  # 참조가 살아 있다
+            self.conn.execute("INSERT INTO daily_snapshots (ticker, date) VALUES ('NOPE', '2026-01-05')")
+
+    def test_dangling_reference_aborts_migration(self):
+        self.conn.execute("INSERT INTO daily_snapshots (ticker, date, price) VALUES ('GONE', '2026-01-05', 1.0)")
+        self.conn.commit()
+        with self.assertRaises(SystemExit), contextlib.redirect_stdout(io.StringIO()) as out:
+            database.migrate(self.conn)
+        self.assertIn("1 rows reference missing companies", out.getvalue())
+        self.assertEqual(database.schema_version(self.conn), 8)  # 9 는 롤백
+        self.assertEqual(self.conn.execute("PRAGMA foreign_keys").fetchone()[0], 0)
+
+    def test_failure_after_rebuild_rolls_back_whole_migration(self):
+        """재생성 뒤 단계(트리거 재설치)에서 실패해도 재생성까지 함께 되돌린다 — 중간 COMMIT 없음."""
+        original = database._latest_snapshots
+
+        def flaky(conn):  # 8 번은 MIGRATIONS 의 원래 함수로 돈다 — 9 번 안의 재호출만 실패
+            original(conn)
+            raise sqlite3.OperationalError("boom")
+
+        with mock.patch.object(database, "_latest_snapshots", flaky), self.assertRaises(SystemExit), \
+                contextlib.redirect_stdout(io.StringIO()):
+            database.migrate(self.conn)
+        self.assertEqual(database.schema_version(self.conn), 8)
+        sql = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'daily_snapshots'").fetchone()[0]
+        self.assertNotIn("WITHOUT ROWID", sql)
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'daily_snapshots_compact'").fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
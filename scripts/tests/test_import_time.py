@@ -0,0 +1,65 @@
+"""관리용 CLI import 시간 회귀 테스트 — `python -X importtime` 으로 새 인터프리터에서 잰다.
+
+add_ticker --list-sectors / --remove, 백필, archive, changeset 같은 명령은 SQLite 만 쓴다.
+모듈 최상단에서 pandas/numpy/yfinance/pyarrow 를 import 하면 명령마다 0.5초 안팎을 그냥 쓴다
+(Actions 단계마다, 로컬 관리 명령마다). 무거운 의존성은 그 경로의 함수 안에서 import 한다.
+
+실패하면: 새로 생긴 최상단 import 를 찾아(-X importtime 출력의 cumulative 열) 쓰는 함수 안으로 옮긴다.
+"""
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).parent.parent
+
+# 무거운 의존성이 없어야 하는 모듈 — 관리 명령과 그들이 import 하는 공용 모듈.
+LIGHT_MODULES = (
+    "add_ticker",
+    "archive",
+    "backfill_new_ticker_score_history",
+    "backfill_score_history",
+    "changeset",
+    "database",
+    "ipo_details",
+    "listing_index",
+    "market_calendar",
+    "measure_storage",
+    "pipeline",
+    "publish_db",
+    "scoring",
+    "shares_history",
+    "staging",
+)
+HEAVY = {"pandas", "numpy", "yfinance", "pyarrow", "zstandard"}
+BUDGET_US = 300_000  # cumulative import 시간 상한(마이크로초). 실측 20~50ms, 느린 러너 여유 포함
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """{import 된 모듈: cumulative us} — 새 인터프리터에서 module 하나만 import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_admin_modules_stay_light(self):
+        for module in LIGHT_MODULES:
+            with self.subTest(module=module):
+                profile = import_profile(module)
+                heavy = sorted({name.split(".")[0] for name in profile} & HEAVY)
+                self.assertEqual(heavy, [], f"{module} imports {heavy} at module level")
+                self.assertLess(profile[module], BUDGET_US, f"{module}: {profile[module] / 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
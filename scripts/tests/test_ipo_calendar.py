@@ -0,0 +1,146 @@
+"""IPO 크롤 증분(ipo_calendar.py) — 로컬 HTTP 대역이 저장 페이지를 서빙한다.
+
+304 면 파싱하지 않고, ETag 가 없는 서버도 본문 해시가 같으면 건너뛰고, 바뀐 페이지만 UPSERT.
+"""
+
+import contextlib
+import io
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import ipo_calendar  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+PAGES = Path(__file__).parent / "pages"
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """경로 → 저장 페이지. server.etags 가 켜져 있으면 ETag/304 를 지원한다."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        body = self.server.pages[self.path]
+        etag = f'"{hash(body) & 0xFFFFFFFF:x}"'
+        if self.server.etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=euc-kr")
+        if self.server.etags:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class IncrementalCrawlTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        self.server.pages = {
+            "/sub": (PAGES / "38_subscription.html").read_bytes(),
+            "/list": (PAGES / "38_listing.html").read_bytes(),
+        }
+        self.server.etags = True
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        self.patches = [
+            mock.patch.object(ipo_calendar, "SUBSCRIPTION_URL", f"{base}/sub"),
+            mock.patch.object(ipo_calendar, "LISTING_URL", f"{base}/list"),
+            mock.patch.object(ipo_calendar.time, "sleep", lambda s: None),
+        ]
+        for p in self.patches:
+            p.start()
+        self.conn = make_db(tickers=2, days=5)
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.conn.close()
+
+    def sync(self) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return ipo_calendar.sync_ipo_calendar(self.conn)
+
+    def test_first_crawl_parses_saved_pages(self):
+        self.assertEqual(self.sync(), 3)
+        rows = dict(self.conn.execute("SELECT name, event_date FROM ipo_calendar"))
+        self.assertEqual(rows, {"가나다바이오": "2026-09-16", "라마전자": "2026-12-30", "사아테크": "2026-09-01"})
+        state = ipo_calendar.load_crawl_state(self.conn)
+        self.assertEqual(len(state), 2)
+        self.assertTrue(all(s["etag"] and s["content_hash"] for s in state.values()))
+
+    def test_not_modified_skips_parse_and_write(self):
+        self.sync()
+        self.conn.execute("DELETE FROM ipo_calendar")  # 다시 쓰면 되살아난다 → 안 써야 한다
+        with mock.patch.object(ipo_calendar, "parse_subscription") as parse:
+            self.assertEqual(self.sync(), 0)
+        parse.assert_not_called()
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM ipo_calendar").fetchone()[0], 0)
+        last = self.server.requests[-2:]
+        self.assertTrue(all("If-None-Match" in headers for _, headers in last))
+
+    def test_parser_version_bump_skips_validators(self):
+        """ETag 를 지키는 서버라도 PARSE_VERSION 이 바뀌면 조건부 헤더 없이 받아 다시 파싱한다."""
+        self.sync()
+        self.conn.execute("DELETE FROM ipo_calendar")
+        with mock.patch.object(ipo_calendar, "PARSE_VERSION", ipo_calendar.PARSE_VERSION + 1):
+            self.assertEqual(self.sync(), 3)
+            self.assertTrue(all("If-None-Match" not in headers for _, headers in self.server.requests[-2:]))
+            self.assertEqual(self.sync(), 0)  # 새 버전 상태로는 다시 304
+        self.assertTrue(all("If-None-Match" in headers for _, headers in self.server.requests[-2:]))
+
+    def test_hash_short_circuit_without_etag(self):
+        self.server.etags = False
+        self.sync()
+        with mock.patch.object(ipo_calendar, "parse_listing") as parse:
+            self.assertEqual(self.sync(), 0)
+        parse.assert_not_called()
+
+        # 한 페이지만 바뀌면 그 페이지만 파싱·UPSERT 하고 changed_at 도 그 페이지만 움직인다.
+        self.server.pages["/list"] = self.server.pages["/list"].replace(b"2026/09/01", b"2026/09/02")
+        self.conn.execute("UPDATE crawl_state SET changed_at = 'old'")
+        self.assertEqual(self.sync(), 1)
+        self.assertEqual(
+            self.conn.execute("SELECT event_date FROM ipo_calendar WHERE name = '사아테크'").fetchone()[0],
+            "2026-09-02",
+        )
+        changed = dict(self.conn.execute("SELECT url, changed_at FROM crawl_state"))
+        self.assertEqual(changed[ipo_calendar.SUBSCRIPTION_URL], "old")
+        self.assertNotEqual(changed[ipo_calendar.LISTING_URL], "old")
+
+
+class UpsertTest(unittest.TestCase):
+    def test_only_changed_rows_move_updated_at(self):
+        conn = make_db(tickers=2, days=5)
+        event = dict(
+            event_type="subscription", event_date="2026-09-16", end_date="2026-09-17", offer_price=None,
+            price_band="10,000~12,000", competition=None, underwriter="한국투자", detail_url="https://x/?no=1",
+        )
+        events = [{**event, "name": "지난종목"}, {**event, "name": "정정종목"}]
+        self.assertEqual(ipo_calendar.upsert_ipo_calendar(conn, events), 2)
+        conn.execute("UPDATE ipo_calendar SET updated_at = 'old'")
+
+        # 같은 페이지가 다시 들어와도(다른 행이 바뀌어서) 값이 같은 행은 그대로. 빈 칸(None)은 변경이 아니다.
+        events[1] = {**events[1], "event_date": "2026-09-18", "end_date": "2026-09-19"}
+        events[0] = {**events[0], "underwriter": None}
+        self.assertEqual(ipo_calendar.upsert_ipo_calendar(conn, events), 1)
+        updated = dict(conn.execute("SELECT name, updated_at FROM ipo_calendar"))
+        self.assertEqual(updated["지난종목"], "old")
+        self.assertNotEqual(updated["정정종목"], "old")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""IPO 상세 보강(ipo_details.py) — 대상 선별, 호스트별 동시성 제한, 해시 캐시.
+
+로컬 HTTP 대역이 저장한 상세 페이지를 no= 마다 서빙한다.
+"""
+
+import contextlib
+import io
+import re
+import sys
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import ipo_details  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+PAGES = Path(__file__).parent / "pages"
+TODAY = date(2026, 12, 20)
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """no= 에 상관없이 같은 상세 페이지. 동시 처리 수와 요청 시작 시각을 기록한다."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.paths.append(self.path)
+        time.sleep(0.05)  # 겹칠 기회를 준다
+        body = server.body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=euc-kr")
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def add_event(conn, name, event_type, day, no, updated="2026-01-01T00:00:00+09:00", base="https://example.test"):
+    conn.execute(
+        "INSERT INTO ipo_calendar (name, event_type, event_date, detail_url, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (name, event_type, day, f"{base}/?o=v&no={no}", updated),
+    )
+
+
+class ParseDetailTest(unittest.TestCase):
+    def test_saved_page(self):
+        html = (PAGES / "38_detail.html").read_bytes().decode("euc-kr")
+        self.assertEqual(
+            ipo_details.parse_detail(html),
+            {
+                "offering_shares": "1,500,000 주",
+                "offering_amount": "31,500 (백만원)",
+                "forecast_dates": "2026.12.21 ~ 12.22",
+                "institutional_competition": "987.65:1",
+                "lockup_ratio": "35.20%",
+            },
+        )
+        self.assertEqual(ipo_details.parse_detail("<html><table><tr><td>x</td></tr></table></html>"), {})
+
+
+class DueDetailsTest(unittest.TestCase):
+    def test_selection(self):
+        conn = make_db(tickers=2, days=5)
+        recent = (datetime.now(ipo_details.KST) - timedelta(hours=1)).isoformat(timespec="seconds")
+        stale = (datetime.now(ipo_details.KST) - timedelta(days=2)).isoformat(timespec="seconds")
+        add_event(conn, "새종목", "subscription", "2027-01-05", 1)           # 상세 없음
+        add_event(conn, "지난종목", "listing", "2026-06-01", 2)               # 캐시된 과거 → 제외
+        add_event(conn, "다가옴", "subscription", "2026-12-22", 3)            # 다가옴 + TTL 지남
+        add_event(conn, "방금받음", "subscription", "2026-12-21", 4)          # 다가오지만 TTL 안
+        add_event(conn, "정정", "listing", "2026-05-01", 5, updated=recent)   # 요약이 상세보다 나중
+        add_event(conn, "다가옴", "listing", "2026-06-02", 3)                 # 같은 no 의 두 번째 행
+        conn.executemany(
+            "INSERT INTO ipo_details (detail_no, content_hash, fetched_at) VALUES (?, 'h', ?)",
+            [(2, stale), (3, stale), (4, recent), (5, stale)],
+        )
+        due = ipo_details.due_details(conn, TODAY)
+        self.assertEqual([d["no"] for d in due], [1, 5, 3])
+        self.assertEqual(due[2]["content_hash"], "h")
+        self.assertEqual(len(ipo_details.due_details(conn, TODAY, everything=True)), 5)
+
+
+class FetchDetailsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        self.server.body = (PAGES / "38_detail.html").read_bytes()
+        self.server.lock = threading.Lock()
+        self.server.active = self.server.peak = 0
+        self.server.paths = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.conn = make_db(tickers=2, days=5)
+        for no in range(1, 7):
+            add_event(self.conn, f"종목{no}", "subscription", "2027-01-05", no, base=self.base)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.conn.close()
+
+    def sync(self) -> str:
+        # 시계를 멈춰 두면 n 번째 요청은 정확히 n × interval 만큼 기다리도록 예약된다.
+        self.waits: list[float] = []
+        limiter = ipo_details.HostLimiter(per_host=2, interval=1.0, clock=lambda: 0.0, sleep=self.waits.append)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = ipo_details.fetch_details(ipo_details.due_details(self.conn, TODAY), workers=4, limiter=limiter)
+            return ipo_details.write_ipo_details(self.conn, results)
+
+    def test_polite_concurrent_fetch_and_cache(self):
+        self.assertEqual(self.sync(), "6 details updated, 0 unchanged")
+        self.assertLessEqual(self.server.peak, 2)  # 워커 4개여도 호스트당 2개
+        self.assertEqual(sorted(self.waits), [1.0, 2.0, 3.0, 4.0, 5.0])  # 시작 간격 = interval
+        self.assertEqual(
+            sorted(int(re.search(r"no=(\d+)", p).group(1)) for p in self.server.paths), [1, 2, 3, 4, 5, 6]
+        )
+        row = self.conn.execute("SELECT name, lockup_ratio FROM ipo_details WHERE detail_no = 3").fetchone()
+        self.assertEqual(row, ("종목3", "35.20%"))
+
+        # 방금 받았으니 대상 없음. 요약이 바뀐 종목만 다시 받고, 본문이 같으면 fetched_at 만.
+        self.assertEqual(self.sync(), "0 details updated, 0 unchanged")
+        self.conn.execute("UPDATE ipo_calendar SET updated_at = '9999' WHERE name = '종목2'")
+        self.conn.execute("UPDATE ipo_details SET lockup_ratio = 'old', changed_at = 'old' WHERE detail_no = 2")
+        self.assertEqual(self.sync(), "0 details updated, 1 unchanged")
+        row = self.conn.execute("SELECT lockup_ratio, changed_at FROM ipo_details WHERE detail_no = 2").fetchone()
+        self.assertEqual(row, ("old", "old"))
+
+
+if __name__ == "__main__":
+    unittest.main()
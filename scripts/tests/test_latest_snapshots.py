@@ -0,0 +1,80 @@
+"""latest_snapshots 읽기 모델 — 트리거가 어떤 쓰기 경로에서도 티커당 최신 1행을 유지하는지."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+# latest_snapshots 가 맞다면 이 질의(원래 소비자들이 쓰던 형태)와 같은 결과여야 한다.
+EXPECTED = """
+    SELECT ticker, date, price, market_cap FROM daily_snapshots ds
+    WHERE date = (SELECT MAX(date) FROM daily_snapshots WHERE ticker = ds.ticker)
+    ORDER BY ticker
+"""
+ACTUAL = "SELECT ticker, date, price, market_cap FROM latest_snapshots ORDER BY ticker"
+
+
+class LatestSnapshotsTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db(tickers=8, days=30)
+        self.last = self.conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertInSync(self):
+        self.assertEqual(self.conn.execute(ACTUAL).fetchall(), self.conn.execute(EXPECTED).fetchall())
+
+    def latest(self, ticker):
+        return self.conn.execute(
+            "SELECT date, price FROM latest_snapshots WHERE ticker = ?", (ticker,)
+        ).fetchone()
+
+    def test_seeded_by_migration(self):
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM latest_snapshots").fetchone()[0], 8)
+        self.assertInSync()
+
+    def test_daily_upsert_advances(self):
+        self.conn.execute(
+            """
+            INSERT INTO daily_snapshots (ticker, date, price) VALUES ('T001', '2099-01-02', 1.0)
+            ON CONFLICT(ticker, date) DO UPDATE SET price = excluded.price
+            """
+        )
+        self.assertEqual(self.latest("T001"), ("2099-01-02", 1.0))
+        self.conn.execute(
+            """
+            INSERT INTO daily_snapshots (ticker, date, price) VALUES ('T001', '2099-01-02', 2.0)
+            ON CONFLICT(ticker, date) DO UPDATE SET price = excluded.price
+            """
+        )
+        self.assertEqual(self.latest("T001"), ("2099-01-02", 2.0))
+        self.assertInSync()
+
+    def test_backfill_of_past_dates_is_noop(self):
+        before = self.latest("T002")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO daily_snapshots (ticker, date, price) VALUES ('T002', '2000-01-03', 9.9)"
+        )
+        self.assertEqual(self.latest("T002"), before)
+
+    def test_update_of_latest_row_propagates(self):
+        self.conn.execute(
+            "UPDATE daily_snapshots SET price = 7.5 WHERE ticker = 'T003' AND date = ?", (self.last,)
+        )
+        self.assertEqual(self.latest("T003"), (self.last, 7.5))
+
+    def test_delete_falls_back_to_previous_row(self):
+        self.conn.execute("DELETE FROM daily_snapshots WHERE ticker = 'T001' AND date = ?", (self.last,))
+        self.assertLess(self.latest("T001")[0], self.last)
+        self.conn.execute("DELETE FROM daily_snapshots WHERE ticker = 'T001'")
+        self.assertIsNone(self.latest("T001"))
+        self.assertInSync()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""상장 종목 인덱스(listing_index.py) — 디렉터리 파싱, 증분 반영·상폐, 값 갱신 대상, 게이트 조회."""
+
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import listing_index  # noqa: E402
+
+NASDAQ = """Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+QQQ|Invesco QQQ Trust, Series 1|G|N|N|100|Y|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N
+File Creation Time: 1019202600:00|||||||
+"""
+
+OTHER = """ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol
+BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK=B
+JPM$C|JPMorgan Chase Preferred C|N|JPMpC|N|100|N|JPM-C
+SPY|SPDR S&P 500 ETF Trust|P|SPY|Y|100|N|SPY
+File Creation Time: 1019202600:00|||||||
+"""
+
+KIND = """<html><body><table>
+<tr><th>회사명</th><th>시장구분</th><th>종목코드</th><th>업종</th><th>주요제품</th><th>상장일</th></tr>
+<tr><td>삼성전자</td><td>유가</td><td>005930</td><td>통신 및 방송 장비 제조업</td><td>반도체</td><td>1975-06-11</td></tr>
+<tr><td>에코프로비엠</td><td>코스닥</td><td>247540</td><td>일차전지 및 축전지 제조업</td><td>양극재</td><td>2019-03-05</td></tr>
+<tr><td>어떤코넥스</td><td>코넥스</td><td>999999</td><td>-</td><td>-</td><td>2020-01-01</td></tr>
+</table></body></html>"""
+
+
+class ListingIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = listing_index.connect(Path(self.tmp.name) / "listing_index.db")
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def directories(self):
+        return {
+            "nasdaq": listing_index.parse_nasdaq_listed(NASDAQ),
+            "other": listing_index.parse_other_listed(OTHER),
+            "kind": listing_index.parse_kind_list(KIND),
+        }
+
+    def symbols(self, where="delisted_at IS NULL"):
+        return sorted(s for (s,) in self.conn.execute(f"SELECT symbol FROM listings WHERE {where}"))
+
+    def test_parse_and_incremental_apply(self):
+        fetched = self.directories()
+        self.assertEqual([r["symbol"] for r in fetched["nasdaq"]], ["AAPL"])
+        self.assertEqual(fetched["other"], [
+            {"symbol": "BRK-B", "exchange": "NYSE", "region": "us", "name": "Berkshire Hathaway Inc. Class B"},
+        ])
+        self.assertEqual([(r["symbol"], r["exchange"]) for r in fetched["kind"]],
+                         [("005930.KS", "KOSPI"), ("247540.KQ", "KOSDAQ")])
+
+        with mock.patch.object(listing_index, "_now", return_value="2026-01-01T00:00:00+00:00"):
+            self.assertEqual(listing_index.apply_directories(self.conn, fetched), {"added": 4, "delisted": 0})
+        listing_index.update_stats(self.conn, {"AAPL": {"market_cap_usd": 3e12, "avg_volume": 5e7}}, "db")
+
+        # 다음 수집에서 AAPL 이 사라지고 KIND 는 실패 → AAPL 만 상폐, KR 은 그대로. 값은 남는다.
+        fetched["nasdaq"] = [{"symbol": "NVDA", "exchange": "NASDAQ", "region": "us", "name": "NVIDIA"}]
+        del fetched["kind"]
+        with mock.patch.object(listing_index, "_now", return_value="2026-01-02T00:00:00+00:00"):
+            self.assertEqual(listing_index.apply_directories(self.conn, fetched), {"added": 1, "delisted": 1})
+        self.assertEqual(self.symbols(), ["005930.KS", "247540.KQ", "BRK-B", "NVDA"])
+        self.assertEqual(self.conn.execute("SELECT market_cap_usd FROM listings WHERE symbol = 'AAPL'").fetchone(),
+                         (3e12,))
+
+    def test_refresh_symbols_respects_ttl(self):
+        with mock.patch.object(listing_index, "fetch_directories", side_effect=self.directories) as fetch:
+            listing_index.refresh_symbols(self.conn)
+            self.assertIn("fresh", listing_index.refresh_symbols(self.conn))
+            listing_index.refresh_symbols(self.conn, force=True)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_due_stats_and_gate_query(self):
+        listing_index.apply_directories(self.conn, self.directories())
+        now = datetime.now(timezone.utc)
+        old, ancient = now - timedelta(days=10), now - timedelta(days=40)
+        stats = {
+            "AAPL": (3e12, 5e7, old),          # 큰 종목, TTL 지남
+            "BRK-B": (9e11, 4e6, now),         # 최신
+            "005930.KS": (5e7, 2e6, old),      # 소형(가정) — 소형 TTL 안
+            "247540.KQ": (6e7, 1e5, ancient),  # 소형, 소형 TTL 도 지남
+        }
+        for symbol, (mcap, vol, at) in stats.items():
+            self.conn.execute(
+                "UPDATE listings SET market_cap_usd = ?, avg_volume = ?, stats_at = ? WHERE symbol = ?",
+                (mcap, vol, at.isoformat(timespec="seconds"), symbol),
+            )
+        self.conn.execute(
+            "INSERT INTO listings (symbol, exchange, region, seen_at) VALUES ('NEW', 'NASDAQ', 'us', 'x')"
+        )
+        self.assertEqual(listing_index.due_stats(self.conn, 10, now), ["NEW", "AAPL", "247540.KQ"])
+        self.assertEqual(listing_index.due_stats(self.conn, 1, now), ["NEW"])
+
+        gated = listing_index.gate_candidates(self.conn, "all", {"us": 1e12, "kr": 1e7}, {"us": 1e6, "kr": 1e6})
+        self.assertEqual([c["symbol"] for c in gated], ["AAPL", "005930.KS"])
+        plan = " ".join(
+            row[3] for row in self.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT symbol FROM listings "
+                "WHERE region = 'us' AND market_cap_usd >= 1 AND delisted_at IS NULL"
+            )
+        )
+        self.assertIn("idx_listings_gate", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
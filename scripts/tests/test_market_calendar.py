@@ -0,0 +1,107 @@
+"""거래소 휴장일(market_calendar.py) — 표 정합성, 시장별 휴장 판정, 휴장 시장 종목의 점수 유지."""
+
+import contextlib
+import io
+import sys
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import market_calendar  # noqa: E402
+import scoring  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+
+class CalendarTest(unittest.TestCase):
+    def test_tables_hold_weekdays_in_covered_years(self):
+        for market, holidays in market_calendar.HOLIDAYS.items():
+            for day in holidays:
+                parsed = date.fromisoformat(day)
+                with self.subTest(market=market, day=day):
+                    self.assertLess(parsed.weekday(), 5)  # 주말 공휴일은 관측일·대체휴일로
+                    self.assertIn(parsed.year, market_calendar.COVERED_YEARS)
+        for year in market_calendar.COVERED_YEARS:
+            for market in market_calendar.MARKETS:  # 빠진 해가 없는지
+                self.assertTrue(any(d.startswith(f"{year}-01") for d in market_calendar.HOLIDAYS[market]))
+
+    def test_known_dates(self):
+        """해마다 몇 개씩 고정 — 음력 명절·대체휴일·관측일처럼 틀리기 쉬운 날 위주."""
+        known = {
+            "us": {
+                "2025-04-18": "Good Friday",
+                "2026-07-03": "Independence Day (observed)",
+                "2027-06-18": "Juneteenth (observed)",
+                "2027-12-24": "Christmas Day (observed)",
+            },
+            "kr": {
+                "2025-01-29": "설날",
+                "2025-10-08": "추석 대체휴일",
+                "2026-02-17": "설날",
+                "2027-02-08": "설날 다음날",
+                "2027-02-09": "설날 대체휴일",
+                "2027-09-15": "추석",
+                "2027-12-27": "성탄절 대체휴일",
+            },
+        }
+        for market, days in known.items():
+            for day, name in days.items():
+                with self.subTest(market=market, day=day):
+                    self.assertEqual(market_calendar.closed_reason(market, day), name)
+        open_days = (
+            ("kr", "2027-02-05"),  # 중국 춘절(2/6) 기준이 아니라 KST 삭(2/7) 기준
+            ("kr", "2026-09-28"),  # 추석 연휴가 토요일과만 겹치면 대체휴일 없음
+            ("us", "2027-12-31"),
+            ("kr", "2026-02-19"),
+        )
+        for market, day in open_days:
+            with self.subTest(market=market, day=day):
+                self.assertIsNone(market_calendar.closed_reason(market, day))  # 개장일
+
+    def test_closed_markets(self):
+        self.assertEqual(market_calendar.closed_markets("2026-10-19"), {})
+        self.assertEqual(market_calendar.closed_markets("2026-09-25"), {"kr": "추석"})
+        self.assertEqual(market_calendar.closed_markets("2026-11-26"), {"us": "Thanksgiving Day"})
+        self.assertEqual(market_calendar.closed_markets("2026-12-25"), {"us": "Christmas Day", "kr": "성탄절"})
+        self.assertEqual(market_calendar.closed_markets("2026-10-18"), {"us": "weekend", "kr": "weekend"})
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(market_calendar.closed_markets("2031-01-01"), {})  # 표 밖 → 주말만
+        self.assertIn("no holiday table", out.getvalue())
+
+    def test_split_tickers(self):
+        tickers = ["AAPL", "005930.KS", "247540.KQ", "BRK-B"]
+        self.assertEqual(market_calendar.split_tickers(tickers, "2026-09-25"),
+                         (["AAPL", "BRK-B"], {"kr": ["005930.KS", "247540.KQ"]}))
+        self.assertEqual(market_calendar.split_tickers(tickers, "2026-10-19"), (tickers, {}))
+
+
+class ClosedMarketScoringTest(unittest.TestCase):
+    """KR 만 쉰 날: KR 종목은 마지막 스냅샷으로 섹터 계산에 들어가고, 점수·이력은 전 거래일 그대로."""
+
+    def test_kr_holiday_keeps_kr_scores(self):
+        conn = make_db(tickers=8, days=10)
+        last = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+        kr = [t for (t,) in conn.execute("SELECT ticker FROM companies WHERE region = 'KR'")]
+        conn.execute("DELETE FROM daily_snapshots WHERE date = ? AND ticker LIKE '%.KS'", (last,))
+        conn.execute("DELETE FROM score_history WHERE date = ?", (last,))
+        kept = conn.execute("SELECT ticker, smoothed_score FROM company_scores WHERE ticker LIKE '%.KS'").fetchall()
+
+        sector = conn.execute("SELECT sector_id FROM sector_companies WHERE ticker = ?", (kr[0],)).fetchone()[0]
+        rows = scoring.fetch_sector_companies(conn, sector, last, "latest_snapshots", "2000-01-01")
+        self.assertIsNotNone(next(r for r in rows if r[0] == kr[0])[1])  # 전일 시총으로 참여
+        self.assertIsNone(next(r for r in scoring.fetch_sector_companies(conn, sector, last) if r[0] == kr[0])[1])
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            scoring.calculate_hegemony_scores(conn, last)
+        self.assertIn(f"kept {len(kr)} without a {last} snapshot", out.getvalue())
+        scored = {t for (t,) in conn.execute("SELECT ticker FROM company_scores WHERE score_updated_at IS NOT NULL")}
+        self.assertEqual(scored, {f"T{i:03d}" for i in range(8) if i % 4})
+        self.assertEqual(
+            conn.execute("SELECT ticker, smoothed_score FROM company_scores WHERE ticker LIKE '%.KS'").fetchall(), kept
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
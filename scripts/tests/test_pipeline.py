@@ -0,0 +1,133 @@
+"""파이프라인 러너(pipeline.py) — 단계 선택, 병렬 실행·메인 스레드 쓰기, 실패 격리, 실행 순서 규칙."""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pipeline  # noqa: E402
+from fixtures import make_db  # noqa: E402
+from pipeline import Stage  # noqa: E402
+
+
+class SelectTest(unittest.TestCase):
+    def test_registry_is_a_dag(self):
+        pipeline.check_dag(pipeline.STAGES)
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            pipeline.check_dag((Stage("a", ("b",), None), Stage("b", ("a",), None)))
+        with self.assertRaisesRegex(ValueError, "unknown deps"):
+            pipeline.check_dag((Stage("a", ("nope",), None),))
+
+    def test_only_and_skip(self):
+        names = lambda stages: [s.name for s in stages]  # noqa: E731
+        default = names(pipeline.select(pipeline.STAGES))
+        self.assertNotIn("score-history", default)  # manual 은 기본 실행에서 빠진다
+        self.assertEqual(default[:4], ["ipo", "ipo-details", "indices", "fetch"])
+        self.assertEqual(names(pipeline.select(pipeline.STAGES, skip=["ipo", "ipo-details"]))[:2], ["indices", "fetch"])
+        self.assertEqual(
+            names(pipeline.select(pipeline.STAGES, only=["rank", "clean-weekend-rows", "score-history"])),
+            ["clean-weekend-rows", "score-history", "rank"],
+        )
+        with self.assertRaisesRegex(ValueError, "unknown stages"):
+            pipeline.select(pipeline.STAGES, only=["nope"])
+
+
+class RunStagesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db(tickers=2, days=5)
+        self.conn.execute("CREATE TABLE log (stage TEXT)")
+        self.run = pipeline.Run("2026-01-09", conn=self.conn)
+        self.writers: set[str] = set()
+        # fetch 3개가 모두 동시에 떠 있어야 통과한다 — 직렬이면 타임아웃으로 깨져 fetch 가 실패한다.
+        self.barrier = threading.Barrier(3, timeout=5)
+
+    def fetch(self, value):
+        def thunk():
+            self.barrier.wait()
+            time.sleep(0.1)
+            return value
+        return lambda run: thunk
+
+    def write(self, name, fail=False):
+        def apply(run, result):
+            self.writers.add(threading.current_thread().name)
+            run.conn.execute("INSERT INTO log VALUES (?)", (name,))
+            if fail:
+                raise RuntimeError("boom")
+            return f"{name}={result}"
+        return apply
+
+    def run_stages(self, stages):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return {r["name"]: r for r in pipeline.run_stages(self.run, stages)}
+
+    def logged(self):
+        return [s for (s,) in self.conn.execute("SELECT stage FROM log ORDER BY rowid")]
+
+    def test_parallel_fetch_and_failure_isolation(self):
+        stages = (
+            Stage("a", (), self.write("a"), self.fetch(1)),
+            Stage("b", (), self.write("b"), self.fetch(2)),
+            Stage("c", (), self.write("c"), self.fetch(3)),
+            Stage("soft", ("a",), self.write("soft", fail=True), required=False),
+            Stage("hard", ("b",), self.write("hard", fail=True)),
+            Stage("after-soft", ("soft",), self.write("after-soft")),
+            Stage("after-hard", ("hard", "c"), self.write("after-hard")),
+        )
+        records = self.run_stages(stages)
+        self.assertEqual({n: r["status"] for n, r in records.items()}, {
+            "a": "ok", "b": "ok", "c": "ok", "soft": "failed", "hard": "failed",
+            "after-soft": "ok", "after-hard": "blocked",
+        })
+        self.assertEqual(records["a"]["summary"], "a=1")
+        self.assertGreaterEqual(records["a"]["fetch"], 0.1)
+        self.assertEqual(records["after-hard"]["summary"], "after hard")
+        self.assertEqual(self.writers, {threading.main_thread().name})  # 쓰기는 메인 스레드에서만
+        # 실패한 단계의 쓰기는 롤백, 나머지는 커밋.
+        self.assertEqual(sorted(self.logged()), ["a", "after-soft", "b", "c"])
+        self.assertIn("after-hard", pipeline.report(list(records.values()), 0.2))
+
+    def test_missing_deps_count_as_done(self):
+        records = self.run_stages((Stage("late", ("not-selected",), self.write("late")),))
+        self.assertEqual(records["late"]["status"], "ok")
+
+    def test_score_history_requires_clean_weekend_rows(self):
+        self.conn.execute(
+            "INSERT INTO daily_snapshots (ticker, date, price) SELECT ticker, '2026-01-10', price "
+            "FROM daily_snapshots WHERE date = (SELECT MAX(date) FROM daily_snapshots)"
+        )  # 토요일
+        self.assertEqual(pipeline.weekend_rows(self.conn)["daily_snapshots"], 2)
+        with self.assertRaisesRegex(RuntimeError, "clean-weekend-rows first"):
+            pipeline.apply_score_history(self.run, None)
+
+        stages = pipeline.select(pipeline.STAGES, only=["clean-weekend-rows"])
+        records = self.run_stages(stages)
+        self.assertEqual(records["clean-weekend-rows"]["summary"], "daily_snapshots -2, score_history -0")
+        self.assertEqual(pipeline.weekend_rows(self.conn), {"daily_snapshots": 0, "score_history": 0})
+
+
+class ClosedDayTest(unittest.TestCase):
+    def test_all_markets_closed_signals_skip(self):
+        """평일 양 시장 휴장(12/25): 아티팩트 없이 0 — push 단계가 건너뛰도록 skipped=true."""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "github_output"
+            with mock.patch.object(sys, "argv", ["pipeline.py", "2026-12-25"]), \
+                    mock.patch.object(pipeline, "DB_PATH", Path(tmp)), \
+                    mock.patch.dict(os.environ, {"GITHUB_OUTPUT": str(output)}), \
+                    contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(pipeline.main(), 0)
+            self.assertIn("all markets closed", out.getvalue())
+            self.assertEqual(output.read_text(), "skipped=true\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
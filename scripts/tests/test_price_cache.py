@@ -0,0 +1,113 @@
+"""일봉 캐시(price_cache.py) — 실패·빈 응답은 받은 구간으로 캐시하지 않고, strict 는 예외를 올린다."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import pandas as pd
+    import price_cache
+    from yfinance.exceptions import YFPricesMissingError
+except ImportError:  # 선택 의존성(numpy/pandas/yfinance) 없음
+    price_cache = None
+
+
+class FakeTicker:
+    """yf.Ticker 대역 — history() 호출을 세고, 정해 둔 응답(프레임 또는 예외)을 돌려준다."""
+
+    calls: list[tuple[str, str]] = []
+    responses: list = []
+
+    def __init__(self, symbol):
+        self.history_metadata = {"firstTradeDate": 0}  # 1970-01-01 상장
+
+    def history(self, start, end, **kwargs):
+        assert kwargs["raise_errors"] is True
+        FakeTicker.calls.append((start, end))
+        response = FakeTicker.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def bars(*days):
+    index = pd.DatetimeIndex(days)
+    return pd.DataFrame({col: [1.0] * len(days) for col in price_cache.COLUMNS}, index=index)
+
+
+@unittest.skipIf(price_cache is None, "price_cache dependencies missing")
+class LoadHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        FakeTicker.calls, FakeTicker.responses = [], []
+        for patch in (
+            mock.patch.object(price_cache, "CACHE_DIR", Path(self.tmp.name)),
+            mock.patch.object(price_cache.yf, "Ticker", FakeTicker),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, start, end, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return price_cache.load_history("AAPL", start, end, **kwargs)
+
+    def test_failed_span_is_not_cached(self):
+        FakeTicker.responses = [ConnectionError("reset"), bars("2024-01-02", "2024-01-03")]
+        self.assertTrue(self.load("2024-01-01", "2024-01-05").empty)
+        self.assertEqual(len(self.load("2024-01-01", "2024-01-05")), 2)  # 실패 구간은 다시 받는다
+        self.load("2024-01-01", "2024-01-05")
+        self.assertEqual(len(FakeTicker.calls), 2)  # 세 번째는 캐시
+
+    def test_strict_raises(self):
+        FakeTicker.responses = [ConnectionError("reset")]
+        with self.assertRaises(ConnectionError):
+            self.load("2024-01-01", "2024-01-05", strict=True)
+
+    def test_empty_span_is_cached_only_when_verifiable(self):
+        FakeTicker.responses = [YFPricesMissingError("AAPL", "")] * 2
+        self.assertTrue(self.load("2024-01-01", "2024-01-05", strict=True).empty)  # 빈 응답 ≠ 실패
+        self.load("2024-01-01", "2024-01-05")
+        self.assertEqual(len(FakeTicker.calls), 2)  # 앞뒤 행이 없으니 캐시하지 않았다
+
+        FakeTicker.responses = [bars("2023-12-29"), bars("2024-01-08")]
+        self.load("2023-12-29", "2023-12-30")
+        self.load("2024-01-08", "2024-01-09")
+        FakeTicker.responses = [YFPricesMissingError("AAPL", "")]
+        self.load("2023-12-29", "2024-01-09")  # 사이 구간은 휴장으로 확정
+        self.load("2023-12-29", "2024-01-09")
+        self.assertEqual(len(FakeTicker.calls), 5)
+
+    def test_span_before_listing_is_cached(self):
+        FakeTicker.responses = [YFPricesMissingError("AAPL", "")]
+        with mock.patch.object(FakeTicker, "__init__", lambda self, symbol: setattr(
+            self, "history_metadata", {"firstTradeDate": 20000 * 86400}
+        )):
+            self.load("2020-01-01", "2020-02-01")
+            self.load("2020-01-01", "2020-02-01")
+        self.assertEqual(len(FakeTicker.calls), 1)
+
+    def test_cached_at_is_first_fetch_not_last_write(self):
+        """최근 구간을 다시 받아 파일을 새로 써도 cached_at 은 과거 구간을 받은 날 그대로."""
+        FakeTicker.responses = [bars("2024-01-02"), bars("2024-01-09")]
+        with mock.patch.object(price_cache, "date", wraps=price_cache.date) as fake_date:
+            fake_date.today.return_value = price_cache.date(2024, 3, 1)
+            self.load("2024-01-02", "2024-01-03")
+            fake_date.today.return_value = price_cache.date(2024, 6, 1)
+            self.load("2024-01-09", "2024-01-10")
+        self.assertEqual(price_cache.cached_at("AAPL"), price_cache.date(2024, 3, 1))
+
+        self.assertEqual(price_cache.invalidate_since(["AAPL", "MSFT"], {"AAPL": "2024-05-01"}), ["AAPL"])
+        self.assertIsNone(price_cache.cached_at("AAPL"))  # 분할 전 캐시는 통째 버린다
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""배포 아티팩트(publish_db.build_artifact) — 페이지 크기·통계·체크섬·내용 동일성."""
+
+import contextlib
+import hashlib
+import io
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+from publish_db import ARTIFACT_PAGE_SIZE, build_artifact  # noqa: E402
+
+
+class PublishArtifactTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.src = self.dir / "hegemony.db"
+        conn = make_db(tickers=20, days=40, path=str(self.src))
+        # 조각난 원본 흉내: 지웠다 다시 넣기
+        conn.execute("DELETE FROM daily_snapshots WHERE ticker = 'T003'")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return build_artifact(self.src, self.dir / "publish", compress=False)
+
+    def test_artifact_is_read_optimized_copy(self):
+        target = self.build()
+        conn = sqlite3.connect(target)
+        self.assertEqual(conn.execute("PRAGMA page_size").fetchone()[0], ARTIFACT_PAGE_SIZE)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertGreater(conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0], 0)
+
+        src = sqlite3.connect(self.src)
+        query = "SELECT ticker, date, price, market_cap FROM daily_snapshots ORDER BY ticker, date"
+        self.assertEqual(conn.execute(query).fetchall(), src.execute(query).fetchall())
+
+    def test_checksum_file_matches(self):
+        target = self.build()
+        line = (target.parent / "hegemony.db.sha256").read_text()
+        expected, name = line.split()
+        self.assertEqual(name, "hegemony.db")
+        self.assertEqual(expected, hashlib.sha256(target.read_bytes()).hexdigest())
+        self.assertFalse((target.parent / "hegemony.db.zst").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
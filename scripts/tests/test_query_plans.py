@@ -0,0 +1,278 @@
+"""파이프라인 쿼리 플랜 회귀 테스트 — 큰 테이블 풀스캔이 새로 생기면 실패한다.
+
+방법: 합성 DB(fixtures.make_db)에서 각 스크립트의 실제 함수를 실행하며
+set_trace_callback 으로 발행된 SQL 을 모두 모으고, 하나씩 EXPLAIN QUERY PLAN 을 돌린다.
+LARGE_TABLES 에 대한 `SCAN <table>` 은 실패다. 단 커버링 인덱스 스캔(테이블 본문을 읽지
+않음)은 허용하고, 전수 읽기가 목적인 경우만 FULL_SCAN_ALLOWED 에 사유와 함께 둔다.
+
+실행: .venv/bin/python -m unittest discover -s scripts/tests
+yfinance/pandas 가 없는 환경에선 그 모듈을 import 하는 케이스만 skip 된다.
+"""
+
+import contextlib
+import io
+import importlib
+import re
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db, ticker_data  # noqa: E402
+
+# 종목×일자로 늘어나는 테이블. 나머지(sectors, sector_companies 등)는 수백 행이라 스캔 무방.
+LARGE_TABLES = {
+    "daily_snapshots",
+    "score_history",
+    "shares_history",
+    "snapshot_anomalies",
+    "market_index_history",
+    "backfill_progress",
+}
+
+# case 이름 → 풀스캔이 의도된 이유.
+FULL_SCAN_ALLOWED = {
+    "scan_anomalies.run_scan": "전 티커 시계열을 한 번에 읽는 전수 스캔이 목적",
+    "backfill_score_history.backfill": "score_history 전 일자 재계산(수동 1회성)",
+    "database.seed_shares": "shares_history 최초 생성 시 1회 시드",
+}
+
+SCAN_RE = re.compile(r"\bSCAN (?:\w+\.)?(\w+)(?: AS \w+)?(.*)")  # main./archive. 접두 허용
+
+
+def _module(name: str):
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:  # 선택 의존성(yfinance/pandas) 없음
+        raise unittest.SkipTest(f"{name}: {e}")
+
+
+# ── 케이스: 네트워크 없이 돌 수 있는 실제 함수 호출 ──────────────────────────
+
+
+def case_scoring(conn):
+    scoring = _module("scoring")
+    last = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    scoring.calculate_hegemony_scores(conn, last)
+    scoring.update_sector_rankings(conn)
+
+
+def case_backfill_score_history(conn):
+    bsh = _module("backfill_score_history")
+    dates = bsh.get_history_dates(conn)
+    bsh.recompute_scale_for_date(conn, dates[-1])
+
+
+def case_backfill_score_history_full(conn):
+    bsh = _module("backfill_score_history")
+    bsh.backfill(conn)
+
+
+def case_new_ticker_history(conn):
+    mod = _module("backfill_new_ticker_score_history")
+    conn.execute("DELETE FROM score_history WHERE ticker = 'T001' AND date < '2026-06-01'")
+    mod.generate_new_ticker_history(conn)
+
+
+def case_shares_history(conn):
+    sh = _module("shares_history")
+    sh.record_shares(conn, "T001", "2026-06-30", 123_456_789)
+    sh.shares_as_of(conn, "T001", "2026-03-02")
+    conn.execute("UPDATE daily_snapshots SET market_cap = NULL WHERE ticker = 'T002'")
+    sh.fill_market_cap(conn, "T002", "2026-01-01", "2026-12-31")
+
+
+def case_seed_shares(conn):
+    sh = _module("shares_history")
+    conn.execute("DELETE FROM shares_history")
+    sh.seed_from_snapshots(conn)
+
+
+def case_scan_anomalies(conn):
+    sa = _module("scan_anomalies")
+    last = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    anomalies = sa.run_scan(conn)
+    sa.flagged_share(anomalies, conn, last)
+
+
+def case_split_events(conn):
+    _module("scan_anomalies").split_events(conn)
+
+
+def case_backfill_data(conn):
+    bd = _module("backfill_data")
+    dates = bd.get_existing_dates(conn)
+    bd.get_tickers_to_backfill(conn)
+    bd.get_tickers_to_backfill(conn, all_tickers=True)
+    bd.get_tickers_to_backfill(conn, gap_window=(dates[0], dates[10]))
+    bd.record_progress(conn, "T001", "gap", "w", "done", 10)
+    bd.finished_tickers(conn, "gap", "w")
+
+
+def case_add_ticker(conn):
+    at = _module("add_ticker")
+    at.list_sectors(conn)
+    sector = at.check_target(conn, "NEWCO", "semis")
+    at.save_company(conn, "NEWCO", sector, {"marketCap": 5e9, "currentPrice": 50.0})
+    at.backfill_window(conn)
+    at.print_result(conn, "NEWCO", sector)
+    at.remove_ticker(conn, "NEWCO", "semis")
+
+
+def case_update_data(conn):
+    ud = _module("update_data")
+    last = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    ud.get_tickers_from_db(conn)
+    ud.write_ticker(conn, ticker_data("T001", last), last)
+
+
+def case_update_data_staged(conn):
+    """--staged: 스테이징 적재 → 테이블별 INSERT ... SELECT ... ON CONFLICT 병합."""
+    ud = _module("update_data")
+    last = conn.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+    ud.create_staging(conn)
+    for ticker in ("T001", "T002", "T003"):
+        ud.write_ticker(conn, ticker_data(ticker, last), last, staged=True)
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    ud.merge_staged(conn)
+    conn.commit()
+
+
+def case_update_indices(conn):
+    ui = _module("update_indices")
+    ui.upsert_history(conn, "^GSPC", [("2026-01-05", 1.0), ("2026-01-06", 2.0)])
+    ui.last_dates(conn)
+    stats = ui.compute_stats(conn, ["^GSPC", "^KS11"])
+    ui.upsert_snapshot(conn, {
+        "symbol": "^GSPC", "country": "미국", "name": "S&P 500", "sort_order": 0, "updated_at": "now",
+        **stats["^GSPC"],
+    })
+
+
+def case_archive(conn):
+    """hot/cold 분리 후 깊은 이력 읽기 — daily_snapshots_all(UNION ALL 뷰) 경유."""
+    archive = _module("archive")
+    with mock.patch.object(archive, "MIN_HORIZON_DAYS", 30):
+        archive.attach_archive(conn, ":memory:", create=True)
+        archive.archive_old(conn, 60)
+    old = conn.execute("SELECT MIN(date) FROM archive.daily_snapshots").fetchone()[0]
+    bd = _module("backfill_data")
+    dates = bd.get_existing_dates(conn)
+    bd.get_tickers_to_backfill(conn)
+    bd.get_tickers_to_backfill(conn, gap_window=(dates[0], dates[10]))
+    _module("backfill_score_history").recompute_scale_for_date(conn, old)
+    _module("add_ticker").backfill_window(conn)
+
+
+def case_valuation_metrics(conn):
+    _module("backfill_valuation_metrics").latest_snapshot_per_ticker(conn)
+
+
+def case_suggest_candidates(conn):
+    sc = _module("suggest_candidates")
+    sc.sector_members(conn, "semis")
+    sc.known_companies(conn, max_age_days=100_000)
+
+
+CASES = {
+    "scoring": case_scoring,
+    "backfill_score_history.recompute": case_backfill_score_history,
+    "backfill_score_history.backfill": case_backfill_score_history_full,
+    "backfill_new_ticker_score_history": case_new_ticker_history,
+    "shares_history": case_shares_history,
+    "database.seed_shares": case_seed_shares,
+    "scan_anomalies.run_scan": case_scan_anomalies,
+    "scan_anomalies.split_events": case_split_events,
+    "backfill_data": case_backfill_data,
+    "add_ticker": case_add_ticker,
+    "update_data": case_update_data,
+    "update_data.staged": case_update_data_staged,
+    "update_indices": case_update_indices,
+    "archive": case_archive,
+    "backfill_valuation_metrics": case_valuation_metrics,
+    "suggest_candidates": case_suggest_candidates,
+}
+
+
+def traced_statements(case) -> tuple[sqlite3.Connection, list[str]]:
+    """케이스를 실행하고 발행된 SQL(파라미터 치환된 형태)을 순서대로 반환."""
+    conn = make_db()
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    with contextlib.redirect_stdout(io.StringIO()):
+        case(conn)
+    conn.set_trace_callback(None)
+    return conn, statements
+
+
+def full_scans(conn: sqlite3.Connection, sql: str) -> list[str]:
+    """sql 의 플랜 중 큰 테이블 본문을 훑는 SCAN 단계들."""
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    if head not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE"):
+        return []
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    except sqlite3.Error:
+        return []  # 케이스가 지운 임시 객체 등 — 플랜 대상 아님
+    bad = []
+    for row in plan:
+        match = SCAN_RE.search(row[3])
+        if not match:
+            continue
+        table, rest = match.group(1), match.group(2)
+        if table in LARGE_TABLES and "COVERING INDEX" not in rest:
+            bad.append(row[3])
+    return bad
+
+
+class QueryPlanTest(unittest.TestCase):
+    def test_no_full_scans_on_large_tables(self):
+        for name, case in CASES.items():
+            with self.subTest(case=name):
+                try:
+                    conn, statements = traced_statements(case)
+                except unittest.SkipTest as e:
+                    self.skipTest(str(e))  # 이 subTest 만 skip
+                self.assertTrue(statements, f"{name}: no SQL traced")
+                if name in FULL_SCAN_ALLOWED:
+                    continue
+                problems = {
+                    sql.strip()[:160]: scans
+                    for sql in dict.fromkeys(statements)
+                    if (scans := full_scans(conn, sql))
+                }
+                self.assertEqual(problems, {}, f"{name}: full scan on a large table")
+
+    def test_date_index_serves_cross_section(self):
+        """fetch_sector_companies·MAX(date) 가 쓰는 날짜 단면 조회는 idx_snapshots_date 로."""
+        conn = make_db(tickers=10, days=20)
+        plan = " ".join(
+            r[3] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT ticker, market_cap FROM daily_snapshots WHERE date = '2026-01-05'"
+            )
+        )
+        self.assertIn("idx_snapshots_date", plan)
+
+    def test_time_series_clustered_on_ticker_date(self):
+        """마이그레이션 9: 티커 구간은 PK(= 본문) 로 바로, 별도 (ticker, date) 인덱스 없음."""
+        conn = make_db(tickers=10, days=20)
+        for table in ("daily_snapshots", "score_history"):
+            plan = " ".join(
+                r[3] for r in conn.execute(
+                    f"EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE ticker = 'T001' AND date >= '2026-01-10'"
+                )
+            )
+            self.assertIn("PRIMARY KEY", plan, table)
+        indexes = {r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'daily_snapshots'"
+        )}
+        self.assertEqual(indexes, {"idx_snapshots_date"})
+
+
+if __name__ == "__main__":
+    unittest.main()
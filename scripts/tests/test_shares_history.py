@@ -0,0 +1,76 @@
+"""주식수 변경점(shares_history.py) — 역산 지터는 새 행을 만들지 않고, 실제 변동만 기록한다."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import shares_history  # noqa: E402
+import staging  # noqa: E402
+from fixtures import make_db  # noqa: E402
+
+
+class RecordSharesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db(tickers=2, days=5)
+        self.conn.execute("DELETE FROM shares_history")
+        self.conn.execute("INSERT INTO shares_history (ticker, date, shares, source) VALUES ('T001', '2026-01-02', 1000000, 'info')")
+
+    def rows(self):
+        return self.conn.execute("SELECT date, shares FROM shares_history WHERE ticker = 'T001' ORDER BY date").fetchall()
+
+    def test_jitter_within_tolerance_is_ignored(self):
+        self.assertFalse(shares_history.record_shares(self.conn, "T001", "2026-01-05", 1_004_000))  # +0.4%
+        self.assertFalse(shares_history.record_shares(self.conn, "T001", "2026-01-06", 996_000))
+        self.assertTrue(shares_history.record_shares(self.conn, "T001", "2026-01-07", 980_000))  # 자사주 소각 -2%
+        self.assertEqual(self.rows(), [("2026-01-02", 1_000_000), ("2026-01-07", 980_000)])
+
+    def test_staged_merge_uses_same_tolerance(self):
+        staging.create_stage(self.conn, "shares_history")
+        staging.stage(self.conn, shares_history.SHARES_UPSERT, ("T001", "2026-01-05", 1_004_000))
+        staging.stage(self.conn, shares_history.SHARES_UPSERT, ("T000", "2026-01-05", 500_000))  # 첫 관측
+        self.assertEqual(shares_history.merge_staged_shares(self.conn), 1)
+        self.assertEqual(self.rows(), [("2026-01-02", 1_000_000)])
+
+        staging.create_stage(self.conn, "shares_history")
+        staging.stage(self.conn, shares_history.SHARES_UPSERT, ("T001", "2026-01-06", 1_020_000))
+        self.assertEqual(shares_history.merge_staged_shares(self.conn), 1)
+        self.assertEqual(self.rows()[-1], ("2026-01-06", 1_020_000))
+
+
+class FirstSharesFillTest(unittest.TestCase):
+    """주식수 행 없이 백필된 시총(NULL)은 그 티커의 첫 주식수 기록 때 채워진다."""
+
+    def setUp(self):
+        self.conn = make_db(tickers=2, days=5)
+        self.conn.execute("DELETE FROM shares_history")
+        self.conn.execute("UPDATE daily_snapshots SET market_cap = NULL")
+
+    def null_caps(self, ticker):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM daily_snapshots WHERE ticker = ? AND market_cap IS NULL", (ticker,)
+        ).fetchone()[0]
+
+    def test_record_shares_fills_backfilled_rows(self):
+        self.assertTrue(shares_history.record_shares(self.conn, "T001", "2026-06-30", 1_000))
+        self.assertEqual(self.null_caps("T001"), 0)
+        price = self.conn.execute("SELECT price FROM daily_snapshots WHERE ticker = 'T001' ORDER BY date").fetchone()[0]
+        self.assertEqual(
+            self.conn.execute("SELECT market_cap FROM daily_snapshots WHERE ticker = 'T001' ORDER BY date").fetchone()[0],
+            int(price * 1_000),
+        )
+
+    def test_staged_merge_fills_only_first_timers(self):
+        self.conn.execute("INSERT INTO shares_history (ticker, date, shares, source) VALUES ('T001', '2026-01-02', 1000, 'info')")
+        staging.create_stage(self.conn, "shares_history")
+        staging.stage(self.conn, shares_history.SHARES_UPSERT, ("000000.KS", "2026-06-30", 500))
+        staging.stage(self.conn, shares_history.SHARES_UPSERT, ("T001", "2026-06-30", 2000))
+        shares_history.merge_staged_shares(self.conn)
+        self.assertEqual(self.null_caps("000000.KS"), 0)
+        self.assertGreater(self.null_caps("T001"), 0)  # 이미 행이 있던 티커는 백필 때 채워졌어야 할 몫
+
+
+if __name__ == "__main__":
+    unittest.main()
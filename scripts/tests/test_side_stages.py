@@ -0,0 +1,58 @@
+"""update_data 의 동시 수집 단계 — 단계별 실패가 격리되고 쓰기는 메인 연결로만 가야 한다."""
+
+import contextlib
+import io
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+try:
+    import update_data
+except ImportError:  # 선택 의존성(yfinance/pandas) 없음
+    update_data = None
+
+
+@unittest.skipIf(update_data is None, "update_data dependencies missing")
+class SideStageTest(unittest.TestCase):
+    def test_failures_are_isolated(self):
+        conn = make_db(tickers=2, days=5)
+        conn.execute("CREATE TABLE side_log (stage TEXT)")
+        threads = set()
+
+        def fetch_ok():
+            threads.add(threading.get_ident())
+            return "ok"
+
+        def fetch_boom():
+            raise RuntimeError("network down")
+
+        def write(c, result):
+            c.execute("INSERT INTO side_log VALUES (?)", (result,))
+            return "written"
+
+        def write_half(c, result):
+            c.execute("INSERT INTO side_log VALUES ('partial')")
+            raise ValueError("bad row")
+
+        stages = [("ok", fetch_ok, write), ("fetch fails", fetch_boom, write), ("write fails", fetch_ok, write_half)]
+        out = io.StringIO()
+        with ThreadPoolExecutor(max_workers=2) as pool, contextlib.redirect_stdout(out):
+            running = update_data.start_side_stages(pool, stages)
+            update_data.finish_side_stages(conn, running)
+
+        self.assertNotIn(threading.get_ident(), threads)  # fetch 는 워커 스레드
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute("SELECT stage FROM side_log").fetchall(), [("ok",)])
+        self.assertIn("fetch failed: network down", out.getvalue())
+        self.assertIn("write failed: bad row", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
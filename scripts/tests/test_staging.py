@@ -0,0 +1,117 @@
+"""스테이징 병합(update_data --staged) — 행 단위 UPSERT 경로와 같은 결과여야 한다."""
+
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import staging  # noqa: E402
+from fixtures import make_db, ticker_data  # noqa: E402
+
+try:
+    import update_data
+except ImportError:  # 선택 의존성(yfinance/pandas) 없음
+    update_data = None
+
+# updated_at 류(실행 시각)는 비교에서 뺀다.
+COMPARE = {
+    "daily_snapshots": "SELECT ticker, date, market_cap, price, volume, avg_volume FROM daily_snapshots",
+    "company_scores": "SELECT ticker, revenue_growth, recommendation_key, analyst_count FROM company_scores",
+    "analyst_recommendation_trend": "SELECT ticker, period, strong_buy, hold FROM analyst_recommendation_trend",
+    "earnings_calendar": "SELECT ticker, earnings_date, earnings_time, is_estimate FROM earnings_calendar",
+    "company_profiles": "SELECT ticker, sector, industry, description FROM company_profiles",
+    "shares_history": "SELECT ticker, date, shares, source FROM shares_history",
+    "latest_snapshots": "SELECT ticker, date, price FROM latest_snapshots",
+}
+
+
+@unittest.skipIf(update_data is None, "update_data dependencies missing")
+class StagedMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.ud = update_data
+        self.direct = make_db(tickers=6, days=20)
+        self.staged = make_db(tickers=6, days=20)
+        self.last = self.direct.execute("SELECT MAX(date) FROM daily_snapshots").fetchone()[0]
+        for conn in (self.direct, self.staged):
+            conn.execute(
+                "INSERT INTO company_profiles (ticker, sector, description) VALUES ('T001', 'Old', 'kept')"
+            )
+            conn.commit()
+
+    def tearDown(self):
+        self.direct.close()
+        self.staged.close()
+
+    def batch(self) -> list[dict]:
+        rows = []
+        for n, ticker in enumerate(("T001", "T002", "T003")):
+            data = ticker_data(ticker, self.last)
+            data.update(price=10.0 + n, market_cap=1000 + n, shares=100 + n)
+            rows.append(data)
+        rows[0].update(volume=0)  # 장외 수집 — 기존 거래량을 지우면 안 된다
+        rows[0]["profile"] = {"sector": "Tech", "description": None}  # 설명 누락 응답
+        new_day = ticker_data("T005", "2099-01-02")  # 새 거래일 → latest_snapshots 전진
+        new_day["shares"] = 1_000_000  # 시드(as-of) 값과 같음 → shares_history 에 안 남는다
+        rows.append(new_day)
+        return rows
+
+    def rows(self, conn, table):
+        return sorted(conn.execute(COMPARE[table]).fetchall(), key=repr)
+
+    def test_staged_matches_direct(self):
+        for data in self.batch():
+            self.ud.write_ticker(self.direct, data, data["date"])
+        self.direct.commit()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.ud.create_staging(self.staged)
+            for data in self.batch():
+                self.ud.write_ticker(self.staged, data, data["date"], staged=True)
+            self.staged.commit()
+            self.assertFalse(self.staged.in_transaction)
+            self.staged.execute("BEGIN IMMEDIATE")
+            self.ud.merge_staged(self.staged)
+            self.staged.commit()
+
+        for table in COMPARE:
+            with self.subTest(table=table):
+                self.assertEqual(self.rows(self.staged, table), self.rows(self.direct, table))
+        volume = self.staged.execute(
+            "SELECT volume FROM daily_snapshots WHERE ticker = 'T001' AND date = ?", (self.last,)
+        ).fetchone()[0]
+        self.assertGreater(volume, 0)
+
+    def test_staging_leaves_live_tables_untouched(self):
+        before = self.rows(self.staged, "daily_snapshots")
+        self.ud.create_staging(self.staged)
+        for data in self.batch():
+            self.ud.write_ticker(self.staged, data, data["date"], staged=True)
+        self.staged.commit()
+        self.assertEqual(self.rows(self.staged, "daily_snapshots"), before)
+
+
+class SwapTest(unittest.TestCase):
+    def test_work_copy_and_swap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            live = Path(tmp) / "hegemony.db"
+            make_db(tickers=3, days=5, path=str(live)).close()
+            work = staging.work_copy(live)
+            conn = sqlite3.connect(work)
+            conn.execute("DELETE FROM daily_snapshots")
+            conn.commit()
+            conn.close()
+            staging.swap_in(work, live)
+            self.assertFalse(work.exists())
+            conn = sqlite3.connect(live)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM daily_snapshots").fetchone()[0], 0)
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""후보 스크리닝(suggest_candidates.py) — DB·캐시로 걸러진 후보는 네트워크를 타지 않고, 나머지는 동시에."""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+try:
+    import suggest_candidates as sc
+except ImportError:  # 선택 의존성(yfinance) 없음
+    sc = None
+
+
+def args(**kw) -> argparse.Namespace:
+    defaults = dict(
+        sector="semis", region="all", min_mcap_us=1e7, min_mcap_kr=1e4, min_vol_us=500, min_vol_kr=500,
+        workers=4, refresh=False,
+    )
+    return argparse.Namespace(**{**defaults, **kw})
+
+
+@unittest.skipIf(sc is None, "suggest_candidates dependencies missing")
+class ScreenTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db(tickers=8, days=5)
+        # T001, T002 는 최근 수집분이 있는 종목, T003 은 스냅샷이 오래돼 다시 조회해야 한다.
+        self.conn.execute("UPDATE latest_snapshots SET date = ? WHERE ticker IN ('T001', 'T002')",
+                          (date.today().isoformat(),))
+        self.calls: list[str] = []
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def fake_ticker(self, ticker):
+        with self.lock:
+            self.calls.append(ticker)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        if ticker == "BOOM":
+            raise RuntimeError("429")
+        return mock.Mock(info={"marketCap": 5e9, "averageVolume": 10**6, "shortName": ticker, "beta": 1.0})
+
+    def screen(self, tickers, cache, **kw):
+        with mock.patch.object(sc.yf, "Ticker", side_effect=self.fake_ticker), \
+                contextlib.redirect_stderr(io.StringIO()):
+            return {r["ticker"]: r for r in sc.screen(tickers, args(**kw), self.conn, cache)}
+
+    def test_prefilter_and_concurrent_fetch(self):
+        members = sc.sector_members(self.conn, "semis")
+        cache = {"CACHED": {"fetched_at": "x", "info": {"marketCap": 3e9, "averageVolume": 10**6}}}
+        tickers = ["T001", "T002", "T003", "CACHED", "0700.HK", "NEW1", "NEW2", "NEW3", "BOOM"]
+        rows = self.screen(tickers, cache)
+
+        self.assertEqual(sorted(self.calls), ["BOOM", "NEW1", "NEW2", "NEW3", "T003"])
+        self.assertGreater(self.peak, 1)
+        self.assertEqual(rows["T001"]["source"], "db")
+        self.assertEqual(rows["CACHED"]["source"], "cache")
+        self.assertEqual(rows["NEW1"]["source"], "yfinance")
+        self.assertNotIn("0700.HK", rows)
+        self.assertNotIn("BOOM", rows)
+        self.assertEqual({t: r["alreadyInSector"] for t, r in rows.items() if t.startswith("T")},
+                         {t: t in members for t in ("T001", "T002", "T003")})
+        self.assertEqual(set(cache), {"CACHED", "NEW1", "NEW2", "NEW3", "T003"})  # 실패는 캐시하지 않는다
+        self.assertEqual(set(cache["NEW1"]["info"]), set(sc.INFO_FIELDS))
+
+        # 같은 목록 재실행 → 네트워크는 실패했던 것만.
+        self.calls.clear()
+        self.screen(tickers, cache)
+        self.assertEqual(self.calls, ["BOOM"])
+
+        self.calls.clear()
+        self.screen(["T001", "CACHED"], cache, refresh=True)
+        self.assertEqual(sorted(self.calls), ["CACHED", "T001"])
+
+    def test_discover_ranks_similar_non_members(self):
+        members = sorted(sc.sector_members(self.conn, "semis"))
+        self.conn.executemany(
+            "INSERT INTO company_profiles (ticker, industry) VALUES (?, ?)",
+            [(members[0], "Semiconductors"), (members[1], "Semiconductors"),
+             (members[2], "Semiconductor Equipment & Materials")],
+        )
+        profile = sc.sector_industry_profile(self.conn, "semis")
+        self.assertEqual(sc.industry_similarity("Semiconductors", profile), 1.0)
+        self.assertAlmostEqual(sc.industry_similarity("Semiconductor Equipment & Materials", profile), 0.5)
+        self.assertEqual(sc.industry_similarity("Banks—Regional", profile), 0.0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index = sc.listing_index.connect(Path(tmp) / "listing_index.db")
+            listings = [
+                ("NEWCHIP", 5e9, 1e6, "Semiconductors"),
+                ("BIGCHIP", 9e9, 1e6, "Semiconductors"),
+                ("TOOLS", 8e9, 1e6, "Semiconductor Equipment & Materials"),
+                ("BANK", 9e10, 1e6, "Banks—Regional"),
+                ("TINYCHIP", 1e6, 1e6, "Semiconductors"),      # 시총 게이트 탈락
+                (members[0], 9e9, 1e6, "Semiconductors"),       # 이미 편입
+            ]
+            index.executemany(
+                "INSERT INTO listings (symbol, exchange, region, market_cap_usd, avg_volume, industry, seen_at) "
+                "VALUES (?, 'NASDAQ', 'us', ?, ?, ?, 'x')",
+                listings,
+            )
+            with contextlib.redirect_stderr(io.StringIO()):
+                found = sc.discover(index, self.conn, args(min_similarity=0.3, min_mcap_us=1e9))
+            index.close()
+        self.assertEqual([(c["symbol"], c["similarity"]) for c in found],
+                         [("BIGCHIP", 1.0), ("NEWCHIP", 1.0), ("TOOLS", 0.5)])
+
+    def test_info_cache_roundtrip_and_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "candidate_info.json"
+            self.assertEqual(sc.load_info_cache(path), {})
+            sc.save_info_cache(
+                {"OLD": {"fetched_at": "2000-01-01T00:00:00+00:00", "info": {}},
+                 "NEW": {"fetched_at": "9999-01-01T00:00:00+00:00", "info": {"marketCap": 1}}},
+                path,
+            )
+            self.assertEqual(list(sc.load_info_cache(path)), ["NEW"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""update_indices 증분 — 이력 있는 심볼은 꼬리만, 없는 심볼만 5년 백필해야 한다."""
+
+import contextlib
+import io
+import math
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import make_db  # noqa: E402
+
+try:
+    import pandas as pd
+    import update_indices
+except ImportError:  # 선택 의존성(pandas) 없음
+    update_indices = None
+
+TODAY = date.today()
+
+
+def fake_history(symbol, start, end, *, adjusted=False, refetch_since=None):
+    """start~어제 평일 종가 100, 101, ... (요청 구간만 돌려준다)."""
+    days = pd.bdate_range(start, TODAY - timedelta(days=1))
+    return pd.DataFrame({"Close": [100.0 + i for i in range(len(days))]}, index=days)
+
+
+@unittest.skipIf(update_indices is None, "update_indices dependencies missing")
+class IncrementalIndicesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "hegemony.db"
+        conn = make_db(tickers=2, days=5, path=str(self.db))
+        self.last = (TODAY - timedelta(days=30)).isoformat()
+        conn.executemany(
+            "INSERT INTO market_index_history (symbol, date, close) VALUES ('^GSPC', ?, 5000)",
+            [((TODAY - timedelta(days=n)).isoformat(),) for n in range(30, 500)],
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *argv):
+        history = mock.Mock(side_effect=fake_history)
+        patches = [
+            mock.patch.object(update_indices, "INDICES", [("미국", "S&P 500", "^GSPC"), ("한국", "코스피", "^KS11")]),
+            mock.patch.object(update_indices, "load_history", history),
+            mock.patch.object(update_indices, "connect", lambda: sqlite3.connect(self.db)),
+            mock.patch.object(update_indices, "publish", lambda conn: (conn.commit(), conn.close())),
+            mock.patch.object(sys, "argv", ["update_indices.py", *argv]),
+        ]
+        with contextlib.ExitStack() as stack, contextlib.redirect_stdout(io.StringIO()):
+            for p in patches:
+                stack.enter_context(p)
+            update_indices.main()
+        return {c.args[0]: (c.args[1], c.kwargs["refetch_since"]) for c in history.call_args_list}
+
+    def test_tail_only_for_known_symbols(self):
+        calls = self.run_main()
+        overlap = (date.fromisoformat(self.last) - timedelta(days=update_indices.OVERLAP_DAYS)).isoformat()
+        self.assertEqual(calls["^GSPC"], (overlap, overlap))
+        backfill_start = (TODAY - timedelta(days=update_indices.HISTORY_DAYS)).isoformat()
+        self.assertEqual(calls["^KS11"], (backfill_start, None))
+
+        conn = sqlite3.connect(self.db)
+        snap = dict(conn.execute("SELECT symbol, as_of_date FROM market_indices"))
+        # 겹침 구간이 덮어써지고 새 거래일이 붙었다 → 스냅샷은 DB 의 마지막 날 기준
+        last_gspc = conn.execute("SELECT MAX(date) FROM market_index_history WHERE symbol = '^GSPC'").fetchone()[0]
+        old_kept = conn.execute(
+            "SELECT close FROM market_index_history WHERE symbol = '^GSPC' AND date = ?",
+            ((TODAY - timedelta(days=200)).isoformat(),),
+        ).fetchone()
+        conn.close()
+        self.assertEqual(snap["^GSPC"], last_gspc)
+        self.assertGreater(last_gspc, self.last)
+        self.assertIn("^KS11", snap)
+        self.assertEqual(old_kept, (5000.0,))
+
+    def test_full_refetches_everything(self):
+        calls = self.run_main("--full")
+        backfill_start = (TODAY - timedelta(days=update_indices.HISTORY_DAYS)).isoformat()
+        starts = {s: start for s, (start, _) in calls.items()}
+        self.assertEqual(starts, {"^GSPC": backfill_start, "^KS11": backfill_start})
+
+
+@unittest.skipIf(update_indices is None, "update_indices dependencies missing")
+class IndexStatsTest(unittest.TestCase):
+    def test_stats_match_reference(self):
+        conn = make_db(tickers=2, days=5)
+        last = TODAY - timedelta(days=1)
+        days = [last - timedelta(days=n) for n in range(update_indices.HISTORY_DAYS)][::-1]
+        # 매일 +1 로 오르다 마지막 10일은 매일 -2 → 고점 대비 낙폭이 생긴다.
+        close = {}
+        level = 1000.0
+        for i, d in enumerate(days):
+            level += -2.0 if i >= len(days) - 10 else 1.0
+            close[d] = level
+        conn.executemany(
+            "INSERT INTO market_index_history (symbol, date, close) VALUES ('^X', ?, ?)",
+            [(d.isoformat(), c) for d, c in close.items()],
+        )
+        stats = update_indices.compute_stats(conn, ["^X", "^MISSING"])
+        self.assertEqual(list(stats), ["^X"])
+        row = stats["^X"]
+        price = close[last]
+
+        self.assertEqual(row["as_of_date"], last.isoformat())
+        for col, n in update_indices.HORIZONS.items():
+            base = close.get(last - timedelta(days=n))
+            expected = round((price - base) / base * 100, 2) if base else None
+            self.assertEqual(row[col], expected, col)
+        ytd_base = close[date(last.year, 1, 1) - timedelta(days=1)]
+        self.assertEqual(row["change_ytd"], round((price - ytd_base) / ytd_base * 100, 2))
+        self.assertEqual(row["drawdown"], round((price / max(close.values()) - 1) * 100, 2))
+        self.assertLess(row["drawdown"], 0)
+
+        tail = [close[d] for d in days[-(update_indices.TRADING_DAYS + 1):]]
+        rets = [math.log(b / a) for a, b in zip(tail, tail[1:])]
+        mean = sum(rets) / len(rets)
+        vol = math.sqrt(sum((r - mean) ** 2 for r in rets) / (len(rets) - 1)) * math.sqrt(252) * 100
+        self.assertEqual(row["volatility_1y"], round(vol, 2))
+        self.assertEqual(row["week_52_high"], max(tail[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
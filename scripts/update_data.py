@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 """Daily stock data update script using yfinance."""
 
+import argparse
 import sqlite3
 import sys
-from datetime import date, datetime, timedelta, timezone
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Ensure sibling modules (scoring.py) are importable regardless of CWD
@@ -11,32 +15,32 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 import yfinance as yf
 
-from ipo_calendar import sync_ipo_calendar
+from archive import archive_horizon, archive_old, attach_archive
+from columnar import export_stage
+from cube import update_stage as update_cube
+from database import DB_PATH, connect, publish
+from ipo_calendar import fetch_ipo_events, load_crawl_state, write_ipo_calendar
+from ipo_details import due_details, fetch_details, write_ipo_details
+from market_calendar import MARKETS, closed_markets, signal_skipped, split_tickers
+from publish_db import build_artifact
+from scan_anomalies import flagged_share, run_scan
 from scoring import calculate_hegemony_scores, update_sector_rankings
-
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+from shares_history import SHARES_UPSERT, implied_shares, merge_staged_shares, record_shares
+from staging import Upsert, create_stage, merge, stage, swap_in, upsert, work_copy
+from update_indices import INDICES, fetch_indices, last_dates, write_indices
 
 # 실적 캘린더는 KST 확정값으로 저장한다(economic_events 와 동일 규약).
 KST = timezone(timedelta(hours=9))
 
+# 대상일 스냅샷 중 이 비율 넘게 이상치(split 제외)면 수집 자체가 깨진 것으로 보고
+# 점수 계산을 건너뛴다(전일 점수·순위 유지). 스냅샷은 저장된 채 다음 실행에 덮인다.
+ANOMALY_GATE_RATIO = 0.2
+
 # Invalid tickers that should be skipped (e.g., wrong format in DB).
 # CATL/ABB 등 좀비 종목은 09_accuracy_audit(A5) 마이그레이션으로 DB 에서 제거됨.
 SKIP_TICKERS: set[str] = set()
 
 
-def is_weekend(date_str: str) -> bool:
-    """True if date_str (YYYY-MM-DD) falls on Saturday or Sunday.
-
-    Markets are closed on weekends; yfinance .info still returns the last
-    trading day's values, which produced carry-forward weekend rows (audit B4-b).
-    We skip persisting snapshots/scores for weekend target dates.
-    """
-    try:
-        return date.fromisoformat(date_str).weekday() >= 5  # 5=Sat, 6=Sun
-    except ValueError:
-        return False
-
-
 def get_tickers_from_db(conn: sqlite3.Connection) -> list[str]:
     """Get all unique tickers from sector_companies table."""
     cursor = conn.execute(
@@ -78,6 +82,8 @@ def fetch_stock_data(ticker: str, target_date: str) -> dict | None:
             "forward_pe": info.get("forwardPE"),
             "price_to_book": info.get("priceToBook"),
             "ev_to_ebitda": info.get("enterpriseToEbitda"),
+            # 상장주식수(shares_history). 백필이 과거 시총을 재구성할 때 쓴다 — 추가 호출 0.
+            "shares": implied_shares(info),
             # Fundamental metrics (from same .info dict, no extra API call)
             "revenue_growth": info.get("revenueGrowth"),
             "earnings_growth": info.get("earningsGrowth"),
@@ -175,7 +181,23 @@ def parse_earnings_dates(info: dict) -> list[dict]:
     return list(by_date.values())
 
 
-def upsert_earnings_calendar(conn: sqlite3.Connection, data: dict):
+def _write(conn: sqlite3.Connection, spec: Upsert, row: tuple, staged: bool) -> None:
+    """staged 면 temp.stage_<table> 에 쌓고(병합은 merge_staged), 아니면 라이브 UPSERT."""
+    (stage if staged else upsert)(conn, spec, row)
+
+
+EARNINGS_CALENDAR_UPSERT = Upsert(
+    "earnings_calendar",
+    ("ticker", "earnings_date", "earnings_time", "is_estimate", "updated_at"),
+    "?, ?, ?, ?, datetime('now')",
+    """ON CONFLICT(ticker, earnings_date) DO UPDATE SET
+            earnings_time = excluded.earnings_time,
+            is_estimate = excluded.is_estimate,
+            updated_at = datetime('now')""",
+)
+
+
+def upsert_earnings_calendar(conn: sqlite3.Connection, data: dict, staged: bool = False):
     """UPSERT earnings dates for one ticker.
 
     Keyed on (ticker, earnings_date) so past quarters accumulate instead of
@@ -185,21 +207,33 @@ def upsert_earnings_calendar(conn: sqlite3.Connection, data: dict):
     at read time (see lib/earnings-calendar.ts).
     """
     for row in data.get("earnings_dates") or []:
-        conn.execute(
-            """
-            INSERT INTO earnings_calendar
-            (ticker, earnings_date, earnings_time, is_estimate, updated_at)
-            VALUES (?, ?, ?, ?, datetime('now'))
-            ON CONFLICT(ticker, earnings_date) DO UPDATE SET
-                earnings_time = excluded.earnings_time,
-                is_estimate = excluded.is_estimate,
-                updated_at = datetime('now')
-        """,
+        _write(
+            conn,
+            EARNINGS_CALENDAR_UPSERT,
             (data["ticker"], row["date"], row["time"], row["is_estimate"]),
+            staged,
         )
 
 
-def upsert_company_profile(conn: sqlite3.Connection, data: dict):
+COMPANY_PROFILE_UPSERT = Upsert(
+    "company_profiles",
+    ("ticker", "sector", "industry", "country", "employees", "revenue", "net_income",
+     "description", "website", "updated_at"),
+    "?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now')",
+    """ON CONFLICT(ticker) DO UPDATE SET
+            sector = COALESCE(excluded.sector, company_profiles.sector),
+            industry = COALESCE(excluded.industry, company_profiles.industry),
+            country = COALESCE(excluded.country, company_profiles.country),
+            employees = COALESCE(excluded.employees, company_profiles.employees),
+            revenue = COALESCE(excluded.revenue, company_profiles.revenue),
+            net_income = COALESCE(excluded.net_income, company_profiles.net_income),
+            description = COALESCE(excluded.description, company_profiles.description),
+            website = COALESCE(excluded.website, company_profiles.website),
+            updated_at = datetime('now')""",
+)
+
+
+def upsert_company_profile(conn: sqlite3.Connection, data: dict, staged: bool = False):
     """UPSERT the company profile for one ticker (issue#49).
 
     Until now `company_profiles` was only written by add_ticker.py, so it held
@@ -215,23 +249,9 @@ def upsert_company_profile(conn: sqlite3.Connection, data: dict):
     profile = data.get("profile")
     if not profile:
         return
-    conn.execute(
-        """
-        INSERT INTO company_profiles
-        (ticker, sector, industry, country, employees, revenue, net_income,
-         description, website, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        ON CONFLICT(ticker) DO UPDATE SET
-            sector = COALESCE(excluded.sector, company_profiles.sector),
-            industry = COALESCE(excluded.industry, company_profiles.industry),
-            country = COALESCE(excluded.country, company_profiles.country),
-            employees = COALESCE(excluded.employees, company_profiles.employees),
-            revenue = COALESCE(excluded.revenue, company_profiles.revenue),
-            net_income = COALESCE(excluded.net_income, company_profiles.net_income),
-            description = COALESCE(excluded.description, company_profiles.description),
-            website = COALESCE(excluded.website, company_profiles.website),
-            updated_at = datetime('now')
-    """,
+    _write(
+        conn,
+        COMPANY_PROFILE_UPSERT,
         (
             data["ticker"],
             profile.get("sector"),
@@ -243,26 +263,17 @@ def upsert_company_profile(conn: sqlite3.Connection, data: dict):
             profile.get("description"),
             profile.get("website"),
         ),
+        staged,
     )
 
 
-def upsert_snapshot(conn: sqlite3.Connection, data: dict):
-    """UPSERT a daily_snapshots row (ON CONFLICT(ticker,date) DO UPDATE).
-
-    Volume guard (audit B4-c): when an incoming fetch has volume 0 or NULL
-    (common for KR tickers fetched outside their trading session), we must NOT
-    overwrite an existing valid (>0) volume. NULLIF(excluded.volume, 0) maps an
-    incoming 0 to NULL, then COALESCE falls back to the existing stored volume.
-    For a brand-new row, storing NULL (no overwrite path) is more honest than 0.
-    """
-    conn.execute(
-        """
-        INSERT INTO daily_snapshots
-        (ticker, date, market_cap, price, price_change, week_52_high,
-         week_52_low, day_high, day_low, volume, avg_volume, pe_ratio, peg_ratio,
-         forward_pe, price_to_book, ev_to_ebitda, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        ON CONFLICT(ticker, date) DO UPDATE SET
+SNAPSHOT_UPSERT = Upsert(
+    "daily_snapshots",
+    ("ticker", "date", "market_cap", "price", "price_change", "week_52_high",
+     "week_52_low", "day_high", "day_low", "volume", "avg_volume", "pe_ratio", "peg_ratio",
+     "forward_pe", "price_to_book", "ev_to_ebitda", "updated_at"),
+    "?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now')",
+    """ON CONFLICT(ticker, date) DO UPDATE SET
             market_cap = excluded.market_cap,
             price = excluded.price,
             price_change = excluded.price_change,
@@ -277,8 +288,22 @@ def upsert_snapshot(conn: sqlite3.Connection, data: dict):
             forward_pe = excluded.forward_pe,
             price_to_book = excluded.price_to_book,
             ev_to_ebitda = excluded.ev_to_ebitda,
-            updated_at = datetime('now')
-    """,
+            updated_at = datetime('now')""",
+)
+
+
+def upsert_snapshot(conn: sqlite3.Connection, data: dict, staged: bool = False):
+    """UPSERT a daily_snapshots row (ON CONFLICT(ticker,date) DO UPDATE).
+
+    Volume guard (audit B4-c): when an incoming fetch has volume 0 or NULL
+    (common for KR tickers fetched outside their trading session), we must NOT
+    overwrite an existing valid (>0) volume. NULLIF(excluded.volume, 0) maps an
+    incoming 0 to NULL, then COALESCE falls back to the existing stored volume.
+    For a brand-new row, storing NULL (no overwrite path) is more honest than 0.
+    """
+    _write(
+        conn,
+        SNAPSHOT_UPSERT,
         (
             data["ticker"],
             data["date"],
@@ -299,20 +324,18 @@ def upsert_snapshot(conn: sqlite3.Connection, data: dict):
             data["price_to_book"],
             data["ev_to_ebitda"],
         ),
+        staged,
     )
 
 
-def upsert_company_scores(conn: sqlite3.Connection, data: dict):
-    """UPSERT fundamental metrics into company_scores table."""
-    conn.execute(
-        """
-        INSERT INTO company_scores (
-            ticker, revenue_growth, earnings_growth, operating_margin,
-            return_on_equity, recommendation_key, analyst_count,
-            target_mean_price, free_cashflow, beta, debt_to_equity,
-            metrics_updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        ON CONFLICT(ticker) DO UPDATE SET
+COMPANY_SCORES_UPSERT = Upsert(
+    "company_scores",
+    ("ticker", "revenue_growth", "earnings_growth", "operating_margin",
+     "return_on_equity", "recommendation_key", "analyst_count",
+     "target_mean_price", "free_cashflow", "beta", "debt_to_equity",
+     "metrics_updated_at"),
+    "?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now')",
+    """ON CONFLICT(ticker) DO UPDATE SET
             revenue_growth = excluded.revenue_growth,
             earnings_growth = excluded.earnings_growth,
             operating_margin = excluded.operating_margin,
@@ -323,8 +346,15 @@ def upsert_company_scores(conn: sqlite3.Connection, data: dict):
             free_cashflow = excluded.free_cashflow,
             beta = excluded.beta,
             debt_to_equity = excluded.debt_to_equity,
-            metrics_updated_at = datetime('now')
-    """,
+            metrics_updated_at = datetime('now')""",
+)
+
+
+def upsert_company_scores(conn: sqlite3.Connection, data: dict, staged: bool = False):
+    """UPSERT fundamental metrics into company_scores table."""
+    _write(
+        conn,
+        COMPANY_SCORES_UPSERT,
         (
             data["ticker"],
             data["revenue_growth"],
@@ -338,10 +368,25 @@ def upsert_company_scores(conn: sqlite3.Connection, data: dict):
             data["beta"],
             data["debt_to_equity"],
         ),
+        staged,
     )
 
 
-def upsert_recommendation_trend(conn: sqlite3.Connection, data: dict):
+RECOMMENDATION_TREND_UPSERT = Upsert(
+    "analyst_recommendation_trend",
+    ("ticker", "period", "strong_buy", "buy", "hold", "sell", "strong_sell", "updated_at"),
+    "?, ?, ?, ?, ?, ?, ?, datetime('now')",
+    """ON CONFLICT(ticker, period) DO UPDATE SET
+            strong_buy = excluded.strong_buy,
+            buy = excluded.buy,
+            hold = excluded.hold,
+            sell = excluded.sell,
+            strong_sell = excluded.strong_sell,
+            updated_at = datetime('now')""",
+)
+
+
+def upsert_recommendation_trend(conn: sqlite3.Connection, data: dict, staged: bool = False):
     """UPSERT analyst recommendation distribution rows for one ticker.
 
     Yahoo periods are relative ('0m' = current month), so each run overwrites
@@ -350,19 +395,9 @@ def upsert_recommendation_trend(conn: sqlite3.Connection, data: dict):
     that was populated by the previous (successful) run.
     """
     for row in data.get("recommendation_trend") or []:
-        conn.execute(
-            """
-            INSERT INTO analyst_recommendation_trend
-            (ticker, period, strong_buy, buy, hold, sell, strong_sell, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            ON CONFLICT(ticker, period) DO UPDATE SET
-                strong_buy = excluded.strong_buy,
-                buy = excluded.buy,
-                hold = excluded.hold,
-                sell = excluded.sell,
-                strong_sell = excluded.strong_sell,
-                updated_at = datetime('now')
-        """,
+        _write(
+            conn,
+            RECOMMENDATION_TREND_UPSERT,
             (
                 data["ticker"],
                 row["period"],
@@ -372,98 +407,150 @@ def upsert_recommendation_trend(conn: sqlite3.Connection, data: dict):
                 row["sell"],
                 row["strongSell"],
             ),
+            staged,
         )
 
 
-def ensure_score_tables(conn: sqlite3.Connection):
-    """Create company_scores and score_history tables if they don't exist."""
+# 스테이징 대상(병합 순서). shares_history 는 as-of 비교가 있어 merge_staged_shares 가 따로 병합.
+STAGED_UPSERTS = (
+    SNAPSHOT_UPSERT,
+    COMPANY_SCORES_UPSERT,
+    RECOMMENDATION_TREND_UPSERT,
+    EARNINGS_CALENDAR_UPSERT,
+    COMPANY_PROFILE_UPSERT,
+)
+
+
+def write_ticker(conn: sqlite3.Connection, data: dict, target_date: str, staged: bool = False):
+    """한 티커의 수집 결과를 전 테이블에 쓴다(staged 면 스테이징 테이블에)."""
+    upsert_snapshot(conn, data, staged)
+    upsert_company_scores(conn, data, staged)
+    upsert_recommendation_trend(conn, data, staged)
+    upsert_earnings_calendar(conn, data, staged)
+    upsert_company_profile(conn, data, staged)
+    if not staged:
+        record_shares(conn, data["ticker"], target_date, data["shares"])
+    elif data["shares"]:
+        stage(conn, SHARES_UPSERT, (data["ticker"], target_date, data["shares"]))
+
+
+def create_staging(conn: sqlite3.Connection) -> None:
+    for spec in (*STAGED_UPSERTS, SHARES_UPSERT):
+        create_stage(conn, spec.table)
+
+
+def merge_staged(conn: sqlite3.Connection) -> None:
+    """스테이징 → 라이브 테이블마다 집합 병합 1회. 커밋은 호출부(점수까지 한 트랜잭션)."""
+    started = time.monotonic()
+    for spec in STAGED_UPSERTS:
+        print(f"  merged {merge(conn, spec):>5} rows → {spec.table}")
+    recorded = merge_staged_shares(conn)
+    print(f"  merged {recorded:>5} rows → shares_history (changed only)")
+    print(f"Merge finished in {time.monotonic() - started:.2f}s")
+
+
+def score_and_rank(conn: sqlite3.Connection, target_date: str) -> None:
+    """이상치 스캔 → 게이트 → 점수·순위. 커밋하지 않는다(호출부 트랜잭션 안에서 돈다).
+
+    점수 계산이 실패하면 SAVEPOINT 까지만 되돌린다 — 스냅샷·스캔 결과는 남는다.
+    """
+    # 전수 이상치 스캔 — scoring 이 snapshot_anomalies 를 참조하므로 반드시 먼저.
+    anomalies = run_scan(conn)
+    share = flagged_share(anomalies, conn, target_date)
+
+    if share > ANOMALY_GATE_RATIO:
+        print(
+            f"Warning: {share:.0%} of {target_date} snapshots flagged as anomalous "
+            f"(> {ANOMALY_GATE_RATIO:.0%}) — skipping score calculation"
+        )
+        return
+
+    conn.execute("SAVEPOINT scoring")
     try:
-        conn.executescript("""
-        CREATE TABLE IF NOT EXISTS company_scores (
-            ticker TEXT PRIMARY KEY REFERENCES companies(ticker),
-            revenue_growth REAL,
-            earnings_growth REAL,
-            operating_margin REAL,
-            return_on_equity REAL,
-            recommendation_key TEXT,
-            analyst_count INTEGER,
-            target_mean_price REAL,
-            free_cashflow INTEGER,
-            beta REAL,
-            debt_to_equity REAL,
-            scale_score REAL DEFAULT 0,
-            growth_score REAL DEFAULT 0,
-            profitability_score REAL DEFAULT 0,
-            sentiment_score REAL DEFAULT 0,
-            raw_total_score REAL DEFAULT 0,
-            smoothed_score REAL DEFAULT 0,
-            data_quality REAL DEFAULT 0,
-            metrics_updated_at TEXT,
-            score_updated_at TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS score_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticker TEXT NOT NULL REFERENCES companies(ticker),
-            date TEXT NOT NULL,
-            raw_total_score REAL,
-            smoothed_score REAL,
-            scale_score REAL,
-            growth_score REAL,
-            profitability_score REAL,
-            sentiment_score REAL,
-            UNIQUE(ticker, date)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_score_history_ticker ON score_history(ticker);
-        CREATE INDEX IF NOT EXISTS idx_score_history_date ON score_history(date);
-
-        CREATE TABLE IF NOT EXISTS analyst_recommendation_trend (
-            ticker TEXT NOT NULL REFERENCES companies(ticker),
-            period TEXT NOT NULL,
-            strong_buy INTEGER,
-            buy INTEGER,
-            hold INTEGER,
-            sell INTEGER,
-            strong_sell INTEGER,
-            updated_at TEXT,
-            PRIMARY KEY (ticker, period)
-        );
-
-        CREATE TABLE IF NOT EXISTS earnings_calendar (
-            ticker TEXT NOT NULL REFERENCES companies(ticker),
-            earnings_date TEXT NOT NULL,
-            earnings_time TEXT,
-            is_estimate INTEGER NOT NULL DEFAULT 0,
-            updated_at TEXT,
-            PRIMARY KEY (ticker, earnings_date)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_earnings_calendar_date
-            ON earnings_calendar(earnings_date);
-
-        -- 공모주(IPO) 일정. 상장 전이라 티커가 없어 종목명이 키다(companies FK 없음).
-        -- 값은 표시용 원문 문자열(공모가 '23,000' 등) — 원화 라벨이라 toUsd 대상이 아니다.
-        CREATE TABLE IF NOT EXISTS ipo_calendar (
-            name TEXT NOT NULL,
-            event_type TEXT NOT NULL,      -- 'subscription' | 'listing'
-            event_date TEXT NOT NULL,      -- 청약 시작일 / 상장일 (YYYY-MM-DD)
-            end_date TEXT,                 -- 청약 종료일 (listing 은 NULL)
-            offer_price TEXT,              -- 확정공모가
-            price_band TEXT,               -- 희망공모가 밴드
-            competition TEXT,              -- 청약경쟁률
-            underwriter TEXT,              -- 주간사
-            detail_url TEXT,
-            updated_at TEXT,
-            PRIMARY KEY (name, event_type)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_ipo_calendar_date
-            ON ipo_calendar(event_date);
-    """)
-    except sqlite3.Error as e:
-        print(f"Error: Failed to ensure score tables: {e}")
-        sys.exit(1)
+        calculate_hegemony_scores(conn, target_date)
+        update_sector_rankings(conn)
+        conn.execute("RELEASE scoring")
+    except Exception as e:
+        print(f"Score calculation failed (snapshots already saved): {e}")
+        conn.execute("ROLLBACK TO scoring")
+        conn.execute("RELEASE scoring")
+
+
+# 티커 루프와 독립인 외부 수집: (이름, fetch — 워커 스레드, write(conn, 결과) → 요약 — 메인 스레드).
+# fetch 는 DB 를 만지지 않는다. 쓰기는 전부 main 의 연결 하나(유일한 writer)로 한다.
+SideStage = tuple[str, Callable[[], object], Callable[[sqlite3.Connection, object], str]]
+
+
+def side_stages(conn: sqlite3.Connection) -> list[SideStage]:
+    """IPO 일정 크롤, IPO 상세 보강, 세계 지수 증분 갱신(update_indices 와 같은 함수).
+
+    워커가 DB 를 읽지 않도록 필요한 상태(crawl_state, 상세 대상, 심볼별 마지막 저장일)는 여기서
+    미리 읽는다. 상세 대상은 이번 일정 크롤 전 기준이라 새로 잡힌 종목은 다음 실행에서 보강된다.
+    """
+    stored = last_dates(conn)
+    crawl_state = load_crawl_state(conn)
+    details_due = due_details(conn)
+
+    def write_ipo(c: sqlite3.Connection, result: tuple[list[dict], dict]) -> str:
+        return write_ipo_calendar(c, *result)
+
+    def write_idx(c: sqlite3.Connection, fetched: dict) -> str:
+        return f"{write_indices(c, fetched, stored)}/{len(INDICES)} indices updated"
+
+    return [
+        ("IPO calendar", lambda: fetch_ipo_events(crawl_state), write_ipo),
+        ("IPO details", lambda: fetch_details(details_due), write_ipo_details),
+        ("World indices", lambda: fetch_indices(stored), write_idx),
+    ]
+
+
+def _timed(fetch: Callable[[], object]) -> tuple[object, float]:
+    started = time.monotonic()
+    return fetch(), time.monotonic() - started
+
+
+def start_side_stages(
+    pool: ThreadPoolExecutor, stages: list[SideStage]
+) -> list[tuple[str, Future, Callable]]:
+    return [(name, pool.submit(_timed, fetch), write) for name, fetch, write in stages]
+
+
+def finish_side_stages(conn: sqlite3.Connection, running: list[tuple[str, Future, Callable]]) -> None:
+    """워커 결과를 기다려 이 연결로 쓰고 커밋한다.
+
+    단계마다 격리: fetch 예외는 경고만, write 예외는 그 단계의 SAVEPOINT 까지만 되돌린다 —
+    한 단계가 실패해도 다른 단계와 티커 수집분은 그대로 반영된다.
+    """
+    for name, future, write in running:
+        try:
+            result, elapsed = future.result()
+        except Exception as e:
+            print(f"Warning: {name} fetch failed: {e}")
+            continue
+        conn.execute("SAVEPOINT side_stage")
+        try:
+            summary = write(conn, result)
+            conn.execute("RELEASE side_stage")
+            print(f"{name}: {summary} (fetched in {elapsed:.1f}s, concurrent with ticker loop)")
+        except Exception as e:
+            conn.execute("ROLLBACK TO side_stage")
+            conn.execute("RELEASE side_stage")
+            print(f"Warning: {name} write failed: {e}")
+    conn.commit()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Daily stock data update")
+    parser.add_argument("date", nargs="?", default="", help="target date YYYY-MM-DD (default: today)")
+    parser.add_argument(
+        "--staged", action="store_true",
+        help="수집분을 TEMP 스테이징에 모았다가 병합·점수·순위를 한 트랜잭션으로 반영",
+    )
+    parser.add_argument(
+        "--swap", action="store_true",
+        help="작업 사본(hegemony.db.next)에서 --staged 로 갱신한 뒤 rename 으로 교체",
+    )
+    return parser.parse_args()
 
 
 def main():
@@ -472,63 +559,51 @@ def main():
         print(f"Error: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    if len(sys.argv) > 1 and sys.argv[1]:
-        target_date = sys.argv[1]
-    else:
-        target_date = datetime.now().date().isoformat()
-
-    # Weekend guard (audit B4-b): markets are closed Sat/Sun. Persisting a
-    # snapshot here only duplicates Friday's values (carry-forward noise) and
-    # writes weekend score_history rows. Skip the whole run for weekend dates.
-    if is_weekend(target_date):
-        print(f"Target date {target_date} is a weekend (market closed) — skipping update.")
+    args = parse_args()
+    target_date = args.date or datetime.now().date().isoformat()
+    staged = args.staged or args.swap
+
+    # 휴장 가드(audit B4-b): 휴장일에 저장하면 직전 거래일 값을 복제한 carry-forward 행만 생긴다.
+    # 두 시장이 모두 쉬면(주말 포함) 실행 전체를, 한 시장만 쉬면 아래에서 그 시장 종목만 건너뛴다.
+    closed = closed_markets(target_date)
+    if len(closed) == len(MARKETS):
+        reasons = ", ".join(f"{m.upper()} {r}" for m, r in closed.items())
+        print(f"Target date {target_date}: all markets closed ({reasons}) — skipping update.")
+        signal_skipped()
         sys.exit(0)
 
-    conn = sqlite3.connect(DB_PATH)
+    db_path = work_copy(DB_PATH) if args.swap else DB_PATH
 
-    # Switch from WAL to DELETE journal mode for CI compatibility.
-    # WAL mode stores writes in a separate .db-wal file, but git only tracks
-    # the main .db file. This causes data loss when CI commits without the WAL.
-    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
-    if journal_mode.lower() == "wal":
-        print("Converting journal mode from WAL to DELETE for git compatibility...")
-        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
-        try:
-            conn.execute("PRAGMA journal_mode=DELETE")
-            print(f"Journal mode: {conn.execute('PRAGMA journal_mode').fetchone()[0]}")
-        except sqlite3.OperationalError as e:
-            print(f"Warning: Could not change journal mode (other readers?): {e}")
-            print("Continuing with WAL mode - ensure WAL is checkpointed before git commit")
+    # 대량 적재 프로파일. WAL→DELETE 변환과 스키마 마이그레이션은 connect 가 처리한다.
+    conn = connect("bulk", db_path)
 
-    ensure_score_tables(conn)
+    # 공모주 일정·상세 크롤과 세계 지수는 티커 루프와 무관하다 — 워커 스레드에서 받아 두고
+    # 루프 뒤에 이 연결로 쓴다. 실행 시간은 단계들의 합이 아니라 가장 긴 단계(티커 루프).
+    pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="side-stage")
+    running = start_side_stages(pool, side_stages(conn))
 
-    # 공모주 일정은 티커 루프와 무관한 외부 크롤이라 먼저 끝내고 즉시 커밋한다.
-    # (루프가 50% 실패로 조기 종료해도 이 수집분은 살아남는다.)
-    sync_ipo_calendar(conn)
-    conn.commit()
-
-    tickers = get_tickers_from_db(conn)
+    tickers, holiday = split_tickers(get_tickers_from_db(conn), target_date)
+    if staged:
+        create_staging(conn)
 
     results = []
     failed = []
 
     print(f"Starting data update at {datetime.now().isoformat()}")
     print(f"Target date: {target_date}")
-    print(f"Database: {DB_PATH}")
+    print(f"Database: {db_path}{' (staged)' if staged else ''}")
     print(f"Tickers to update: {len(tickers)} (from sector_companies)")
     if SKIP_TICKERS:
         print(f"Skipped tickers: {SKIP_TICKERS}")
+    for market, skipped in holiday.items():
+        print(f"Skipped {len(skipped)} {market.upper()} tickers: market closed ({closed[market]})")
     print("=" * 50)
 
     for ticker in tickers:
         print(f"Fetching {ticker}...", end=" ")
         data = fetch_stock_data(ticker, target_date)
         if data:
-            upsert_snapshot(conn, data)
-            upsert_company_scores(conn, data)
-            upsert_recommendation_trend(conn, data)
-            upsert_earnings_calendar(conn, data)
-            upsert_company_profile(conn, data)
+            write_ticker(conn, data, target_date, staged)
             results.append(ticker)
             print("OK")
         else:
@@ -536,6 +611,11 @@ def main():
             print("FAILED")
 
     conn.commit()
+    started = time.monotonic()
+    # 50% 실패 판정 전에 반영·커밋 — 루프가 조기 종료해도 이 수집분은 살아남는다.
+    finish_side_stages(conn, running)
+    pool.shutdown()
+    print(f"Waited {time.monotonic() - started:.1f}s for side stages after the ticker loop")
 
     print("=" * 50)
     print(f"Updated: {len(results)} tickers")
@@ -544,31 +624,44 @@ def main():
 
     if len(failed) > len(tickers) * 0.5:
         conn.close()
+        if args.swap:
+            db_path.unlink()
         print("Error: More than 50% of tickers failed")
         sys.exit(1)
 
+    if staged:
+        # 잠금은 여기서부터 커밋까지만 — 수집 루프 동안 라이브 테이블은 그대로다.
+        conn.execute("BEGIN IMMEDIATE")
+        merge_staged(conn)
+
     # Calculate hegemony scores and update rankings
-    try:
-        calculate_hegemony_scores(conn, target_date)
-        conn.commit()
+    score_and_rank(conn, target_date)
+    conn.commit()
 
-        update_sector_rankings(conn)
-        conn.commit()
-    except Exception as e:
-        print(f"Score calculation failed (snapshots already saved): {e}")
-        conn.rollback()
-
-    # Ensure all data is written to the main DB file before git commit.
-    # Without this, data may remain only in the WAL file and be lost.
-    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
-    conn.close()
-
-    # Remove WAL/SHM files to ensure clean state for git
-    wal_path = DB_PATH.with_suffix(".db-wal")
-    shm_path = DB_PATH.with_suffix(".db-shm")
-    for f in (wal_path, shm_path):
-        if f.exists():
-            f.unlink()
+    # hot/cold 분리(opt-in): ARCHIVE_HORIZON_DAYS 보다 오래된 스냅샷을 hegemony_archive.db 로.
+    # 점수 계산 뒤라 scoring 이 읽는 구간(최신일)에는 영향이 없다.
+    horizon = archive_horizon()
+    if horizon:
+        try:
+            attach_archive(conn, create=True)
+            archive_old(conn, horizon)
+        except (RuntimeError, ValueError) as e:
+            conn.rollback()
+            print(f"Archive skipped: {e}")
+
+    # 커밋되는 DB 는 DELETE 저널·-wal/-shm 없음 상태여야 한다(git 은 본 파일만 추적).
+    publish(conn, db_path)
+    if args.swap:
+        swap_in(db_path, DB_PATH)
+        print(f"Swapped {db_path.name} → {DB_PATH.name}")
+
+    # 분석용 월 파티션(COLUMNAR_EXPORT=1 일 때만) — 이 단계가 쓴 시계열만.
+    export_stage(DB_PATH, ("daily_snapshots", "score_history", "market_index_history"))
+    # 종목 × 거래일 memmap 큐브(CUBE_EXPORT=1 일 때만) — 새 거래일 행 append.
+    update_cube(DB_PATH)
+
+    # db-snapshot 에 올라가는 건 이 읽기 최적화 사본(data/publish/)이다.
+    build_artifact()
 
     print("\nData update completed successfully!")
 
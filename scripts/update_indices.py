@@ -1,28 +1,54 @@
 """주요 국가 대표 지수 수집 → market_indices(스냅샷) + market_index_history(시계열) UPSERT.
 
 실행: `python scripts/update_indices.py` (또는 `pnpm db:update-indices`)
+      `python scripts/update_indices.py --full`  — 전 심볼 5년치 재수집·UPSERT(자기치유)
 
 - 개별 종목(US/KR 한정) 모델과 분리된 별도 테이블. 국가 지수는 종목이 아니므로
   통화 환산(toUsd)·섹터 매핑과 무관하다. 지수 레벨(포인트)은 그대로 저장한다.
-- yfinance 5년 일별 종가를 받아 시계열(history)을 백필하고, 그로부터 현재 레벨·
-  1일 등락률·52주 고저(스냅샷)를 산출한다.
-- 멱등: symbol/(symbol,date) 기준 UPSERT — 매일 재실행하면 새 거래일만 추가된다.
-
-# ponytail: 매 실행마다 5년치를 재요청·UPSERT 한다(단순·자기치유). 지수 12개·~15k행이라
-#           부하 무시 가능. 종목 수가 크게 늘면 period='5d' 증분 + 1회 백필로 분리.
+- 증분: 심볼별 마지막 저장일(GROUP BY 한 번)부터 OVERLAP_DAYS 앞까지만 받아 UPSERT 한다
+  (겹침 구간은 price_cache 를 우회해 다시 받는다 — 잠정 종가 정정 흡수). 이력이 없는
+  심볼만 5년치를 1회 백필한다. 예전엔 매 실행 12개 × 5년 ≈ 15k행을 UPSERT 했다.
+- 스냅샷 통계는 UPSERT 뒤 저장 이력에서 전 심볼을 한 번에 계산한다(compute_stats):
+  쿼리 한 번으로 (symbol, date) 순 종가를 읽어 numpy 배열로 — 기간 등락(1주·1달·3달·YTD·
+  1년·3년·5년)은 searchsorted 로 기준일을 찾고, 52주 고저·고점 대비 낙폭·1년 실현
+  변동성도 같은 배열에서 낸다. 증분이든 백필이든 같은 입력.
+- 멱등: symbol/(symbol,date) 기준 UPSERT.
+- 일봉은 price_cache 를 거친다: 이미 받은 과거 구간은 디스크에서, 최근 며칠만 네트워크로.
 """
 
+import argparse
 import sqlite3
+import sys
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
 
-import pandas as pd
-import yfinance as yf
+# Ensure sibling modules (price_cache.py) are importable regardless of CWD
+sys.path.insert(0, str(Path(__file__).parent))
 
-DB_PATH = Path(__file__).parent.parent / "data" / "hegemony.db"
+from columnar import export_stage
+from database import DB_PATH, connect, publish
+from price_cache import load_history
 
-HISTORY_PERIOD = "5y"  # 차트 최대 범위(5년)
+HISTORY_DAYS = 5 * 365 + 2  # 차트 최대 범위(5년, 윤일 여유)
 WEEK52_WINDOW = 252    # 52주 ≈ 252 거래일
+OVERLAP_DAYS = 7       # 증분 시 마지막 저장일 앞으로 다시 받는 달력일(정정 흡수)
+TRADING_DAYS = 252     # 변동성 연율화
+
+# market_indices 기간 등락 컬럼 → 달력일. 기준 = 최신일 - N일 시점(이전 최근 거래일) 종가.
+HORIZONS = {
+    "change_1w": 7,
+    "change_1m": 30,
+    "change_3m": 91,
+    "change_1y": 365,
+    "change_3y": 3 * 365,
+    "change_5y": 5 * 365,
+}
+STAT_COLUMNS = (
+    "price", "change_percent", "week_52_high", "week_52_low", "as_of_date",
+    *HORIZONS, "change_ytd", "drawdown", "volatility_1y",
+)
 
 # 주요 국가 대표 지수 (국가, 표시명, yfinance 심볼) — 표시 순서대로.
 # 신흥국(인도·브라질) 포함, 선진/주요 시장 선별.
@@ -42,56 +68,63 @@ INDICES = [
 ]
 
 
-def ensure_tables(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS market_indices (
-            symbol TEXT PRIMARY KEY,
-            country TEXT NOT NULL,
-            name TEXT NOT NULL,
-            price REAL,
-            change_percent REAL,
-            week_52_high REAL,
-            week_52_low REAL,
-            as_of_date TEXT,
-            sort_order INTEGER NOT NULL DEFAULT 0,
-            updated_at TEXT
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS market_index_history (
-            symbol TEXT NOT NULL,
-            date TEXT NOT NULL,
-            close REAL NOT NULL,
-            PRIMARY KEY (symbol, date)
-        )
-        """
-    )
-    conn.execute(
-        "CREATE INDEX IF NOT EXISTS idx_index_history_symbol ON market_index_history(symbol)"
+def _pct(last: float, base: float) -> float | None:
+    return round((last - base) / base * 100, 2) if base else None
+
+
+def _stats(dates: np.ndarray, close: np.ndarray) -> dict:
+    """한 심볼의 날짜순 (datetime64[D], float) 배열 → STAT_COLUMNS 값."""
+    last = float(close[-1])
+    prev = float(close[-2]) if len(close) >= 2 else last
+    recent = close[-WEEK52_WINDOW:]
+    row = {
+        "price": round(last, 2),
+        "change_percent": round((last - prev) / prev * 100, 2) if prev else 0.0,
+        "week_52_high": round(float(recent.max()), 2),
+        "week_52_low": round(float(recent.min()), 2),
+        "as_of_date": str(dates[-1]),
+        "drawdown": round((last / float(close.max()) - 1) * 100, 2),
+    }
+    # 각 기준일 이하 마지막 거래일 — 기간 전부를 searchsorted 한 번으로.
+    targets = np.array([dates[-1] - np.timedelta64(days, "D") for days in HORIZONS.values()])
+    year_start = np.datetime64(f"{str(dates[-1])[:4]}-01-01")
+    idx = np.searchsorted(dates, targets, side="right") - 1
+    ytd = np.searchsorted(dates, year_start, side="left") - 1  # 전년 마지막 거래일
+    for col, i in zip(HORIZONS, idx):
+        row[col] = _pct(last, float(close[i])) if 0 <= i < len(close) - 1 else None
+    row["change_ytd"] = _pct(last, float(close[ytd])) if ytd >= 0 else None
+
+    returns = np.diff(np.log(close[-(TRADING_DAYS + 1):]))
+    row["volatility_1y"] = (
+        round(float(returns.std(ddof=1)) * TRADING_DAYS ** 0.5 * 100, 2) if len(returns) >= 20 else None
     )
-    # 기간별 등락 컬럼(기존 테이블에 없으면 추가) — change_percent 는 1일 등락.
-    existing = {r[1] for r in conn.execute("PRAGMA table_info(market_indices)").fetchall()}
-    for col in ("change_1w", "change_1m", "change_1y"):
-        if col not in existing:
-            conn.execute(f"ALTER TABLE market_indices ADD COLUMN {col} REAL")
-    conn.commit()
-
-
-def pct_change_since(close: "pd.Series", days: int) -> float | None:
-    """최신 종가 대비 약 `days` 일 전(달력 기준) 종가의 % 변화."""
-    if len(close) < 2:
-        return None
-    target = close.index[-1] - pd.Timedelta(days=days)
-    past = close[close.index <= target]
-    if len(past) == 0:
-        return None
-    base = float(past.iloc[-1])
-    if base == 0:
-        return None
-    return round((float(close.iloc[-1]) - base) / base * 100, 2)
+    return row
+
+
+def compute_stats(conn: sqlite3.Connection, symbols: list[str]) -> dict[str, dict]:
+    """{symbol: STAT_COLUMNS 값} — 저장 이력(최근 HISTORY_DAYS)을 쿼리 한 번으로 읽어 계산."""
+    if not symbols:
+        return {}
+    since = (date.today() - timedelta(days=HISTORY_DAYS + OVERLAP_DAYS)).isoformat()
+    rows = conn.execute(
+        f"""
+        SELECT symbol, date, close FROM market_index_history
+        WHERE symbol IN ({",".join("?" * len(symbols))}) AND date >= ?
+        ORDER BY symbol, date
+        """,
+        (*symbols, since),
+    ).fetchall()
+    if not rows:
+        return {}
+    sym = np.array([r[0] for r in rows])
+    dates = np.array([r[1] for r in rows], dtype="datetime64[D]")
+    close = np.array([r[2] for r in rows], dtype=float)
+    # 심볼 경계에서 잘라 구간별로 — 행 순서가 (symbol, date) 라 연속 구간이다.
+    bounds = [0, *(np.flatnonzero(sym[1:] != sym[:-1]) + 1), len(rows)]
+    return {
+        str(sym[a]): _stats(dates[a:b], close[a:b])
+        for a, b in zip(bounds, bounds[1:])
+    }
 
 
 def upsert_snapshot(conn: sqlite3.Connection, row: dict) -> None:
@@ -99,10 +132,12 @@ def upsert_snapshot(conn: sqlite3.Connection, row: dict) -> None:
         """
         INSERT INTO market_indices
             (symbol, country, name, price, change_percent, week_52_high, week_52_low,
-             as_of_date, sort_order, updated_at, change_1w, change_1m, change_1y)
+             as_of_date, sort_order, updated_at, change_1w, change_1m, change_1y,
+             change_3m, change_ytd, change_3y, change_5y, drawdown, volatility_1y)
         VALUES
             (:symbol, :country, :name, :price, :change_percent, :week_52_high, :week_52_low,
-             :as_of_date, :sort_order, :updated_at, :change_1w, :change_1m, :change_1y)
+             :as_of_date, :sort_order, :updated_at, :change_1w, :change_1m, :change_1y,
+             :change_3m, :change_ytd, :change_3y, :change_5y, :drawdown, :volatility_1y)
         ON CONFLICT(symbol) DO UPDATE SET
             country=excluded.country,
             name=excluded.name,
@@ -115,7 +150,13 @@ def upsert_snapshot(conn: sqlite3.Connection, row: dict) -> None:
             updated_at=excluded.updated_at,
             change_1w=excluded.change_1w,
             change_1m=excluded.change_1m,
-            change_1y=excluded.change_1y
+            change_1y=excluded.change_1y,
+            change_3m=excluded.change_3m,
+            change_ytd=excluded.change_ytd,
+            change_3y=excluded.change_3y,
+            change_5y=excluded.change_5y,
+            drawdown=excluded.drawdown,
+            volatility_1y=excluded.volatility_1y
         """,
         row,
     )
@@ -132,61 +173,85 @@ def upsert_history(conn: sqlite3.Connection, symbol: str, points: list[tuple[str
     )
 
 
-def fetch(country: str, name: str, symbol: str, order: int):
-    """(snapshot dict, history points) 반환. 데이터 없으면 (None, [])."""
-    hist = yf.Ticker(symbol).history(period=HISTORY_PERIOD)
+def last_dates(conn: sqlite3.Connection) -> dict[str, str]:
+    """{symbol: 마지막 저장일} — PK(symbol, date) 로 심볼마다 끝 한 칸만 읽는다."""
+    return dict(conn.execute("SELECT symbol, MAX(date) FROM market_index_history GROUP BY symbol"))
+
+
+def fetch_points(symbol: str, last: str | None) -> list[tuple[str, float]]:
+    """받아 올 일봉 종가 [(date, close)]. last 가 없으면 5년 백필, 있으면 last - OVERLAP_DAYS 부터."""
+    today = date.today()
+    if last is None:
+        start, refetch = (today - timedelta(days=HISTORY_DAYS)).isoformat(), None
+    else:
+        start = (date.fromisoformat(last) - timedelta(days=OVERLAP_DAYS)).isoformat()
+        refetch = start  # 겹침 구간은 캐시 대신 새로 받는다
+    hist = load_history(
+        symbol,
+        start,
+        (today + timedelta(days=1)).isoformat(),
+        adjusted=True,  # Ticker.history 기본값(auto_adjust=True)과 동일 기준
+        refetch_since=refetch,
+    )
     if hist is None or len(hist) == 0:
-        return None, []
+        return []
     close = hist["Close"].dropna()
-    if len(close) == 0:
-        return None, []
-
-    points = [(idx.strftime("%Y-%m-%d"), round(float(v), 2)) for idx, v in close.items()]
-
-    price = float(close.iloc[-1])
-    prev = float(close.iloc[-2]) if len(close) >= 2 else price
-    change_percent = ((price - prev) / prev * 100) if prev else 0.0
-    recent = close.tail(WEEK52_WINDOW)
-    snapshot = {
-        "symbol": symbol,
-        "country": country,
-        "name": name,
-        "price": round(price, 2),
-        "change_percent": round(change_percent, 2),
-        "week_52_high": round(float(recent.max()), 2),
-        "week_52_low": round(float(recent.min()), 2),
-        "as_of_date": close.index[-1].strftime("%Y-%m-%d"),
-        "sort_order": order,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "change_1w": pct_change_since(close, 7),
-        "change_1m": pct_change_since(close, 30),
-        "change_1y": pct_change_since(close, 365),
-    }
-    return snapshot, points
+    return [(idx.strftime("%Y-%m-%d"), round(float(v), 2)) for idx, v in close.items()]
 
 
-def main() -> None:
-    conn = sqlite3.connect(str(DB_PATH))
-    ensure_tables(conn)
-    ok = 0
-    for i, (country, name, symbol) in enumerate(INDICES):
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="update market index snapshots and history")
+    parser.add_argument("--full", action="store_true", help="마지막 저장일 무시, 전 심볼 5년치 재수집")
+    return parser.parse_args()
+
+
+def fetch_indices(stored: dict[str, str]) -> dict[str, list[tuple[str, float]]]:
+    """네트워크 단계 — DB 를 만지지 않아 다른 스레드에서 돌려도 된다(update_data 가 그렇게 쓴다).
+
+    stored 는 last_dates() 결과(--full 이면 빈 dict). 심볼별 실패는 건너뛴다.
+    """
+    fetched: dict[str, list[tuple[str, float]]] = {}
+    for country, name, symbol in INDICES:
         try:
-            snapshot, points = fetch(country, name, symbol, i)
-            if snapshot:
-                upsert_snapshot(conn, snapshot)
-                upsert_history(conn, symbol, points)
-                ok += 1
-                print(
-                    f"  {country} {name}: {snapshot['price']:,} "
-                    f"({snapshot['change_percent']:+.2f}%) · {len(points)} pts"
-                )
-            else:
-                print(f"  SKIP {country} {name} ({symbol}) — no data")
+            fetched[symbol] = fetch_points(symbol, stored.get(symbol))
         except Exception as exc:  # noqa: BLE001
             print(f"  ERR {country} {name} ({symbol}): {str(exc)[:80]}")
-    conn.commit()
-    conn.close()
-    print(f"[update_indices] done: {ok}/{len(INDICES)}")
+    return fetched
+
+
+def write_indices(conn: sqlite3.Connection, fetched: dict[str, list], stored: dict[str, str]) -> int:
+    """이력 UPSERT → 전 심볼 통계 → 스냅샷 UPSERT. 스냅샷을 쓴 심볼 수. 커밋은 호출부."""
+    for symbol, points in fetched.items():
+        upsert_history(conn, symbol, points)
+
+    # 받기 실패한 심볼도 저장 이력이 있으면 스냅샷은 갱신한다(통계가 하루 밀릴 뿐).
+    stats = compute_stats(conn, [symbol for _, _, symbol in INDICES])
+    now = datetime.now(timezone.utc).isoformat()
+    for i, (country, name, symbol) in enumerate(INDICES):
+        row = stats.get(symbol)
+        if not row:
+            print(f"  SKIP {country} {name} ({symbol}) — no data")
+            continue
+        upsert_snapshot(conn, {
+            "symbol": symbol, "country": country, "name": name, "sort_order": i, "updated_at": now, **row,
+        })
+        print(
+            f"  {country} {name}: {row['price']:,} ({row['change_percent']:+.2f}%) · "
+            f"{len(fetched.get(symbol, []))} pts{'' if symbol in stored else ' (backfill)'}"
+        )
+    return len(stats)
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect()
+    stored = {} if args.full else last_dates(conn)
+    fetched = fetch_indices(stored)
+    ok = write_indices(conn, fetched, stored)
+    publish(conn)
+    export_stage(DB_PATH, ("market_index_history",))
+    backfilled = sum(1 for symbol in fetched if symbol not in stored)
+    print(f"[update_indices] done: {ok}/{len(INDICES)} ({backfilled} backfilled)")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
  * 검증 스크립트 — 데이터 정합성 사후 점검 (읽기 전용, 멱등) — 09_accuracy_audit A6
  *
  * 점검 항목:
- *   1) 주말(토/일) 행 0건 (daily_snapshots, score_history).
+ *   1) 주말(토/일) 행 0건 (daily_snapshots, score_history, 있으면 아카이브 daily_snapshots).
  *   2) 최신 score_history.smoothed_score == company_scores.smoothed_score (EMA 동기화).
  *   3) 모든 sector_companies 티커가 최신 스냅샷 + company_scores 보유(빈 카드 0).
  *   4) 혼합섹터 스팟체크(hbm): MU 의 USD 시총 비중을 SQL 로 재계산해
@@ -16,10 +16,13 @@
  */
 
 import Database from 'better-sqlite3'
+import { existsSync } from 'fs'
 import path from 'path'
 import { toUsd } from '../lib/currency'
 
 const DB_PATH = path.join(process.cwd(), 'data', 'hegemony.db')
+// hot/cold 분리(scripts/archive.py) — 오래된 daily_snapshots 는 여기로 옮겨진다.
+const ARCHIVE_PATH = path.join(process.cwd(), 'data', 'hegemony_archive.db')
 
 /** null 안전 USD 환산 — null/0 은 0 으로 흡수(시총 합산용). */
 function toUsdSafe(value: number | null, ticker: string): number {
@@ -45,9 +48,15 @@ function run(): void {
   let fatal = 0
   let warnings = 0
 
+  const weekendTables = ['daily_snapshots', 'score_history']
+  if (existsSync(ARCHIVE_PATH)) {
+    sqlite.prepare('ATTACH DATABASE ? AS archive').run(ARCHIVE_PATH)
+    weekendTables.push('archive.daily_snapshots')
+  }
+
   try {
     // ── 1) 주말 행 0건 ────────────────────────────────────────────────────
-    for (const table of ['daily_snapshots', 'score_history']) {
+    for (const table of weekendTables) {
       const row = sqlite
         .prepare(`SELECT COUNT(*) AS c FROM ${table} WHERE strftime('%w', date) IN ('0','6')`)
         .get() as CountRow